@@ -36,13 +36,49 @@ CSRF_TRUSTED_ORIGINS = [
     'https://*.onrender.com',
 ]
 
+# Cache dùng chung giữa các worker: Redis hoặc memcached khi có cấu hình,
+# ngược lại là locmem (chỉ dùng chung trong một process)
+REDIS_URL = os.environ.get('REDIS_URL')
+MEMCACHED_LOCATION = os.environ.get('MEMCACHED_LOCATION')
+
+if REDIS_URL:
+    SHARED_CACHE = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': REDIS_URL,
+    }
+elif MEMCACHED_LOCATION:
+    SHARED_CACHE = {
+        'BACKEND': 'django.core.cache.backends.memcached.PyMemcacheCache',
+        'LOCATION': MEMCACHED_LOCATION,
+    }
+else:
+    SHARED_CACHE = {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'qldt-shared',
+        'OPTIONS': {'MAX_ENTRIES': 5000},
+    }
+
 CACHES = {
+    # LRU trong process đặt trước cache dùng chung (products/cache_backends.py)
     'default': {
-        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
-        'LOCATION': os.path.join(BASE_DIR, 'cache'),
-    }
+        'BACKEND': 'products.cache_backends.TwoLevelCache',
+        'TIMEOUT': 300,
+        'OPTIONS': {
+            'SHARED_ALIAS': 'shared',
+            'LOCAL_MAX_ENTRIES': int(os.environ.get('CACHE_LOCAL_MAX_ENTRIES', 1000)),
+            'LOCAL_TIMEOUT': float(os.environ.get('CACHE_LOCAL_TIMEOUT', 5)),
+        },
+    },
+    'shared': SHARED_CACHE,
 }
 
+# Nơi lưu phiên bản model dùng cho khóa cache và ETag (products/invalidation.py).
+# locmem chỉ dùng chung trong một process nên khi không có Redis / memcached
+# phiên bản được lưu trong database để mọi worker gunicorn cùng thấy.
+MODEL_VERSION_STORE = os.environ.get(
+    'MODEL_VERSION_STORE', 'cache' if REDIS_URL or MEMCACHED_LOCATION else 'database'
+)
+
 # CORS settings cho phép frontend truy 
 # CORS_ALLOWED_ORIGINS = [
 #     "https://qldt.vercel.app",
@@ -89,6 +125,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Đo truy vấn / cache / thời gian mỗi request; chỉ chạy khi REQUEST_METRICS=True
+    'products.middleware.RequestMetricsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
@@ -155,6 +193,12 @@ else:
             }
         }
     }
+
+# Export dùng server-side cursor (.iterator()); pooler ở chế độ transaction (pgbouncer,
+# Supabase cổng 6543) không hỗ trợ nên cần tắt khi kết nối qua pooler
+DATABASES['default']['DISABLE_SERVER_SIDE_CURSORS'] = (
+    os.environ.get('DB_DISABLE_SERVER_SIDE_CURSORS', 'False').lower() == 'true'
+)
     
 
 # Password validation
@@ -220,6 +264,18 @@ LOGIN_URL = '/admin/login/'
 LOGIN_REDIRECT_URL = '/admin/'
 LOGOUT_REDIRECT_URL = '/admin/'
 
+# Import Excel chạy nền bằng thread pool trong mỗi worker (không cần broker)
+IMPORT_JOBS_ASYNC = os.environ.get('IMPORT_JOBS_ASYNC', 'True').lower() == 'true'
+IMPORT_JOB_WORKERS = int(os.environ.get('IMPORT_JOB_WORKERS', '2'))
+# Job không có heartbeat quá số giây này bị đánh dấu thất bại (worker đã restart / crash)
+IMPORT_JOB_STALE_AFTER = int(os.environ.get('IMPORT_JOB_STALE_AFTER', 300))
+# File Excel được đọc streaming theo khối nên có thể nhận file lớn hơn 10MB
+IMPORT_MAX_UPLOAD_SIZE = int(os.environ.get('IMPORT_MAX_UPLOAD_SIZE', 50 * 1024 * 1024))
+IMPORT_CHUNK_SIZE = int(os.environ.get('IMPORT_CHUNK_SIZE', '1000'))
+
+# Header Server-Timing và log 'products.metrics' cho mỗi request (products/middleware.py)
+REQUEST_METRICS_ENABLED = os.environ.get('REQUEST_METRICS', 'False').lower() == 'true'
+
 
 if DEBUG:
     LOGGING = {
@@ -235,3 +291,21 @@ if DEBUG:
             'level': 'DEBUG'
         }
     }
+elif REQUEST_METRICS_ENABLED:
+    LOGGING = {
+        'version': 1,
+        'disable_existing_loggers': False,
+        'handlers': {
+            'console': {
+                'class': 'logging.StreamHandler',
+                'stream': sys.stdout,
+            }
+        },
+        'loggers': {
+            'products.metrics': {
+                'handlers': ['console'],
+                'level': 'INFO',
+                'propagate': False,
+            }
+        }
+    }
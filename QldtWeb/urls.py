@@ -1,7 +1,7 @@
 from django.contrib import admin
 from django.urls import path, include
 from django.http import HttpResponse
-from .views import health_check
+from .views import health_check, readiness_check
 
 # def home(request):
 #     return HttpResponse("QLDT App is working!")
@@ -10,5 +10,6 @@ urlpatterns = [
     # path('', home, name='home'),
     path('admin/', admin.site.urls),
     path('health/', health_check, name='health-check'),
+    path('ready/', readiness_check, name='readiness-check'),
     path('', include('products.urls')),
 ]
\ No newline at end of file
@@ -1,6 +1,7 @@
 import os
 from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
+from products import warmup
 
 
 def health_check(request):
@@ -11,4 +12,15 @@ def health_check(request):
         'environment': os.getenv('ENVIRONMENT', 'development'),
         'public_url': f"https://{os.getenv('RAILWAY_PUBLIC_DOMAIN', 'localhost')}"},
         status=200
-    )
\ No newline at end of file
+    )
+
+
+def readiness_check(request):
+    """200 khi worker đã làm nóng xong (products/warmup.py), 503 trong lúc làm nóng"""
+    if not warmup.is_ready():
+        warmup.warm_up_in_background()
+    state = warmup.readiness()
+    return JsonResponse(
+        {'status': 'ready' if state['ready'] else 'warming', **state},
+        status=200 if state['ready'] else 503
+    )
@@ -0,0 +1,17 @@
+# gunicorn.conf.py
+# gunicorn tự đọc file này khi chạy từ thư mục gốc của project (procfile, render.yml).
+# Bind / số worker vẫn lấy từ dòng lệnh hoặc biến môi trường của nền tảng.
+import os
+
+# WARMUP=False để tắt làm nóng (vd. khi debug khởi động)
+WARMUP_ENABLED = os.environ.get('WARMUP', 'True').lower() == 'true'
+
+
+def post_worker_init(worker):
+    """Worker đã nạp ứng dụng Django: làm nóng trước khi nhận kết nối (products/warmup.py)"""
+    if not WARMUP_ENABLED:
+        return
+    from products import warmup
+    if not warmup.warm_up():
+        # Worker vẫn chạy; /ready/ trả 503 và thử làm nóng lại ở lần gọi sau
+        worker.log.warning('Worker %s started without completing warm-up: %s', worker.pid, warmup.readiness()['errors'])
@@ -0,0 +1,519 @@
+#!/usr/bin/env python
+"""Kiểm tra tải end-to-end: phát lại hỗn hợp request giống người dùng thật tới server.
+
+Mỗi người dùng ảo là một coroutine (asyncio + httpx) chọn ngẫu nhiên một kịch bản
+theo trọng số - tải lưới môn học, danh sách dropdown, sửa ô, tạo phân công,
+thống kê - rồi chờ một khoảng nghỉ. Cuối lượt chạy in p50/p95/p99, thông lượng và
+tỉ lệ lỗi của từng endpoint (và ghi JSON nếu có --output) để chọn số worker
+gunicorn / kết nối database cho đợt cao điểm đầu học kỳ.
+
+    # Tự khởi động gunicorn trên cổng 8765 với 4 worker, 50 người dùng trong 60 giây
+    python loadtest.py --start-server --workers 4 --users 50 --duration 60
+
+    # Chạy vào server có sẵn, chỉ các request đọc
+    python loadtest.py --base-url http://127.0.0.1:8000 --users 20 --read-only --output report.json
+
+Kịch bản ghi chỉ ghi lại giá trị đang có của ô (không làm đổi dữ liệu) và xóa
+ngay phân công vừa tạo, nhưng vẫn ghi vào database mà server đang dùng: chỉ chạy
+vào database local/staging (vd. dữ liệu của `manage.py seed_scale`). Khi server
+bật REQUEST_METRICS, thời gian truy vấn trong header Server-Timing cũng được
+thống kê (cột db p50).
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import re
+import subprocess
+import sys
+import time
+import uuid
+from collections import Counter, namedtuple
+from datetime import datetime, timezone
+
+import httpx
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SEMESTER_COLUMNS = [f'hk{semester}' for semester in range(1, 7)]
+SERVER_TIMING_DB = re.compile(r'(?:^|,)\s*db;dur=([\d.]+)')
+
+# name, trọng số mặc định, có ghi dữ liệu hay không, tên phương thức của LoadTest
+Scenario = namedtuple('Scenario', ['name', 'weight', 'write', 'method'])
+
+SCENARIOS = [
+    # Lưới môn học: trang render sẵn theo CTĐT và API tải dòng theo trang
+    Scenario('grid_page', 4, False, 'grid_page'),
+    Scenario('grid_rows', 15, False, 'grid_rows'),
+    # Dropdown / danh mục
+    Scenario('reference_data', 8, False, 'reference_data'),
+    Scenario('all_subjects', 6, False, 'all_subjects'),
+    Scenario('departments', 3, False, 'departments'),
+    Scenario('curricula', 3, False, 'curricula'),
+    Scenario('majors', 2, False, 'majors'),
+    Scenario('subject_types', 2, False, 'subject_types'),
+    Scenario('instructors', 5, False, 'instructors'),
+    Scenario('classes', 4, False, 'classes'),
+    Scenario('search_instructors', 3, False, 'search_instructors'),
+    # Phân công / thống kê
+    Scenario('teaching_assignments', 6, False, 'teaching_assignments'),
+    Scenario('teaching_statistics', 5, False, 'teaching_statistics'),
+    # Ghi
+    Scenario('cell_put', 8, True, 'cell_put'),
+    Scenario('batch_edit', 2, True, 'batch_edit'),
+    Scenario('assignment_create', 3, True, 'assignment_create'),
+]
+
+
+def percentile(sorted_values, p):
+    """Percentile theo nearest-rank của danh sách đã sắp xếp"""
+    if not sorted_values:
+        return None
+    return sorted_values[max(0, math.ceil(p / 100 * len(sorted_values)) - 1)]
+
+
+def parse_mix(value):
+    """'grid_rows=20,cell_put=0' -> {'grid_rows': 20, 'cell_put': 0}"""
+    known = {scenario.name for scenario in SCENARIOS}
+    weights = {}
+    for item in filter(None, (part.strip() for part in value.split(','))):
+        name, sep, weight = item.partition('=')
+        if not sep or name not in known:
+            raise argparse.ArgumentTypeError(f'invalid mix entry {item!r} (known: {", ".join(sorted(known))})')
+        try:
+            weights[name] = float(weight)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f'invalid weight in {item!r}')
+    return weights
+
+
+class EndpointStats:
+    """Độ trễ (ms), lỗi và thời gian DB (Server-Timing) của một endpoint"""
+
+    def __init__(self):
+        self.latencies = []
+        self.db_durations = []
+        self.statuses = Counter()
+        self.errors = Counter()
+
+    def record(self, elapsed_ms, status=None, error=None, db_ms=None):
+        self.latencies.append(elapsed_ms)
+        self.statuses[status if status is not None else 'network'] += 1
+        if error:
+            self.errors[error] += 1
+        if db_ms is not None:
+            self.db_durations.append(db_ms)
+
+    def summary(self, duration):
+        latencies = sorted(self.latencies)
+        db_durations = sorted(self.db_durations)
+        count = len(latencies)
+        error_count = sum(self.errors.values())
+        return {
+            'requests': count,
+            'errors': error_count,
+            'error_rate': error_count / count if count else 0.0,
+            'rps': count / duration if duration else 0.0,
+            'p50_ms': percentile(latencies, 50),
+            'p95_ms': percentile(latencies, 95),
+            'p99_ms': percentile(latencies, 99),
+            'max_ms': latencies[-1] if latencies else None,
+            'db_p50_ms': percentile(db_durations, 50),
+            'statuses': {str(status): n for status, n in sorted(self.statuses.items(), key=str)},
+            'error_kinds': dict(self.errors.most_common()),
+        }
+
+
+class Fixtures:
+    """Id có thật trong database, lấy qua API trước khi chạy tải"""
+
+    def __init__(self):
+        self.curricula = []
+        self.subjects = []
+        self.instructors = []
+        self.classes = []
+
+
+class LoadTest:
+    def __init__(self, client, options):
+        self.client = client
+        self.options = options
+        self.fixtures = Fixtures()
+        self.stats = {}
+        self.issued = 0
+        # Mỗi lần chạy dùng năm học riêng cho phân công tạo ra để không trùng unique_together
+        self.run_tag = uuid.uuid4().hex[:6]
+        self.created_count = 0
+        self.leftover_assignments = []
+
+        weights = {scenario.name: scenario.weight for scenario in SCENARIOS}
+        weights.update(options.mix)
+        self.scenarios = [
+            scenario for scenario in SCENARIOS
+            if weights[scenario.name] > 0 and not (scenario.write and options.read_only)
+        ]
+        self.weights = [weights[scenario.name] for scenario in self.scenarios]
+
+    # ----- đo request -----
+
+    async def request(self, name, method, url, **kwargs):
+        """Gửi request và ghi độ trễ vào thống kê của name; trả về response (None nếu lỗi mạng)"""
+        stats = self.stats.setdefault(name, EndpointStats())
+        started = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, **kwargs)
+        except httpx.HTTPError as e:
+            stats.record((time.perf_counter() - started) * 1000, error=type(e).__name__)
+            return None
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        error = None
+        if response.status_code >= 400:
+            error = f'HTTP {response.status_code}'
+        elif response.headers.get('content-type', '').startswith('application/json'):
+            # Các view JSON trả lỗi nghiệp vụ với HTTP 200 và status='error'
+            try:
+                body = response.json()
+            except ValueError:
+                error = 'invalid JSON'
+            else:
+                if isinstance(body, dict) and body.get('status') == 'error':
+                    error = 'status=error'
+        match = SERVER_TIMING_DB.search(response.headers.get('server-timing', ''))
+        stats.record(elapsed_ms, response.status_code, error, float(match.group(1)) if match else None)
+        return response
+
+    async def get_json(self, url, **params):
+        response = await self.client.get(url, params=params)
+        response.raise_for_status()
+        return response.json()
+
+    def write_headers(self):
+        return {
+            'X-Requested-With': 'XMLHttpRequest',
+            'X-CSRFToken': self.client.cookies.get('csrftoken', ''),
+        }
+
+    # ----- chuẩn bị -----
+
+    async def prepare(self):
+        """Lấy cookie CSRF và các id dùng trong kịch bản"""
+        fixtures = self.fixtures
+        # Trang lưới đặt cookie csrftoken cho các request PUT/POST không csrf_exempt
+        (await self.client.get('/train_program/')).raise_for_status()
+
+        fixtures.curricula = [row['id'] for row in await self.get_json('/api/curricula/')]
+        random.shuffle(fixtures.curricula)
+        # Môn học của vài CTĐT (kèm giá trị hiện tại của ô để ghi lại đúng giá trị đó)
+        for curriculum_id in fixtures.curricula[:self.options.sample_curricula] or [None]:
+            params = {'page_size': 100}
+            if curriculum_id is not None:
+                params['curriculum_id'] = curriculum_id
+            body = await self.get_json('/api/subjects/', **params)
+            fixtures.subjects.extend(body.get('data', []))
+
+        fixtures.instructors = [
+            {'id': row['id'], 'full_name': row.get('full_name') or ''}
+            for row in await self.get_json('/api/instructors/')
+        ]
+        fixtures.classes = [row['id'] for row in await self.get_json('/api/classes/')]
+
+        if not fixtures.subjects:
+            raise RuntimeError('no subjects found - seed the database first (manage.py seed_scale)')
+        missing = [
+            name for name, values in (('instructors', fixtures.instructors), ('classes', fixtures.classes))
+            if not values
+        ]
+        if missing and not self.options.read_only:
+            raise RuntimeError(f'no {" / ".join(missing)} found - seed the database first or use --read-only')
+
+    # ----- kịch bản -----
+
+    async def grid_page(self, rng, session):
+        curriculum_id = rng.choice(self.fixtures.curricula) if self.fixtures.curricula else ''
+        await self.request('grid_page', 'GET', '/train_program/', params={'chuong-trinh-dao-tao': curriculum_id})
+
+    async def grid_rows(self, rng, session):
+        params = {'page_size': 50}
+        if self.fixtures.curricula:
+            params['curriculum_id'] = rng.choice(self.fixtures.curricula)
+        response = await self.request('grid_rows', 'GET', '/api/subjects/', params=params)
+        # Người dùng cuộn xuống: trang tiếp theo theo cursor
+        if response is not None and response.status_code == 200 and rng.random() < 0.3:
+            cursor = (response.json().get('pagination') or {}).get('next_cursor')
+            if cursor:
+                await self.request('grid_rows_next', 'GET', '/api/subjects/', params={**params, 'cursor': cursor})
+
+    async def conditional_get(self, name, url, session):
+        """GET có If-None-Match như trình duyệt (ETag nhớ theo từng người dùng ảo)"""
+        etags = session.setdefault('etags', {})
+        headers = {'If-None-Match': etags[url]} if url in etags else {}
+        response = await self.request(name, 'GET', url, headers=headers)
+        if response is not None and response.headers.get('etag'):
+            etags[url] = response.headers['etag']
+
+    async def reference_data(self, rng, session):
+        await self.conditional_get('reference_data', '/api/reference-data/', session)
+
+    async def all_subjects(self, rng, session):
+        await self.request('all_subjects', 'GET', '/api/all-subjects/')
+
+    async def departments(self, rng, session):
+        await self.conditional_get('departments', '/api/departments/', session)
+
+    async def curricula(self, rng, session):
+        await self.conditional_get('curricula', '/api/curricula/', session)
+
+    async def majors(self, rng, session):
+        await self.conditional_get('majors', '/api/majors/', session)
+
+    async def subject_types(self, rng, session):
+        await self.conditional_get('subject_types', '/api/subject-types/', session)
+
+    async def instructors(self, rng, session):
+        await self.request('instructors', 'GET', '/api/instructors/')
+
+    async def classes(self, rng, session):
+        params = {'curriculum_id': rng.choice(self.fixtures.curricula)} if self.fixtures.curricula else {}
+        await self.request('classes', 'GET', '/api/classes/', params=params)
+
+    async def search_instructors(self, rng, session):
+        names = [instructor['full_name'] for instructor in self.fixtures.instructors if instructor['full_name']]
+        # Gõ vài ký tự đầu của tên
+        query = rng.choice(names).split()[-1][:rng.randint(2, 4)] if names else 'ng'
+        await self.request('search_instructors', 'GET', '/api/search-instructors/', params={'q': query})
+
+    async def teaching_assignments(self, rng, session):
+        params = {'instructor_id': rng.choice(self.fixtures.instructors)['id']} if self.fixtures.instructors else {}
+        await self.request('teaching_assignments', 'GET', '/api/teaching-assignments/', params=params)
+
+    async def teaching_statistics(self, rng, session):
+        await self.request('teaching_statistics', 'GET', '/api/teaching-statistics/')
+
+    def cell_value(self, rng, subject):
+        """(field, value) của một ô với giá trị hiện tại: ô học kỳ có tín chỉ nếu có, không thì số giờ lý thuyết"""
+        semesters = [column for column in SEMESTER_COLUMNS if subject.get(column) not in ('', None)]
+        if semesters:
+            column = rng.choice(semesters)
+            return column, subject[column]
+        return 'theory_hours', subject.get('ly_thuyet') or 0
+
+    async def cell_put(self, rng, session):
+        subject = rng.choice(self.fixtures.subjects)
+        field, value = self.cell_value(rng, subject)
+        await self.request(
+            'cell_put', 'PUT', f'/train-program/{subject["id"]}/',
+            json={'field': field, 'value': value}, headers=self.write_headers(),
+        )
+
+    async def batch_edit(self, rng, session):
+        subjects = rng.sample(self.fixtures.subjects, min(len(self.fixtures.subjects), rng.randint(2, 10)))
+        changes = []
+        for subject in subjects:
+            field, value = self.cell_value(rng, subject)
+            changes.append({'id': subject['id'], 'field': field, 'value': value})
+        await self.request(
+            'batch_edit', 'POST', '/train-program/update-multiple/',
+            json={'changes': changes}, headers=self.write_headers(),
+        )
+
+    async def assignment_create(self, rng, session):
+        self.created_count += 1
+        response = await self.request('assignment_create', 'POST', '/api/teaching-assignments/create/', json={
+            'instructor_id': rng.choice(self.fixtures.instructors)['id'],
+            'curriculum_subject_id': rng.choice(self.fixtures.subjects)['id'],
+            'class_obj_id': rng.choice(self.fixtures.classes),
+            'academic_year': f'LT-{self.run_tag}-{self.created_count}',
+            'semester': rng.randint(1, 2),
+            'student_count': rng.randint(20, 60),
+            'teaching_hours': rng.choice([30, 45, 60]),
+        })
+        assignment_id = response.json().get('id') if response is not None and response.status_code == 200 else None
+        if assignment_id:
+            # Xóa ngay để dữ liệu không đổi sau lượt chạy
+            if not await self.delete_assignment(assignment_id):
+                self.leftover_assignments.append(assignment_id)
+
+    async def delete_assignment(self, assignment_id, name='assignment_delete'):
+        response = await self.request(name, 'DELETE', f'/api/teaching-assignments/delete/{assignment_id}/')
+        return response is not None and response.status_code == 200 and response.json().get('status') == 'success'
+
+    # ----- chạy -----
+
+    def budget_left(self):
+        if self.options.requests and self.issued >= self.options.requests:
+            return False
+        self.issued += 1
+        return True
+
+    async def user(self, index, deadline):
+        rng = random.Random(self.options.seed * 100003 + index)
+        session = {}
+        # Tăng dần số người dùng trong ramp_up giây
+        if self.options.ramp_up:
+            await asyncio.sleep(self.options.ramp_up * index / self.options.users)
+        while time.monotonic() < deadline and self.budget_left():
+            scenario = rng.choices(self.scenarios, self.weights)[0]
+            await getattr(self, scenario.method)(rng, session)
+            if self.options.think_time:
+                await asyncio.sleep(rng.expovariate(1 / self.options.think_time))
+
+    async def run(self):
+        deadline = time.monotonic() + self.options.duration
+        started = time.perf_counter()
+        await asyncio.gather(*(self.user(index, deadline) for index in range(self.options.users)))
+        elapsed = time.perf_counter() - started
+        for assignment_id in self.leftover_assignments:
+            await self.delete_assignment(assignment_id, 'cleanup')
+        return elapsed
+
+
+# ----- gunicorn -----
+
+def start_server(options):
+    """Khởi động gunicorn với cấu hình đang thử, trả về process"""
+    command = [
+        sys.executable, '-m', 'gunicorn', 'QldtWeb.wsgi:application',
+        '--bind', f'127.0.0.1:{options.port}',
+        '--workers', str(options.workers),
+        '--threads', str(options.threads),
+        '--log-level', 'warning',
+        *options.gunicorn_arg,
+    ]
+    print(f'Starting: {" ".join(command[1:])}')
+    return subprocess.Popen(command, cwd=BASE_DIR)
+
+
+def wait_until_healthy(base_url, process, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError(f'gunicorn exited with code {process.returncode}')
+        try:
+            if httpx.get(f'{base_url}/health/', timeout=2).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.5)
+    raise RuntimeError(f'{base_url}/health/ did not respond within {timeout}s')
+
+
+def stop_server(process):
+    process.terminate()
+    try:
+        process.wait(timeout=15)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+# ----- báo cáo -----
+
+def format_ms(value):
+    return '-' if value is None else f'{value:.1f}'
+
+
+def print_report(results, totals, duration):
+    print(f'\nDuration {duration:.1f}s, {totals["requests"]} requests, {totals["rps"]:.1f} req/s, '
+          f'error rate {totals["error_rate"]:.2%}\n')
+    header = f'{"endpoint":<22} {"reqs":>7} {"err%":>6} {"req/s":>7} {"p50":>8} {"p95":>8} {"p99":>8} {"max":>8} {"db p50":>7}'
+    print(header)
+    print('-' * len(header))
+    for name, result in sorted(results.items(), key=lambda item: -item[1]['requests']):
+        print(
+            f'{name:<22} {result["requests"]:>7} {result["error_rate"] * 100:>6.1f} {result["rps"]:>7.1f} '
+            f'{format_ms(result["p50_ms"]):>8} {format_ms(result["p95_ms"]):>8} {format_ms(result["p99_ms"]):>8} '
+            f'{format_ms(result["max_ms"]):>8} {format_ms(result["db_p50_ms"]):>7}'
+        )
+        for kind, count in result['error_kinds'].items():
+            print(f'{"":<22}   {count} x {kind}')
+    print('\nLatencies in ms; db p50 from the Server-Timing header (REQUEST_METRICS=True on the server).')
+
+
+async def main_async(options):
+    limits = httpx.Limits(max_connections=options.users, max_keepalive_connections=options.users)
+    async with httpx.AsyncClient(base_url=options.base_url, timeout=options.timeout, limits=limits) as client:
+        load_test = LoadTest(client, options)
+        if not load_test.scenarios:
+            raise RuntimeError('no scenarios left to run (check --mix / --read-only)')
+        await load_test.prepare()
+        print(f'{len(load_test.fixtures.curricula)} curricula, {len(load_test.fixtures.subjects)} subjects, '
+              f'{len(load_test.fixtures.instructors)} instructors, {len(load_test.fixtures.classes)} classes')
+        print(f'Running {options.users} users for {options.duration}s against {options.base_url}...')
+        duration = await load_test.run()
+
+    all_stats = EndpointStats()
+    results = {}
+    for name, stats in load_test.stats.items():
+        results[name] = stats.summary(duration)
+        all_stats.latencies.extend(stats.latencies)
+        all_stats.db_durations.extend(stats.db_durations)
+        all_stats.statuses.update(stats.statuses)
+        all_stats.errors.update(stats.errors)
+    totals = all_stats.summary(duration)
+    print_report(results, totals, duration)
+    return {
+        'meta': {
+            'created_at': datetime.now(timezone.utc).isoformat(),
+            'base_url': options.base_url,
+            'users': options.users,
+            'duration': duration,
+            'think_time': options.think_time,
+            'read_only': options.read_only,
+            'workers': options.workers if options.start_server else None,
+            'threads': options.threads if options.start_server else None,
+            'scenarios': dict(zip((scenario.name for scenario in load_test.scenarios), load_test.weights)),
+        },
+        'totals': totals,
+        'results': results,
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Replay a realistic request mix and report latency percentiles per endpoint.')
+    parser.add_argument('--base-url', help='Server to test (default http://127.0.0.1:PORT)')
+    parser.add_argument('--users', type=int, default=20, help='Concurrent virtual users')
+    parser.add_argument('--duration', type=float, default=60, help='Seconds to run')
+    parser.add_argument('--requests', type=int, default=0, help='Stop after this many scenarios (0 = until --duration)')
+    parser.add_argument('--ramp-up', type=float, default=5, help='Seconds over which users are started')
+    parser.add_argument('--think-time', type=float, default=0.5, help='Mean pause between requests of a user in seconds (0 = none)')
+    parser.add_argument('--timeout', type=float, default=30, help='Request timeout in seconds')
+    parser.add_argument('--mix', type=parse_mix, default={}, help='Override scenario weights, e.g. grid_rows=20,cell_put=0')
+    parser.add_argument('--read-only', action='store_true', help='Skip scenarios that write to the database')
+    parser.add_argument('--sample-curricula', type=int, default=5, help='Curricula whose subjects are used by the scenarios')
+    parser.add_argument('--seed', type=int, default=1, help='Random seed')
+    parser.add_argument('--output', help='Write the results as JSON to this file')
+    parser.add_argument('--start-server', action='store_true', help='Start gunicorn for the run and stop it afterwards')
+    parser.add_argument('--port', type=int, default=8765, help='Port for --start-server')
+    parser.add_argument('--workers', type=int, default=2, help='gunicorn workers for --start-server')
+    parser.add_argument('--threads', type=int, default=1, help='gunicorn threads per worker for --start-server')
+    parser.add_argument('--gunicorn-arg', action='append', default=[], help='Extra argument passed to gunicorn (repeatable)')
+    options = parser.parse_args(argv)
+    if options.users < 1:
+        parser.error('--users must be at least 1')
+    options.base_url = (options.base_url or f'http://127.0.0.1:{options.port}').rstrip('/')
+    return options
+
+
+def main(argv=None):
+    options = parse_args(argv)
+    process = start_server(options) if options.start_server else None
+    try:
+        wait_until_healthy(options.base_url, process)
+        report = asyncio.run(main_async(options))
+    except (RuntimeError, httpx.HTTPError) as e:
+        print(f'Error: {e}', file=sys.stderr)
+        return 1
+    finally:
+        if process is not None:
+            stop_server(process)
+    if options.output:
+        with open(options.output, 'w', encoding='utf-8') as output:
+            json.dump(report, output, ensure_ascii=False, indent=2)
+        print(f'Results written to {options.output}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
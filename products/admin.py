@@ -3,7 +3,7 @@ from django.contrib import admin
 from .models import (
     Department, SubjectGroup, Major, Curriculum, SubjectType, 
     Subject, SemesterAllocation, Instructor, TeachingAssignment, 
-    Course, ImportHistory, Class, CombinedClass, Position
+    Course, ImportHistory, Class, CombinedClass, Position, TeachingLoadSummary
 )
 
 
@@ -158,7 +158,14 @@ class CourseAdmin(admin.ModelAdmin):
 
 @admin.register(ImportHistory)
 class ImportHistoryAdmin(admin.ModelAdmin):
-    list_display = ['file_name', 'curriculum', 'imported_by', 'status', 'record_count', 'created_at']
-    list_filter = ['status', 'created_at']
+    list_display = ['file_name', 'object_type', 'curriculum', 'imported_by', 'status', 'processed_rows', 'total_rows', 'record_count', 'created_at']
+    list_filter = ['status', 'object_type', 'created_at']
     search_fields = ['file_name', 'curriculum__name']
-    readonly_fields = ['created_at']
+    readonly_fields = ['created_at', 'started_at', 'finished_at']
+
+
+@admin.register(TeachingLoadSummary)
+class TeachingLoadSummaryAdmin(admin.ModelAdmin):
+    list_display = ['scope', 'code', 'name', 'total_assignments', 'total_instructors', 'total_hours', 'updated_at']
+    list_filter = ['scope']
+    search_fields = ['code', 'name']
@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class ProductsConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'products'
+
+    def ready(self):
+        # Đăng ký signal vô hiệu hóa cache
+        from . import signals  # noqa: F401
@@ -0,0 +1,357 @@
+# batch_edit.py
+"""Áp dụng một lô thay đổi ô của lưới môn học trong một transaction.
+
+Mỗi thay đổi là {id, field, value} với cùng tên trường như
+TrainProgramManagerView.put (code, name, credits, total_hours, ..., hk1..hk6,
+department, course, instructor). Cả lô được kiểm tra trước với số truy vấn cố
+định (môn học, đơn vị, khóa học, giảng viên, mã trùng), sau đó:
+
+- các trường của Subject: một bulk_update chỉ với các cột có thay đổi
+- hk1..hk6: một DELETE cho ô bị xóa và một upsert (subject, semester) cho ô có giá trị
+- instructor: xóa rồi bulk_create lại phân công của các môn học liên quan
+
+Ô không hợp lệ - kể cả giá trị vượt giới hạn cột trong database (NaN / inf,
+số quá lớn, chuỗi quá dài; xem importers.field_bound_error) - không được ghi
+và được trả về trong kết quả theo từng ô, để một ô lỗi không làm hỏng cả lô.
+bulk_update / bulk_create không phát signal nên phiên bản cache và bảng tổng
+hợp phân công được đánh dấu lại ở cuối (xem signals.py).
+"""
+from collections import defaultdict
+import math
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from . import teaching_load
+from .importers import field_bound_error
+from .invalidation import bump_model_version
+from .models import (
+    Subject, SemesterAllocation, Department, Course, Instructor, TeachingAssignment,
+    normalize_search_text
+)
+
+FLOAT_FIELDS = ('credits',)
+INTEGER_FIELDS = ('total_hours', 'theory_hours', 'practice_hours', 'tests_hours', 'exam_hours', 'order_number', 'semester')
+TEXT_FIELDS = ('code', 'name', 'description', 'prerequisites', 'learning_outcomes')
+REQUIRED_TEXT_FIELDS = ('code', 'name')
+SEMESTER_FIELDS = {f'hk{hk}': hk for hk in range(1, 7)}
+RELATION_FIELDS = ('department', 'course', 'instructor')
+EDITABLE_FIELDS = FLOAT_FIELDS + INTEGER_FIELDS + TEXT_FIELDS + tuple(SEMESTER_FIELDS) + RELATION_FIELDS
+
+MAX_CHANGES = 2000
+
+
+def parse_changes(data, subject_id=None):
+    """Danh sách {id, field, value} từ body của request.
+
+    Nhận {'changes': [{id, field, value}, ...]} hoặc, cho một dòng,
+    {'id': ..., 'changes': {field: value}} (id có thể lấy từ URL).
+    Ném ValueError nếu body sai cấu trúc.
+    """
+    changes = data.get('changes') if isinstance(data, dict) else None
+    if isinstance(changes, dict):
+        row_id = subject_id or data.get('id')
+        changes = [{'id': row_id, 'field': field, 'value': value} for field, value in changes.items()]
+    if not isinstance(changes, list) or not changes:
+        raise ValueError("Thiếu danh sách thay đổi 'changes'")
+    if len(changes) > MAX_CHANGES:
+        raise ValueError(f'Tối đa {MAX_CHANGES} ô mỗi lần cập nhật')
+
+    parsed = []
+    for change in changes:
+        if not isinstance(change, dict):
+            raise ValueError('Mỗi thay đổi phải có dạng {id, field, value}')
+        try:
+            change_id = int(change.get('id', subject_id))
+        except (TypeError, ValueError):
+            raise ValueError(f"ID môn học không hợp lệ: {change.get('id')}")
+        parsed.append({'id': change_id, 'field': change.get('field'), 'value': change.get('value')})
+    return parsed
+
+
+def _text(value):
+    return '' if value is None else str(value).strip()
+
+
+def _finite_float(value):
+    number = float(value)
+    if not math.isfinite(number):
+        raise ValueError(value)
+    return number
+
+
+def _int64(value):
+    # Ngoài khoảng 64 bit thì driver (vd. sqlite3) lỗi trước cả khi tới database
+    number = int(value)
+    if abs(number) >= 2 ** 63:
+        raise ValueError(value)
+    return number
+
+
+def convert_value(field, value):
+    """Giá trị đã chuyển kiểu cho trường của Subject; ném ValueError nếu không hợp lệ"""
+    try:
+        if field in FLOAT_FIELDS:
+            return _finite_float(value) if value else 0.0
+        if field in INTEGER_FIELDS:
+            return _int64(value) if value else 0
+    except (TypeError, ValueError, OverflowError):
+        raise ValueError(f'Giá trị {field} không hợp lệ: {value}')
+    text = _text(value)
+    if field in REQUIRED_TEXT_FIELDS and not text:
+        raise ValueError(f'{field} không được để trống')
+    return text
+
+
+def check_bounds(model, field, value, label=None):
+    """Ném ValueError nếu database sẽ từ chối giá trị (cùng kiểm tra với importer)"""
+    error = field_bound_error(model, field, value)
+    if error:
+        raise ValueError(f'{label or field} {error}')
+    return value
+
+
+class BatchEdit:
+    def __init__(self, changes):
+        self.changes = changes
+        self.results = [None] * len(changes)
+
+    def fail(self, index, message):
+        change = self.changes[index]
+        self.results[index] = {'id': change['id'], 'field': change['field'], 'status': 'error', 'message': message}
+
+    def succeed(self, index, message='Đã cập nhật'):
+        change = self.changes[index]
+        self.results[index] = {'id': change['id'], 'field': change['field'], 'status': 'success', 'message': message}
+
+    # ----- Nạp dữ liệu cho cả lô -----
+
+    def load(self):
+        ids = {change['id'] for change in self.changes}
+        self.subjects = Subject.objects.select_related('curriculum').in_bulk(ids)
+
+        values_by_field = defaultdict(set)
+        for change in self.changes:
+            values_by_field[change['field']].add(_text(change['value']))
+
+        department_names = values_by_field['department'] - {''}
+        self.departments = {
+            department.name: department
+            for department in Department.objects.filter(name__in=department_names).order_by('-id')
+        }
+        course_ids = set()
+        for value in values_by_field['course'] - {''}:
+            try:
+                course_ids.add(int(value))
+            except ValueError:
+                pass
+        self.courses = Course.objects.in_bulk(
+            course_id for course_id in course_ids if not field_bound_error(Course, 'id', course_id)
+        )
+        instructor_names = {
+            name.strip()
+            for value in values_by_field['instructor']
+            for name in value.split(',') if name.strip()
+        }
+        self.instructors = {
+            instructor.full_name: instructor
+            for instructor in Instructor.objects.filter(full_name__in=instructor_names).order_by('-id')
+        }
+        new_codes = values_by_field['code'] - {''}
+        self.taken_codes = dict(Subject.objects.filter(code__in=new_codes).values_list('code', 'id'))
+
+    # ----- Kiểm tra -----
+
+    def validate(self):
+        """Phân loại các ô hợp lệ; ô sau ghi đè ô trước cùng (id, field)"""
+        self.field_changes = {}
+        self.semester_changes = {}
+        self.instructor_changes = {}
+        self.department_changes = {}
+        self.course_changes = {}
+        claimed_codes = {}
+
+        for index, change in enumerate(self.changes):
+            subject = self.subjects.get(change['id'])
+            field, value = change['field'], change['value']
+            if subject is None:
+                self.fail(index, 'Môn học không tồn tại')
+                continue
+            key = (subject.id, field)
+            try:
+                if field in SEMESTER_FIELDS:
+                    credits_value = check_bounds(
+                        SemesterAllocation, 'credits', self.convert_semester_credits(value), field.upper()
+                    )
+                    self.semester_changes[key] = (index, credits_value)
+                elif field == 'department':
+                    # Đơn vị chưa có được tạo mới với tên này
+                    self.department_changes[key] = (index, check_bounds(Department, 'name', _text(value), field))
+                elif field == 'course':
+                    self.course_changes[key] = (index, self.convert_course(value))
+                elif field == 'instructor':
+                    self.instructor_changes[key] = (index, _text(value))
+                elif field in EDITABLE_FIELDS:
+                    new_value = check_bounds(Subject, field, convert_value(field, value))
+                    if field == 'code':
+                        owner = claimed_codes.get(new_value, self.taken_codes.get(new_value, subject.id))
+                        if owner != subject.id:
+                            raise ValueError(f'Mã môn học {new_value} đã tồn tại')
+                        claimed_codes[new_value] = subject.id
+                    self.field_changes[key] = (index, new_value)
+                else:
+                    raise ValueError(f'Trường {field} không tồn tại')
+            except ValueError as e:
+                self.fail(index, str(e))
+
+    def convert_semester_credits(self, value):
+        if value == '' or value is None:
+            return None
+        try:
+            return _finite_float(value)
+        except (TypeError, ValueError):
+            raise ValueError(f'Giá trị tín chỉ không hợp lệ: {value}')
+
+    def convert_course(self, value):
+        text = _text(value)
+        if not text:
+            return None
+        try:
+            course = self.courses.get(int(text))
+        except ValueError:
+            raise ValueError(f'ID khóa học không hợp lệ: {value}')
+        if course is None:
+            raise ValueError(f'Không tìm thấy khóa học với ID: {value}')
+        return course
+
+    # ----- Ghi -----
+
+    def get_department(self, name):
+        department = self.departments.get(name)
+        if department is None:
+            department, _ = Department.objects.get_or_create(
+                name=name, defaults={'code': name[:10].upper().replace(' ', '')}
+            )
+            self.departments[name] = department
+        return department
+
+    def apply_subject_fields(self):
+        changed = {}
+        fields = set()
+
+        def assign(key, index, attribute, new_value):
+            subject = self.subjects[key[0]]
+            # Khóa ngoại so sánh theo id để không nạp đối tượng cũ
+            attname = Subject._meta.get_field(attribute).attname
+            compared = new_value.pk if attname != attribute and new_value is not None else new_value
+            if getattr(subject, attname) == compared:
+                self.succeed(index, 'Không thay đổi')
+                return
+            setattr(subject, attribute, new_value)
+            changed[subject.id] = subject
+            fields.add(attribute)
+            self.succeed(index)
+
+        for key, (index, new_value) in self.field_changes.items():
+            assign(key, index, key[1], new_value)
+        for key, (index, name) in self.department_changes.items():
+            assign(key, index, 'department', self.get_department(name) if name else None)
+        for key, (index, course) in self.course_changes.items():
+            assign(key, index, 'course', course)
+
+        if not changed:
+            return []
+        now = timezone.now()
+        for subject in changed.values():
+            # bulk_update không gọi Subject.save() nên tự tính chuỗi tìm kiếm và updated_at
+            subject.search_name = normalize_search_text(subject.name, subject.code)
+            subject.updated_at = now
+        Subject.objects.bulk_update(list(changed.values()), sorted(fields) + ['search_name', 'updated_at'])
+        return list(changed.values())
+
+    def apply_semesters(self):
+        if not self.semester_changes:
+            return
+        removed = Q()
+        upserts = []
+        for (subject_id, field), (index, credits_value) in self.semester_changes.items():
+            semester = SEMESTER_FIELDS[field]
+            if credits_value is None:
+                removed |= Q(base_subject_id=subject_id, semester=semester)
+            else:
+                upserts.append(SemesterAllocation(base_subject_id=subject_id, semester=semester, credits=credits_value))
+            self.succeed(index, f'Đã cập nhật phân bố học kỳ HK{semester}')
+        if removed:
+            SemesterAllocation.objects.filter(removed).delete()
+        SemesterAllocation.objects.bulk_create(
+            upserts,
+            update_conflicts=True,
+            unique_fields=['base_subject', 'semester'],
+            update_fields=['credits'],
+        )
+
+    def apply_instructors(self):
+        """Thay toàn bộ phân công của môn học bằng danh sách giảng viên mới (như put)"""
+        if not self.instructor_changes:
+            return
+        subject_ids = [subject_id for subject_id, _ in self.instructor_changes]
+        # QuerySet.delete() vẫn phát signal nên bảng tổng hợp của phân công cũ tự được đánh dấu
+        TeachingAssignment.objects.filter(curriculum_subject_id__in=subject_ids).delete()
+
+        assignments = []
+        for (subject_id, _), (index, value) in self.instructor_changes.items():
+            subject = self.subjects[subject_id]
+            names = [name.strip() for name in value.split(',') if name.strip()]
+            missing = [name for name in names if name not in self.instructors]
+            for name in dict.fromkeys(names):
+                if name in self.instructors:
+                    assignments.append(TeachingAssignment(
+                        instructor=self.instructors[name],
+                        curriculum_subject=subject,
+                        academic_year=subject.curriculum.academic_year if subject.curriculum else '',
+                        semester=subject.semester or 1,
+                        is_main_instructor=True,
+                        teaching_hours=0,
+                        student_count=0,
+                    ))
+            message = f'Đã cập nhật phân công giảng dạy cho {len(names) - len(missing)} giảng viên'
+            if missing:
+                message += f" (không tìm thấy: {', '.join(missing)})"
+            self.succeed(index, message if names else 'Đã xóa tất cả phân công giảng dạy')
+        TeachingAssignment.objects.bulk_create(assignments)
+
+        if assignments:
+            teaching_load.mark_keys_dirty({
+                'instructor': {a.instructor_id for a in assignments},
+                'curriculum': {a.curriculum_subject.curriculum_id for a in assignments},
+                'department': {a.instructor.department_id for a in assignments},
+                'department_teacher': {a.instructor.department_of_teacher_management_id for a in assignments},
+            })
+            bump_model_version(TeachingAssignment)
+
+    def run(self):
+        self.load()
+        self.validate()
+        with transaction.atomic():
+            changed_subjects = self.apply_subject_fields()
+            self.apply_semesters()
+            self.apply_instructors()
+
+        if changed_subjects:
+            bump_model_version(Subject)
+            # Đổi mã môn học làm thay đổi số môn học của chương trình trong bảng tổng hợp
+            if 'code' in {field for _, field in self.field_changes}:
+                curriculum_ids = set(TeachingAssignment.objects.filter(
+                    curriculum_subject__in=changed_subjects
+                ).values_list('curriculum_subject__curriculum_id', flat=True))
+                if curriculum_ids:
+                    teaching_load.mark_dirty('curriculum', curriculum_ids)
+        if self.semester_changes:
+            bump_model_version(SemesterAllocation)
+        return self.results
+
+
+def apply_changes(changes):
+    """Kiểm tra và ghi một lô thay đổi; trả về kết quả theo từng ô (cùng thứ tự với changes)"""
+    return BatchEdit(changes).run()
@@ -0,0 +1,196 @@
+# cache_backends.py
+"""Cache hai tầng: LRU trong process đặt trước một backend dùng chung.
+
+Tầng 1 (L1) là OrderedDict giới hạn số mục và thời gian sống ngắn trong
+từng worker gunicorn, tầng 2 (L2) là một alias khác trong settings.CACHES
+(Redis / memcached khi có cấu hình, ngược lại là locmem). Đọc ưu tiên L1,
+ghi luôn đi qua cả hai tầng.
+
+Vì L1 của các worker khác chỉ hết hạn sau LOCAL_TIMEOUT giây, các khóa cần
+nhất quán giữa worker (vd. phiên bản model trong invalidation.py) nên đọc
+trực tiếp từ `cache.shared`.
+
+track_cache_stats() đếm hit/miss của get()/get_many() trong một request
+(dùng bởi middleware.RequestMetricsMiddleware); khi không bật chỉ tốn một
+lần đọc ContextVar.
+
+Cấu hình:
+    'default': {
+        'BACKEND': 'products.cache_backends.TwoLevelCache',
+        'OPTIONS': {'SHARED_ALIAS': 'shared', 'LOCAL_MAX_ENTRIES': 1000, 'LOCAL_TIMEOUT': 5},
+    }
+"""
+from collections import OrderedDict
+from contextlib import contextmanager
+import contextvars
+import threading
+import time
+
+from django.core.cache import cache, caches
+from django.core.cache.backends.base import BaseCache, DEFAULT_TIMEOUT
+from django.core.cache.backends.locmem import LocMemCache
+
+
+_request_stats = contextvars.ContextVar('cache_request_stats', default=None)
+
+
+@contextmanager
+def track_cache_stats():
+    """Đếm hit/miss của cache mặc định trong khối with; trả về dict {'hits', 'misses'}"""
+    stats = {'hits': 0, 'misses': 0}
+    token = _request_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _request_stats.reset(token)
+
+
+def _count(hits, misses):
+    stats = _request_stats.get()
+    if stats is not None:
+        stats['hits'] += hits
+        stats['misses'] += misses
+
+
+def get_shared_cache():
+    """Tầng dùng chung của cache mặc định (chính nó nếu không phải TwoLevelCache)"""
+    return getattr(cache, 'shared', cache)
+
+
+def shared_cache_is_cross_process():
+    """False khi tầng dùng chung là locmem: mỗi worker gunicorn có một bản riêng"""
+    return not isinstance(get_shared_cache(), LocMemCache)
+
+
+class TwoLevelCache(BaseCache):
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self._shared_alias = options.get('SHARED_ALIAS', 'shared')
+        self._local_max_entries = int(options.get('LOCAL_MAX_ENTRIES', 1000))
+        self._local_timeout = float(options.get('LOCAL_TIMEOUT', 5))
+        self._local = OrderedDict()
+        self._lock = threading.Lock()
+        # Thống kê hit/miss của L1 (dùng cho đo đạc)
+        self.local_hits = 0
+        self.local_misses = 0
+
+    @property
+    def shared(self):
+        return caches[self._shared_alias]
+
+    # ----- Tầng L1 -----
+
+    def _local_get(self, key):
+        with self._lock:
+            entry = self._local.get(key)
+            if entry is None:
+                self.local_misses += 1
+                return False, None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._local[key]
+                self.local_misses += 1
+                return False, None
+            self._local.move_to_end(key)
+            self.local_hits += 1
+            return True, value
+
+    def _local_set(self, key, value, timeout):
+        ttl = self._local_timeout
+        if timeout is not None and timeout is not DEFAULT_TIMEOUT:
+            if timeout <= 0:
+                self._local_delete(key)
+                return
+            ttl = min(ttl, timeout)
+        with self._lock:
+            self._local[key] = (time.monotonic() + ttl, value)
+            self._local.move_to_end(key)
+            while len(self._local) > self._local_max_entries:
+                self._local.popitem(last=False)
+
+    def _local_delete(self, key):
+        with self._lock:
+            self._local.pop(key, None)
+
+    # ----- API của BaseCache -----
+
+    def get(self, key, default=None, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        found, value = self._local_get(key)
+        if found:
+            _count(1, 0)
+            return value
+        sentinel = object()
+        value = self.shared.get(key, sentinel, version=0)
+        if value is sentinel:
+            _count(0, 1)
+            return default
+        _count(1, 0)
+        self._local_set(key, value, DEFAULT_TIMEOUT)
+        return value
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        result = {}
+        missing = {}
+        for key in keys:
+            full_key = self.make_and_validate_key(key, version=version)
+            found, value = self._local_get(full_key)
+            if found:
+                result[key] = value
+            else:
+                missing[full_key] = key
+        if missing:
+            for full_key, value in self.shared.get_many(list(missing), version=0).items():
+                self._local_set(full_key, value, DEFAULT_TIMEOUT)
+                result[missing[full_key]] = value
+        _count(len(result), len(keys) - len(result))
+        return result
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        self.shared.set(key, value, self._shared_timeout(timeout), version=0)
+        self._local_set(key, value, timeout)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        added = self.shared.add(key, value, self._shared_timeout(timeout), version=0)
+        if added:
+            self._local_set(key, value, timeout)
+        else:
+            self._local_delete(key)
+        return added
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        self._local_delete(key)
+        return self.shared.touch(key, self._shared_timeout(timeout), version=0)
+
+    def delete(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        self._local_delete(key)
+        return self.shared.delete(key, version=0)
+
+    def has_key(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        found, _ = self._local_get(key)
+        return found or self.shared.has_key(key, version=0)
+
+    def incr(self, key, delta=1, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        self._local_delete(key)
+        return self.shared.incr(key, delta, version=0)
+
+    def clear(self):
+        with self._lock:
+            self._local.clear()
+        self.shared.clear()
+
+    def close(self, **kwargs):
+        self.shared.close(**kwargs)
+
+    def _shared_timeout(self, timeout):
+        # DEFAULT_TIMEOUT của alias này, không phải của backend dùng chung
+        return self.default_timeout if timeout is DEFAULT_TIMEOUT else timeout
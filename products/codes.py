@@ -0,0 +1,80 @@
+# codes.py
+"""Cấp mã duy nhất dạng MA, MA_1, MA_2, ... (vd. mã môn học CT1_MH01).
+
+Thay cho vòng lặp `while filter(code=...).exists()` (mỗi lần thử một truy vấn):
+các mã đã dùng có cùng tiền tố được lấy bằng một truy vấn, hậu tố được chọn
+trong bộ nhớ và nhớ lại cho cả lô.
+
+Hai lần import đồng thời có thể chọn trùng một mã. Trên PostgreSQL,
+lock_codes() lấy advisory lock của bảng tới hết transaction hiện tại nên việc
+chọn mã và INSERT của các transaction diễn ra lần lượt. Database khác (SQLite
+chỉ cho một transaction ghi tại một thời điểm) không cần khóa; Subject.save()
+vẫn thử lại với mã kế tiếp khi INSERT gặp IntegrityError.
+"""
+import zlib
+from itertools import count
+
+from django.db import connections, router
+
+
+def candidate_codes(proposed_code):
+    """proposed_code, proposed_code_1, proposed_code_2, ..."""
+    yield proposed_code
+    for counter in count(1):
+        yield f"{proposed_code}_{counter}"
+
+
+def first_free_code(proposed_code, taken, reuse=None):
+    """Mã đầu tiên chưa có trong `taken`; reuse(code) trả về True để dùng lại một mã đã có"""
+    for code in candidate_codes(proposed_code):
+        if code not in taken or (reuse is not None and reuse(code)):
+            return code
+
+
+def advisory_lock(model, name):
+    """Khóa advisory theo (bảng của model, name) tới hết transaction hiện tại (chỉ PostgreSQL).
+
+    Phải gọi bên trong transaction.atomic(); ngoài transaction khóa được nhả
+    ngay sau câu lệnh.
+    """
+    connection = connections[router.db_for_write(model)]
+    if connection.vendor != 'postgresql':
+        return
+    # Khóa advisory nhận số nguyên 64 bit; crc32 của tên bảng.name là đủ để phân biệt
+    key = zlib.crc32(f'{model._meta.db_table}.{name}'.encode())
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT pg_advisory_xact_lock(%s)', [key])
+
+
+def lock_codes(model, field='code'):
+    """Khóa việc cấp mã của model tới hết transaction hiện tại (xem advisory_lock)"""
+    advisory_lock(model, field)
+
+
+class CodeAllocator:
+    """Cấp nhiều mã duy nhất với một truy vấn cho mỗi tiền tố.
+
+        allocator = CodeAllocator(Subject.objects.all())
+        allocator.allocate('CT1_MH01')  # 'CT1_MH01' hoặc 'CT1_MH01_1', ...
+    """
+
+    def __init__(self, queryset, field='code'):
+        self.queryset = queryset
+        self.field = field
+        self.taken = set()
+        self.loaded_prefixes = []
+
+    def load(self, prefix):
+        """Nạp các mã đã dùng bắt đầu bằng prefix (bỏ qua nếu tiền tố ngắn hơn đã được nạp)"""
+        if any(prefix.startswith(loaded) for loaded in self.loaded_prefixes):
+            return
+        self.taken.update(
+            self.queryset.filter(**{f'{self.field}__startswith': prefix}).values_list(self.field, flat=True)
+        )
+        self.loaded_prefixes.append(prefix)
+
+    def allocate(self, proposed_code, reuse=None):
+        self.load(proposed_code)
+        code = first_free_code(proposed_code, self.taken, reuse)
+        self.taken.add(code)
+        return code
@@ -0,0 +1,134 @@
+# excel_reader.py
+"""Đọc file Excel dạng streaming cho import.
+
+File .xlsx được mở bằng openpyxl ở chế độ read-only: danh sách sheet lấy từ
+metadata của workbook, dữ liệu được đọc tuần tự và trả về theo từng khối
+(DataFrame nhỏ) nên bộ nhớ không tăng theo kích thước file. File .xls cũ
+không hỗ trợ read-only nên vẫn đọc bằng pandas.
+"""
+import os
+import tempfile
+
+from django.conf import settings
+from openpyxl import load_workbook
+import pandas as pd
+
+DEFAULT_CHUNK_SIZE = 1000
+
+
+def is_legacy_xls(file_name):
+    return str(file_name).lower().endswith('.xls')
+
+
+def save_upload(uploaded_file):
+    """Chép file upload ra file tạm để worker đọc sau khi request kết thúc"""
+    suffix = os.path.splitext(uploaded_file.name)[1]
+    handle, path = tempfile.mkstemp(prefix='import-', suffix=suffix)
+    with os.fdopen(handle, 'wb') as destination:
+        uploaded_file.seek(0)
+        for chunk in uploaded_file.chunks():
+            destination.write(chunk)
+    return path
+
+
+def get_sheet_names(source, file_name=None):
+    """Danh sách sheet từ metadata workbook, không đọc dữ liệu ô"""
+    file_name = file_name or getattr(source, 'name', source)
+    if hasattr(source, 'seek'):
+        source.seek(0)
+    if is_legacy_xls(file_name):
+        return pd.ExcelFile(source).sheet_names
+    workbook = load_workbook(source, read_only=True)
+    try:
+        return workbook.sheetnames
+    finally:
+        workbook.close()
+
+
+class SheetReader:
+    """Đọc một sheet theo từng khối dòng.
+
+    `columns` là dòng tiêu đề; `frames()` trả về các DataFrame có index bằng
+    (số dòng Excel - 2) để thông báo lỗi 'Dòng N' khớp với file gốc.
+    """
+
+    def __init__(self, source, sheet_name=None, chunk_size=None, file_name=None):
+        self.source = source
+        self.file_name = file_name or getattr(source, 'name', source)
+        self.chunk_size = chunk_size or getattr(settings, 'IMPORT_CHUNK_SIZE', DEFAULT_CHUNK_SIZE)
+        self.legacy = is_legacy_xls(self.file_name)
+        self.workbook = None
+        self._rows = None
+
+        if self.legacy:
+            # .xls: pandas đọc toàn bộ sheet, sau đó vẫn chia khối như .xlsx
+            xls = pd.ExcelFile(source)
+            self.sheet_name = sheet_name or xls.sheet_names[0]
+            self._frame = pd.read_excel(xls, sheet_name=self.sheet_name)
+            self.columns = list(self._frame.columns)
+            self.total_rows = len(self._frame)
+            return
+
+        self.workbook = load_workbook(source, read_only=True, data_only=True)
+        self.sheet_name = sheet_name or self.workbook.sheetnames[0]
+        if self.sheet_name not in self.workbook.sheetnames:
+            self.close()
+            raise ValueError(f"Worksheet named '{self.sheet_name}' not found")
+        worksheet = self.workbook[self.sheet_name]
+        # max_row lấy từ thẻ <dimension>, có thể thiếu với file do công cụ khác tạo
+        self.total_rows = max((worksheet.max_row or 1) - 1, 0)
+        self._rows = worksheet.iter_rows(values_only=True)
+        header = next(self._rows, ())
+        self.columns = [
+            str(value) if value is not None else f'Unnamed: {index}'
+            for index, value in enumerate(header)
+        ]
+
+    def frames(self):
+        if self.legacy:
+            for start in range(0, len(self._frame), self.chunk_size):
+                yield self._frame.iloc[start:start + self.chunk_size]
+            return
+
+        width = len(self.columns)
+        chunk, index = [], []
+        try:
+            for position, values in enumerate(self._rows):
+                if not any(value is not None for value in values):
+                    continue
+                values = tuple(values[:width]) + (None,) * (width - len(values))
+                chunk.append(values)
+                index.append(position)
+                if len(chunk) >= self.chunk_size:
+                    yield pd.DataFrame(chunk, columns=self.columns, index=index)
+                    chunk, index = [], []
+            if chunk:
+                yield pd.DataFrame(chunk, columns=self.columns, index=index)
+        finally:
+            self.close()
+
+    def close(self):
+        if self.workbook is not None:
+            self.workbook.close()
+            self.workbook = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def iter_frames(data):
+    """DataFrame hoặc SheetReader -> các DataFrame theo khối"""
+    if isinstance(data, pd.DataFrame):
+        yield data
+    else:
+        yield from data.frames()
+
+
+def remove_file(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
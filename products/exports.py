@@ -0,0 +1,228 @@
+# exports.py
+"""Xuất toàn bộ môn học / phân công giảng dạy ra CSV, NDJSON hoặc XLSX.
+
+Dữ liệu được đọc bằng server-side cursor (`.iterator(chunk_size=...)`) và xử lý
+theo từng lô: mỗi lô nạp phân bố học kỳ / giảng viên bằng một truy vấn rồi
+serialize (xem serializers.py). CSV và NDJSON được trả về bằng
+StreamingHttpResponse nên byte đầu tiên được gửi ngay và bộ nhớ không tăng theo
+số dòng. XLSX là file zip nên phải ghi xong mới gửi được: xlsxwriter ghi ở chế
+độ constant_memory (mỗi dòng được ghi xuống đĩa ngay, phải ghi theo thứ tự dòng)
+vào file tạm - giữ trong RAM khi nhỏ hơn XLSX_SPOOL_MAX_SIZE - rồi FileResponse
+đọc file đó ra theo từng khối.
+"""
+import csv
+import tempfile
+from collections import namedtuple
+from itertools import islice
+
+import xlsxwriter
+from django.http import FileResponse, StreamingHttpResponse
+
+from .http import dumps
+from .loaders import load_semester_map, load_instructor_map
+from .serializers import (
+    SEMESTER_COLUMNS, SUBJECT_ROW_SERIALIZER, TEACHING_ASSIGNMENT_SERIALIZER,
+    ValuesSerializer, Field, Computed, Lookup
+)
+
+EXPORT_CHUNK_SIZE = 2000
+EXPORT_FORMATS = ('csv', 'ndjson', 'xlsx')
+XLSX_SPOOL_MAX_SIZE = 1024 * 1024
+XLSX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+# serializer, các cột (khóa trong dict output, tiêu đề), hàm nạp dữ liệu theo lô từ danh sách id
+ExportSpec = namedtuple('ExportSpec', ['serializer', 'columns', 'load_context'])
+
+
+def _subject_context(subject_ids):
+    return {
+        'semesters': load_semester_map(subject_ids),
+        'instructors': load_instructor_map(subject_ids),
+    }
+
+
+SUBJECT_EXPORT = ExportSpec(
+    serializer=SUBJECT_ROW_SERIALIZER,
+    columns=[
+        ('curriculum_code', 'Mã CTĐT'),
+        ('curriculum_name', 'Chương trình đào tạo'),
+        ('course_code', 'Khóa học'),
+        ('order_number', 'TT'),
+        ('ma_mon_hoc', 'Mã môn học'),
+        ('ten_mon_hoc', 'Tên học phần'),
+        ('so_tin_chi', 'Số tín chỉ'),
+        ('tong_so_gio', 'Tổng số giờ'),
+        ('ly_thuyet', 'Lý thuyết'),
+        ('thuc_hanh', 'Thực hành'),
+        ('kiem_tra', 'Kiểm tra'),
+        ('thi', 'Thi'),
+        *[(column, column.upper()) for column in SEMESTER_COLUMNS],
+        ('don_vi', 'Đơn vị quản lý chuyên môn'),
+        ('bo_mon', 'Tổ bộ môn'),
+        ('loai_mon', 'Loại môn'),
+        ('giang_vien', 'Giảng viên'),
+    ],
+    load_context=_subject_context,
+)
+
+# Cùng cột với file mẫu import chương trình đào tạo (importers.CURRICULUM_COLUMNS)
+# để file xuất ra có thể sửa rồi import lại
+CURRICULUM_TEMPLATE_EXPORT = ExportSpec(
+    serializer=ValuesSerializer(
+        id=Field('id'),
+        order_number=Field('order_number', default=''),
+        code=Computed(lambda original_code, code: original_code or code, 'original_code', 'code'),
+        name=Field('name', default=''),
+        credits=Field('credits', default=0, convert=float),
+        total_hours=Field('total_hours', default=0),
+        theory_hours=Field('theory_hours', default=0),
+        practice_hours=Field('practice_hours', default=0),
+        tests_hours=Field('tests_hours', default=0),
+        exam_hours=Field('exam_hours', default=0),
+        **{column: Lookup('semesters', 'id', column, default='') for column in SEMESTER_COLUMNS},
+        department=Field('department__name', default=''),
+        subject_group=Field('subject_group__name', default=''),
+        subject_type=Field('subject_type__name', default=''),
+        prerequisites=Field('prerequisites', default=''),
+        learning_outcomes=Field('learning_outcomes', default=''),
+        description=Field('description', default=''),
+    ),
+    columns=[
+        ('order_number', 'TT'),
+        ('code', 'Mã môn học*'),
+        ('name', 'Tên học phần*'),
+        ('credits', 'Số tín chỉ*'),
+        ('total_hours', 'Tổng số giờ*'),
+        ('theory_hours', 'Lý thuyết*'),
+        ('practice_hours', 'Thực hành*'),
+        ('tests_hours', 'Kiểm tra*'),
+        ('exam_hours', 'Thi'),
+        *[(column, column.upper()) for column in SEMESTER_COLUMNS],
+        ('department', 'Đơn vị quản lý chuyên môn*'),
+        ('subject_group', 'Tổ bộ môn*'),
+        ('subject_type', 'Loại môn'),
+        ('prerequisites', 'Điều kiện tiên quyết'),
+        ('learning_outcomes', 'Chuẩn đầu ra'),
+        ('description', 'Mô tả môn học'),
+    ],
+    load_context=lambda subject_ids: {'semesters': load_semester_map(subject_ids)},
+)
+
+TEACHING_ASSIGNMENT_EXPORT = ExportSpec(
+    serializer=TEACHING_ASSIGNMENT_SERIALIZER,
+    columns=[
+        ('instructor_code', 'Mã giảng viên'),
+        ('instructor_name', 'Họ tên giảng viên'),
+        ('subject_code', 'Mã môn học'),
+        ('subject_name', 'Tên môn học'),
+        ('class_type', 'Loại lớp'),
+        ('class_code', 'Mã lớp'),
+        ('class_name', 'Tên lớp'),
+        ('academic_year', 'Năm học'),
+        ('semester', 'Học kỳ'),
+        ('is_main_instructor', 'Giảng viên chính'),
+        ('student_count', 'Số sinh viên'),
+        ('teaching_hours', 'Số giờ giảng'),
+    ],
+    load_context=None,
+)
+
+
+def iter_export_rows(spec, queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    """Các dict output của queryset, đọc bằng server-side cursor theo từng lô chunk_size dòng"""
+    rows = spec.serializer.rows(queryset).iterator(chunk_size=chunk_size)
+    while True:
+        batch = list(islice(rows, chunk_size))
+        if not batch:
+            return
+        context = spec.load_context(spec.serializer.column(batch, 'id')) if spec.load_context else {}
+        yield from spec.serializer.serialize(batch, **context)
+
+
+def iter_export_values(spec, queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    """Như iter_export_rows nhưng mỗi dòng là list giá trị theo thứ tự spec.columns"""
+    keys = [key for key, _ in spec.columns]
+    for row in iter_export_rows(spec, queryset, chunk_size):
+        yield [row[key] for key in keys]
+
+
+class _Echo:
+    """File giả cho csv.writer: write() trả lại dòng thay vì ghi vào đâu đó"""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(spec, rows):
+    # BOM để Excel mở đúng tiếng Việt
+    yield '\ufeff'
+    writer = csv.writer(_Echo())
+    yield writer.writerow([header for _, header in spec.columns])
+    keys = [key for key, _ in spec.columns]
+    for row in rows:
+        yield writer.writerow([row[key] for key in keys])
+
+
+def iter_ndjson(rows):
+    for row in rows:
+        yield dumps(row) + b'\n'
+
+
+def open_xlsx_workbook():
+    """Workbook ở chế độ constant_memory ghi vào file tạm; trả về (workbook, file)"""
+    output = tempfile.SpooledTemporaryFile(max_size=XLSX_SPOOL_MAX_SIZE)
+    return xlsxwriter.Workbook(output, {'constant_memory': True}), output
+
+
+def write_sheet_rows(worksheet, headers, rows, header_format=None):
+    """Ghi dòng tiêu đề rồi các dòng theo thứ tự.
+
+    Trả về (số dòng dữ liệu, độ dài nội dung dài nhất của từng cột) để đặt độ
+    rộng cột sau khi ghi - constant_memory không cho đọc lại các ô đã ghi.
+    """
+    worksheet.write_row(0, 0, headers, header_format)
+    lengths = [len(str(header)) for header in headers]
+    row_index = 0
+    for row_index, values in enumerate(rows, start=1):
+        worksheet.write_row(row_index, 0, values)
+        for column, value in enumerate(values):
+            length = len(str(value))
+            if length > lengths[column]:
+                lengths[column] = length
+    return row_index, lengths
+
+
+def xlsx_file_response(workbook, output, filename):
+    """Đóng workbook và trả file về bằng FileResponse (file tạm bị xóa khi response đóng file)"""
+    try:
+        workbook.close()
+    except Exception:
+        output.close()
+        raise
+    output.seek(0)
+    return FileResponse(output, as_attachment=True, filename=filename, content_type=XLSX_CONTENT_TYPE)
+
+
+def export_response(spec, queryset, export_format, filename, sheet_name='Dữ liệu'):
+    """Response tải file cho một định dạng trong EXPORT_FORMATS"""
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Định dạng không hợp lệ: {export_format} (hỗ trợ: {', '.join(EXPORT_FORMATS)})")
+    if export_format == 'csv':
+        response = StreamingHttpResponse(
+            iter_csv(spec, iter_export_rows(spec, queryset)), content_type='text/csv; charset=utf-8'
+        )
+    elif export_format == 'ndjson':
+        response = StreamingHttpResponse(iter_ndjson(iter_export_rows(spec, queryset)), content_type='application/x-ndjson')
+    else:
+        workbook, output = open_xlsx_workbook()
+        worksheet = workbook.add_worksheet(sheet_name)
+        row_count, _ = write_sheet_rows(
+            worksheet, [header for _, header in spec.columns], iter_export_values(spec, queryset),
+            workbook.add_format({'bold': True})
+        )
+        worksheet.freeze_panes(1, 0)
+        worksheet.autofilter(0, 0, row_count, len(spec.columns) - 1)
+        return xlsx_file_response(workbook, output, f'{filename}.xlsx')
+
+    response['Content-Disposition'] = f'attachment; filename="{filename}.{export_format}"'
+    return response
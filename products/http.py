@@ -0,0 +1,67 @@
+# http.py
+"""JSON response nhanh dựa trên orjson.
+
+FastJsonResponse dùng thay JsonResponse: cùng tham số (data, safe,
+json_dumps_params), nhưng serialize bằng orjson. Tiếng Việt được giữ nguyên
+UTF-8 (không escape \\uXXXX) và date/datetime/UUID được xử lý sẵn; Decimal,
+lazy string và timedelta được chuyển như DjangoJSONEncoder để output không
+đổi với client hiện có. Khi chưa cài orjson thì quay về json của stdlib.
+"""
+import datetime
+import decimal
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse
+from django.utils.duration import duration_iso_string
+from django.utils.functional import Promise
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson là dependency tùy chọn
+    orjson = None
+
+ORJSON_OPTIONS = (orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z) if orjson else 0
+
+
+def _default(value):
+    """Các kiểu orjson không tự serialize, chuyển giống DjangoJSONEncoder"""
+    if isinstance(value, decimal.Decimal):
+        return str(value)
+    if isinstance(value, Promise):
+        return str(value)
+    if isinstance(value, datetime.timedelta):
+        return duration_iso_string(value)
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+
+
+def dumps(data):
+    """Serialize ra bytes UTF-8"""
+    if orjson is not None:
+        return orjson.dumps(data, default=_default, option=ORJSON_OPTIONS)
+    return json.dumps(data, cls=DjangoJSONEncoder, ensure_ascii=False).encode('utf-8')
+
+
+class FastJsonResponse(HttpResponse):
+    """JsonResponse serialize bằng orjson.
+
+    ensure_ascii=False là mặc định. Khi truyền encoder riêng hoặc
+    json_dumps_params khác (vd. indent) thì đi qua json của stdlib để giữ
+    đúng hành vi của JsonResponse.
+    """
+
+    def __init__(self, data, encoder=DjangoJSONEncoder, safe=True, json_dumps_params=None, **kwargs):
+        if safe and not isinstance(data, dict):
+            raise TypeError(
+                'In order to allow non-dict objects to be serialized set the '
+                'safe parameter to False.'
+            )
+        kwargs.setdefault('content_type', 'application/json')
+        params = {'ensure_ascii': False, **(json_dumps_params or {})}
+        if params != {'ensure_ascii': False} or encoder is not DjangoJSONEncoder:
+            content = json.dumps(data, cls=encoder, **params)
+        else:
+            content = dumps(data)
+        super().__init__(content=content, **kwargs)
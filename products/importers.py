@@ -0,0 +1,460 @@
+# importers.py
+"""Import dữ liệu Excel theo lô (set-based).
+
+Các bảng tra cứu được nạp một lần vào dict, mã môn học được giải quyết
+trong bộ nhớ và việc ghi dữ liệu dùng bulk_create / bulk_update trong
+một transaction, thay vì 15+ truy vấn cho mỗi dòng Excel.
+"""
+from collections import namedtuple
+from decimal import Decimal, InvalidOperation
+
+from django.db import connections, models, router, transaction
+from django.utils import timezone
+import numpy as np
+import pandas as pd
+
+from .codes import first_free_code, lock_codes
+from .excel_reader import iter_frames
+from .invalidation import bump_model_version
+from .models import Department, SubjectType, SubjectGroup, Subject, SemesterAllocation, normalize_search_text
+
+SEMESTER_RANGE = range(1, 7)
+EMPTY_VALUES = ('', 'nan')
+SEMESTER_EMPTY_VALUES = ('', 'nan', 'x', 'X')
+TRUE_VALUES = ('có', 'yes', 'true', '1')
+
+# Mô tả một cột Excel cần chuẩn hóa.
+# kind: 'text' | 'number' | 'integer' | 'bool' | 'date'
+# default: giá trị khi ô trống (với 'bool': giá trị khi thiếu cột)
+# empty: các giá trị (sau khi strip) được coi là ô trống
+Column = namedtuple('Column', ['name', 'kind', 'default', 'empty', 'true_values'],
+                    defaults=('text', None, EMPTY_VALUES, TRUE_VALUES))
+
+
+def _text_column(df, column):
+    if column.name not in df.columns:
+        return pd.Series('', index=df.index, dtype=object)
+    series = df[column.name]
+    text = series.where(series.notna(), '').astype(str).str.strip()
+    return text.where(~text.isin(column.empty), '')
+
+
+def normalize_frame(df, columns, key, required=()):
+    """Chuẩn hóa DataFrame theo cột (vectorized) thay vì từng ô trong iterrows().
+
+    `columns` là dict {field: Column}. Trả về danh sách dict (một dict cho mỗi
+    dòng có `key` khác rỗng) gồm các field đã chuẩn hóa và:
+      - 'line': số dòng trong file Excel (index + 2)
+      - '<field>_error': giá trị gốc nếu ô số / ngày không hợp lệ, ngược lại ''
+      - 'missing_required': True nếu một trong các field text `required` bị trống
+    """
+    frame = pd.DataFrame(index=df.index)
+    for field, column in columns.items():
+        text = _text_column(df, column)
+        if column.kind == 'text':
+            frame[field] = text
+        elif column.kind in ('number', 'integer'):
+            number = pd.to_numeric(text.where(text != ''), errors='coerce')
+            # inf và số vượt int64 không ghi được vào database: coi như ô không hợp lệ
+            number = number.where(np.isfinite(number) & (number.abs() < 2 ** 63))
+            if column.kind == 'integer':
+                values = np.trunc(number).fillna(0).astype('int64').astype(object)
+            else:
+                values = number.astype(object)
+            frame[field] = values.where(number.notna(), column.default)
+            frame[f'{field}_error'] = text.where((text != '') & number.isna(), '')
+        elif column.kind == 'date':
+            source = df[column.name] if column.name in df.columns else text
+            dates = pd.to_datetime(source.where(text != ''), errors='coerce', format='mixed')
+            frame[field] = dates.dt.date.astype(object).where(dates.notna(), column.default)
+            frame[f'{field}_error'] = text.where((text != '') & dates.isna(), '')
+        elif column.kind == 'bool':
+            if column.name in df.columns:
+                frame[field] = text.str.lower().isin(column.true_values)
+            else:
+                frame[field] = bool(column.default)
+        else:
+            raise ValueError(f'Kiểu cột không hợp lệ: {column.kind}')
+
+    # Bỏ qua dòng trống và dòng lặp lại tiêu đề
+    key_text = frame[key]
+    keep = (key_text != '') & (key_text != columns[key].name)
+    if required:
+        frame['missing_required'] = frame[list(required)].eq('').any(axis=1)
+    else:
+        frame['missing_required'] = False
+    frame['line'] = frame.index + 2
+    return frame[keep].to_dict('records')
+
+
+def field_bound_error(model, field_name, value):
+    """Lý do `value` vượt giới hạn cột trong database của model.field_name, hoặc None.
+
+    Chỉ kiểm tra giới hạn mà database từ chối (max_length, số chữ số của
+    DecimalField, khoảng số nguyên của backend): một giá trị như vậy làm cả
+    bulk_create / bulk_update của khối lỗi, nên phải loại dòng đó trước khi ghi.
+    """
+    if value is None or value == '':
+        return None
+    field = model._meta.get_field(field_name)
+    if isinstance(field, models.CharField):
+        if field.max_length and len(value) > field.max_length:
+            return f'dài {len(value)} ký tự (tối đa {field.max_length})'
+    elif isinstance(field, models.DecimalField):
+        limit = Decimal(10) ** (field.max_digits - field.decimal_places)
+        try:
+            number = Decimal(str(value)).quantize(Decimal(1).scaleb(-field.decimal_places))
+        except InvalidOperation:
+            return f'giá trị {value} không hợp lệ'
+        if abs(number) >= limit:
+            return f'giá trị {value} vượt quá giới hạn (nhỏ hơn {limit})'
+    elif isinstance(field, models.IntegerField):
+        connection = connections[router.db_for_write(model)]
+        low, high = connection.ops.integer_field_range(field.get_internal_type())
+        if (low is not None and value < low) or (high is not None and value > high):
+            return f'giá trị {value} vượt quá giới hạn ({low} - {high})'
+    return None
+
+
+def iter_normalized_rows(data, columns, key, required=()):
+    """normalize_frame() cho từng khối của DataFrame hoặc SheetReader"""
+    for frame in iter_frames(data):
+        yield from normalize_frame(frame, columns, key, required)
+
+
+SUBJECT_UPDATE_FIELDS = [
+    'name', 'credits', 'semester', 'total_hours', 'theory_hours', 'practice_hours',
+    'tests_hours', 'exam_hours', 'department', 'subject_type', 'subject_group',
+    'is_elective', 'order_number', 'original_code', 'search_name', 'updated_at',
+]
+
+
+CURRICULUM_COLUMNS = {
+    'original_code': Column('Mã môn học*'),
+    'name': Column('Tên học phần*'),
+    'credits': Column('Số tín chỉ*', 'number', 0),
+    'total_hours': Column('Tổng số giờ*', 'integer', 0),
+    'theory_hours': Column('Lý thuyết*', 'integer', 0),
+    'practice_hours': Column('Thực hành*', 'integer', 0),
+    'tests_hours': Column('Kiểm tra*', 'integer', 0),
+    'exam_hours': Column('Thi', 'integer', 0),
+    'department_name': Column('Đơn vị quản lý chuyên môn*'),
+    'subject_type_name': Column('Loại môn'),
+    'subject_group_name': Column('Tổ bộ môn*'),
+    'order_number': Column('TT', 'integer'),
+}
+# Cột được ghi thẳng vào field cùng tên của Subject, kiểm tra giới hạn trước khi ghi theo lô
+CURRICULUM_BOUNDED_FIELDS = (
+    'original_code', 'name', 'credits', 'total_hours', 'theory_hours', 'practice_hours',
+    'tests_hours', 'exam_hours', 'order_number',
+)
+CURRICULUM_COLUMNS.update({
+    f'hk{hk}': Column(f'HK{hk}', 'number', None, SEMESTER_EMPTY_VALUES) for hk in SEMESTER_RANGE
+})
+
+CLASS_COLUMNS = {
+    'code': Column('Mã lớp*'),
+    'name': Column('Tên lớp*'),
+    'curriculum_code': Column('Mã chương trình*'),
+    'course_code': Column('Mã khóa học*'),
+    'start_date': Column('Ngày bắt đầu', 'date'),
+    'end_date': Column('Ngày kết thúc', 'date'),
+    'is_combined': Column('Là lớp ghép', 'bool', False),
+    'combined_class_code': Column('Mã lớp ghép (nếu có)'),
+    'description': Column('Mô tả'),
+}
+
+COMBINED_CLASS_COLUMNS = {
+    'code': Column('Mã lớp ghép*'),
+    'name': Column('Tên lớp ghép*'),
+    'subject_code': Column('Mã môn học*'),
+    'class_codes': Column('Mã các lớp thành phần*'),
+    'description': Column('Mô tả'),
+}
+
+INSTRUCTOR_COLUMNS = {
+    'code': Column('Mã giảng viên*'),
+    'full_name': Column('Họ và tên*'),
+    'department_teacher': Column('Đơn vị quản lý GV*'),
+    'department': Column('Khoa chuyên môn*'),
+    'position': Column('Chức vụ*'),
+    'subject_group': Column('Mã tổ bộ môn*'),
+    'email': Column('Email'),
+    'phone': Column('Số điện thoại'),
+    'is_active': Column('Trạng thái', 'bool', True,
+                        true_values=('đang hoạt động', 'active', 'true', '1', 'có', 'yes')),
+}
+
+TEACHING_ASSIGNMENT_COLUMNS = {
+    'instructor_code': Column('Mã giảng viên*'),
+    'instructor_name': Column('Họ và tên*'),
+    'subject_code': Column('Mã môn học*'),
+    'class_code': Column('Mã lớp*'),
+    'class_type': Column('Loại lớp*'),
+    'academic_year': Column('Năm học*'),
+    'semester': Column('Học kỳ*', 'integer'),
+    'is_main_instructor': Column('Là giảng viên chính*', 'bool', True),
+    'student_count': Column('Số lượng sinh viên', 'integer', 0),
+    'teaching_hours': Column('Số giờ giảng dạy', 'integer', 0),
+}
+
+
+def _lookup_code(name):
+    """Sinh mã cho đơn vị / loại môn / bộ môn được tạo mới từ file import"""
+    return name[:10].upper().replace(' ', '')
+
+
+class CurriculumImporter:
+    """Import môn học của một chương trình đào tạo / khóa học từ DataFrame"""
+
+    def __init__(self, curriculum, course):
+        self.curriculum = curriculum
+        self.course = course
+        self.curriculum_prefix = curriculum.code.replace(' ', '_').upper()[:15]
+        self.errors = []
+
+    # ----- Bảng tra cứu -----
+
+    def load_lookups(self):
+        """Nạp toàn bộ bảng tra cứu vào dict (3 truy vấn)"""
+        self.departments = {}
+        for department in Department.objects.order_by('id'):
+            self.departments.setdefault(department.name, department)
+        self.subject_types = {}
+        for subject_type in SubjectType.objects.order_by('id'):
+            self.subject_types.setdefault(subject_type.name, subject_type)
+        self.subject_groups = {}
+        for subject_group in SubjectGroup.objects.order_by('id'):
+            self.subject_groups.setdefault((subject_group.department_id, subject_group.name), subject_group)
+        self.failed_lookups = {}
+
+    # Bản ghi tra cứu mới được tạo trong savepoint riêng để lỗi của một dòng
+    # (vd. trùng mã) không làm hỏng cả transaction import; lỗi được nhớ lại
+    # để các dòng sau cùng giá trị không thử tạo lại.
+
+    def create_lookup(self, key, model, **kwargs):
+        if key in self.failed_lookups:
+            raise ValueError(self.failed_lookups[key])
+        try:
+            with transaction.atomic():
+                return model.objects.get_or_create(**kwargs)[0]
+        except Exception as e:
+            self.failed_lookups[key] = str(e)
+            raise
+
+    def get_department(self, name, line):
+        department = self.departments.get(name)
+        if department is None:
+            department = self.create_lookup(
+                ('department', name), Department,
+                name=name, defaults={'code': _lookup_code(name), 'name': name}
+            )
+            self.departments[name] = department
+            self.errors.append(f"Dòng {line}: Đã tạo mới đơn vị '{name}'")
+        return department
+
+    def get_subject_type(self, name, line):
+        subject_type = self.subject_types.get(name)
+        if subject_type is None:
+            subject_type = self.create_lookup(
+                ('subject_type', name), SubjectType,
+                name=name, defaults={'code': _lookup_code(name), 'name': name}
+            )
+            self.subject_types[name] = subject_type
+            self.errors.append(f"Dòng {line}: Đã tạo mới loại môn '{name}'")
+        return subject_type
+
+    def get_subject_group(self, department, name):
+        key = (department.id if department else None, name)
+        subject_group = self.subject_groups.get(key)
+        if subject_group is None:
+            subject_group = self.create_lookup(
+                ('subject_group', key), SubjectGroup,
+                department=department, name=name,
+                defaults={'code': _lookup_code(name), 'name': name, 'department': department}
+            )
+            self.subject_groups[key] = subject_group
+        return subject_group
+
+    # ----- Đọc dòng -----
+
+    def parse_rows(self, df):
+        """Chuẩn hóa một khối dòng theo cột; chỉ còn ghép học kỳ là xử lý theo dòng"""
+        rows = normalize_frame(df, CURRICULUM_COLUMNS, key='original_code', required=['name'])
+        semesters = [hk for hk in SEMESTER_RANGE if f'HK{hk}' in df.columns]
+
+        parsed_rows = []
+        for row in rows:
+            line = row['line']
+            if row['missing_required']:
+                self.errors.append(f"Dòng {line}: Mã môn học và Tên học phần không được để trống")
+                continue
+
+            # Dòng có giá trị vượt giới hạn cột bị bỏ qua và báo lỗi như vòng lặp save() từng dòng trước đây
+            bound_errors = []
+            for field in CURRICULUM_BOUNDED_FIELDS:
+                error = field_bound_error(Subject, field, row[field])
+                if error:
+                    bound_errors.append(f"{CURRICULUM_COLUMNS[field].name} {error}")
+            if bound_errors:
+                self.errors.append(f"Dòng {line}: {'; '.join(bound_errors)}")
+                continue
+
+            # Phân bố học kỳ; học kỳ mặc định là học kỳ đầu tiên có giá trị
+            semester_credits = {}
+            default_semester = None
+            for hk in semesters:
+                credits_value, invalid_value = row[f'hk{hk}'], row[f'hk{hk}_error']
+                if not credits_value and not invalid_value:
+                    continue
+                if default_semester is None:
+                    default_semester = hk
+                if invalid_value:
+                    self.errors.append(f"Dòng {line} - HK{hk}: Giá trị tín chỉ không hợp lệ: {invalid_value}")
+                elif field_bound_error(SemesterAllocation, 'credits', credits_value):
+                    self.errors.append(f"Dòng {line} - HK{hk}: Giá trị tín chỉ không hợp lệ: {credits_value}")
+                else:
+                    semester_credits[hk] = credits_value
+
+            row['semester'] = default_semester
+            row['semester_credits'] = semester_credits
+            row['subject_type_name'] = row['subject_type_name'] or 'Bắt buộc'
+            if row['order_number'] is None:
+                row['order_number'] = line - 1
+            parsed_rows.append(row)
+        return parsed_rows
+
+    # ----- Giải quyết mã môn học -----
+
+    def load_existing_subjects(self):
+        """Nạp các môn học có mã cùng tiền tố chương trình trong một truy vấn"""
+        return {
+            subject.code: subject
+            for subject in Subject.objects.filter(code__startswith=f"{self.curriculum_prefix}_")
+        }
+
+    def is_same_subject(self, subject, parsed):
+        return (subject.name == parsed['name'] and
+                subject.curriculum_id == self.curriculum.id and
+                subject.course_id == self.course.id and
+                float(subject.credits) == parsed['credits'] and
+                subject.semester == parsed['semester'])
+
+    def resolve_code(self, subjects_by_code, parsed):
+        """Mã duy nhất: dùng lại mã của môn học giống hệt, nếu khác thì thêm hậu tố _1, _2, ..."""
+        proposed_code = f"{self.curriculum_prefix}_{parsed['original_code']}"
+        return first_free_code(
+            proposed_code, subjects_by_code,
+            reuse=lambda code: self.is_same_subject(subjects_by_code[code], parsed)
+        )
+
+    # ----- Chạy import -----
+
+    def run(self, data, job=None):
+        """Import DataFrame hoặc SheetReader theo từng khối trong một transaction.
+
+        `job` (ImportJob) nhận tiến độ theo từng dòng nếu có.
+        """
+        self.errors = []
+        self.created_count = 0
+        self.updated_count = 0
+        processed_data = []
+
+        with transaction.atomic():
+            # Import đồng thời vào cùng database chọn mã lần lượt, tránh trùng mã khi bulk_create
+            lock_codes(Subject)
+            self.load_lookups()
+            subjects_by_code = self.load_existing_subjects()
+            for frame in iter_frames(data):
+                row_subjects = self.write_rows(self.parse_rows(frame), subjects_by_code, job)
+                processed_data.extend({
+                    'ma_mon_hoc_goc': parsed['original_code'],
+                    'ma_mon_hoc_moi': subject.code,
+                    'ten_mon_hoc': subject.name,
+                    'so_tin_chi': float(subject.credits),
+                    'tong_so_gio': subject.total_hours,
+                    'ly_thuyet': subject.theory_hours,
+                    'thuc_hanh': subject.practice_hours,
+                    'kiem_tra': subject.tests_hours,
+                    'thi': subject.exam_hours,
+                    'hoc_ky': subject.semester
+                } for parsed, subject in row_subjects)
+
+        # bulk_create / bulk_update không phát signal nên tự đánh dấu dữ liệu đã đổi
+        bump_model_version(Subject, SemesterAllocation)
+        return {
+            'created_count': self.created_count,
+            'updated_count': self.updated_count,
+            'processed_data': processed_data,
+            'errors': self.errors,
+        }
+
+    def write_rows(self, parsed_rows, subjects_by_code, job=None):
+        """Ghi một khối dòng đã chuẩn hóa bằng bulk_create / bulk_update"""
+        to_create = {}
+        to_update = {}
+        row_subjects = []
+        now = timezone.now()
+
+        for parsed in parsed_rows:
+            if job:
+                job.advance()
+            line = parsed['line']
+            try:
+                department = self.get_department(parsed['department_name'], line) if parsed['department_name'] else None
+                subject_type = self.get_subject_type(parsed['subject_type_name'], line)
+                subject_group = (self.get_subject_group(department, parsed['subject_group_name'])
+                                 if parsed['subject_group_name'] else None)
+            except Exception as e:
+                self.errors.append(f"Dòng {line}: {str(e)}")
+                continue
+
+            code = self.resolve_code(subjects_by_code, parsed)
+            subject = subjects_by_code.get(code)
+            if subject is None:
+                subject = Subject(code=code, curriculum=self.curriculum, course=self.course)
+                subjects_by_code[code] = to_create[code] = subject
+                self.created_count += 1
+            else:
+                if code not in to_create:
+                    to_update[subject.pk] = subject
+                self.updated_count += 1
+
+            subject.name = parsed['name']
+            subject.credits = parsed['credits']
+            subject.semester = parsed['semester']
+            subject.total_hours = parsed['total_hours']
+            subject.theory_hours = parsed['theory_hours']
+            subject.practice_hours = parsed['practice_hours']
+            subject.tests_hours = parsed['tests_hours']
+            subject.exam_hours = parsed['exam_hours']
+            subject.department = department
+            subject.subject_type = subject_type
+            subject.subject_group = subject_group
+            subject.is_elective = parsed['subject_type_name'] == "Môn học tự chọn"
+            subject.order_number = parsed['order_number']
+            subject.original_code = parsed['original_code']
+            # bulk_create / bulk_update không gọi Subject.save() nên tự tính chuỗi tìm kiếm
+            subject.search_name = normalize_search_text(subject.name, subject.code)
+            subject.updated_at = now
+            row_subjects.append((parsed, subject))
+
+        Subject.objects.bulk_create(list(to_create.values()), batch_size=500)
+        if to_update:
+            Subject.objects.bulk_update(list(to_update.values()), SUBJECT_UPDATE_FIELDS, batch_size=500)
+
+        # Upsert phân bố học kỳ theo khóa (subject, semester)
+        allocations = {}
+        for parsed, subject in row_subjects:
+            for hk, credit_value in parsed['semester_credits'].items():
+                allocations[(subject.pk, hk)] = SemesterAllocation(
+                    base_subject=subject, semester=hk, credits=credit_value
+                )
+        SemesterAllocation.objects.bulk_create(
+            list(allocations.values()),
+            batch_size=500,
+            update_conflicts=True,
+            unique_fields=['base_subject', 'semester'],
+            update_fields=['credits'],
+        )
+        return row_subjects
@@ -0,0 +1,203 @@
+# invalidation.py
+"""Phiên bản dữ liệu theo model để vô hiệu hóa cache.
+
+Mỗi model có một số phiên bản lưu trong cache, được tăng khi bản ghi của
+model thay đổi (signals.py, hoặc gọi trực tiếp sau bulk_create/bulk_update vì
+các thao tác này không phát signal). Dữ liệu cache đưa phiên bản của các model
+mà nó phụ thuộc vào khóa, nên khi một model đổi phiên bản thì khóa cũ tự hết
+hiệu lực mà không cần xóa từng mục.
+
+Phiên bản phải được mọi worker cùng thấy. settings.MODEL_VERSION_STORE chọn:
+  - 'cache': đọc/ghi ở tầng dùng chung (Redis / memcached, bỏ qua L1 của
+    TwoLevelCache);
+  - 'database': bảng ModelVersion, dùng khi cache dùng chung chỉ là locmem
+    của từng process.
+
+Phiên bản chỉ được tăng sau khi transaction commit (transaction.on_commit):
+tăng sớm hơn thì request khác có thể cache lại dữ liệu cũ với phiên bản mới.
+"""
+from functools import wraps
+import hashlib
+import threading
+import time
+
+from django.conf import settings
+from django.core import checks
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from django.http import HttpResponse
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+
+from .cache_backends import get_shared_cache, shared_cache_is_cross_process
+from .models import ModelVersion
+
+VERSION_KEY = 'model-version:{}'
+RESPONSE_CACHE_KEY = 'response:{}:{}:{}'
+
+_pending = threading.local()
+
+
+def _version_key(label):
+    return VERSION_KEY.format(label)
+
+
+def _new_version():
+    # Khởi tạo theo thời gian để không dùng lại phiên bản cũ khi khóa / dòng bị xóa
+    return int(time.time() * 1000)
+
+
+def _use_database():
+    return settings.MODEL_VERSION_STORE == 'database'
+
+
+def _read_cache_versions(labels):
+    store = get_shared_cache()
+    keys = {label: _version_key(label) for label in labels}
+    cached = store.get_many(keys.values())
+    versions = {}
+    for label, key in keys.items():
+        version = cached.get(key)
+        if version is None:
+            version = _new_version()
+            # add() để không ghi đè phiên bản do process khác vừa tạo
+            if not store.add(key, version, None):
+                version = store.get(key, version)
+        versions[label] = version
+    return versions
+
+
+def _read_database_versions(labels):
+    versions = dict(ModelVersion.objects.filter(label__in=labels).values_list('label', 'version'))
+    missing = [label for label in labels if label not in versions]
+    if missing:
+        # ignore_conflicts: process khác có thể vừa tạo cùng dòng
+        ModelVersion.objects.bulk_create(
+            [ModelVersion(label=label, version=_new_version()) for label in missing], ignore_conflicts=True
+        )
+        versions.update(ModelVersion.objects.filter(label__in=missing).values_list('label', 'version'))
+    return versions
+
+
+def versions_are_shared():
+    """True nếu mọi process đọc cùng một phiên bản (database, hoặc cache không phải locmem)"""
+    return _use_database() or shared_cache_is_cross_process()
+
+
+@checks.register(checks.Tags.caches)
+def check_version_store(app_configs, **kwargs):
+    if settings.MODEL_VERSION_STORE not in ('cache', 'database'):
+        return [checks.Error(
+            f"MODEL_VERSION_STORE must be 'cache' or 'database', got {settings.MODEL_VERSION_STORE!r}",
+            id='products.E001',
+        )]
+    if not versions_are_shared() and not settings.DEBUG:
+        return [checks.Warning(
+            "MODEL_VERSION_STORE='cache' with a locmem shared cache: each gunicorn worker keeps its own "
+            "model versions, so cached responses and ETags go stale after edits made in another worker.",
+            hint="Configure REDIS_URL / MEMCACHED_LOCATION or set MODEL_VERSION_STORE='database'.",
+            id='products.W001',
+        )]
+    return []
+
+
+def get_models_version(*models):
+    """Chuỗi phiên bản gộp của các model, dùng làm một phần của khóa cache"""
+    labels = [model._meta.label_lower for model in models]
+    versions = _read_database_versions(labels) if _use_database() else _read_cache_versions(labels)
+    return '.'.join(str(versions[label]) for label in labels)
+
+
+def _get_pending():
+    if not hasattr(_pending, 'labels'):
+        _pending.labels = set()
+    return _pending.labels
+
+
+def bump_model_version(*models):
+    """Đánh dấu dữ liệu của các model đã thay đổi (có hiệu lực khi transaction commit)"""
+    _get_pending().update(model._meta.label_lower for model in models)
+    # Các callback sau trong cùng transaction thấy tập rỗng (giống teaching_load.mark_dirty)
+    transaction.on_commit(flush_pending_versions, robust=True)
+
+
+def flush_pending_versions():
+    pending = _get_pending()
+    labels = sorted(pending)
+    pending.clear()
+    if not labels:
+        return
+    if _use_database():
+        # Model chưa có dòng thì chưa ai đọc phiên bản; dòng được tạo ở lần đọc đầu tiên
+        ModelVersion.objects.filter(label__in=labels).update(version=F('version') + 1)
+        return
+    store = get_shared_cache()
+    for label in labels:
+        key = _version_key(label)
+        try:
+            store.incr(key)
+        except ValueError:
+            store.set(key, _new_version(), None)
+
+
+def cache_response_by_models(*models, timeout=60 * 5):
+    """Cache response GET của view theo phiên bản các model phụ thuộc.
+
+    Thay cho cache_page: khóa gồm URL đầy đủ và phiên bản model, nên response
+    hết hiệu lực ngay khi một model phụ thuộc thay đổi thay vì chờ timeout.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view_func(request, *args, **kwargs)
+
+            path_hash = hashlib.md5(request.get_full_path().encode('utf-8')).hexdigest()
+            cache_key = RESPONSE_CACHE_KEY.format(
+                view_func.__name__, path_hash, get_models_version(*models)
+            )
+            cached = cache.get(cache_key)
+            if cached is not None:
+                content, content_type = cached
+                return HttpResponse(content, content_type=content_type)
+
+            response = view_func(request, *args, **kwargs)
+            if response.status_code == 200 and not response.streaming:
+                cache.set(cache_key, (response.content, response['Content-Type']), timeout)
+            return response
+        return wrapper
+    return decorator
+
+
+def etag_by_models(*models):
+    """ETag theo phiên bản model cho API danh sách chỉ đọc.
+
+    Request có If-None-Match khớp nhận 304 chỉ sau một lần đọc phiên bản,
+    không truy vấn dữ liệu. Response được đánh dấu no-cache để trình duyệt
+    luôn hỏi lại server thay vì dùng bản cũ.
+
+    ETag chỉ được dùng khi phiên bản được mọi worker cùng thấy
+    (versions_are_shared): với phiên bản riêng của từng process, client giữ
+    ETag cũ sẽ nhận 304 mãi cho dữ liệu đã đổi ở worker khác.
+    """
+    def etag_func(request, *args, **kwargs):
+        key = f'{request.get_full_path()}:{get_models_version(*models)}'
+        return hashlib.md5(key.encode('utf-8')).hexdigest()
+
+    def decorator(view_func):
+        conditional_view = condition(etag_func=etag_func)(view_func)
+
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if not versions_are_shared():
+                return view_func(request, *args, **kwargs)
+            response = conditional_view(request, *args, **kwargs)
+            if response.status_code not in (200, 304):
+                # Không để client cache lại response lỗi với ETag hợp lệ
+                del response['ETag']
+                return response
+            patch_cache_control(response, private=True, no_cache=True)
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,249 @@
+# jobs.py
+"""Chạy import Excel nền bằng thread pool cục bộ (không cần broker).
+
+Mỗi job gắn với một bản ghi ImportHistory: request chỉ tạo bản ghi ở trạng
+thái 'pending' rồi trả về id, worker thread đọc file, xử lý và ghi kết quả.
+Tiến độ được ghi vào tầng dùng chung của cache, ngoài transaction đang mở
+của bước import. Tầng này chỉ dùng chung giữa các worker gunicorn khi có
+Redis / memcached; với locmem (cấu hình mặc định khi deploy) mỗi worker có bản
+riêng, nên thread heartbeat còn ghi processed_rows vào ImportHistory mỗi
+PROGRESS_PERSIST_INTERVAL giây (bằng kết nối riêng, không nằm trong transaction
+import) để request polling tới worker khác vẫn thấy tiến độ.
+
+Job chỉ sống trong process đã nhận nó: worker bị restart, bị gunicorn thay thế
+(max_requests) hoặc crash giữa chừng thì job mất và không được chạy lại. Để
+bản ghi không nằm mãi ở 'pending' / 'running', một thread của mỗi process ghi
+heartbeat_at cho các job nó đang giữ mỗi HEARTBEAT_INTERVAL giây; job không có
+heartbeat quá IMPORT_JOB_STALE_AFTER giây được fail_stale_jobs() đánh dấu
+'failed' (khi polling trạng thái và khi worker khởi động). Người dùng cần
+import lại file.
+"""
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
+import traceback
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, connection
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .cache_backends import get_shared_cache, shared_cache_is_cross_process
+from .models import ImportHistory
+
+PROGRESS_CACHE_KEY = 'import-job:{}:progress'
+PROGRESS_CACHE_TIMEOUT = 60 * 60
+PROGRESS_INTERVAL = 1.0  # giây giữa hai lần ghi tiến độ
+HEARTBEAT_INTERVAL = 30  # giây giữa hai lần ghi heartbeat_at
+PROGRESS_PERSIST_INTERVAL = 5  # giây giữa hai lần ghi processed_rows vào DB khi cache không dùng chung
+ACTIVE_STATUSES = ('pending', 'running')
+STALE_JOB_MESSAGE = 'Job import bị gián đoạn (worker đã khởi động lại hoặc dừng), vui lòng import lại file'
+
+_executor = None
+_executor_lock = threading.Lock()
+# id ImportHistory của các job process này đang giữ (chờ trong hàng đợi hoặc đang
+# chạy) -> số dòng đã xử lý gần nhất
+_owned_jobs = {}
+_heartbeat_thread = None
+
+
+def get_executor():
+    """Thread pool dùng chung trong process (tạo lười sau khi gunicorn fork)"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'IMPORT_JOB_WORKERS', 2),
+                thread_name_prefix='import-job'
+            )
+        return _executor
+
+
+def write_heartbeats():
+    """Ghi heartbeat_at (và processed_rows nếu cache không dùng chung) cho các job đang giữ"""
+    with _executor_lock:
+        progress = dict(_owned_jobs)
+    if not progress:
+        return
+    active = ImportHistory.objects.filter(status__in=ACTIVE_STATUSES)
+    now = timezone.now()
+    if shared_cache_is_cross_process():
+        active.filter(id__in=list(progress)).update(heartbeat_at=now)
+        return
+    for history_id, processed_rows in progress.items():
+        active.filter(id=history_id).update(heartbeat_at=now, processed_rows=processed_rows)
+
+
+def _heartbeat_loop():
+    while True:
+        time.sleep(HEARTBEAT_INTERVAL if shared_cache_is_cross_process() else PROGRESS_PERSIST_INTERVAL)
+        try:
+            write_heartbeats()
+        except Exception as e:
+            print(f"Error writing import job heartbeat: {str(e)}")
+        finally:
+            connection.close()
+
+
+def _own_job(history):
+    """Đăng ký job với heartbeat của process (khởi động thread heartbeat nếu chưa có)"""
+    global _heartbeat_thread
+    with _executor_lock:
+        _owned_jobs[history.id] = 0
+        if _heartbeat_thread is None:
+            _heartbeat_thread = threading.Thread(target=_heartbeat_loop, name='import-job-heartbeat', daemon=True)
+            _heartbeat_thread.start()
+    history.heartbeat_at = timezone.now()
+    ImportHistory.objects.filter(id=history.id).update(heartbeat_at=history.heartbeat_at)
+
+
+def _release_job(history_id):
+    with _executor_lock:
+        _owned_jobs.pop(history_id, None)
+
+
+def stale_jobs():
+    """Job 'pending' / 'running' không có heartbeat quá IMPORT_JOB_STALE_AFTER giây"""
+    threshold = timezone.now() - timedelta(seconds=settings.IMPORT_JOB_STALE_AFTER)
+    return ImportHistory.objects.filter(status__in=ACTIVE_STATUSES).annotate(
+        last_seen=Coalesce('heartbeat_at', 'started_at', 'created_at')
+    ).filter(last_seen__lt=threshold)
+
+
+def fail_stale_jobs(queryset=None):
+    """Đánh dấu 'failed' các job đã mất worker; trả về số job bị đánh dấu"""
+    stale = stale_jobs()
+    if queryset is not None:
+        stale = stale.filter(id__in=queryset.values('id'))
+    # Lọc lại trạng thái trong UPDATE để không ghi đè job vừa kết thúc
+    return ImportHistory.objects.filter(
+        id__in=list(stale.values_list('id', flat=True)), status__in=ACTIVE_STATUSES
+    ).update(
+        status='failed',
+        errors=[STALE_JOB_MESSAGE],
+        result={'status': 'error', 'message': STALE_JOB_MESSAGE},
+        finished_at=timezone.now(),
+    )
+
+
+class ImportJob:
+    """Theo dõi tiến độ của một lần import gắn với ImportHistory"""
+
+    def __init__(self, history):
+        self.history = history
+        self.processed_rows = 0
+        self._last_report = 0
+
+    def start(self, total_rows):
+        self.history.status = 'running'
+        self.history.total_rows = total_rows
+        self.history.started_at = timezone.now()
+        self.history.save(update_fields=['status', 'total_rows', 'started_at'])
+        get_shared_cache().set(PROGRESS_CACHE_KEY.format(self.history.id), 0, PROGRESS_CACHE_TIMEOUT)
+
+    def advance(self, count=1):
+        """Tăng số dòng đã xử lý; chỉ ghi cache tối đa mỗi PROGRESS_INTERVAL giây"""
+        self.processed_rows += count
+        now = time.monotonic()
+        if now - self._last_report >= PROGRESS_INTERVAL:
+            self._last_report = now
+            get_shared_cache().set(PROGRESS_CACHE_KEY.format(self.history.id), self.processed_rows, PROGRESS_CACHE_TIMEOUT)
+            with _executor_lock:
+                if self.history.id in _owned_jobs:
+                    _owned_jobs[self.history.id] = self.processed_rows
+
+    def finish(self, result, response_data=None):
+        """Ghi kết quả cuối cùng của processor vào ImportHistory"""
+        history = self.history
+        errors = result.get('errors') or []
+        if result.get('status') == 'success':
+            history.status = 'success' if not errors else 'partial'
+            history.record_count = len(result.get('processed_data', []))
+            history.created_count = result.get('created_count', 0)
+            history.updated_count = result.get('updated_count', 0)
+        else:
+            history.status = 'failed'
+            errors = errors or [result.get('message', 'Lỗi không xác định')]
+        history.errors = errors if errors else None
+        history.processed_rows = max(self.processed_rows, history.record_count)
+        history.result = response_data
+        history.finished_at = timezone.now()
+        history.save()
+        get_shared_cache().delete(PROGRESS_CACHE_KEY.format(history.id))
+
+    def fail(self, message):
+        self.finish({'status': 'error', 'message': message}, {'status': 'error', 'message': message})
+
+
+def get_progress(history):
+    """Số dòng đã xử lý: từ cache hoặc bản ghi heartbeat khi job đang chạy, từ DB khi đã xong"""
+    if history.status == 'running':
+        # Đọc thẳng tầng dùng chung: L1 của worker khác có thể đang giữ giá trị cũ.
+        # Với locmem, worker khác không có khóa này và dùng giá trị heartbeat đã ghi
+        cached = get_shared_cache().get(PROGRESS_CACHE_KEY.format(history.id))
+        return max(cached or 0, history.processed_rows)
+    return history.processed_rows
+
+
+def _run(history_id, func, args):
+    close_old_connections()
+    job = None
+    try:
+        history = ImportHistory.objects.get(id=history_id)
+        job = ImportJob(history)
+        func(job, *args)
+    except Exception as e:
+        print(f"Error in import job {history_id}: {str(e)}")
+        traceback.print_exc()
+        if job is not None:
+            try:
+                job.fail(f'Lỗi xử lý dữ liệu: {str(e)}')
+            except Exception:
+                pass
+    finally:
+        _release_job(history_id)
+        # Thread của pool không đi qua request/response nên phải tự đóng kết nối
+        connection.close()
+
+
+def submit_import_job(history, func, *args):
+    """Đưa job vào hàng đợi; func(job, *args) chạy trong worker thread.
+
+    Khi IMPORT_JOBS_ASYNC = False, job chạy ngay trong request (dev / debug).
+    Job không được lưu lại khi process dừng (xem docstring của module).
+    """
+    _own_job(history)
+    if getattr(settings, 'IMPORT_JOBS_ASYNC', True):
+        get_executor().submit(_run, history.id, func, args)
+    else:
+        job = ImportJob(history)
+        try:
+            func(job, *args)
+        except Exception as e:
+            job.fail(f'Lỗi xử lý dữ liệu: {str(e)}')
+        finally:
+            _release_job(history.id)
+    return history
+
+
+def serialize_job(history):
+    """Dữ liệu trạng thái job cho API polling"""
+    data = {
+        'id': history.id,
+        'state': history.status,
+        'finished': history.is_finished,
+        'object_type': history.object_type,
+        'file_name': history.file_name,
+        'total_rows': history.total_rows,
+        'processed_rows': get_progress(history),
+        'created_count': history.created_count,
+        'updated_count': history.updated_count,
+        'errors': history.errors or [],
+        'started_at': history.started_at.isoformat() if history.started_at else None,
+        'finished_at': history.finished_at.isoformat() if history.finished_at else None,
+    }
+    if history.is_finished:
+        data['result'] = history.result
+    return data
@@ -0,0 +1,83 @@
+# loaders.py
+"""Nạp dữ liệu theo lô cho lưới chương trình đào tạo.
+
+Thay vì truy vấn phân bố học kỳ và giảng viên cho từng môn học (N+1),
+các hàm ở đây lấy toàn bộ dữ liệu liên quan bằng số truy vấn cố định
+rồi ghép lại trong bộ nhớ.
+"""
+import base64
+from collections import defaultdict
+
+from django.db.models import Q
+
+from .models import Subject, SemesterAllocation, TeachingAssignment
+from .serializers import SUBJECT_GRID_SERIALIZER
+
+
+def encode_subject_cursor(order_number, subject_id):
+    """Mã hóa vị trí (order_number, id) của môn học cuối trang thành cursor"""
+    raw = f"{order_number}:{subject_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def decode_subject_cursor(cursor):
+    """Giải mã cursor thành (order_number, id); ném ValueError nếu không hợp lệ"""
+    try:
+        order_number, subject_id = base64.urlsafe_b64decode(cursor.encode()).decode().split(':')
+        return int(order_number), int(subject_id)
+    except (TypeError, UnicodeDecodeError, base64.binascii.Error) as e:
+        raise ValueError(f'Cursor không hợp lệ: {cursor}') from e
+
+
+def apply_subject_cursor(queryset, cursor):
+    """Phân trang keyset theo (order_number, id) - trang sâu tốn chi phí như trang đầu"""
+    queryset = queryset.order_by('order_number', 'id')
+    if cursor:
+        order_number, subject_id = decode_subject_cursor(cursor)
+        queryset = queryset.filter(
+            Q(order_number__gt=order_number) |
+            Q(order_number=order_number, id__gt=subject_id)
+        )
+    return queryset
+
+
+def load_semester_map(subject_filter):
+    """Trả về {subject_id: {'hk1': 4.0, ...}} trong một truy vấn.
+
+    `subject_filter` là danh sách id hoặc queryset môn học (dùng làm subquery).
+    """
+    semester_map = defaultdict(dict)
+    allocations = SemesterAllocation.objects.filter(
+        base_subject_id__in=subject_filter
+    ).values_list('base_subject_id', 'semester', 'credits')
+    for subject_id, semester, credits in allocations:
+        semester_map[subject_id][f'hk{semester}'] = float(credits)
+    return semester_map
+
+
+def load_instructor_map(subject_filter):
+    """Trả về {subject_id: 'GV A, GV B'} trong một truy vấn."""
+    names = defaultdict(list)
+    assignments = TeachingAssignment.objects.filter(
+        curriculum_subject_id__in=subject_filter
+    ).values_list('curriculum_subject_id', 'instructor__full_name')
+    for subject_id, full_name in assignments:
+        if full_name:
+            names[subject_id].append(full_name)
+    return {subject_id: ", ".join(full_names) for subject_id, full_names in names.items()}
+
+
+def load_subject_grid(curriculum_id=None):
+    """Lấy dữ liệu các dòng của lưới môn học với 3 truy vấn, bất kể số môn học"""
+    curriculum_subjects = Subject.objects.all()
+    if curriculum_id:
+        curriculum_subjects = curriculum_subjects.filter(curriculum=curriculum_id)
+    curriculum_subjects = curriculum_subjects.order_by('order_number')
+
+    # Subquery chỉ lấy id để không phải truyền danh sách id dài vào IN (...)
+    subject_ids = curriculum_subjects.values('id')
+    return SUBJECT_GRID_SERIALIZER.serialize(
+        curriculum_subjects,
+        semesters=load_semester_map(subject_ids),
+        instructors=load_instructor_map(subject_ids),
+    )
@@ -0,0 +1,92 @@
+import datetime
+import decimal
+import json
+import time
+
+from django.core.management.base import BaseCommand
+from django.core.serializers.json import DjangoJSONEncoder
+
+from products import http
+
+
+def subject_rows(count):
+    """Dòng có cấu trúc như api_all_subjects (Decimal, chuỗi tiếng Việt, null)"""
+    return [
+        {
+            'id': index,
+            'code': f'CT{index % 20}_MH{index:05d}',
+            'name': f'Nguyên lý kỹ thuật điện tử số {index}',
+            'credits': decimal.Decimal('3.00'),
+            'total_hours': 45,
+            'theory_hours': 30,
+            'practice_hours': 15,
+            'semester': index % 6 + 1,
+            'curriculum': {'id': index % 20, 'code': f'CT{index % 20}', 'name': 'Chương trình đào tạo'},
+            'department': 'Khoa Điện - Điện tử',
+            'subject_group': None,
+            'semester_allocations': [{'semester': s, 'credits': decimal.Decimal('1.50')} for s in range(1, 3)],
+        }
+        for index in range(count)
+    ]
+
+
+def assignment_rows(count):
+    """Dòng có cấu trúc như api_teaching_assignments (datetime, chuỗi tiếng Việt)"""
+    now = datetime.datetime(2025, 1, 1, 8, 30, tzinfo=datetime.timezone.utc)
+    return [
+        {
+            'id': index,
+            'instructor': {'id': index % 300, 'code': f'GV{index % 300:04d}', 'full_name': 'Nguyễn Thị Hồng Nhung'},
+            'subject': {'id': index, 'code': f'MH{index:05d}', 'name': 'Cơ sở dữ liệu nâng cao'},
+            'class_name': f'Lớp CĐ Điện {index % 40}',
+            'academic_year': '2024-2025',
+            'semester': index % 2 + 1,
+            'is_main_instructor': index % 3 != 0,
+            'student_count': 35,
+            'teaching_hours': 60,
+            'created_at': now,
+            'updated_at': now,
+        }
+        for index in range(count)
+    ]
+
+
+PAYLOADS = {
+    'all_subjects': subject_rows,
+    'teaching_assignments': assignment_rows,
+}
+
+
+def best_of(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+class Command(BaseCommand):
+    help = 'Compare stdlib json (JsonResponse) and orjson (FastJsonResponse) serialization on large API payloads'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=5000, help='Rows per payload (default 5000)')
+        parser.add_argument('--repeat', type=int, default=5, help='Runs per encoder, best time is reported')
+
+    def handle(self, *args, **options):
+        rows, repeat = options['rows'], options['repeat']
+        if http.orjson is None:
+            self.stdout.write(self.style.WARNING('orjson is not installed, FastJsonResponse falls back to stdlib json'))
+
+        for name, build in PAYLOADS.items():
+            data = build(rows)
+            stdlib_time, stdlib_body = best_of(
+                lambda: json.dumps(data, cls=DjangoJSONEncoder).encode('utf-8'), repeat
+            )
+            fast_time, fast_body = best_of(lambda: http.dumps(data), repeat)
+            self.stdout.write(
+                f'{name} ({rows} rows): '
+                f'json {stdlib_time * 1000:.1f} ms / {len(stdlib_body) / 1024:.0f} KB, '
+                f'fast {fast_time * 1000:.1f} ms / {len(fast_body) / 1024:.0f} KB, '
+                f'x{stdlib_time / fast_time:.1f}'
+            )
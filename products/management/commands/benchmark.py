@@ -0,0 +1,383 @@
+import json
+import os
+import platform
+import statistics
+import tempfile
+import time
+import tracemalloc
+from collections import namedtuple
+from io import StringIO
+
+import django
+import xlsxwriter
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count
+from django.test import RequestFactory
+from django.utils import timezone
+
+from products import views
+from products.excel_reader import SheetReader
+from products.exports import CURRICULUM_TEMPLATE_EXPORT, write_sheet_rows
+from products.invalidation import bump_model_version
+from products.middleware import QueryRecorder
+from products.models import (
+    Department, SubjectGroup, Curriculum, Course, Subject, Position, Instructor, Class, TeachingAssignment
+)
+from products.signals import TRACKED_MODELS
+
+SEED_PREFIX = 'BENCH'
+IMPORT_PREFIX = 'BENCH-IMP-'
+DEFAULT_IMPORT_SIZES = '100,1000,10000'
+
+# func: hàm được đo; setup: chạy trước mỗi lần đo, không tính giờ; rollback: chạy trong transaction rồi hoàn tác
+Case = namedtuple('Case', ['name', 'func', 'setup', 'rollback', 'repeat'])
+
+
+def measure(case):
+    """Thời gian (tốt nhất / trung vị của case.repeat lần), số truy vấn và bộ nhớ đỉnh (một lần chạy riêng)"""
+
+    def run():
+        if case.setup:
+            case.setup()
+        if not case.rollback:
+            return case.func()
+        with transaction.atomic():
+            result = case.func()
+            transaction.set_rollback(True)
+        return result
+
+    timings = []
+    for _ in range(case.repeat):
+        # Đếm bằng execute_wrapper: không cần DEBUG và không bị giới hạn 9000 truy vấn của connection.queries
+        recorder = QueryRecorder()
+        with connection.execute_wrapper(recorder):
+            started = time.perf_counter()
+            result = run()
+            timings.append((time.perf_counter() - started) * 1000)
+        queries = recorder.count
+
+    # tracemalloc làm chậm đáng kể nên đo bộ nhớ ở lần chạy riêng
+    tracemalloc.start()
+    try:
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    measurement = {
+        'wall_ms': round(min(timings), 2),
+        'wall_ms_median': round(statistics.median(timings), 2),
+        'queries': queries,
+        'peak_kb': round(peak / 1024),
+        'runs': case.repeat,
+    }
+    content = getattr(result, 'content', None)
+    if content is not None:
+        measurement['bytes'] = len(content)
+    elif isinstance(result, dict) and result.get('status'):
+        measurement['status'] = result['status']
+        measurement['errors'] = len(result.get('errors') or [])
+    return measurement
+
+
+def write_workbook(path, headers, rows):
+    workbook = xlsxwriter.Workbook(path, {'constant_memory': True})
+    write_sheet_rows(workbook.add_worksheet('Sheet1'), headers, rows)
+    workbook.close()
+    return path
+
+
+class WorkbookBuilder:
+    """Sinh file Excel import từ dữ liệu đang có trong database (vd. do seed_scale tạo)"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.curricula = list(
+            Curriculum.objects.filter(subject__isnull=False, courses__isnull=False).distinct()
+            .order_by('code').values_list('id', 'code')
+        )
+        if not self.curricula:
+            raise CommandError('No curriculum with subjects and courses to build import workbooks from; run without --no-seed')
+        self.curriculum_codes = dict(Curriculum.objects.values_list('id', 'code'))
+        self.courses = list(Course.objects.order_by('code').values_list('code', 'curriculum_id'))
+        self.subjects = list(Subject.objects.order_by('code').values_list('code', 'curriculum_id', 'semester'))
+        self.classes = list(Class.objects.order_by('code').values_list('code', 'course__code', 'curriculum_id'))
+        self.departments = list(Department.objects.order_by('code').values_list('name', flat=True))
+        self.groups = list(SubjectGroup.objects.order_by('code').values_list('code', 'name', 'department__name'))
+        self.positions = list(Position.objects.order_by('name').values_list('name', flat=True))
+        # Import phân công tìm giảng viên theo họ tên nên chỉ dùng tên không trùng
+        unique_names = Instructor.objects.values('full_name').annotate(count=Count('id')).filter(count=1).values('full_name')
+        self.instructors = list(
+            Instructor.objects.filter(full_name__in=unique_names).order_by('code').values_list('code', 'full_name')
+        )
+
+    def path(self, name, size):
+        return os.path.join(self.directory, f'{name}_{size}.xlsx')
+
+    def curriculum(self, size):
+        headers = [header for _, header in CURRICULUM_TEMPLATE_EXPORT.columns]
+
+        def rows():
+            for index in range(size):
+                # Tổ bộ môn phải thuộc đúng đơn vị của dòng, nếu không importer sẽ tạo tổ mới
+                _, group_name, department = self.groups[index % len(self.groups)] if self.groups else ('', '', '')
+                yield [
+                    index + 1, f'IMP{index:05d}', f'Học phần benchmark {index}', 3, 45, 30, 13, 1, 1,
+                    *(3 if hk == index % 6 else '' for hk in range(6)),
+                    department or '', group_name, 'Chuyên ngành', '', '', '',
+                ]
+        return write_workbook(self.path('curriculum', size), headers, rows())
+
+    def classes_workbook(self, size):
+        headers = list(views.ImportTeachingDataView().get_class_template())
+
+        def rows():
+            for index in range(size):
+                course_code, curriculum_id = self.courses[index % len(self.courses)]
+                yield [
+                    f'{IMPORT_PREFIX}L{index:05d}', f'Lớp benchmark {index}', self.curriculum_codes[curriculum_id],
+                    course_code, '01/09/2025', '30/06/2028', 'Không', '', '',
+                ]
+        return write_workbook(self.path('class', size), headers, rows())
+
+    def combined_classes(self, size):
+        headers = list(views.ImportTeachingDataView().get_combined_class_template())
+        rows = (
+            [
+                f'{IMPORT_PREFIX}G{index:05d}', f'Lớp ghép benchmark {index}',
+                self.subjects[index % len(self.subjects)][0],
+                ', '.join(self.classes[(index + offset) % len(self.classes)][0] for offset in range(2)),
+                '',
+            ]
+            for index in range(size)
+        )
+        return write_workbook(self.path('combined_class', size), headers, rows)
+
+    def instructors_workbook(self, size):
+        headers = list(views.ImportTeachingDataView().get_instructor_template())
+
+        def rows():
+            for index in range(size):
+                department = self.departments[index % len(self.departments)] if self.departments else ''
+                yield [
+                    f'{IMPORT_PREFIX}GV{index:05d}', f'Giảng viên benchmark {index}', department,
+                    self.positions[index % len(self.positions)] if self.positions else '',
+                    f'bench{index}@example.com', '0900000000', department,
+                    self.groups[index % len(self.groups)][0] if self.groups else '',
+                    'Đang hoạt động',
+                ]
+        return write_workbook(self.path('instructor', size), headers, rows())
+
+    def teaching_assignments(self, size):
+        headers = list(views.ImportTeachingDataView().get_teaching_assignment_template())
+        if not self.instructors:
+            raise CommandError('No instructor with a unique full name to build the teaching assignment workbook')
+        subjects_by_curriculum = {}
+        for code, curriculum_id, semester in self.subjects:
+            subjects_by_curriculum.setdefault(curriculum_id, []).append((code, semester))
+
+        def rows():
+            # Mỗi dòng một (năm học, lớp, môn học) khác nhau để không trùng unique_together
+            index = 0
+            year = 2030
+            while index < size:
+                for class_code, _, curriculum_id in self.classes:
+                    for subject_code, semester in subjects_by_curriculum.get(curriculum_id, []):
+                        if index >= size:
+                            return
+                        instructor_code, instructor_name = self.instructors[index % len(self.instructors)]
+                        yield [
+                            instructor_code, instructor_name, subject_code, class_code, 'Thường',
+                            f'{year}-{year + 1}', semester or 1, 'Có', 30, 45,
+                        ]
+                        index += 1
+                year += 1
+        if not any(curriculum_id in subjects_by_curriculum for _, _, curriculum_id in self.classes):
+            raise CommandError('No class whose curriculum has subjects to build the teaching assignment workbook')
+        return write_workbook(self.path('teaching_assignment', size), headers, rows())
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark import, serialization and statistics hot paths (wall time, query count, peak memory); '
+        'write the results as JSON and optionally compare them against a stored baseline'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--import-sizes', default=DEFAULT_IMPORT_SIZES,
+                            help=f'Comma-separated workbook sizes for the import cases (default {DEFAULT_IMPORT_SIZES})')
+        parser.add_argument('--assignments', type=int, default=20000,
+                            help='Teaching assignments seeded with seed_scale for the API cases (default 20000)')
+        parser.add_argument('--seed', type=int, default=2024)
+        parser.add_argument('--no-seed', action='store_true', help='Benchmark the data already in the database')
+        parser.add_argument('--keep-data', action='store_true', help='Keep the seeded rows after the run')
+        parser.add_argument('--repeat', type=int, default=5, help='Timed runs per API case; the best run is reported')
+        parser.add_argument('--only', action='append', help='Only run cases whose name starts with this (can be repeated)')
+        parser.add_argument('--output', help='Write the results to this JSON file')
+        parser.add_argument('--compare', help='Baseline JSON file written earlier with --output')
+        parser.add_argument('--threshold', type=float, default=0.2,
+                            help='Relative slowdown / memory growth reported as a regression (default 0.2 = 20%%)')
+
+    def handle(self, *args, **options):
+        try:
+            import_sizes = [int(size) for size in options['import_sizes'].split(',') if size.strip()]
+        except ValueError:
+            raise CommandError('--import-sizes must be a comma-separated list of integers')
+        baseline = self.load_baseline(options['compare']) if options['compare'] else None
+
+        if not options['no_seed']:
+            self.stdout.write(f"Seeding {options['assignments']} teaching assignments (prefix {SEED_PREFIX}-)...")
+            call_command(
+                'seed_scale', prefix=SEED_PREFIX, flush=True, seed=options['seed'],
+                assignments=options['assignments'], stdout=StringIO()
+            )
+
+        try:
+            with tempfile.TemporaryDirectory(prefix='qldt-bench-') as directory:
+                cases = self.api_cases(options['repeat']) + self.import_cases(WorkbookBuilder(directory), import_sizes)
+                if options['only']:
+                    cases = [case for case in cases if any(case.name.startswith(prefix) for prefix in options['only'])]
+
+                results = {}
+                for case in cases:
+                    results[case.name] = measure(case)
+                    self.stdout.write(self.format_result(case.name, results[case.name]))
+            subject_count = Subject.objects.count()
+        finally:
+            if not options['no_seed'] and not options['keep_data']:
+                call_command('seed_scale', prefix=SEED_PREFIX, flush_only=True, stdout=StringIO())
+
+        report = {
+            'meta': {
+                'created_at': timezone.now().isoformat(),
+                'database': connection.vendor,
+                'django': django.get_version(),
+                'python': platform.python_version(),
+                'seeded_assignments': None if options['no_seed'] else options['assignments'],
+                'subjects': subject_count,
+                'repeat': options['repeat'],
+            },
+            'results': results,
+        }
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as output:
+                json.dump(report, output, ensure_ascii=False, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
+
+        if baseline is not None:
+            regressions = self.compare(baseline, report, options['threshold'])
+            if regressions:
+                raise CommandError(f'{regressions} regression(s) against {options["compare"]}')
+            self.stdout.write(self.style.SUCCESS('No regressions against the baseline'))
+
+    # ----- Các case -----
+
+    def api_cases(self, repeat):
+        factory = RequestFactory()
+        curriculum_id = (
+            Subject.objects.values('curriculum_id').annotate(count=Count('id'))
+            .order_by('-count').values_list('curriculum_id', flat=True).first()
+        )
+        academic_year = (
+            TeachingAssignment.objects.order_by('-academic_year')
+            .values_list('academic_year', flat=True).first()
+        )
+
+        def cold():
+            # Tăng phiên bản model để response cache cũ hết hiệu lực (không xóa cả cache)
+            bump_model_version(*TRACKED_MODELS)
+
+        def get(view, path, **params):
+            return lambda: view(factory.get(path, params))
+
+        grid = views.TrainProgramManagerView()
+        return [
+            Case('api_all_subjects', get(views.api_all_subjects, '/api/all-subjects/'), cold, False, repeat),
+            Case('api_all_subjects[cached]', get(views.api_all_subjects, '/api/all-subjects/'), None, False, repeat),
+            Case('api_teaching_assignments', get(views.api_teaching_assignments, '/api/teaching-assignments/'), None, False, repeat),
+            Case(
+                'api_teaching_assignments[academic_year]',
+                get(views.api_teaching_assignments, '/api/teaching-assignments/', academic_year=academic_year or ''),
+                None, False, repeat,
+            ),
+            Case('api_teaching_statistics', get(views.api_teaching_statistics, '/api/teaching-statistics/'), None, False, repeat),
+            Case('get_subject_data[curriculum]', lambda: grid.get_subject_data(curriculum_id), None, False, repeat),
+            Case('get_subject_data[all]', lambda: grid.get_subject_data(None), None, False, repeat),
+        ]
+
+    def import_cases(self, builder, sizes):
+        """Mỗi lần import chạy trong transaction rồi hoàn tác để các lần đo thấy cùng dữ liệu"""
+        curriculum_id = builder.curricula[0][0]
+        course_id = Course.objects.filter(curriculum_id=curriculum_id).values_list('id', flat=True).first()
+        excel_view = views.ImportExcelView()
+        teaching_view = views.ImportTeachingDataView()
+        importers = [
+            ('import_curriculum', builder.curriculum,
+             lambda reader: excel_view.process_excel_data(reader, curriculum_id, course_id)),
+            ('import_class', builder.classes_workbook, teaching_view.process_class_import),
+            ('import_combined_class', builder.combined_classes, teaching_view.process_combined_class_import),
+            ('import_instructor', builder.instructors_workbook, teaching_view.process_instructor_import),
+            ('import_teaching_assignment', builder.teaching_assignments, teaching_view.process_teaching_assignment_import),
+        ]
+
+        def run_import(path, process):
+            def run():
+                with SheetReader(path) as reader:
+                    return process(reader)
+            return run
+
+        cases = []
+        for name, build, process in importers:
+            for size in sizes:
+                cases.append(Case(f'{name}[{size}]', run_import(build(size), process), None, True, 1))
+        return cases
+
+    # ----- Kết quả -----
+
+    def format_result(self, name, result):
+        extra = ''
+        if 'bytes' in result:
+            extra = f", {result['bytes'] / 1024:.0f} KB"
+        elif 'status' in result:
+            extra = f", {result['status']}, {result['errors']} row errors"
+        return (
+            f"{name}: {result['wall_ms']:.1f} ms (median {result['wall_ms_median']:.1f}), "
+            f"{result['queries']} queries, peak {result['peak_kb']} KB{extra}"
+        )
+
+    def load_baseline(self, path):
+        try:
+            with open(path, encoding='utf-8') as baseline:
+                return json.load(baseline)
+        except (OSError, ValueError) as e:
+            raise CommandError(f'Cannot read baseline {path}: {e}')
+
+    def compare(self, baseline, report, threshold):
+        """In các thay đổi so với baseline; trả về số chỉ số bị chậm / tốn hơn ngưỡng"""
+        self.stdout.write(f"Comparing against baseline from {baseline.get('meta', {}).get('created_at', '?')}")
+        # Bỏ qua chênh lệch nhỏ hơn mức nhiễu đo đạc
+        noise = {'wall_ms': 5, 'peak_kb': 256, 'queries': 0}
+        regressions = 0
+        for name, result in report['results'].items():
+            base = baseline.get('results', {}).get(name)
+            if base is None:
+                self.stdout.write(f'[ NEW ] {name}')
+                continue
+            problems = []
+            for metric, allowed in (('wall_ms', threshold), ('peak_kb', threshold), ('queries', 0)):
+                old, new = base.get(metric), result.get(metric)
+                if old is None or new is None:
+                    continue
+                if new > old * (1 + allowed) and new - old > noise[metric]:
+                    problems.append(f'{metric} {old} -> {new}')
+            if problems:
+                regressions += len(problems)
+                self.stdout.write(self.style.ERROR(f"[REGR ] {name}: {', '.join(problems)}"))
+            else:
+                self.stdout.write(self.style.SUCCESS(
+                    f"[ OK  ] {name}: {base.get('wall_ms')} -> {result['wall_ms']} ms, "
+                    f"{base.get('queries')} -> {result['queries']} queries"
+                ))
+        return regressions
@@ -0,0 +1,81 @@
+import re
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from products.models import Subject, TeachingAssignment, Instructor, Class, CombinedClass
+
+# Quét toàn bảng trong kế hoạch thực thi (PostgreSQL / SQLite)
+SEQ_SCAN_PATTERNS = [
+    re.compile(r'Seq Scan on (\w+)'),
+    re.compile(r'\bSCAN (\w+)\b(?! USING)'),
+]
+
+
+def first_value(queryset, field):
+    return queryset.values_list(field, flat=True).first()
+
+
+def query_shapes():
+    """Các dạng truy vấn của API, dùng giá trị mẫu lấy từ dữ liệu hiện có"""
+    subject = Subject.objects.order_by().values(
+        'curriculum_id', 'course_id', 'department_id', 'subject_group_id'
+    ).first() or {}
+    assignment = TeachingAssignment.objects.order_by().values(
+        'instructor_id', 'academic_year', 'semester'
+    ).first() or {}
+    class_code = first_value(Class.objects.order_by(), 'code') or ''
+    combined_code = first_value(CombinedClass.objects.order_by(), 'code') or ''
+
+    subjects_page = Subject.objects.order_by('order_number', 'id')
+    return [
+        ('api_subjects ?curriculum_id', subjects_page.filter(curriculum_id=subject.get('curriculum_id'))[:51]),
+        ('api_subjects ?course_id', subjects_page.filter(course_id=subject.get('course_id'))[:51]),
+        ('api_subjects ?department_id', subjects_page.filter(department_id=subject.get('department_id'))[:51]),
+        ('api_subjects ?subject_group_id', subjects_page.filter(subject_group_id=subject.get('subject_group_id'))[:51]),
+        ('api_teaching_assignments ?academic_year&semester', TeachingAssignment.objects.filter(
+            academic_year=assignment.get('academic_year', ''), semester=assignment.get('semester', 1)
+        )),
+        ('api_teaching_assignments ?instructor_id', TeachingAssignment.objects.filter(
+            instructor_id=assignment.get('instructor_id')
+        )),
+        # search.search_postgres: LIKE '%q%' trên search_name (index trigram, migration 0007)
+        ('api_search_instructors ?q', Instructor.objects.filter(search_name__contains='nguyen').values('id', 'full_name', 'code')[:10]),
+        ('api_search ?type=subjects', Subject.objects.filter(search_name__contains='toan').values('id', 'code', 'name')[:10]),
+        ('api_search ?type=classes', Class.objects.filter(search_name__contains='lop').values('id', 'code', 'name')[:10]),
+        ('class by code', Class.objects.filter(code=class_code)),
+        ('combined class by code', CombinedClass.objects.filter(code=combined_code)),
+    ]
+
+
+class Command(BaseCommand):
+    help = 'Replay the API query shapes with EXPLAIN and report full table scans (missing indexes)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verbose-plan', action='store_true', help='Print the full query plan for each shape')
+
+    def handle(self, *args, **options):
+        self.stdout.write(f'Database vendor: {connection.vendor}')
+        problems = 0
+        for label, queryset in query_shapes():
+            plan = queryset.explain()
+            scanned = sorted({
+                match.group(1)
+                for pattern in SEQ_SCAN_PATTERNS
+                for match in pattern.finditer(plan)
+            })
+            if scanned:
+                problems += 1
+                self.stdout.write(self.style.WARNING(f'[SCAN] {label}: full scan on {", ".join(scanned)}'))
+            else:
+                self.stdout.write(self.style.SUCCESS(f'[ OK ] {label}'))
+            if options['verbose_plan']:
+                self.stdout.write(plan)
+
+        if problems:
+            self.stdout.write(self.style.WARNING(
+                f'{problems} query shape(s) scan whole tables. On small tables the planner may prefer '
+                'a scan even when an index exists; re-check with production-sized data.'
+            ))
+        else:
+            self.stdout.write(self.style.SUCCESS('All query shapes use indexes'))
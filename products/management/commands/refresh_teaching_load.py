@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from products.teaching_load import SCOPES, refresh_summaries
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the teaching load summary table used by the teaching statistics API'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scope',
+            action='append',
+            choices=list(SCOPES),
+            help='Only rebuild the given scope (can be repeated)'
+        )
+
+    def handle(self, *args, **options):
+        scopes = options['scope'] or list(SCOPES)
+        for scope in scopes:
+            try:
+                count = refresh_summaries(scope)
+            except Exception as e:
+                raise CommandError(f'Failed to rebuild {scope}: {e}')
+            self.stdout.write(f'{scope}: {count} rows')
+        self.stdout.write(self.style.SUCCESS('Teaching load summary rebuilt'))
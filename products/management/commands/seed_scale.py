@@ -0,0 +1,444 @@
+import random
+import time
+from itertools import islice
+from math import ceil, gcd
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from products import teaching_load
+from products.invalidation import bump_model_version
+from products.models import (
+    Department, SubjectGroup, Major, Curriculum, Course, SubjectType, Subject,
+    SemesterAllocation, Position, Instructor, Class, CombinedClass, TeachingAssignment,
+    normalize_search_text
+)
+from products.signals import TRACKED_MODELS
+
+# Danh mục dùng chung (không xóa khi --flush, dùng lại nếu đã có)
+SUBJECT_TYPES = [('DC', 'Đại cương'), ('CS', 'Cơ sở ngành'), ('CN', 'Chuyên ngành'), ('TT', 'Thực tập')]
+POSITIONS = ['Giảng viên', 'Giảng viên chính', 'Trưởng bộ môn', 'Phó trưởng khoa', 'Trưởng khoa']
+
+DEPARTMENT_NAMES = [
+    'Công nghệ thông tin', 'Điện - Điện tử', 'Cơ khí', 'Kinh tế', 'Du lịch - Khách sạn', 'Ngoại ngữ',
+    'Xây dựng', 'Hóa - Môi trường', 'Điều dưỡng', 'Khoa học cơ bản', 'Ô tô', 'Lý luận chính trị',
+]
+SUBJECT_TOPICS = [
+    'Lập trình căn bản', 'Cơ sở dữ liệu', 'Mạng máy tính', 'Kỹ thuật điện', 'Điện tử số', 'Vẽ kỹ thuật',
+    'Kế toán tài chính', 'Quản trị doanh nghiệp', 'Tiếng Anh chuyên ngành', 'Giáo dục chính trị',
+    'Pháp luật', 'Giáo dục thể chất', 'An toàn lao động', 'Vật liệu học', 'Thực tập tốt nghiệp',
+]
+FAMILY_NAMES = ['Nguyễn', 'Trần', 'Lê', 'Phạm', 'Hoàng', 'Huỳnh', 'Phan', 'Vũ', 'Võ', 'Đặng', 'Bùi', 'Đỗ']
+MIDDLE_NAMES = ['Văn', 'Thị', 'Hữu', 'Đức', 'Thanh', 'Minh', 'Ngọc', 'Quang', 'Thu', 'Hoài']
+GIVEN_NAMES = ['An', 'Bình', 'Chi', 'Dũng', 'Giang', 'Hà', 'Hải', 'Hùng', 'Lan', 'Long', 'Mai', 'Nam', 'Phương', 'Sơn', 'Trang', 'Tuấn']
+
+START_YEAR = 2024
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def coprime_stride(rng, capacity):
+    """Bước nhảy nguyên tố cùng nhau với capacity: i -> (i * stride) % capacity là hoán vị"""
+    if capacity <= 1:
+        return 1
+    while True:
+        stride = rng.randrange(capacity // 3 or 1, capacity)
+        if gcd(stride, capacity) == 1:
+            return stride
+
+
+class Command(BaseCommand):
+    help = (
+        'Generate a deterministic synthetic dataset (departments ... teaching assignments) '
+        'with bulk inserts for scale testing on a local Postgres or SQLite database'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--departments', type=int, default=12)
+        parser.add_argument('--groups-per-department', type=int, default=4)
+        parser.add_argument('--majors', type=int, default=10)
+        parser.add_argument('--curricula-per-major', type=int, default=3)
+        parser.add_argument('--courses-per-curriculum', type=int, default=3)
+        parser.add_argument('--subjects-per-curriculum', type=int, default=45)
+        parser.add_argument('--classes-per-course', type=int, default=3)
+        parser.add_argument('--instructors', type=int, default=800)
+        parser.add_argument('--combined-classes', type=int, default=500)
+        parser.add_argument('--assignments', type=int, default=100000, help='Teaching assignments to create (default 100000); academic years are added when classes x subjects is not enough')
+        parser.add_argument('--combined-ratio', type=float, default=0.1, help='Share of assignments taught to combined classes')
+        parser.add_argument('--seed', type=int, default=2024, help='Random seed; the same seed and sizes give the same data')
+        parser.add_argument('--prefix', default='SEED', help='Code prefix of generated rows (used by --flush)')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--flush', action='store_true', help='Delete rows generated earlier with the same prefix first')
+        parser.add_argument('--flush-only', action='store_true', help='Only delete rows generated earlier with the prefix')
+        parser.add_argument('--skip-summary', action='store_true', help='Do not rebuild the teaching load summary table')
+
+    def handle(self, *args, **options):
+        self.options = options
+        self.rng = random.Random(options['seed'])
+        self.prefix = f"{options['prefix']}-"
+        self.batch_size = options['batch_size']
+        for name in ('departments', 'majors', 'curricula_per_major', 'courses_per_curriculum',
+                     'subjects_per_curriculum', 'classes_per_course', 'instructors'):
+            if options[name] < 1:
+                raise CommandError(f"--{name.replace('_', '-')} must be at least 1")
+
+        if options['flush_only']:
+            self.timed('flush', self.flush)
+            bump_model_version(*TRACKED_MODELS)
+            if not options['skip_summary']:
+                self.timed('teaching load summary', teaching_load.rebuild_all)
+            return
+        if options['flush']:
+            self.timed('flush', self.flush)
+        elif Department.objects.filter(code__startswith=self.prefix).exists():
+            raise CommandError(f'Rows with prefix {self.prefix} already exist; rerun with --flush')
+
+        started = time.perf_counter()
+        with transaction.atomic():
+            self.timed('reference data', self.create_reference_data)
+            self.timed('departments', self.create_departments)
+            self.timed('curricula', self.create_curricula)
+            self.timed('subjects', self.create_subjects)
+            self.timed('instructors', self.create_instructors)
+            self.timed('classes', self.create_classes)
+            self.timed('combined classes', self.create_combined_classes)
+            self.timed('teaching assignments', self.create_assignments)
+
+        # bulk_create không phát signal: tự đánh dấu cache và dựng lại bảng tổng hợp
+        bump_model_version(*TRACKED_MODELS)
+        if not options['skip_summary']:
+            self.timed('teaching load summary', teaching_load.rebuild_all)
+        self.stdout.write(self.style.SUCCESS(f'Seeded in {time.perf_counter() - started:.1f}s'))
+
+    def timed(self, label, func):
+        started = time.perf_counter()
+        result = func()
+        detail = f' ({result})' if result is not None else ''
+        self.stdout.write(f'{label}: {time.perf_counter() - started:.1f}s{detail}')
+        return result
+
+    def bulk_create(self, model, objects):
+        count = 0
+        for batch in chunked(objects, self.batch_size):
+            model.objects.bulk_create(batch, batch_size=self.batch_size)
+            count += len(batch)
+        return count
+
+    # ----- Xóa dữ liệu đã sinh -----
+
+    def flush(self):
+        """Xóa theo thứ tự bảng con trước; _raw_delete bỏ qua signal (bảng tổng hợp được dựng lại sau)"""
+        prefix = self.prefix
+        querysets = [
+            TeachingAssignment.objects.filter(curriculum_subject__code__startswith=prefix),
+            TeachingAssignment.objects.filter(instructor__code__startswith=prefix),
+            TeachingAssignment.objects.filter(class_obj__code__startswith=prefix),
+            CombinedClass.classes.through.objects.filter(class__code__startswith=prefix),
+            CombinedClass.objects.filter(code__startswith=prefix),
+            SemesterAllocation.objects.filter(base_subject__code__startswith=prefix),
+            Subject.objects.filter(code__startswith=prefix),
+            Class.objects.filter(code__startswith=prefix),
+            Course.objects.filter(code__startswith=prefix),
+            Curriculum.objects.filter(code__startswith=prefix),
+            Major.objects.filter(code__startswith=prefix),
+            Instructor.objects.filter(code__startswith=prefix),
+            SubjectGroup.objects.filter(code__startswith=prefix),
+            Department.objects.filter(code__startswith=prefix),
+        ]
+        deleted = 0
+        with transaction.atomic():
+            for queryset in querysets:
+                deleted += queryset._raw_delete(queryset.db)
+        return f'{deleted} rows'
+
+    # ----- Sinh dữ liệu -----
+
+    def create_reference_data(self):
+        self.subject_type_ids = [
+            SubjectType.objects.get_or_create(code=code, defaults={'name': name})[0].id
+            for code, name in SUBJECT_TYPES
+        ]
+        self.position_ids = [Position.objects.get_or_create(name=name)[0].id for name in POSITIONS]
+
+    def create_departments(self):
+        prefix, count = self.prefix, self.options['departments']
+        self.bulk_create(Department, (
+            Department(
+                code=f'{prefix}D{index:03d}',
+                name=f'Khoa {DEPARTMENT_NAMES[index % len(DEPARTMENT_NAMES)]} {index + 1}',
+            )
+            for index in range(count)
+        ))
+        self.department_ids = list(
+            Department.objects.filter(code__startswith=prefix).order_by('code').values_list('id', flat=True)
+        )
+        groups = self.options['groups_per_department']
+        self.bulk_create(SubjectGroup, (
+            SubjectGroup(
+                department_id=department_id,
+                code=f'{prefix}D{index:03d}G{group:02d}',
+                name=f'Tổ bộ môn {group + 1} - Khoa {index + 1}',
+            )
+            for index, department_id in enumerate(self.department_ids)
+            for group in range(groups)
+        ))
+        self.group_ids_by_department = {}
+        for group_id, department_id in SubjectGroup.objects.filter(code__startswith=prefix).values_list('id', 'department_id'):
+            self.group_ids_by_department.setdefault(department_id, []).append(group_id)
+        return f'{len(self.department_ids)} departments, {len(self.department_ids) * groups} subject groups'
+
+    def create_curricula(self):
+        prefix, options = self.prefix, self.options
+        self.bulk_create(Major, (
+            Major(code=f'{prefix}M{index:03d}', name=f'Ngành {SUBJECT_TOPICS[index % len(SUBJECT_TOPICS)]} {index + 1}')
+            for index in range(options['majors'])
+        ))
+        major_ids = list(Major.objects.filter(code__startswith=prefix).order_by('code').values_list('id', flat=True))
+        self.bulk_create(Curriculum, (
+            Curriculum(
+                major_id=major_id,
+                code=f'{prefix}C{major_index:03d}{index:02d}',
+                name=f'Chương trình đào tạo ngành {major_index + 1} - {START_YEAR - index}',
+                academic_year=f'{START_YEAR - index}-{START_YEAR - index + 1}',
+                status='active',
+            )
+            for major_index, major_id in enumerate(major_ids)
+            for index in range(options['curricula_per_major'])
+        ))
+        self.curricula = list(
+            Curriculum.objects.filter(code__startswith=prefix).order_by('code').values_list('id', 'code', 'academic_year')
+        )
+        self.bulk_create(Course, (
+            Course(
+                curriculum_id=curriculum_id,
+                code=f'{code}K{index}',
+                name=f'Khóa {START_YEAR - index} - {code}',
+                start_year=START_YEAR - index,
+                end_year=START_YEAR - index + 3,
+                status='ongoing',
+                total_students=self.rng.randint(30, 120),
+            )
+            for curriculum_id, code, _ in self.curricula
+            for index in range(options['courses_per_curriculum'])
+        ))
+        self.courses = list(
+            Course.objects.filter(code__startswith=prefix).order_by('code').values_list('id', 'curriculum_id', 'code')
+        )
+        return f'{len(major_ids)} majors, {len(self.curricula)} curricula, {len(self.courses)} courses'
+
+    def subject_objects(self):
+        per_curriculum = self.options['subjects_per_curriculum']
+        first_course = {}
+        for course_id, curriculum_id, _ in self.courses:
+            first_course.setdefault(curriculum_id, course_id)
+        for curriculum_id, curriculum_code, _ in self.curricula:
+            for index in range(per_curriculum):
+                department_id = self.rng.choice(self.department_ids)
+                groups = self.group_ids_by_department.get(department_id)
+                credits = self.rng.choice([1, 2, 2, 3, 3, 3, 4])
+                theory = credits * 15 if index % 4 else credits * 10
+                practice = self.rng.choice([0, 15, 30, 45])
+                code = f'{curriculum_code}MH{index:03d}'
+                name = f'{SUBJECT_TOPICS[index % len(SUBJECT_TOPICS)]} {index // len(SUBJECT_TOPICS) + 1}'
+                yield Subject(
+                    code=code,
+                    original_code=f'MH{index:03d}',
+                    name=name,
+                    search_name=normalize_search_text(name, code),
+                    curriculum_id=curriculum_id,
+                    course_id=first_course.get(curriculum_id),
+                    subject_type_id=self.subject_type_ids[index * len(self.subject_type_ids) // per_curriculum],
+                    credits=credits,
+                    total_hours=theory + practice + 4,
+                    theory_hours=theory,
+                    practice_hours=practice,
+                    tests_hours=2,
+                    exam_hours=2,
+                    semester=1 + index * 6 // per_curriculum,
+                    department_id=department_id,
+                    subject_group_id=self.rng.choice(groups) if groups else None,
+                    order_number=index + 1,
+                )
+
+    def create_subjects(self):
+        count = self.bulk_create(Subject, self.subject_objects())
+        # (id, curriculum_id, department_id, semester, credits, total_hours) theo thứ tự trong chương trình
+        self.subjects = list(
+            Subject.objects.filter(code__startswith=self.prefix).order_by('code')
+            .values_list('id', 'curriculum_id', 'department_id', 'semester', 'credits', 'total_hours')
+        )
+        self.subjects_by_curriculum = {}
+        for subject in self.subjects:
+            self.subjects_by_curriculum.setdefault(subject[1], []).append(subject)
+
+        def allocations():
+            for subject_id, _, _, semester, credits, _ in self.subjects:
+                # Khoảng 1/5 số môn học chia tín chỉ cho hai học kỳ liên tiếp
+                if credits >= 2 and semester < 6 and self.rng.random() < 0.2:
+                    yield SemesterAllocation(base_subject_id=subject_id, semester=semester, credits=credits / 2)
+                    yield SemesterAllocation(base_subject_id=subject_id, semester=semester + 1, credits=credits / 2)
+                else:
+                    yield SemesterAllocation(base_subject_id=subject_id, semester=semester, credits=credits)
+        allocation_count = self.bulk_create(SemesterAllocation, allocations())
+        return f'{count} subjects, {allocation_count} semester allocations'
+
+    def create_instructors(self):
+        prefix = self.prefix
+
+        def instructors():
+            for index in range(self.options['instructors']):
+                full_name = ' '.join([
+                    self.rng.choice(FAMILY_NAMES), self.rng.choice(MIDDLE_NAMES), self.rng.choice(GIVEN_NAMES)
+                ])
+                code = f'{prefix}GV{index:05d}'
+                department_id = self.department_ids[index % len(self.department_ids)]
+                groups = self.group_ids_by_department.get(department_id)
+                yield Instructor(
+                    code=code,
+                    full_name=full_name,
+                    search_name=normalize_search_text(full_name, code),
+                    email=f'gv{index:05d}@seed.example.com',
+                    department_id=department_id,
+                    department_of_teacher_management_id=department_id,
+                    position_id=self.rng.choice(self.position_ids),
+                    subject_group_id=self.rng.choice(groups) if groups else None,
+                    is_active=self.rng.random() > 0.05,
+                )
+        count = self.bulk_create(Instructor, instructors())
+        self.instructor_ids_by_department = {}
+        for instructor_id, department_id in Instructor.objects.filter(code__startswith=prefix).values_list('id', 'department_id'):
+            self.instructor_ids_by_department.setdefault(department_id, []).append(instructor_id)
+        self.instructor_ids = [
+            instructor_id for ids in self.instructor_ids_by_department.values() for instructor_id in ids
+        ]
+        return f'{count} instructors'
+
+    def create_classes(self):
+        per_course = self.options['classes_per_course']
+
+        def classes():
+            for course_id, curriculum_id, course_code in self.courses:
+                for index in range(per_course):
+                    code = f'{course_code}L{index + 1}'
+                    name = f'Lớp {course_code} - {index + 1}'
+                    yield Class(
+                        code=code, name=name, search_name=normalize_search_text(name, code),
+                        curriculum_id=curriculum_id, course_id=course_id,
+                    )
+        count = self.bulk_create(Class, classes())
+        self.classes = list(
+            Class.objects.filter(code__startswith=self.prefix).order_by('code').values_list('id', 'curriculum_id', 'course_id')
+        )
+        return f'{count} classes'
+
+    def create_combined_classes(self):
+        count = self.options['combined_classes']
+        if count < 1:
+            self.combined_classes = []
+            return '0 combined classes'
+        classes_by_course = {}
+        for class_id, _, course_id in self.classes:
+            classes_by_course.setdefault(course_id, []).append(class_id)
+        courses = [(course_id, curriculum_id) for course_id, curriculum_id, _ in self.courses]
+
+        members = []
+        objects = []
+        for index in range(count):
+            course_id, curriculum_id = courses[index % len(courses)]
+            subject = self.rng.choice(self.subjects_by_curriculum[curriculum_id])
+            course_classes = classes_by_course[course_id]
+            members.append(self.rng.sample(course_classes, min(len(course_classes), self.rng.randint(2, 3))))
+            objects.append(CombinedClass(
+                code=f'{self.prefix}LG{index:06d}', name=f'Lớp ghép {index + 1}', subject_id=subject[0],
+            ))
+        self.bulk_create(CombinedClass, objects)
+        # (id, subject) theo thứ tự mã, cùng thứ tự với members
+        subjects_by_id = {subject[0]: subject for subject in self.subjects}
+        self.combined_classes = [
+            (combined_id, subjects_by_id[subject_id])
+            for combined_id, subject_id in CombinedClass.objects.filter(code__startswith=self.prefix)
+            .order_by('code').values_list('id', 'subject_id')
+        ]
+        through = CombinedClass.classes.through
+        link_count = self.bulk_create(through, (
+            through(combinedclass_id=combined_id, class_id=class_id)
+            for (combined_id, _), class_ids in zip(self.combined_classes, members)
+            for class_id in class_ids
+        ))
+        return f'{count} combined classes, {link_count} class links'
+
+    def create_assignments(self):
+        """Mỗi phân công chiếm một ô khác nhau của unique_together nên không bị trùng.
+
+        Ô thường là (năm học, lớp, môn học thứ k trong chương trình của lớp); ô
+        lớp ghép là (năm học, lớp ghép, giảng viên thứ k trong khoa của môn học).
+        Các ô được duyệt theo hoán vị i -> (i * stride) % capacity để phân bố đều
+        mà không phải giữ cả không gian ô trong bộ nhớ; số năm học tăng theo số
+        phân công cần tạo.
+        """
+        total = self.options['assignments']
+        combined_total = round(total * self.options['combined_ratio']) if self.combined_classes else 0
+        regular_total = total - combined_total
+
+        per_curriculum = self.options['subjects_per_curriculum']
+        regular_per_year = len(self.classes) * per_curriculum
+        years = ceil(regular_total / regular_per_year) if regular_total else 1
+        academic_years = [f'{START_YEAR - index}-{START_YEAR - index + 1}' for index in range(years)]
+
+        def instructors_for(subject):
+            return self.instructor_ids_by_department.get(subject[2]) or self.instructor_ids
+
+        # Số giảng viên khác nhau cần cho một lớp ghép trong một năm học
+        combined_per_year = len(self.combined_classes)
+        per_combined = ceil(combined_total / (combined_per_year * years)) if combined_total else 0
+        if per_combined > min((len(instructors_for(subject)) for _, subject in self.combined_classes), default=0):
+            raise CommandError(
+                'Not enough combined-class slots for the requested assignments; '
+                'raise --combined-classes or lower --combined-ratio'
+            )
+
+        def assignment(subject, year_index, instructor_id=None, **class_field):
+            subject_id, _, _, semester, _, total_hours = subject
+            return TeachingAssignment(
+                curriculum_subject_id=subject_id,
+                instructor_id=instructor_id or self.rng.choice(instructors_for(subject)),
+                academic_year=academic_years[year_index],
+                semester=semester,
+                is_main_instructor=self.rng.random() > 0.15,
+                student_count=self.rng.randint(15, 45),
+                teaching_hours=total_hours,
+                **class_field
+            )
+
+        def regular():
+            capacity = regular_per_year * years
+            stride = coprime_stride(self.rng, capacity)
+            for index in range(regular_total):
+                year_index, slot = divmod((index * stride) % capacity, regular_per_year)
+                class_index, subject_index = divmod(slot, per_curriculum)
+                class_id, curriculum_id, _ = self.classes[class_index]
+                yield assignment(
+                    self.subjects_by_curriculum[curriculum_id][subject_index], year_index, class_obj_id=class_id
+                )
+
+        def combined():
+            capacity = combined_per_year * years * per_combined
+            stride = coprime_stride(self.rng, capacity)
+            for index in range(combined_total):
+                year_index, slot = divmod((index * stride) % capacity, combined_per_year * per_combined)
+                combined_index, instructor_index = divmod(slot, per_combined)
+                combined_id, subject = self.combined_classes[combined_index]
+                instructors = instructors_for(subject)
+                instructor_id = instructors[(combined_index + year_index + instructor_index) % len(instructors)]
+                yield assignment(subject, year_index, instructor_id, combined_class_id=combined_id)
+
+        regular_count = self.bulk_create(TeachingAssignment, regular())
+        combined_count = self.bulk_create(TeachingAssignment, combined())
+        return f'{regular_count} regular + {combined_count} combined over {years} academic years'
@@ -1,8 +1,14 @@
-from django.db import DatabaseError, connection
-from django.http import JsonResponse
+from contextlib import ExitStack
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DatabaseError, connection, connections
+from .cache_backends import track_cache_stats
+from .http import FastJsonResponse, dumps
 import logging
+import time
 
 logger = logging.getLogger(__name__)
+metrics_logger = logging.getLogger('products.metrics')
 
 class DatabaseHealthCheckMiddleware:
     def __init__(self, get_response):
@@ -17,10 +23,77 @@ class DatabaseHealthCheckMiddleware:
                     logger.info("✅ Database connection healthy for admin request")
             except DatabaseError as e:
                 logger.error(f"❌ Database connection failed for admin: {e}")
-                return JsonResponse({
+                return FastJsonResponse({
                     'error': 'Database connection failed',
                     'details': str(e)
                 }, status=500)
         
         response = self.get_response(request)
-        return response
\ No newline at end of file
+        return response
+
+
+class QueryRecorder:
+    """execute_wrapper đếm số truy vấn và tổng thời gian thực thi (giây)"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+
+
+class RequestMetricsMiddleware:
+    """Đo số truy vấn, thời gian DB, hit/miss cache và thời gian xử lý mỗi request.
+
+    Kết quả được gửi trong header Server-Timing (tab Network của trình duyệt)
+    và ghi một dòng JSON vào logger 'products.metrics'. Bật bằng
+    settings.REQUEST_METRICS_ENABLED; khi tắt middleware tự gỡ khỏi chuỗi
+    (MiddlewareNotUsed) nên không tốn gì. Với response streaming, thời gian chỉ
+    tính tới khi view trả response, chưa gồm việc gửi nội dung.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'REQUEST_METRICS_ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        recorder = QueryRecorder()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for db in connections.all():
+                stack.enter_context(db.execute_wrapper(recorder))
+            cache_stats = stack.enter_context(track_cache_stats())
+            response = self.get_response(request)
+        total_ms = (time.perf_counter() - started) * 1000
+        db_ms = recorder.duration * 1000
+
+        timing = (
+            f'db;dur={db_ms:.1f};desc="{recorder.count} queries", '
+            f'cache;desc="hit={cache_stats["hits"]} miss={cache_stats["misses"]}", '
+            f'app;dur={total_ms - db_ms:.1f}, '
+            f'total;dur={total_ms:.1f}'
+        )
+        if response.has_header('Server-Timing'):
+            timing = f"{response['Server-Timing']}, {timing}"
+        response['Server-Timing'] = timing
+
+        match = getattr(request, 'resolver_match', None)
+        metrics_logger.info(dumps({
+            'method': request.method,
+            'path': request.path,
+            'view': match.view_name if match else None,
+            'status': response.status_code,
+            'queries': recorder.count,
+            'db_ms': round(db_ms, 1),
+            'cache_hits': cache_stats['hits'],
+            'cache_misses': cache_stats['misses'],
+            'total_ms': round(total_ms, 1),
+        }).decode())
+        return response
@@ -0,0 +1,318 @@
+# Generated by Django 5.2.7 on 2026-10-17 22:02
+
+import django.core.validators
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Department',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('code', models.CharField(max_length=20, unique=True, verbose_name='Mã khoa')),
+                ('name', models.CharField(max_length=255, verbose_name='Tên khoa')),
+                ('description', models.TextField(blank=True, null=True, verbose_name='Mô tả')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Khoa',
+                'verbose_name_plural': 'Các khoa',
+                'db_table': 'departments',
+            },
+        ),
+        migrations.CreateModel(
+            name='Major',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('code', models.CharField(max_length=20, unique=True, verbose_name='Mã ngành')),
+                ('name', models.CharField(max_length=255, verbose_name='Tên ngành')),
+                ('description', models.TextField(blank=True, null=True, verbose_name='Mô tả')),
+                ('duration_years', models.IntegerField(default=3, validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(6)], verbose_name='Thời gian đào tạo (năm)')),
+                ('total_credits', models.IntegerField(default=0, verbose_name='Tổng số tín chỉ')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Ngành đào tạo',
+                'verbose_name_plural': 'Các ngành đào tạo',
+                'db_table': 'majors',
+            },
+        ),
+        migrations.CreateModel(
+            name='Position',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True, verbose_name='Tên chức vụ')),
+                ('description', models.TextField(blank=True, null=True, verbose_name='Mô tả')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Chức vụ',
+                'verbose_name_plural': 'Các chức vụ',
+                'db_table': 'positions',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='SubjectType',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('code', models.CharField(max_length=20, unique=True, verbose_name='Mã loại môn học')),
+                ('name', models.CharField(max_length=100, verbose_name='Tên loại môn học')),
+                ('description', models.TextField(blank=True, null=True, verbose_name='Mô tả')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Loại môn học',
+                'verbose_name_plural': 'Các loại môn học',
+                'db_table': 'subject_types',
+            },
+        ),
+        migrations.CreateModel(
+            name='Curriculum',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('code', models.CharField(max_length=50, unique=True, verbose_name='Mã chương trình')),
+                ('name', models.CharField(max_length=255, verbose_name='Tên chương trình')),
+                ('academic_year', models.CharField(max_length=20, verbose_name='Năm học áp dụng')),
+                ('description', models.TextField(blank=True, null=True, verbose_name='Mô tả')),
+                ('total_credits', models.IntegerField(default=0, verbose_name='Tổng số tín chỉ')),
+                ('total_hours', models.IntegerField(default=0, verbose_name='Tổng số giờ')),
+                ('theory_hours', models.IntegerField(default=0, verbose_name='Số giờ lý thuyết')),
+                ('practice_hours', models.IntegerField(default=0, verbose_name='Số giờ thực hành')),
+                ('status', models.CharField(choices=[('draft', 'Bản nháp'), ('under_review', 'Chờ duyệt'), ('approved', 'Đã phê duyệt'), ('active', 'Đang áp dụng'), ('archived', 'Lưu trữ')], default='draft', max_length=20, verbose_name='Trạng thái')),
+                ('version', models.CharField(default='1.0', max_length=10, verbose_name='Phiên bản')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('approved_at', models.DateTimeField(blank=True, null=True, verbose_name='Thời gian phê duyệt')),
+                ('approved_by', models.ForeignKey(blank=True, db_column='approved_by', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='approved_curricula', to=settings.AUTH_USER_MODEL, verbose_name='Người phê duyệt')),
+                ('created_by', models.ForeignKey(db_column='created_by', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='created_curricula', to=settings.AUTH_USER_MODEL, verbose_name='Người tạo')),
+                ('major', models.ForeignKey(db_column='major_id', on_delete=django.db.models.deletion.CASCADE, to='products.major', verbose_name='Ngành đào tạo')),
+            ],
+            options={
+                'verbose_name': 'Chương trình đào tạo',
+                'verbose_name_plural': 'Các chương trình đào tạo',
+                'db_table': 'curricula',
+                'ordering': ['-academic_year', 'major'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Course',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('code', models.CharField(max_length=50, unique=True, verbose_name='Mã khóa học')),
+                ('name', models.CharField(max_length=255, verbose_name='Tên khóa học')),
+                ('start_year', models.IntegerField(verbose_name='Năm bắt đầu')),
+                ('end_year', models.IntegerField(verbose_name='Năm kết thúc')),
+                ('status', models.CharField(choices=[('planned', 'Đã lập kế hoạch'), ('enrolling', 'Đang tuyển sinh'), ('ongoing', 'Đang đào tạo'), ('completed', 'Đã hoàn thành'), ('cancelled', 'Đã hủy')], default='planned', max_length=20, verbose_name='Trạng thái')),
+                ('total_students', models.IntegerField(default=0, verbose_name='Tổng số sinh viên')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('curriculum', models.ForeignKey(db_column='curriculum_id', on_delete=django.db.models.deletion.CASCADE, related_name='courses', to='products.curriculum', verbose_name='Chương trình đào tạo')),
+            ],
+            options={
+                'verbose_name': 'Khóa học',
+                'verbose_name_plural': 'Các khóa học',
+                'db_table': 'courses',
+                'ordering': ['-start_year'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Class',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('code', models.CharField(max_length=50, verbose_name='Mã lớp')),
+                ('name', models.CharField(max_length=255, verbose_name='Tên lớp')),
+                ('start_date', models.DateField(blank=True, null=True, verbose_name='Ngày bắt đầu')),
+                ('end_date', models.DateField(blank=True, null=True, verbose_name='Ngày kết thúc')),
+                ('is_combined', models.BooleanField(default=False, verbose_name='Là lớp ghép')),
+                ('combined_class_code', models.CharField(blank=True, max_length=50, null=True, verbose_name='Mã lớp ghép (nếu có)')),
+                ('description', models.TextField(blank=True, null=True, verbose_name='Mô tả')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='classes', to='products.course', verbose_name='Khóa học')),
+                ('curriculum', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='classes', to='products.curriculum', verbose_name='Chương trình đào tạo')),
+            ],
+            options={
+                'verbose_name': 'Lớp học',
+                'verbose_name_plural': 'Các lớp học',
+                'db_table': 'classes',
+                'ordering': ['code'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ImportHistory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file_name', models.CharField(max_length=255, verbose_name='Tên file')),
+                ('file_size', models.IntegerField(blank=True, null=True, verbose_name='Kích thước file')),
+                ('record_count', models.IntegerField(default=0, verbose_name='Số bản ghi')),
+                ('status', models.CharField(choices=[('success', 'Thành công'), ('partial', 'Thành công một phần'), ('failed', 'Thất bại')], default='success', max_length=20, verbose_name='Trạng thái')),
+                ('errors', models.JSONField(blank=True, null=True, verbose_name='Lỗi')),
+                ('additional_info', models.TextField(blank=True, null=True, verbose_name='Thông tin bổ sung')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('curriculum', models.ForeignKey(blank=True, db_column='curriculum_id', null=True, on_delete=django.db.models.deletion.SET_NULL, to='products.curriculum', verbose_name='Chương trình đào tạo')),
+                ('imported_by', models.ForeignKey(db_column='imported_by', null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL, verbose_name='Người import')),
+            ],
+            options={
+                'verbose_name': 'Lịch sử import',
+                'verbose_name_plural': 'Lịch sử import',
+                'db_table': 'import_history',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Subject',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('code', models.CharField(max_length=50, unique=True, verbose_name='Mã môn học')),
+                ('name', models.CharField(max_length=255, verbose_name='Tên môn học')),
+                ('credits', models.DecimalField(decimal_places=2, default=0, max_digits=4, validators=[django.core.validators.MinValueValidator(0)], verbose_name='Số tín chỉ')),
+                ('total_hours', models.IntegerField(default=0, verbose_name='Tổng số giờ')),
+                ('theory_hours', models.IntegerField(default=0, verbose_name='Số giờ lý thuyết')),
+                ('practice_hours', models.IntegerField(default=0, verbose_name='Số giờ thực hành')),
+                ('tests_hours', models.IntegerField(default=0, verbose_name='Số giờ kiểm tra')),
+                ('exam_hours', models.IntegerField(default=0, verbose_name='Số giờ thi')),
+                ('semester', models.IntegerField(blank=True, null=True, validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(8)], verbose_name='Học kỳ mặc định')),
+                ('is_elective', models.BooleanField(default=False, verbose_name='Là môn tự chọn')),
+                ('elective_group', models.CharField(blank=True, max_length=50, null=True, verbose_name='Nhóm môn tự chọn')),
+                ('prerequisites', models.TextField(blank=True, null=True, verbose_name='Điều kiện tiên quyết')),
+                ('learning_outcomes', models.TextField(blank=True, null=True, verbose_name='Chuẩn đầu ra')),
+                ('description', models.TextField(blank=True, null=True, verbose_name='Mô tả')),
+                ('order_number', models.IntegerField(default=0, verbose_name='Thứ tự trong chương trình')),
+                ('original_code', models.CharField(max_length=20, verbose_name='Mã gốc từ file import')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('course', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='products.course', verbose_name='Khóa học')),
+                ('curriculum', models.ForeignKey(blank=True, on_delete=django.db.models.deletion.CASCADE, to='products.curriculum', verbose_name='Chương trình đào tạo')),
+                ('department', models.ForeignKey(blank=True, db_column='department_id', null=True, on_delete=django.db.models.deletion.SET_NULL, to='products.department', verbose_name='Đơn vị quản lý')),
+            ],
+            options={
+                'verbose_name': 'Môn học trong chương trình',
+                'verbose_name_plural': 'Các môn học trong chương trình',
+                'db_table': 'subjects',
+                'ordering': ['curriculum', 'order_number'],
+            },
+        ),
+        migrations.CreateModel(
+            name='CombinedClass',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('code', models.CharField(max_length=50, verbose_name='Mã lớp ghép')),
+                ('name', models.CharField(max_length=255, verbose_name='Tên lớp ghép')),
+                ('description', models.TextField(blank=True, null=True, verbose_name='Mô tả')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('classes', models.ManyToManyField(related_name='combined_classes', to='products.class', verbose_name='Các lớp được ghép')),
+                ('subject', models.ForeignKey(blank=True, db_column='subject_id', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='combined_classes', to='products.subject', verbose_name='Môn học')),
+            ],
+            options={
+                'verbose_name': 'Lớp học ghép',
+                'verbose_name_plural': 'Các lớp học ghép',
+                'db_table': 'combined_classes',
+            },
+        ),
+        migrations.CreateModel(
+            name='SubjectGroup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('code', models.CharField(max_length=20, unique=True, verbose_name='Mã tổ bộ môn')),
+                ('name', models.CharField(max_length=255, verbose_name='Tên tổ bộ môn')),
+                ('description', models.TextField(blank=True, null=True, verbose_name='Mô tả')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('department', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, to='products.department', verbose_name='Khoa quản lý')),
+            ],
+            options={
+                'verbose_name': 'Tổ bộ môn',
+                'verbose_name_plural': 'Các tổ bộ môn',
+                'db_table': 'subject_groups',
+            },
+        ),
+        migrations.AddField(
+            model_name='subject',
+            name='subject_group',
+            field=models.ForeignKey(blank=True, db_column='subject_group_id', null=True, on_delete=django.db.models.deletion.SET_NULL, to='products.subjectgroup', verbose_name='Tổ bộ môn'),
+        ),
+        migrations.CreateModel(
+            name='Instructor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('code', models.CharField(max_length=20, unique=True, verbose_name='Mã giảng viên')),
+                ('full_name', models.CharField(max_length=255, verbose_name='Họ và tên')),
+                ('email', models.EmailField(blank=True, max_length=254, null=True, verbose_name='Email')),
+                ('phone', models.CharField(blank=True, max_length=20, null=True, verbose_name='Số điện thoại')),
+                ('is_active', models.BooleanField(default=True, verbose_name='Đang hoạt động')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('department', models.ForeignKey(blank=True, db_column='department_id', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='instructors', to='products.department', verbose_name='Khoa')),
+                ('department_of_teacher_management', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='managed_instructors', to='products.department', verbose_name='Khoa quản lý giảng viên')),
+                ('position', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='instructors', to='products.position', verbose_name='Chức vụ')),
+                ('subject_group', models.ForeignKey(blank=True, db_column='subject_group_id', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='instructors', to='products.subjectgroup', verbose_name='Tổ bộ môn')),
+            ],
+            options={
+                'verbose_name': 'Giảng viên',
+                'verbose_name_plural': 'Các giảng viên',
+                'db_table': 'instructors',
+                'ordering': ['full_name'],
+            },
+        ),
+        migrations.AddField(
+            model_name='subject',
+            name='subject_type',
+            field=models.ForeignKey(db_column='subject_type_id', null=True, on_delete=django.db.models.deletion.SET_NULL, to='products.subjecttype', verbose_name='Loại môn học'),
+        ),
+        migrations.CreateModel(
+            name='SemesterAllocation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('semester', models.IntegerField(validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(12)], verbose_name='Học kỳ')),
+                ('credits', models.DecimalField(decimal_places=2, max_digits=4, validators=[django.core.validators.MinValueValidator(0)], verbose_name='Số tín chỉ')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('base_subject', models.ForeignKey(db_column='subject_id', on_delete=django.db.models.deletion.CASCADE, related_name='semester_allocations', to='products.subject', verbose_name='Môn học trong chương trình')),
+            ],
+            options={
+                'verbose_name': 'Phân bố học kỳ',
+                'verbose_name_plural': 'Phân bố học kỳ',
+                'db_table': 'semester_allocations',
+                'ordering': ['semester'],
+                'unique_together': {('base_subject', 'semester')},
+            },
+        ),
+        migrations.CreateModel(
+            name='TeachingAssignment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('academic_year', models.CharField(max_length=20, verbose_name='Năm học')),
+                ('semester', models.IntegerField(validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(12)], verbose_name='Học kỳ')),
+                ('is_main_instructor', models.BooleanField(default=True, verbose_name='Là giảng viên chính')),
+                ('student_count', models.IntegerField(default=0, verbose_name='Số lượng sinh viên')),
+                ('teaching_hours', models.IntegerField(default=0, verbose_name='Số giờ giảng dạy')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('class_obj', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='teaching_assignments', to='products.class', verbose_name='Lớp học')),
+                ('combined_class', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='teaching_assignments', to='products.combinedclass', verbose_name='Lớp học ghép')),
+                ('curriculum_subject', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='teaching_assignments', to='products.subject', verbose_name='Môn học trong chương trình')),
+                ('instructor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='teaching_assignments', to='products.instructor', verbose_name='Giảng viên')),
+            ],
+            options={
+                'verbose_name': 'Phân công giảng dạy',
+                'verbose_name_plural': 'Phân công giảng dạy',
+                'db_table': 'teaching_assignments',
+                'ordering': ['-academic_year', 'semester'],
+                'unique_together': {('curriculum_subject', 'instructor', 'academic_year', 'semester', 'class_obj'), ('curriculum_subject', 'instructor', 'academic_year', 'semester', 'combined_class')},
+            },
+        ),
+    ]
@@ -0,0 +1,83 @@
+# Generated by Django 5.2.7 on 2026-10-17 22:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importhistory',
+            name='created_count',
+            field=models.IntegerField(default=0, verbose_name='Số bản ghi tạo mới'),
+        ),
+        migrations.AddField(
+            model_name='importhistory',
+            name='finished_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Kết thúc'),
+        ),
+        migrations.AddField(
+            model_name='importhistory',
+            name='object_type',
+            field=models.CharField(blank=True, max_length=50, null=True, verbose_name='Loại dữ liệu import'),
+        ),
+        migrations.AddField(
+            model_name='importhistory',
+            name='processed_rows',
+            field=models.IntegerField(default=0, verbose_name='Số dòng đã xử lý'),
+        ),
+        migrations.AddField(
+            model_name='importhistory',
+            name='result',
+            field=models.JSONField(blank=True, null=True, verbose_name='Kết quả'),
+        ),
+        migrations.AddField(
+            model_name='importhistory',
+            name='started_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Bắt đầu'),
+        ),
+        migrations.AddField(
+            model_name='importhistory',
+            name='total_rows',
+            field=models.IntegerField(default=0, verbose_name='Tổng số dòng'),
+        ),
+        migrations.AddField(
+            model_name='importhistory',
+            name='updated_count',
+            field=models.IntegerField(default=0, verbose_name='Số bản ghi cập nhật'),
+        ),
+        migrations.AlterField(
+            model_name='importhistory',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Đang chờ'), ('running', 'Đang xử lý'), ('success', 'Thành công'), ('partial', 'Thành công một phần'), ('failed', 'Thất bại')], default='success', max_length=20, verbose_name='Trạng thái'),
+        ),
+        migrations.CreateModel(
+            name='TeachingLoadSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(choices=[('instructor', 'Giảng viên'), ('curriculum', 'Chương trình đào tạo'), ('department', 'Đơn vị'), ('department_teacher', 'Đơn vị quản lý giảng viên')], max_length=30, verbose_name='Phạm vi')),
+                ('object_id', models.BigIntegerField(blank=True, null=True, verbose_name='ID đối tượng')),
+                ('code', models.CharField(blank=True, max_length=50, null=True, verbose_name='Mã')),
+                ('name', models.CharField(blank=True, max_length=255, null=True, verbose_name='Tên')),
+                ('total_assignments', models.IntegerField(default=0, verbose_name='Số phân công')),
+                ('total_students', models.IntegerField(default=0, verbose_name='Tổng số sinh viên')),
+                ('total_hours', models.IntegerField(default=0, verbose_name='Tổng số giờ')),
+                ('total_instructors', models.IntegerField(default=0, verbose_name='Số giảng viên')),
+                ('total_subjects', models.IntegerField(default=0, verbose_name='Số môn học')),
+                ('regular_class_count', models.IntegerField(default=0, verbose_name='Số lớp thường')),
+                ('combined_class_count', models.IntegerField(default=0, verbose_name='Số lớp ghép')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Tổng hợp phân công giảng dạy',
+                'verbose_name_plural': 'Tổng hợp phân công giảng dạy',
+                'db_table': 'teaching_load_summary',
+                'ordering': ['scope', 'object_id'],
+                'unique_together': {('scope', 'object_id')},
+            },
+        ),
+    ]
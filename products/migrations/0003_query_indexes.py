@@ -0,0 +1,39 @@
+# Generated by Django 5.2.7 on 2026-10-17 22:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0002_import_jobs_teaching_load'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='class',
+            name='code',
+            field=models.CharField(db_index=True, max_length=50, verbose_name='Mã lớp'),
+        ),
+        migrations.AlterField(
+            model_name='combinedclass',
+            name='code',
+            field=models.CharField(db_index=True, max_length=50, verbose_name='Mã lớp ghép'),
+        ),
+        migrations.AddIndex(
+            model_name='subject',
+            index=models.Index(fields=['curriculum', 'order_number', 'id'], name='subjects_curr_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='subject',
+            index=models.Index(fields=['course', 'order_number', 'id'], name='subjects_course_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='teachingassignment',
+            index=models.Index(fields=['academic_year', 'semester'], name='ta_year_semester_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='teachingassignment',
+            index=models.Index(fields=['instructor', 'academic_year', 'semester'], name='ta_instructor_year_sem_idx'),
+        ),
+    ]
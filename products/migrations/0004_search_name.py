@@ -0,0 +1,60 @@
+# Generated by Django 5.2.7 on 2026-10-17 22:04
+
+import unicodedata
+
+from django.db import migrations, models
+
+# (model, các trường ghép thành chuỗi tìm kiếm)
+SEARCH_SOURCES = [
+    ('Instructor', ('full_name', 'code')),
+    ('Subject', ('name', 'code')),
+    ('Class', ('name', 'code')),
+]
+
+
+def normalize_search_text(*parts):
+    # Bản sao của models.normalize_search_text để migration không phụ thuộc code hiện tại
+    text = ' '.join(str(part) for part in parts if part)
+    text = text.replace('đ', 'd').replace('Đ', 'D')
+    text = ''.join(ch for ch in unicodedata.normalize('NFD', text) if not unicodedata.combining(ch))
+    return ' '.join(text.lower().split())
+
+
+def fill_search_name(apps, schema_editor):
+    for model_name, fields in SEARCH_SOURCES:
+        model = apps.get_model('products', model_name)
+        batch = []
+        for obj in model.objects.only('id', *fields).iterator(chunk_size=2000):
+            obj.search_name = normalize_search_text(*(getattr(obj, field) for field in fields))
+            batch.append(obj)
+            if len(batch) >= 2000:
+                model.objects.bulk_update(batch, ['search_name'])
+                batch = []
+        if batch:
+            model.objects.bulk_update(batch, ['search_name'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0003_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='class',
+            name='search_name',
+            field=models.CharField(blank=True, default='', editable=False, max_length=320, verbose_name='Chuỗi tìm kiếm'),
+        ),
+        migrations.AddField(
+            model_name='instructor',
+            name='search_name',
+            field=models.CharField(blank=True, default='', editable=False, max_length=320, verbose_name='Chuỗi tìm kiếm'),
+        ),
+        migrations.AddField(
+            model_name='subject',
+            name='search_name',
+            field=models.CharField(blank=True, default='', editable=False, max_length=320, verbose_name='Chuỗi tìm kiếm'),
+        ),
+        migrations.RunPython(fill_search_name, migrations.RunPython.noop),
+    ]
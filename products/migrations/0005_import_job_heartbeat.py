@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-17 23:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0004_search_name'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importhistory',
+            name='heartbeat_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Heartbeat'),
+        ),
+    ]
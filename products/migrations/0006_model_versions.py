@@ -0,0 +1,25 @@
+# Generated by Django 5.2.7 on 2026-10-17 23:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0005_import_job_heartbeat'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ModelVersion',
+            fields=[
+                ('label', models.CharField(max_length=100, primary_key=True, serialize=False, verbose_name='Model')),
+                ('version', models.BigIntegerField(default=0, verbose_name='Phiên bản')),
+            ],
+            options={
+                'verbose_name': 'Phiên bản dữ liệu',
+                'verbose_name_plural': 'Phiên bản dữ liệu',
+                'db_table': 'model_versions',
+            },
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.7 on 2026-10-18 09:12
+
+from django.db import DatabaseError, migrations
+
+# search.search_postgres lọc bằng search_name LIKE '%q%' / search_name % q
+TRIGRAM_TABLES = ['instructors', 'subjects', 'classes']
+# Index trên UPPER(full_name) của bản 0003 cũ: tìm kiếm không còn dùng full_name
+OLD_INSTRUCTOR_NAME_INDEX = 'instructors_full_name_trgm'
+
+
+def create_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    try:
+        schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    except DatabaseError as e:
+        raise RuntimeError(
+            'Migration này cần extension pg_trgm cho index tìm kiếm: nhờ superuser chạy '
+            '"CREATE EXTENSION pg_trgm;" trên database rồi chạy lại migrate'
+        ) from e
+    schema_editor.execute(f'DROP INDEX IF EXISTS {OLD_INSTRUCTOR_NAME_INDEX}')
+    for table in TRIGRAM_TABLES:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {table}_search_name_trgm '
+            f'ON {table} USING gin (search_name gin_trgm_ops)'
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        for table in TRIGRAM_TABLES:
+            schema_editor.execute(f'DROP INDEX IF EXISTS {table}_search_name_trgm')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0006_model_versions'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
@@ -1,5 +1,5 @@
 # models.py
-from django.db import models
+from django.db import models, transaction, IntegrityError
 from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
 from django.core.validators import MinValueValidator, MaxValueValidator
@@ -7,6 +7,21 @@ from django.utils import timezone
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 import re
+import unicodedata
+
+from .codes import CodeAllocator, lock_codes
+
+
+def normalize_search_text(*parts):
+    """Chuỗi dùng để tìm kiếm: chữ thường, bỏ dấu tiếng Việt, gộp khoảng trắng.
+
+    Tên đặt trước mã để tìm theo đầu tên được xếp hạng 'khớp đầu chuỗi'.
+    """
+    text = ' '.join(str(part) for part in parts if part)
+    text = text.replace('đ', 'd').replace('Đ', 'D')
+    text = ''.join(ch for ch in unicodedata.normalize('NFD', text) if not unicodedata.combining(ch))
+    return ' '.join(text.lower().split())
+
 
 class Department(models.Model):
     code = models.CharField(max_length=20, unique=True, verbose_name="Mã khoa")
@@ -275,6 +290,7 @@ class Subject(models.Model):
      # Thông tin hệ thống
     order_number = models.IntegerField(default=0, verbose_name="Thứ tự trong chương trình")
     original_code = models.CharField(max_length=20, verbose_name="Mã gốc từ file import")
+    search_name = models.CharField(max_length=320, blank=True, default='', editable=False, verbose_name="Chuỗi tìm kiếm")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
         
@@ -283,6 +299,13 @@ class Subject(models.Model):
         verbose_name = 'Môn học trong chương trình'
         verbose_name_plural = 'Các môn học trong chương trình'
         ordering = ['curriculum', 'order_number']
+        indexes = [
+            # Lưới môn học: lọc theo chương trình / khóa, phân trang keyset theo (order_number, id)
+            models.Index(fields=['curriculum', 'order_number', 'id'], name='subjects_curr_order_idx'),
+            models.Index(fields=['course', 'order_number', 'id'], name='subjects_course_order_idx'),
+        ]
+
+    CODE_SAVE_ATTEMPTS = 3
 
     def __str__(self):
         return f"{self.code} - {self.name} ({self.curriculum.code})"
@@ -297,23 +320,28 @@ class Subject(models.Model):
         base_code = self.original_code or re.sub(r'[^A-Z0-9]', '', self.name.upper())[:10]
         curriculum_prefix = self.curriculum.code.replace(' ', '_').upper()[:10]
         
-        # Tạo mã cơ sở
+        # Tạo mã cơ sở; các mã đã dùng cùng tiền tố được lấy bằng một truy vấn
         proposed_code = f"{curriculum_prefix}_{base_code}"
-        
-        # Kiểm tra và tạo mã duy nhất
-        counter = 1
-        unique_code = proposed_code
-        while Subject.objects.filter(code=unique_code).exists():
-            unique_code = f"{proposed_code}_{counter}"
-            counter += 1
-            
-        return unique_code
+        return CodeAllocator(Subject.objects.all()).allocate(proposed_code)
 
     def save(self, *args, **kwargs):
         # Tự động tạo mã duy nhất nếu chưa có
-        if not self.code:
-            self.code = self.generate_unique_code()
-        super().save(*args, **kwargs)
+        if self.code:
+            self.search_name = normalize_search_text(self.name, self.code)
+            return super().save(*args, **kwargs)
+
+        for attempt in range(self.CODE_SAVE_ATTEMPTS):
+            try:
+                with transaction.atomic():
+                    lock_codes(Subject)
+                    self.code = self.generate_unique_code()
+                    self.search_name = normalize_search_text(self.name, self.code)
+                    return super().save(*args, **kwargs)
+            except IntegrityError:
+                # Chỉ thử lại khi mã vừa chọn đã bị một request khác dùng (database không có advisory lock)
+                if attempt == self.CODE_SAVE_ATTEMPTS - 1 or not Subject.objects.filter(code=self.code).exists():
+                    raise
+                self.code = ''
 
 class SemesterAllocation(models.Model):
     base_subject = models.ForeignKey(
@@ -401,6 +429,7 @@ class Instructor(models.Model):
         db_column="subject_group_id"
     )
     is_active = models.BooleanField(default=True, verbose_name="Đang hoạt động")
+    search_name = models.CharField(max_length=320, blank=True, default='', editable=False, verbose_name="Chuỗi tìm kiếm")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -413,9 +442,13 @@ class Instructor(models.Model):
     def __str__(self):
         return f"{self.code} - {self.full_name}"
 
+    def save(self, *args, **kwargs):
+        self.search_name = normalize_search_text(self.full_name, self.code)
+        super().save(*args, **kwargs)
+
 class Class(models.Model):
     """Lớp học - mỗi lớp học có thể học nhiều môn học"""
-    code = models.CharField(max_length=50, unique=False, verbose_name="Mã lớp")
+    code = models.CharField(max_length=50, unique=False, db_index=True, verbose_name="Mã lớp")
     name = models.CharField(max_length=255, verbose_name="Tên lớp")
     curriculum = models.ForeignKey(
         Curriculum,
@@ -433,6 +466,7 @@ class Class(models.Model):
     end_date = models.DateField(blank=True, null=True, verbose_name="Ngày kết thúc")
     is_combined = models.BooleanField(default=False, verbose_name="Là lớp ghép")
     combined_class_code = models.CharField(max_length=50, blank=True, null=True, verbose_name="Mã lớp ghép (nếu có)")
+    search_name = models.CharField(max_length=320, blank=True, default='', editable=False, verbose_name="Chuỗi tìm kiếm")
     description = models.TextField(blank=True, null=True, verbose_name="Mô tả")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -462,11 +496,12 @@ class Class(models.Model):
     
     def save(self, *args, **kwargs):
         self.clean()
+        self.search_name = normalize_search_text(self.name, self.code)
         super().save(*args, **kwargs)
 
 class CombinedClass(models.Model):
     """Lớp học ghép - quản lý các lớp học được ghép với nhau"""
-    code = models.CharField(max_length=50, unique=False, verbose_name="Mã lớp ghép")
+    code = models.CharField(max_length=50, unique=False, db_index=True, verbose_name="Mã lớp ghép")
     name = models.CharField(max_length=255, verbose_name="Tên lớp ghép")
     classes = models.ManyToManyField(
         Class,
@@ -554,6 +589,10 @@ class TeachingAssignment(models.Model):
             ['curriculum_subject', 'instructor', 'academic_year', 'semester', 'combined_class']
         ]
         ordering = ['-academic_year', 'semester']
+        indexes = [
+            models.Index(fields=['academic_year', 'semester'], name='ta_year_semester_idx'),
+            models.Index(fields=['instructor', 'academic_year', 'semester'], name='ta_instructor_year_sem_idx'),
+        ]
 
     def __str__(self):
         role = "Chính" if self.is_main_instructor else "Phụ"
@@ -593,12 +632,52 @@ class TeachingAssignment(models.Model):
             return self.combined_class.code
         return "Không xác định"
 
+class TeachingLoadSummary(models.Model):
+    """Bảng tổng hợp phân công giảng dạy, được tính sẵn cho trang thống kê.
+
+    Mỗi dòng là số liệu của một đối tượng (giảng viên, chương trình, đơn vị,
+    đơn vị quản lý giảng viên); được cập nhật theo từng khóa khi phân công
+    thay đổi (teaching_load.py) hoặc dựng lại bằng lệnh refresh_teaching_load.
+    """
+    SCOPE_CHOICES = [
+        ('instructor', 'Giảng viên'),
+        ('curriculum', 'Chương trình đào tạo'),
+        ('department', 'Đơn vị'),
+        ('department_teacher', 'Đơn vị quản lý giảng viên'),
+    ]
+
+    scope = models.CharField(max_length=30, choices=SCOPE_CHOICES, verbose_name="Phạm vi")
+    object_id = models.BigIntegerField(null=True, blank=True, verbose_name="ID đối tượng")
+    code = models.CharField(max_length=50, blank=True, null=True, verbose_name="Mã")
+    name = models.CharField(max_length=255, blank=True, null=True, verbose_name="Tên")
+    total_assignments = models.IntegerField(default=0, verbose_name="Số phân công")
+    total_students = models.IntegerField(default=0, verbose_name="Tổng số sinh viên")
+    total_hours = models.IntegerField(default=0, verbose_name="Tổng số giờ")
+    total_instructors = models.IntegerField(default=0, verbose_name="Số giảng viên")
+    total_subjects = models.IntegerField(default=0, verbose_name="Số môn học")
+    regular_class_count = models.IntegerField(default=0, verbose_name="Số lớp thường")
+    combined_class_count = models.IntegerField(default=0, verbose_name="Số lớp ghép")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'teaching_load_summary'
+        verbose_name = 'Tổng hợp phân công giảng dạy'
+        verbose_name_plural = 'Tổng hợp phân công giảng dạy'
+        unique_together = ['scope', 'object_id']
+        ordering = ['scope', 'object_id']
+
+    def __str__(self):
+        return f"{self.get_scope_display()} - {self.code or 'Không xác định'}"
+
 class ImportHistory(models.Model):
     STATUS_CHOICES = [
+        ('pending', 'Đang chờ'),
+        ('running', 'Đang xử lý'),
         ('success', 'Thành công'),
         ('partial', 'Thành công một phần'),
         ('failed', 'Thất bại'),
     ]
+    FINISHED_STATUSES = ('success', 'partial', 'failed')
     
     curriculum = models.ForeignKey(
         Curriculum, 
@@ -626,8 +705,23 @@ class ImportHistory(models.Model):
     )
     errors = models.JSONField(blank=True, null=True, verbose_name="Lỗi")
     additional_info = models.TextField(blank=True, null=True, verbose_name="Thông tin bổ sung")
+    # Thông tin job import chạy nền
+    object_type = models.CharField(max_length=50, blank=True, null=True, verbose_name="Loại dữ liệu import")
+    total_rows = models.IntegerField(default=0, verbose_name="Tổng số dòng")
+    processed_rows = models.IntegerField(default=0, verbose_name="Số dòng đã xử lý")
+    created_count = models.IntegerField(default=0, verbose_name="Số bản ghi tạo mới")
+    updated_count = models.IntegerField(default=0, verbose_name="Số bản ghi cập nhật")
+    result = models.JSONField(blank=True, null=True, verbose_name="Kết quả")
+    started_at = models.DateTimeField(null=True, blank=True, verbose_name="Bắt đầu")
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name="Kết thúc")
+    # Process đang giữ job ghi định kỳ; job mất heartbeat bị coi là đã dừng (jobs.fail_stale_jobs)
+    heartbeat_at = models.DateTimeField(null=True, blank=True, verbose_name="Heartbeat")
     created_at = models.DateTimeField(auto_now_add=True)
 
+    @property
+    def is_finished(self):
+        return self.status in self.FINISHED_STATUSES
+
     class Meta:
         db_table = 'import_history'
         verbose_name = 'Lịch sử import'
@@ -636,3 +730,21 @@ class ImportHistory(models.Model):
 
     def __str__(self):
         return f"{self.file_name} - {self.created_at.strftime('%d/%m/%Y %H:%M')}"
+
+
+class ModelVersion(models.Model):
+    """Phiên bản dữ liệu của một model dùng cho khóa cache / ETag (invalidation.py).
+
+    Chỉ dùng khi settings.MODEL_VERSION_STORE = 'database' (không có Redis /
+    memcached): database là nơi duy nhất mọi worker cùng thấy.
+    """
+    label = models.CharField(max_length=100, primary_key=True, verbose_name="Model")
+    version = models.BigIntegerField(default=0, verbose_name="Phiên bản")
+
+    class Meta:
+        db_table = 'model_versions'
+        verbose_name = 'Phiên bản dữ liệu'
+        verbose_name_plural = 'Phiên bản dữ liệu'
+
+    def __str__(self):
+        return f"{self.label}: {self.version}"
@@ -0,0 +1,56 @@
+# reference_data.py
+"""Gói dữ liệu danh mục (reference data) dùng cho dropdown.
+
+Các bảng danh mục nhỏ và ít thay đổi được gom vào một payload duy nhất, cache
+theo phiên bản của các model liên quan (invalidation.py). Trang quản lý lấy
+context từ đây và JS chỉ cần một request tới /api/reference-data/.
+"""
+import hashlib
+
+from django.core.cache import cache
+
+from .invalidation import get_models_version
+from .models import (
+    Department, SubjectGroup, Major, Curriculum, Course, SubjectType, Position, Class
+)
+
+BUNDLE_CACHE_KEY = 'reference-bundle:{}'
+BUNDLE_CACHE_TIMEOUT = 60 * 60
+
+# tên bảng -> (model, các trường trả về)
+REFERENCE_TABLES = {
+    'departments': (Department, ('id', 'code', 'name')),
+    'subject_groups': (SubjectGroup, ('id', 'code', 'name', 'department_id')),
+    'majors': (Major, ('id', 'code', 'name')),
+    'curricula': (Curriculum, ('id', 'code', 'name', 'academic_year', 'major_id')),
+    'courses': (Course, ('id', 'code', 'name', 'curriculum_id')),
+    'subject_types': (SubjectType, ('id', 'code', 'name')),
+    'positions': (Position, ('id', 'name', 'description')),
+    'classes': (Class, ('id', 'code', 'name', 'curriculum_id', 'course_id', 'is_combined')),
+}
+
+REFERENCE_MODELS = tuple(model for model, _ in REFERENCE_TABLES.values())
+
+
+def get_reference_version():
+    """Mã phiên bản ngắn của gói dữ liệu, đổi khi một bảng bất kỳ thay đổi"""
+    models_version = get_models_version(*REFERENCE_MODELS)
+    return hashlib.md5(models_version.encode('utf-8')).hexdigest()[:12]
+
+
+def build_reference_bundle():
+    return {
+        name: list(model.objects.all().values(*fields))
+        for name, (model, fields) in REFERENCE_TABLES.items()
+    }
+
+
+def get_reference_bundle():
+    """{'version': ..., 'data': {tên bảng: [bản ghi]}} - lấy từ cache nếu còn hiệu lực"""
+    version = get_reference_version()
+    cache_key = BUNDLE_CACHE_KEY.format(version)
+    bundle = cache.get(cache_key)
+    if bundle is None:
+        bundle = {'version': version, 'data': build_reference_bundle()}
+        cache.set(cache_key, bundle, BUNDLE_CACHE_TIMEOUT)
+    return bundle
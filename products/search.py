@@ -0,0 +1,183 @@
+# search.py
+"""Tìm kiếm giảng viên / môn học / lớp học theo chuỗi không dấu, có xếp hạng.
+
+Mỗi model có cột `search_name` (tên + mã, chữ thường, bỏ dấu - xem
+models.normalize_search_text) nên gõ "nguyen" vẫn tìm được "Nguyễn".
+
+- PostgreSQL có pg_trgm: lọc bằng LIKE '%q%' hoặc toán tử trigram `%` (cả hai
+  dùng index GIN gin_trgm_ops trên search_name), xếp hạng trong database.
+- Các trường hợp khác (SQLite khi dev): chỉ mục trigram trong bộ nhớ của
+  process, dựng lại khi phiên bản dữ liệu của model thay đổi.
+
+Thứ tự kết quả: trùng khớp hoàn toàn > khớp đầu chuỗi > khớp đầu một từ >
+chứa chuỗi > độ tương đồng trigram.
+"""
+from collections import defaultdict, namedtuple
+import heapq
+import threading
+
+from django.db import connection
+from django.db.models import BooleanField, Case, IntegerField, Q, Value, When
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Length
+import numpy as np
+
+from .invalidation import get_models_version
+from .models import Instructor, Subject, Class, normalize_search_text
+
+SearchTarget = namedtuple('SearchTarget', ['model', 'fields'])
+
+SEARCH_TARGETS = {
+    'instructors': SearchTarget(Instructor, ('id', 'code', 'full_name')),
+    'subjects': SearchTarget(Subject, ('id', 'code', 'name', 'curriculum_id')),
+    'classes': SearchTarget(Class, ('id', 'code', 'name', 'curriculum_id', 'course_id')),
+}
+
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 50
+MIN_QUERY_LENGTH = 2
+# Bằng ngưỡng mặc định pg_trgm.similarity_threshold để hai nhánh cho kết quả giống nhau
+MIN_SIMILARITY = 0.3
+
+_trigram_support = {}
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def trigrams(text):
+    """Trigram theo cách của pg_trgm: mỗi từ được đệm 2 khoảng trắng trước, 1 sau"""
+    grams = set()
+    for word in text.split():
+        padded = f'  {word} '
+        for start in range(len(padded) - 2):
+            grams.add(padded[start:start + 3])
+    return grams
+
+
+def match_rank(search_name, query):
+    if search_name == query:
+        return 3
+    if search_name.startswith(query):
+        return 2
+    if f' {query}' in search_name:
+        return 1
+    return 0
+
+
+def has_trigram_support():
+    """PostgreSQL và đã cài extension pg_trgm (kiểm tra một lần mỗi process)"""
+    alias = connection.alias
+    if alias not in _trigram_support:
+        supported = False
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+                supported = cursor.fetchone() is not None
+        _trigram_support[alias] = supported
+    return _trigram_support[alias]
+
+
+class NGramIndex:
+    """Chỉ mục trigram trong bộ nhớ cho database không có pg_trgm.
+
+    Mỗi trigram trỏ tới mảng vị trí các dòng chứa nó; số trigram chung với câu
+    tìm kiếm được đếm bằng numpy.bincount thay vì vòng lặp Python.
+    """
+
+    def __init__(self, rows):
+        self.rows = []
+        self.names = []
+        postings = defaultdict(list)
+        gram_counts = []
+        for position, row in enumerate(rows):
+            name = row.pop('search_name') or ''
+            grams = trigrams(name)
+            self.rows.append(row)
+            self.names.append(name)
+            gram_counts.append(len(grams))
+            for gram in grams:
+                postings[gram].append(position)
+        self.gram_counts = np.array(gram_counts, dtype=np.int32)
+        self.postings = {gram: np.array(positions, dtype=np.int32) for gram, positions in postings.items()}
+
+    def search(self, query, limit):
+        query_grams = trigrams(query)
+        arrays = [self.postings[gram] for gram in query_grams if gram in self.postings]
+        if not arrays:
+            return []
+        counts = np.bincount(np.concatenate(arrays), minlength=len(self.rows))
+        candidates = np.flatnonzero(counts)
+        shared = counts[candidates]
+        # Độ tương đồng như similarity() của pg_trgm
+        similarities = shared / (len(query_grams) + self.gram_counts[candidates] - shared)
+
+        scored = []
+        for position, similarity in zip(candidates.tolist(), similarities.tolist()):
+            name = self.names[position]
+            if similarity < MIN_SIMILARITY and query not in name:
+                continue
+            scored.append((match_rank(name, query), similarity, -len(name), position))
+
+        return [
+            {**self.rows[position], 'score': round(rank + similarity, 3)}
+            for rank, similarity, _, position in heapq.nlargest(limit, scored)
+        ]
+
+
+def get_ngram_index(target_name):
+    target = SEARCH_TARGETS[target_name]
+    version = get_models_version(target.model)
+    cached = _indexes.get(target_name)
+    if cached and cached[0] == version:
+        return cached[1]
+    with _indexes_lock:
+        cached = _indexes.get(target_name)
+        if cached and cached[0] == version:
+            return cached[1]
+        rows = target.model.objects.order_by().values(*target.fields, 'search_name')
+        index = NGramIndex(list(rows))
+        _indexes[target_name] = (version, index)
+        return index
+
+
+def search_postgres(target_name, query, limit):
+    from django.contrib.postgres.search import TrigramSimilarity
+
+    target = SEARCH_TARGETS[target_name]
+    table = connection.ops.quote_name(target.model._meta.db_table)
+    trigram_match = RawSQL(f'{table}."search_name" %% %s', (query,), output_field=BooleanField())
+    rows = target.model.objects.filter(
+        Q(search_name__contains=query) | Q(trigram_match)
+    ).annotate(
+        similarity=TrigramSimilarity('search_name', query),
+        match_rank=Case(
+            When(search_name=query, then=Value(3)),
+            When(search_name__startswith=query, then=Value(2)),
+            When(search_name__contains=f' {query}', then=Value(1)),
+            default=Value(0),
+            output_field=IntegerField(),
+        ),
+    ).order_by(
+        '-match_rank', '-similarity', Length('search_name')
+    ).values(*target.fields, 'similarity', 'match_rank')[:limit]
+
+    results = []
+    for row in rows:
+        similarity = row.pop('similarity') or 0
+        rank = row.pop('match_rank')
+        results.append({**row, 'score': round(rank + similarity, 3)})
+    return results
+
+
+def search(target_name, query, limit=DEFAULT_LIMIT):
+    """Kết quả đã xếp hạng của một loại đối tượng; mỗi dòng có thêm 'score'"""
+    if target_name not in SEARCH_TARGETS:
+        raise ValueError(f"Loại tìm kiếm không hợp lệ: {target_name} (hỗ trợ: {', '.join(SEARCH_TARGETS)})")
+    query = normalize_search_text(query)
+    if len(query) < MIN_QUERY_LENGTH:
+        return []
+    limit = max(1, min(int(limit), MAX_LIMIT))
+
+    if has_trigram_support():
+        return search_postgres(target_name, query, limit)
+    return get_ngram_index(target_name).search(query, limit)
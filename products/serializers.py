@@ -0,0 +1,306 @@
+# serializers.py
+"""Khai báo cấu trúc output của API và dựng dict từ .values_list().
+
+Một ValuesSerializer gồm các trường output, mỗi trường lấy từ một đường dẫn
+ORM (vd. 'curriculum__name'). Serializer gom tất cả đường dẫn thành một lệnh
+values_list() - Django tự thêm JOIN cần thiết - rồi dựng dict cho từng dòng
+mà không khởi tạo model và không cần các điều kiện `x.fk.attr if x.fk else ''`.
+
+    SUBJECT_OPTION = ValuesSerializer(
+        id=Field('id'),
+        name=Field('name', default=''),
+        credits=Field('credits', default=0, convert=float),
+        curriculum_name=Field('curriculum__name', default=''),
+    )
+    SUBJECT_OPTION.serialize(Subject.objects.filter(...))
+
+Dữ liệu nạp theo lô từ bảng khác (phân bố học kỳ, giảng viên) được truyền vào
+serialize() dưới dạng dict và đọc bằng trường Lookup.
+"""
+
+
+class Field:
+    """Một cột của values_list(); None hoặc giá trị rỗng được thay bằng default.
+
+    convert (vd. float, str) chỉ áp dụng cho giá trị khác rỗng.
+    empty: các giá trị coi là rỗng ngoài None (vd. ('',) để '' cũng thành default).
+    """
+
+    def __init__(self, source, default=None, convert=None, empty=()):
+        self.source = source
+        self.default = default
+        self.convert = convert
+        self.empty = empty
+
+    @property
+    def sources(self):
+        return [self.source]
+
+    def build(self, positions, context):
+        index = positions[self.source]
+        default, convert, empty = self.default, self.convert, self.empty
+
+        def get(row):
+            value = row[index]
+            if value is None or value in empty:
+                return default
+            return convert(value) if convert is not None else value
+        return get
+
+
+class Computed:
+    """Trường tính từ nhiều cột: func nhận giá trị các cột theo thứ tự sources"""
+
+    def __init__(self, func, *sources):
+        self.func = func
+        self._sources = list(sources)
+
+    @property
+    def sources(self):
+        return self._sources
+
+    def build(self, positions, context):
+        indexes = [positions[source] for source in self._sources]
+        func = self.func
+        return lambda row: func(*[row[index] for index in indexes])
+
+
+class Lookup:
+    """Giá trị lấy từ dict truyền vào serialize(), theo khóa là cột source.
+
+    Lookup('semesters', 'id', 'hk1') đọc context['semesters'][id]['hk1'];
+    bỏ key thì đọc thẳng context['semesters'][id].
+    """
+
+    def __init__(self, context_key, source, key=None, default=None):
+        self.context_key = context_key
+        self.source = source
+        self.key = key
+        self.default = default
+
+    @property
+    def sources(self):
+        return [self.source]
+
+    def build(self, positions, context):
+        index = positions[self.source]
+        mapping = context.get(self.context_key) or {}
+        key, default = self.key, self.default
+        if key is None:
+            return lambda row: mapping.get(row[index], default)
+        empty = {}
+        return lambda row: mapping.get(row[index], empty).get(key, default)
+
+
+class Nested:
+    """Dict con (vd. thông tin khoa của giảng viên); None khi cột `when` là None"""
+
+    def __init__(self, when, **fields):
+        self.when = when
+        self.fields = fields
+
+    @property
+    def sources(self):
+        result = [self.when]
+        for field in self.fields.values():
+            result.extend(field.sources)
+        return result
+
+    def build(self, positions, context):
+        index = positions[self.when]
+        getters = [(name, field.build(positions, context)) for name, field in self.fields.items()]
+
+        def get(row):
+            if row[index] is None:
+                return None
+            return {name: getter(row) for name, getter in getters}
+        return get
+
+
+class ValuesSerializer:
+    def __init__(self, **fields):
+        self.fields = fields
+        self.sources = list(dict.fromkeys(
+            source for field in fields.values() for source in field.sources
+        ))
+        self.positions = {source: index for index, source in enumerate(self.sources)}
+
+    def rows(self, queryset):
+        """values_list() với đúng các cột cần cho output"""
+        return queryset.values_list(*self.sources)
+
+    def column(self, rows, source):
+        """Giá trị một cột của các dòng đã lấy (vd. id để nạp dữ liệu theo lô)"""
+        index = self.positions[source]
+        return [row[index] for row in rows]
+
+    def serialize(self, rows, **context):
+        """Danh sách dict output từ queryset hoặc các dòng đã lấy bằng rows()"""
+        if hasattr(rows, 'values_list'):
+            rows = self.rows(rows)
+        getters = [(name, field.build(self.positions, context)) for name, field in self.fields.items()]
+        return [
+            {name: getter(row) for name, getter in getters}
+            for row in rows
+        ]
+
+
+# ----- Cấu trúc output dùng chung -----
+
+def _class_type(class_id, combined_class_id):
+    if class_id is not None:
+        return 'regular'
+    return 'combined' if combined_class_id is not None else ''
+
+
+def _first_present(primary, fallback):
+    if primary is not None:
+        return primary
+    return fallback if fallback is not None else ''
+
+
+ALL_SUBJECTS_SERIALIZER = ValuesSerializer(
+    id=Field('id'),
+    code=Field('code', default=''),
+    name=Field('name', default=''),
+    credits=Field('credits', default=0, convert=float, empty=(0,)),
+    total_hours=Field('total_hours', default=0),
+    theory_hours=Field('theory_hours', default=0),
+    practice_hours=Field('practice_hours', default=0),
+    tests_hours=Field('tests_hours', default=0),
+    exam_hours=Field('exam_hours', default=0),
+    order_number=Field('order_number', default=0),
+    semester=Field('semester', default='', convert=str, empty=(0,)),
+    description=Field('description', default=''),
+    prerequisites=Field('prerequisites', default=''),
+    learning_outcomes=Field('learning_outcomes', default=''),
+    is_elective=Field('is_elective', default=False, convert=bool),
+    elective_group=Field('elective_group', default=''),
+    curriculum_id=Field('curriculum_id'),
+    curriculum_name=Field('curriculum__name', default=''),
+    course_id=Field('course_id'),
+    course_name=Field('course__name', default=''),
+    department_id=Field('department_id'),
+    department_name=Field('department__name', default=''),
+    subject_type_id=Field('subject_type_id'),
+    subject_type_name=Field('subject_type__name', default=''),
+    subject_group_id=Field('subject_group_id'),
+    subject_group_name=Field('subject_group__name', default=''),
+)
+
+SEMESTER_COLUMNS = [f'hk{hk}' for hk in range(1, 7)]
+
+
+def _semester_columns():
+    """hk1..hk6 đọc từ loaders.load_semester_map; học kỳ không có tín chỉ là ''"""
+    return {column: Lookup('semesters', 'id', column, default='') for column in SEMESTER_COLUMNS}
+
+
+# Dòng của lưới môn học (api_subjects); serialize(..., semesters=, instructors=)
+SUBJECT_ROW_SERIALIZER = ValuesSerializer(
+    id=Field('id'),
+    curriculum_id=Field('curriculum_id'),
+    curriculum_name=Field('curriculum__name', default=''),
+    curriculum_code=Field('curriculum__code', default=''),
+    course_id=Field('course_id'),
+    course_code=Field('course__code', default=''),
+    course_name=Field('course__name', default=''),
+    ma_mon_hoc=Field('code', default=''),
+    ten_mon_hoc=Field('name', default=''),
+    so_tin_chi=Field('credits', default=0, convert=float, empty=(0,)),
+    tong_so_gio=Field('total_hours', default=0),
+    ly_thuyet=Field('theory_hours', default=0),
+    thuc_hanh=Field('practice_hours', default=0),
+    kiem_tra=Field('tests_hours', default=0),
+    thi=Field('exam_hours', default=0),
+    **_semester_columns(),
+    don_vi=Field('department__name', default=''),
+    bo_mon=Field('subject_group__name', default=''),
+    order_number=Field('order_number', default=0),
+    original_code=Field('original_code', default=''),
+    giang_vien=Lookup('instructors', 'id', default=''),
+    loai_mon=Field('subject_type__name', default=''),
+    subject_id=Field('id'),
+)
+
+# Dòng của lưới môn học trong trang chương trình đào tạo (loaders.load_subject_grid)
+SUBJECT_GRID_SERIALIZER = ValuesSerializer(
+    id=Field('id'),
+    ma_mon_hoc=Field('code'),
+    ten_mon_hoc=Field('name'),
+    curriculum_id=Field('curriculum_id'),
+    curriculum_code=Field('curriculum__code', default=''),
+    curriculum_academic_year=Field('curriculum__academic_year', default=''),
+    course_id=Field('course_id', default=''),
+    course_code=Field('course__code', default=''),
+    course_name=Field('course__name', default=''),
+    loai_mon=Field('subject_type__name', default=''),
+    so_tin_chi=Field('credits', convert=float),
+    tong_so_gio=Field('total_hours'),
+    ly_thuyet=Field('theory_hours'),
+    thuc_hanh=Field('practice_hours'),
+    kiem_tra=Field('tests_hours'),
+    thi=Field('exam_hours'),
+    **_semester_columns(),
+    don_vi=Field('department__name', default=''),
+    bo_mon=Field('subject_group__name', default=''),
+    giang_vien=Lookup('instructors', 'id', default=''),
+    order_number=Field('order_number'),
+    original_code=Field('original_code', default=''),
+    subject_id=Field('id'),
+)
+
+INSTRUCTOR_SERIALIZER = ValuesSerializer(
+    id=Field('id'),
+    code=Field('code'),
+    full_name=Field('full_name'),
+    email=Field('email'),
+    phone=Field('phone'),
+    is_active=Field('is_active'),
+    position_id=Field('position_id'),
+    department_id=Field('department_id'),
+    department_of_teacher_management_id=Field('department_of_teacher_management_id'),
+    subject_group_id=Field('subject_group_id'),
+    position=Nested(
+        'position_id',
+        id=Field('position_id'),
+        name=Field('position__name'),
+    ),
+    department=Nested(
+        'department_id',
+        id=Field('department_id'),
+        name=Field('department__name'),
+        code=Field('department__code'),
+    ),
+    department_of_teacher_management=Nested(
+        'department_of_teacher_management_id',
+        id=Field('department_of_teacher_management_id'),
+        name=Field('department_of_teacher_management__name'),
+        code=Field('department_of_teacher_management__code'),
+    ),
+    subject_group=Nested(
+        'subject_group_id',
+        id=Field('subject_group_id'),
+        name=Field('subject_group__name'),
+        code=Field('subject_group__code'),
+    ),
+)
+
+TEACHING_ASSIGNMENT_SERIALIZER = ValuesSerializer(
+    id=Field('id'),
+    instructor_id=Field('instructor_id'),
+    instructor_name=Field('instructor__full_name'),
+    instructor_code=Field('instructor__code'),
+    academic_year=Field('academic_year'),
+    semester=Field('semester'),
+    is_main_instructor=Field('is_main_instructor'),
+    student_count=Field('student_count'),
+    teaching_hours=Field('teaching_hours'),
+    subject_id=Field('curriculum_subject_id'),
+    subject_code=Field('curriculum_subject__code', default=''),
+    subject_name=Field('curriculum_subject__name', default=''),
+    class_type=Computed(_class_type, 'class_obj_id', 'combined_class_id'),
+    class_name=Computed(_first_present, 'class_obj__name', 'combined_class__name'),
+    class_code=Computed(_first_present, 'class_obj__code', 'combined_class__code'),
+    class_obj_id=Field('class_obj_id'),
+)
@@ -0,0 +1,90 @@
+# signals.py
+"""Tăng phiên bản cache của model khi dữ liệu thay đổi (xem invalidation.py)
+và cập nhật bảng tổng hợp phân công giảng dạy (xem teaching_load.py)"""
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete, m2m_changed
+
+from . import teaching_load
+from .invalidation import bump_model_version
+from .models import (
+    Department, SubjectGroup, Major, Curriculum, Course, SubjectType, Subject,
+    SemesterAllocation, Position, Instructor, Class, CombinedClass, TeachingAssignment
+)
+
+TRACKED_MODELS = [
+    Department, SubjectGroup, Major, Curriculum, Course, SubjectType, Subject,
+    SemesterAllocation, Position, Instructor, Class, CombinedClass, TeachingAssignment,
+]
+
+
+def bump_on_change(sender, **kwargs):
+    bump_model_version(sender)
+
+
+def bump_on_m2m_change(sender, instance, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        bump_model_version(CombinedClass, Class)
+
+
+for model in TRACKED_MODELS:
+    post_save.connect(bump_on_change, sender=model, dispatch_uid=f'bump-save-{model._meta.label_lower}')
+    post_delete.connect(bump_on_change, sender=model, dispatch_uid=f'bump-delete-{model._meta.label_lower}')
+
+m2m_changed.connect(bump_on_m2m_change, sender=CombinedClass.classes.through, dispatch_uid='bump-m2m-combined-classes')
+
+
+# ----- Bảng tổng hợp phân công giảng dạy -----
+
+def remember_assignment_keys(sender, instance, **kwargs):
+    # Lưu khóa cũ trước khi ghi/xóa để tính lại cả khóa cũ lẫn khóa mới
+    if instance.pk:
+        old = sender.objects.filter(pk=instance.pk).values('instructor_id', 'curriculum_subject_id').first()
+        if old:
+            instance._teaching_load_keys = teaching_load.assignment_keys(
+                old['instructor_id'], old['curriculum_subject_id']
+            )
+
+
+def refresh_assignment_summary(sender, instance, **kwargs):
+    old_keys = getattr(instance, '_teaching_load_keys', {})
+    if kwargs.get('signal') is post_delete:
+        teaching_load.mark_keys_dirty(old_keys)
+    else:
+        new_keys = teaching_load.assignment_keys(instance.instructor_id, instance.curriculum_subject_id)
+        teaching_load.mark_keys_dirty(old_keys, new_keys)
+
+
+def refresh_instructor_summary(sender, instance, created=False, **kwargs):
+    # Giảng viên đổi đơn vị: dòng của đơn vị cũ không biết trước nên tính lại cả phạm vi
+    if not created and TeachingAssignment.objects.filter(instructor_id=instance.pk).exists():
+        teaching_load.mark_dirty('instructor', {instance.pk})
+        teaching_load.mark_dirty('department', {teaching_load.ALL_KEYS})
+        teaching_load.mark_dirty('department_teacher', {teaching_load.ALL_KEYS})
+
+
+def refresh_subject_summary(sender, instance, created=False, **kwargs):
+    # Môn học chuyển chương trình: tính lại phạm vi chương trình
+    if not created and TeachingAssignment.objects.filter(curriculum_subject_id=instance.pk).exists():
+        teaching_load.mark_dirty('curriculum', {teaching_load.ALL_KEYS})
+
+
+def refresh_department_summary(sender, instance, **kwargs):
+    # Đổi tên cập nhật nhãn; xóa đơn vị làm giảng viên chuyển về nhóm NULL
+    keys = {instance.pk, None} if kwargs.get('signal') is post_delete else {instance.pk}
+    teaching_load.mark_dirty('department', keys)
+    teaching_load.mark_dirty('department_teacher', keys)
+
+
+def refresh_curriculum_summary(sender, instance, created=False, **kwargs):
+    if not created:
+        teaching_load.mark_dirty('curriculum', {instance.pk})
+
+
+pre_save.connect(remember_assignment_keys, sender=TeachingAssignment, dispatch_uid='teaching-load-pre-save')
+pre_delete.connect(remember_assignment_keys, sender=TeachingAssignment, dispatch_uid='teaching-load-pre-delete')
+post_save.connect(refresh_assignment_summary, sender=TeachingAssignment, dispatch_uid='teaching-load-save')
+post_delete.connect(refresh_assignment_summary, sender=TeachingAssignment, dispatch_uid='teaching-load-delete')
+post_save.connect(refresh_instructor_summary, sender=Instructor, dispatch_uid='teaching-load-instructor')
+post_save.connect(refresh_subject_summary, sender=Subject, dispatch_uid='teaching-load-subject')
+post_save.connect(refresh_department_summary, sender=Department, dispatch_uid='teaching-load-department-save')
+post_delete.connect(refresh_department_summary, sender=Department, dispatch_uid='teaching-load-department-delete')
+post_save.connect(refresh_curriculum_summary, sender=Curriculum, dispatch_uid='teaching-load-curriculum')
@@ -0,0 +1,110 @@
+# stats.py
+"""Thống kê tín chỉ / số giờ của môn học, tính hoàn toàn trong database.
+
+Tổng được tính bằng một truy vấn aggregate(); khi có group_by thì dùng một
+truy vấn GROUP BY duy nhất và tổng chung được cộng lại từ các nhóm. Kết quả
+được cache theo phiên bản dữ liệu (invalidation.py) nên chỉ tính lại khi môn
+học (hoặc danh mục dùng làm nhãn nhóm) thay đổi.
+"""
+import hashlib
+import json
+
+from django.core.cache import cache
+from django.db.models import Count, Sum, Value, DecimalField, IntegerField
+from django.db.models.functions import Coalesce
+
+from .invalidation import get_models_version
+from .models import Subject, Curriculum, Course, Department
+
+STATS_CACHE_KEY = 'subject-stats:{}:{}'
+STATS_CACHE_TIMEOUT = 60 * 60
+
+# tham số lọc trên request -> trường của Subject
+FILTER_FIELDS = {
+    'curriculum_id': 'curriculum_id',
+    'course_id': 'course_id',
+    'department_id': 'department_id',
+    'semester': 'semester',
+}
+
+# giá trị group_by -> (các trường trả về, model dùng làm nhãn)
+GROUP_FIELDS = {
+    'curriculum': (('curriculum_id', 'curriculum__code', 'curriculum__name'), Curriculum),
+    'course': (('course_id', 'course__code', 'course__name'), Course),
+    'department': (('department_id', 'department__code', 'department__name'), Department),
+    'semester': (('semester',), None),
+}
+
+AGGREGATES = {
+    'so_mon_hoc': Count('id'),
+    'tong_tin_chi': Coalesce(Sum('credits'), Value(0), output_field=DecimalField()),
+    'tong_gio': Coalesce(Sum('total_hours'), Value(0), output_field=IntegerField()),
+    'tong_ly_thuyet': Coalesce(Sum('theory_hours'), Value(0), output_field=IntegerField()),
+    'tong_thuc_hanh': Coalesce(Sum('practice_hours'), Value(0), output_field=IntegerField()),
+}
+
+
+def parse_group_by(value):
+    """'curriculum,semester' -> ['curriculum', 'semester']; ValueError nếu không hợp lệ"""
+    groups = [item.strip() for item in (value or '').split(',') if item.strip()]
+    invalid = [item for item in groups if item not in GROUP_FIELDS]
+    if invalid:
+        raise ValueError(
+            f"group_by không hợp lệ: {', '.join(invalid)} "
+            f"(hỗ trợ: {', '.join(GROUP_FIELDS)})"
+        )
+    return list(dict.fromkeys(groups))
+
+
+def _format_totals(row):
+    total_hours = row['tong_gio'] or 0
+    theory_ratio = (row['tong_ly_thuyet'] / total_hours * 100) if total_hours > 0 else 0
+    practice_ratio = (row['tong_thuc_hanh'] / total_hours * 100) if total_hours > 0 else 0
+    return {
+        'so_mon_hoc': row['so_mon_hoc'],
+        'tong_tin_chi': float(row['tong_tin_chi']),
+        'tong_gio': total_hours,
+        'tong_ly_thuyet': row['tong_ly_thuyet'],
+        'tong_thuc_hanh': row['tong_thuc_hanh'],
+        'ty_le_ly_thuyet': f'{theory_ratio:.1f}%',
+        'ty_le_thuc_hanh': f'{practice_ratio:.1f}%',
+    }
+
+
+def compute_subject_statistics(filters, group_by):
+    queryset = Subject.objects.filter(**filters)
+    if not group_by:
+        return _format_totals(queryset.aggregate(**AGGREGATES))
+
+    fields = [field for group in group_by for field in GROUP_FIELDS[group][0]]
+    # order_by() bỏ Meta.ordering để không bị thêm vào GROUP BY
+    rows = list(queryset.order_by().values(*fields).annotate(**AGGREGATES).order_by(*fields))
+
+    totals = {name: sum(row[name] for row in rows) for name in AGGREGATES}
+    result = _format_totals(totals)
+    result['group_by'] = group_by
+    result['groups'] = [
+        {**{field: row[field] for field in fields}, **_format_totals(row)}
+        for row in rows
+    ]
+    return result
+
+
+def get_subject_statistics(filters=None, group_by=None):
+    """Thống kê môn học theo bộ lọc, có cache theo phiên bản dữ liệu.
+
+    filters: dict theo FILTER_FIELDS; group_by: danh sách khóa của GROUP_FIELDS.
+    """
+    filters = {FILTER_FIELDS[key]: value for key, value in (filters or {}).items() if value not in (None, '')}
+    group_by = group_by or []
+
+    models = [Subject] + [GROUP_FIELDS[group][1] for group in group_by if GROUP_FIELDS[group][1]]
+    scope = json.dumps({'filters': filters, 'group_by': group_by}, sort_keys=True)
+    cache_key = STATS_CACHE_KEY.format(
+        hashlib.md5(scope.encode('utf-8')).hexdigest(), get_models_version(*models)
+    )
+    result = cache.get(cache_key)
+    if result is None:
+        result = compute_subject_statistics(filters, group_by)
+        cache.set(cache_key, result, STATS_CACHE_TIMEOUT)
+    return result
@@ -0,0 +1,211 @@
+# teaching_load.py
+"""Duy trì bảng TeachingLoadSummary cho api_teaching_statistics.
+
+Các truy vấn GROUP BY / COUNT(DISTINCT) chỉ chạy cho những khóa bị ảnh hưởng
+khi phân công thay đổi (vd. một giảng viên, một chương trình), không chạy lại
+toàn bộ ở mỗi lần xem thống kê. Signal chỉ đánh dấu khóa cần tính lại; việc
+tính được gom lại và chạy một lần sau khi transaction commit (import nhiều dòng
+nên chạy trong một transaction để chỉ tính lại một lần cho cả file).
+
+Mỗi lần tính lại một phạm vi giữ advisory lock của phạm vi đó (PostgreSQL) và
+chỉ đọc phân công sau khi có khóa: hai transaction commit cùng lúc tính lần
+lượt, lần sau đọc được dữ liệu của lần trước, không trùng (scope, object_id)
+và không ghi đè số liệu mới bằng số liệu cũ.
+"""
+import threading
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count, Sum, Q, Value, IntegerField
+from django.db.models.functions import Coalesce
+
+from .codes import advisory_lock
+from .models import TeachingAssignment, TeachingLoadSummary, Instructor, Subject
+
+ALL_KEYS = '*'
+
+# phạm vi -> (trường nhóm, trường mã, trường tên) trên TeachingAssignment
+SCOPES = {
+    'instructor': ('instructor_id', 'instructor__code', 'instructor__full_name'),
+    'curriculum': (
+        'curriculum_subject__curriculum_id',
+        'curriculum_subject__curriculum__code',
+        'curriculum_subject__curriculum__name',
+    ),
+    'department': (
+        'instructor__department_id',
+        'instructor__department__code',
+        'instructor__department__name',
+    ),
+    'department_teacher': (
+        'instructor__department_of_teacher_management_id',
+        'instructor__department_of_teacher_management__code',
+        'instructor__department_of_teacher_management__name',
+    ),
+}
+
+AGGREGATES = {
+    'total_assignments': Count('id'),
+    'total_students': Coalesce(Sum('student_count'), Value(0), output_field=IntegerField()),
+    'total_hours': Coalesce(Sum('teaching_hours'), Value(0), output_field=IntegerField()),
+    'total_instructors': Count('instructor', distinct=True),
+    'total_subjects': Count('curriculum_subject__code', distinct=True),
+    'regular_class_count': Count('class_obj', distinct=True),
+    'combined_class_count': Count('combined_class', distinct=True),
+}
+
+_pending = threading.local()
+
+
+def _key_filter(field, object_ids):
+    condition = Q(**{f'{field}__in': [object_id for object_id in object_ids if object_id is not None]})
+    if None in object_ids:
+        condition |= Q(**{f'{field}__isnull': True})
+    return condition
+
+
+def compute_summaries(scope, object_ids=None):
+    """Các dòng TeachingLoadSummary (chưa lưu) của một phạm vi, hoặc chỉ các khóa object_ids"""
+    field, code_field, name_field = SCOPES[scope]
+    queryset = TeachingAssignment.objects.order_by()
+    if object_ids is not None:
+        queryset = queryset.filter(_key_filter(field, object_ids))
+    rows = queryset.values(field, code_field, name_field).annotate(**AGGREGATES)
+    return [
+        TeachingLoadSummary(
+            scope=scope,
+            object_id=row[field],
+            code=row[code_field],
+            name=row[name_field],
+            **{name: row[name] for name in AGGREGATES}
+        )
+        for row in rows
+    ]
+
+
+def refresh_summaries(scope, object_ids=None):
+    """Tính lại toàn bộ phạm vi (object_ids=None) hoặc chỉ các khóa đã cho"""
+    existing = TeachingLoadSummary.objects.filter(scope=scope)
+    if object_ids is not None:
+        existing = existing.filter(_key_filter('object_id', object_ids))
+    with transaction.atomic():
+        advisory_lock(TeachingLoadSummary, f'scope:{scope}')
+        summaries = compute_summaries(scope, object_ids)
+        existing.delete()
+        TeachingLoadSummary.objects.bulk_create(summaries)
+    return len(summaries)
+
+
+def rebuild_all():
+    return {scope: refresh_summaries(scope) for scope in SCOPES}
+
+
+# ----- Đánh dấu khóa cần tính lại (gọi từ signals.py) -----
+
+def _get_pending():
+    if not hasattr(_pending, 'keys'):
+        _pending.keys = defaultdict(set)
+    return _pending.keys
+
+
+def mark_dirty(scope, object_ids):
+    """Ghi nhận khóa cần tính lại; ALL_KEYS trong object_ids = cả phạm vi"""
+    _get_pending()[scope].update(object_ids)
+    # robust: lỗi khi tính lại được ghi log, không làm hỏng request mà dữ liệu đã commit
+    transaction.on_commit(flush_pending, robust=True)
+
+
+def flush_pending():
+    pending = _get_pending()
+    # Các callback on_commit sau trong cùng transaction sẽ thấy pending rỗng
+    scopes = dict(pending)
+    pending.clear()
+    # Thứ tự cố định để các transaction lấy khóa phạm vi theo cùng thứ tự
+    for scope, object_ids in sorted(scopes.items()):
+        refresh_summaries(scope, None if ALL_KEYS in object_ids else object_ids)
+
+
+def assignment_keys(instructor_id, subject_id):
+    """Các khóa tổng hợp mà một phân công đóng góp vào"""
+    instructor = Instructor.objects.filter(id=instructor_id).values(
+        'department_id', 'department_of_teacher_management_id'
+    ).first() or {}
+    curriculum_id = Subject.objects.filter(id=subject_id).values_list('curriculum_id', flat=True).first()
+    return {
+        'instructor': {instructor_id},
+        'curriculum': {curriculum_id},
+        'department': {instructor.get('department_id')},
+        'department_teacher': {instructor.get('department_of_teacher_management_id')},
+    }
+
+
+def mark_keys_dirty(*key_sets):
+    for keys in key_sets:
+        for scope, object_ids in keys.items():
+            mark_dirty(scope, object_ids)
+
+
+# ----- Đọc cho API -----
+
+def get_teaching_statistics():
+    """Dữ liệu cho api_teaching_statistics, cùng cấu trúc với các truy vấn GROUP BY cũ"""
+    summaries = list(TeachingLoadSummary.objects.all())
+    if not summaries and TeachingAssignment.objects.exists():
+        # Bảng chưa được dựng (vd. ngay sau khi triển khai)
+        rebuild_all()
+        summaries = list(TeachingLoadSummary.objects.all())
+
+    by_scope = defaultdict(list)
+    for summary in summaries:
+        by_scope[summary.scope].append(summary)
+
+    return {
+        'instructor_statistics': [
+            {
+                'instructor__id': s.object_id,
+                'instructor__full_name': s.name,
+                'instructor__code': s.code,
+                'total_assignments': s.total_assignments,
+                'total_students': s.total_students,
+                'total_hours': s.total_hours,
+                'subject_count': s.total_subjects,
+                'regular_class_count': s.regular_class_count,
+                'combined_class_count': s.combined_class_count,
+                'class_count': s.regular_class_count + s.combined_class_count,
+            }
+            for s in by_scope['instructor']
+        ],
+        'curriculum_statistics': [
+            {
+                'curriculum_subject__curriculum__id': s.object_id,
+                'curriculum_subject__curriculum__name': s.name,
+                'curriculum_subject__curriculum__code': s.code,
+                'total_assignments': s.total_assignments,
+                'total_instructors': s.total_instructors,
+                'total_subjects': s.total_subjects,
+            }
+            for s in by_scope['curriculum']
+        ],
+        'department_statistics': [
+            {
+                'instructor__department__id': s.object_id,
+                'instructor__department__name': s.name,
+                'instructor__department__code': s.code,
+                'total_assignments': s.total_assignments,
+                'total_instructors': s.total_instructors,
+                'total_hours': s.total_hours,
+            }
+            for s in by_scope['department']
+        ],
+        'department_teacher_statistics': [
+            {
+                'instructor__department_of_teacher_management__id': s.object_id,
+                'instructor__department_of_teacher_management__name': s.name,
+                'instructor__department_of_teacher_management__code': s.code,
+                'total_assignments': s.total_assignments,
+                'total_instructors': s.total_instructors,
+                'total_hours': s.total_hours,
+            }
+            for s in by_scope['department_teacher']
+        ],
+    }
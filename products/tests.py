@@ -0,0 +1,253 @@
+from datetime import timedelta
+import json
+from unittest import mock
+
+import pandas as pd
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .importers import CurriculumImporter
+from .invalidation import get_models_version
+from .loaders import load_subject_grid
+from .models import (
+    Class, Course, Curriculum, Department, ImportHistory, Instructor, Major, SemesterAllocation, Subject,
+    TeachingAssignment, TeachingLoadSummary,
+)
+from . import jobs, teaching_load
+from .views import ImportTeachingDataView, TrainProgramManagerView
+
+
+class SubjectGridQueryCountTests(TestCase):
+    """Lưới môn học phải nạp với số truy vấn cố định, không tăng theo số môn học (N+1)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        major = Major.objects.create(code='M', name='Ngành')
+        cls.curriculum = Curriculum.objects.create(code='CT1', name='CT', academic_year='2024', major=major)
+        cls.course = Course.objects.create(
+            code='K1', name='K', curriculum=cls.curriculum, start_year=2024, end_year=2027
+        )
+        cls.department = Department.objects.create(code='D', name='Khoa')
+        cls.instructors = [
+            Instructor.objects.create(code=f'GV{index}', full_name=f'Giảng viên {index}') for index in range(2)
+        ]
+
+    def seed_subjects(self, count):
+        start = Subject.objects.count()
+        for index in range(start, start + count):
+            subject = Subject.objects.create(
+                code=f'CT1_MH{index:03d}', name=f'Môn {index}', curriculum=self.curriculum, course=self.course,
+                department=self.department, credits=3, order_number=index, original_code=f'MH{index:03d}',
+            )
+            SemesterAllocation.objects.create(base_subject=subject, semester=1 + index % 6, credits=3)
+            SemesterAllocation.objects.create(base_subject=subject, semester=1 + (index + 1) % 6, credits=2)
+            for instructor in self.instructors:
+                TeachingAssignment.objects.create(
+                    curriculum_subject=subject, instructor=instructor, academic_year='2024', semester=1
+                )
+
+    def assert_fixed_query_count(self, load):
+        self.seed_subjects(3)
+        with self.assertNumQueries(3):
+            rows = load()
+        self.assertEqual(len(rows), 3)
+
+        self.seed_subjects(27)
+        with self.assertNumQueries(3):
+            rows = load()
+        self.assertEqual(len(rows), 30)
+        self.assertEqual(rows[0]['giang_vien'], 'Giảng viên 0, Giảng viên 1')
+
+    def test_load_subject_grid(self):
+        self.assert_fixed_query_count(lambda: load_subject_grid(self.curriculum.id))
+
+    def test_get_subject_data(self):
+        self.assert_fixed_query_count(lambda: TrainProgramManagerView().get_subject_data(self.curriculum.id))
+
+
+class CurriculumImporterTests(TestCase):
+    """Dòng vượt giới hạn cột bị bỏ qua và báo lỗi, các dòng khác vẫn được import"""
+
+    def test_out_of_range_rows_are_reported_per_row(self):
+        major = Major.objects.create(code='M', name='Ngành')
+        curriculum = Curriculum.objects.create(code='CT1', name='CT', academic_year='2024', major=major)
+        course = Course.objects.create(code='K1', name='K', curriculum=curriculum, start_year=2024, end_year=2027)
+        rows = [
+            ('MH01', 'Môn hợp lệ', 3, 45, '2'),
+            ('MH02', 'T' * 300, 3, 45, ''),
+            ('MH03', 'Tín chỉ quá lớn', 1000, 45, ''),
+            ('MH04_MA_GOC_QUA_DAI_123', 'Mã quá dài', 3, 45, ''),
+            ('MH05', 'Học kỳ quá lớn', 3, 45, '500'),
+        ]
+        df = pd.DataFrame([{
+            'Mã môn học*': code, 'Tên học phần*': name, 'Số tín chỉ*': credits, 'Tổng số giờ*': hours,
+            'Đơn vị quản lý chuyên môn*': 'Khoa', 'Tổ bộ môn*': 'Tổ', 'HK1': hk1,
+        } for code, name, credits, hours, hk1 in rows])
+
+        result = CurriculumImporter(curriculum, course).run(df)
+
+        self.assertEqual(result['created_count'], 2)
+        self.assertEqual(
+            sorted(Subject.objects.values_list('original_code', flat=True)), ['MH01', 'MH05']
+        )
+        self.assertEqual(SemesterAllocation.objects.get().base_subject.original_code, 'MH01')
+        for line in (3, 4, 5):
+            self.assertTrue(any(error.startswith(f'Dòng {line}:') for error in result['errors']), result['errors'])
+        self.assertIn('Dòng 6 - HK1: Giá trị tín chỉ không hợp lệ: 500.0', result['errors'])
+
+
+class StaleImportJobTests(TestCase):
+    """Job mất heartbeat (worker đã restart) được báo thất bại khi polling"""
+
+    def poll(self, history):
+        return self.client.get(reverse('api_import_job_status', args=[history.id])).json()['job']
+
+    def test_stale_job_is_marked_failed(self):
+        history = ImportHistory.objects.create(
+            status='running', file_name='a.xlsx', started_at=timezone.now() - timedelta(hours=1),
+            heartbeat_at=timezone.now() - timedelta(hours=1),
+        )
+        job = self.poll(history)
+        self.assertEqual(job['state'], 'failed')
+        self.assertTrue(job['finished'])
+        self.assertEqual(len(job['errors']), 1)
+
+    def test_job_with_recent_heartbeat_keeps_running(self):
+        history = ImportHistory.objects.create(
+            status='running', file_name='a.xlsx', started_at=timezone.now() - timedelta(hours=1),
+            heartbeat_at=timezone.now(),
+        )
+        self.assertEqual(self.poll(history)['state'], 'running')
+
+
+@override_settings(CACHES={
+    'default': {'BACKEND': 'products.cache_backends.TwoLevelCache', 'OPTIONS': {'SHARED_ALIAS': 'shared'}},
+    'shared': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'job-progress-tests'},
+})
+class ImportJobProgressTests(TestCase):
+    """Với cache locmem của từng worker, tiến độ được heartbeat ghi vào ImportHistory"""
+
+    def test_progress_is_readable_without_the_cache(self):
+        history = ImportHistory.objects.create(status='pending', file_name='a.xlsx')
+        with mock.patch.dict(jobs._owned_jobs, {history.id: 0}):
+            job = jobs.ImportJob(history)
+            job.start(10)
+            job.advance(7)
+            jobs.write_heartbeats()
+
+        # Worker khác: không có gì trong cache của process này
+        for alias in ('default', 'shared'):
+            caches[alias].clear()
+        job_data = self.client.get(reverse('api_import_job_status', args=[history.id])).json()['job']
+        self.assertEqual((job_data['state'], job_data['processed_rows']), ('running', 7))
+
+
+@override_settings(MODEL_VERSION_STORE='database')
+class ModelVersionTests(TestCase):
+    """Phiên bản model lưu trong database: mọi worker cùng thấy, chỉ tăng khi commit"""
+
+    def test_version_is_bumped_on_commit(self):
+        before = get_models_version(Department)
+        with self.captureOnCommitCallbacks(execute=True):
+            Department.objects.create(code='D', name='Khoa')
+            self.assertEqual(get_models_version(Department), before)
+        after = get_models_version(Department)
+        self.assertNotEqual(after, before)
+
+        # Worker khác không có gì trong cache của process này vẫn đọc cùng phiên bản
+        for alias in ('default', 'shared'):
+            caches[alias].clear()
+        self.assertEqual(get_models_version(Department), after)
+
+
+class ETagTests(TestCase):
+    """ETag của API danh mục đổi theo phiên bản model dùng chung giữa các worker"""
+
+    @override_settings(MODEL_VERSION_STORE='database')
+    def test_etag_changes_after_commit(self):
+        url = reverse('api_departments')
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Department.objects.create(code='D', name='Khoa')
+        # Cache của process này trống như ở một worker khác
+        for alias in ('default', 'shared'):
+            caches[alias].clear()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    @override_settings(MODEL_VERSION_STORE='cache', CACHES={
+        'default': {'BACKEND': 'products.cache_backends.TwoLevelCache', 'OPTIONS': {'SHARED_ALIAS': 'shared'}},
+        'shared': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'etag-tests'},
+    })
+    def test_no_etag_with_per_process_versions(self):
+        response = self.client.get(reverse('api_departments'))
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header('ETag'))
+
+
+class TeachingLoadImportTests(TestCase):
+    """Import phân công tính lại bảng tổng hợp một lần cho cả file, không phải mỗi dòng"""
+
+    def test_import_refreshes_each_scope_once(self):
+        major = Major.objects.create(code='M', name='Ngành')
+        curriculum = Curriculum.objects.create(code='CT1', name='CT', academic_year='2024', major=major)
+        course = Course.objects.create(code='K1', name='K', curriculum=curriculum, start_year=2024, end_year=2027)
+        department = Department.objects.create(code='D', name='Khoa')
+        instructor = Instructor.objects.create(code='GV1', full_name='Giảng viên 1', department=department)
+        Class.objects.create(code='L1', name='Lớp 1', curriculum=curriculum, course=course)
+        for index in range(5):
+            Subject.objects.create(
+                code=f'CT1_MH{index}', name=f'Môn {index}', curriculum=curriculum, course=course, credits=3,
+            )
+        df = pd.DataFrame([{
+            'Mã giảng viên*': 'GV1', 'Họ và tên*': 'Giảng viên 1', 'Mã môn học*': f'CT1_MH{index}',
+            'Mã lớp*': 'L1', 'Loại lớp*': 'Thường', 'Năm học*': '2024', 'Học kỳ*': 1,
+            'Số lượng sinh viên': 40, 'Số giờ giảng dạy': 30,
+        } for index in range(5)])
+
+        with mock.patch.object(teaching_load, 'refresh_summaries', wraps=teaching_load.refresh_summaries) as refresh:
+            with self.captureOnCommitCallbacks(execute=True):
+                result = ImportTeachingDataView().process_teaching_assignment_import(df)
+
+        self.assertEqual(result['created_count'], 5, result)
+        self.assertEqual(sorted(call.args[0] for call in refresh.call_args_list), sorted(teaching_load.SCOPES))
+        summary = TeachingLoadSummary.objects.get(scope='instructor', object_id=instructor.id)
+        self.assertEqual((summary.total_assignments, summary.total_hours), (5, 150))
+
+        # Tính lại cả phạm vi lần nữa không trùng (scope, object_id)
+        teaching_load.rebuild_all()
+        self.assertEqual(TeachingLoadSummary.objects.filter(scope='instructor').count(), 1)
+
+
+class BatchEditBoundsTests(TestCase):
+    """Ô vượt giới hạn cột bị báo lỗi theo ô, không làm hỏng cả lô"""
+
+    def test_out_of_range_cells_are_rejected(self):
+        major = Major.objects.create(code='M', name='Ngành')
+        curriculum = Curriculum.objects.create(code='CT1', name='CT', academic_year='2024', major=major)
+        subject = Subject.objects.create(code='CT1_MH01', name='Môn 1', curriculum=curriculum, credits=3)
+        SemesterAllocation.objects.create(base_subject=subject, semester=1, credits=3)
+        changes = [
+            {'id': subject.id, 'field': 'credits', 'value': 1000},
+            {'id': subject.id, 'field': 'credits', 'value': 'nan'},
+            {'id': subject.id, 'field': 'hk1', 'value': 'inf'},
+            {'id': subject.id, 'field': 'hk2', 'value': 100},
+            {'id': subject.id, 'field': 'total_hours', 'value': 2 ** 63},
+        ]
+
+        response = self.client.post(
+            reverse('train_program_update_multiple'), json.dumps({'changes': changes}),
+            content_type='application/json',
+        )
+
+        payload = response.json()
+        self.assertEqual(payload['status'], 'error', payload)
+        self.assertEqual(payload['errors'], len(changes))
+        subject.refresh_from_db()
+        self.assertEqual((subject.credits, subject.total_hours), (3, 0))
+        self.assertEqual(list(SemesterAllocation.objects.values_list('semester', 'credits')), [(1, 3)])
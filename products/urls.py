@@ -9,6 +9,8 @@ urlpatterns = [
     path('health/', health_check, name='health-check'),
     path('train_program/', views.TrainProgramManagerView.as_view(), name='train_program'),
     path('train-program/<int:id>/', views.TrainProgramManagerView.as_view(), name='train_program_update'),
+    path('train-program/update-multiple/', views.train_program_update_multiple, name='train_program_update_multiple'),
+    path('train-program/<int:id>/update-multiple/', views.train_program_update_multiple, name='train_program_update_row'),
     path('download-excel-template/', views.ImportExcelView.as_view(), name='download_excel_template'),
     path('import-excel/', views.ImportExcelView.as_view(), name='import_excel'),
     path('thong-ke/', views.ThongKeView.as_view(), name='thong_ke'),
@@ -28,6 +30,7 @@ urlpatterns = [
     path('api/curriculum/create/', views.create_curriculum, name='create_curriculum'),
     path('import-teaching-data/<str:object_type>/', views.ImportTeachingDataView.as_view(), name='import_teaching_data'),
     path('api/search-instructors/', views.api_search_instructors, name='api_search_instructors'),
+    path('api/search/', views.api_search, name='api_search'),
     
     # URL mới cho quản lý lớp học và phân công giảng dạy
     path('api/classes/', views.api_classes, name='api_classes'),
@@ -36,11 +39,15 @@ urlpatterns = [
     path('api/combined-classes/create/', views.api_create_combined_class, name='api_create_combined_class'),
     path('api/teaching-assignments/', views.api_teaching_assignments, name='api_teaching_assignments'),
     path('api/teaching-assignments/create/', views.api_create_teaching_assignment, name='api_create_teaching_assignment'),
+    path('api/export/subjects/', views.api_export_subjects, name='api_export_subjects'),
+    path('api/export/teaching-assignments/', views.api_export_teaching_assignments, name='api_export_teaching_assignments'),
     path('api/teaching-statistics/', views.api_teaching_statistics, name='api_teaching_statistics'),
     path('api/instructors/', views.api_instructors, name='api_instructors'),
     path('api/instructors/create/', views.api_create_instructor, name='api_create_instructor'),
     path('api/positions/', views.api_positions, name='api_positions'),
+    path('api/reference-data/', views.api_reference_data, name='api_reference_data'),
     path('api/get-sheet-names/', views.api_get_sheet_names, name='api_get_sheet_names'),
+    path('api/import-jobs/<int:id>/', views.api_import_job_status, name='api_import_job_status'),
 
     # API cho Lớp học
     path('api/classes/<int:id>/', views.api_class_detail, name='api_class_detail'),
@@ -1,13 +1,15 @@
-from django.http import JsonResponse, HttpResponse
-from django.db.models import Count, Sum, F, Q, Case, When, IntegerField
+from django.http import HttpResponse
+from django.db import transaction
+from django.db.models import Q, Case, When, IntegerField
 from django.views.decorators.csrf import csrf_exempt
-from django.views.decorators.cache import cache_page
+from django.core.cache import cache
 import json
 import random
 import traceback
 import time
 from django.db.models import Prefetch
 from django.shortcuts import render, get_object_or_404
+from django.urls import reverse
 from django.core.serializers import serialize
 from django.views import View
 from .models import (
@@ -20,6 +22,32 @@ from django.core.files.storage import default_storage
 import os
 from django.conf import settings
 from .services import UserService
+from .jobs import submit_import_job, serialize_job, fail_stale_jobs
+from .http import FastJsonResponse
+from .codes import first_free_code
+from .batch_edit import parse_changes, apply_changes
+from .exports import (
+    export_response, iter_export_values, open_xlsx_workbook, write_sheet_rows, xlsx_file_response,
+    SUBJECT_EXPORT, TEACHING_ASSIGNMENT_EXPORT, CURRICULUM_TEMPLATE_EXPORT
+)
+from .serializers import (
+    ALL_SUBJECTS_SERIALIZER, SUBJECT_ROW_SERIALIZER, INSTRUCTOR_SERIALIZER,
+    TEACHING_ASSIGNMENT_SERIALIZER
+)
+from .invalidation import get_models_version, cache_response_by_models, etag_by_models
+from .reference_data import get_reference_bundle, REFERENCE_MODELS
+from .stats import get_subject_statistics, parse_group_by, FILTER_FIELDS as STATS_FILTER_FIELDS
+from .teaching_load import get_teaching_statistics
+from .search import search, SEARCH_TARGETS, DEFAULT_LIMIT as SEARCH_DEFAULT_LIMIT
+from .excel_reader import SheetReader, get_sheet_names, save_upload, remove_file
+from .importers import (
+    CurriculumImporter, iter_normalized_rows, CLASS_COLUMNS, COMBINED_CLASS_COLUMNS,
+    INSTRUCTOR_COLUMNS, TEACHING_ASSIGNMENT_COLUMNS
+)
+from .loaders import (
+    load_subject_grid, load_semester_map, load_instructor_map,
+    apply_subject_cursor, encode_subject_cursor
+)
 from .supabase_api import supabase_api
 from django.utils.decorators import method_decorator
 from django.contrib.auth.decorators import login_required
@@ -33,46 +61,33 @@ def home_page(request):
 
 def users_list(request):
     users = supabase_api.get_users()
-    return JsonResponse(users, safe=False)
-
-class KeepAliveMiddleware:
-    def __init__(self, get_response):
-        self.get_response = get_response
-        
-    def __call__(self, request):
-        # Preload các model thường dùng
-        from django.apps import apps
-        apps.get_models()
-        return self.get_response(request)
+    return FastJsonResponse(users, safe=False)
 
 class TrainProgramManagerView(View):
     template_name = 'products/TrainProgram.html'
     
     def get(self, request):
         try:
-            # Lấy dữ liệu từ database
-            departments = Department.objects.all().values('id', 'code', 'name')
-            subject_groups = SubjectGroup.objects.all().values('id', 'code', 'name', 'department_id')
-            curricula = Curriculum.objects.all().values('id', 'code', 'name', 'academic_year', 'major_id')
-            courses = Course.objects.all().values('id', 'code', 'name', 'curriculum_id')
-            subject_types = SubjectType.objects.all().values('id', 'code', 'name')
-            majors = Major.objects.all().values('id', 'code', 'name')
+            # Dữ liệu dropdown lấy từ gói danh mục (cache theo phiên bản)
+            reference = get_reference_bundle()['data']
             
             # Lấy curriculum_id từ request nếu có
+            # Không có bộ lọc thì chỉ render khung trang, JS tải dần các dòng từ /api/subjects/ theo cursor
             curriculum_id = request.GET.get('chuong-trinh-dao-tao')
             if curriculum_id:
                 mon_hoc_data = self.get_subject_data(curriculum_id)
             else:
-                mon_hoc_data = self.get_subject_data()
+                mon_hoc_data = []
             
             context = {
-                'departments': list(departments),
-                'subject_groups': list(subject_groups),
-                'curricula': list(curricula),
-                'courses': list(courses),
-                'subject_types': list(subject_types),
-                'majors': list(majors),
-                'mon_hoc_data': mon_hoc_data
+                'departments': reference['departments'],
+                'subject_groups': reference['subject_groups'],
+                'curricula': reference['curricula'],
+                'courses': reference['courses'],
+                'subject_types': reference['subject_types'],
+                'majors': reference['majors'],
+                'mon_hoc_data': mon_hoc_data,
+                'lazy_load_subjects': not curriculum_id
             }
             
             return render(request, self.template_name, context)
@@ -108,20 +123,20 @@ class TrainProgramManagerView(View):
                     status='draft'
                 )
                 
-                return JsonResponse({
+                return FastJsonResponse({
                     'status': 'success', 
                     'message': 'Đã thêm chương trình đào tạo thành công',
                     'id': curriculum.id
                 })
             except Exception as e:
-                return JsonResponse({'status': 'error', 'message': str(e)})
+                return FastJsonResponse({'status': 'error', 'message': str(e)})
         
-        return JsonResponse({'status': 'error', 'message': 'Invalid request'})
+        return FastJsonResponse({'status': 'error', 'message': 'Invalid request'})
     
     def put(self, request, id=None):
         """Cập nhật chương trình đào tạo"""
         if not request.headers.get('X-Requested-With') == 'XMLHttpRequest':
-            return JsonResponse({
+            return FastJsonResponse({
                 'status': 'error', 
                 'message': 'Invalid request'
             }, status=400)
@@ -155,12 +170,12 @@ class TrainProgramManagerView(View):
                                 defaults={'credits': credits_value}
                             )
                         except (ValueError, TypeError):
-                            return JsonResponse({
+                            return FastJsonResponse({
                                 'status': 'error', 
                                 'message': f'Giá trị tín chỉ không hợp lệ: {value}'
                             })
                     
-                    return JsonResponse({
+                    return FastJsonResponse({
                         'status': 'success', 
                         'message': f'Đã cập nhật phân bố học kỳ HK{semester}'
                     })
@@ -178,7 +193,7 @@ class TrainProgramManagerView(View):
                     else:
                         curriculum_subject.department = None
                         curriculum_subject.save()
-                    return JsonResponse({
+                    return FastJsonResponse({
                         'status': 'success', 
                         'message': 'Đã cập nhật đơn vị quản lý'
                     })
@@ -190,17 +205,17 @@ class TrainProgramManagerView(View):
                             course = Course.objects.get(id=course_id)
                             curriculum_subject.course = course
                             curriculum_subject.save()
-                            return JsonResponse({
+                            return FastJsonResponse({
                                 'status': 'success', 
                                 'message': f'Đã cập nhật khóa học thành công: {course.name}'
                             })
                         except (ValueError, TypeError):
-                            return JsonResponse({
+                            return FastJsonResponse({
                                 'status': 'error', 
                                 'message': f'ID khóa học không hợp lệ: {value}'
                             })
                         except Course.DoesNotExist:
-                            return JsonResponse({
+                            return FastJsonResponse({
                                 'status': 'error', 
                                 'message': f'Không tìm thấy khóa học với ID: {value}'
                             })
@@ -208,7 +223,7 @@ class TrainProgramManagerView(View):
                         # Nếu giá trị rỗng, xóa liên kết course
                         curriculum_subject.course = None
                         curriculum_subject.save()
-                        return JsonResponse({
+                        return FastJsonResponse({
                             'status': 'success', 
                             'message': 'Đã xóa liên kết khóa học'
                         })
@@ -239,18 +254,18 @@ class TrainProgramManagerView(View):
                                     # Bỏ qua nếu không tìm thấy giảng viên
                                     continue
                             
-                            return JsonResponse({
+                            return FastJsonResponse({
                                 'status': 'success', 
                                 'message': f'Đã cập nhật phân công giảng dạy cho {len(instructor_names)} giảng viên'
                             })
                         else:
-                            return JsonResponse({
+                            return FastJsonResponse({
                                 'status': 'success', 
                                 'message': 'Đã xóa tất cả phân công giảng dạy'
                             })
                             
                     except Exception as e:
-                        return JsonResponse({
+                        return FastJsonResponse({
                             'status': 'error', 
                             'message': f'Lỗi khi cập nhật giảng viên: {str(e)}'
                         })
@@ -273,17 +288,17 @@ class TrainProgramManagerView(View):
                             curriculum_subject.save()
                             print(f"Updated {field} from {old_value} to {new_value}")
                         
-                        return JsonResponse({
+                        return FastJsonResponse({
                             'status': 'success', 
                             'message': f'Đã cập nhật {field} thành công'
                         })
                     except (ValueError, TypeError) as e:
-                        return JsonResponse({
+                        return FastJsonResponse({
                             'status': 'error', 
                             'message': f'Giá trị {field} không hợp lệ: {value}'
                         })
                 else:
-                    return JsonResponse({
+                    return FastJsonResponse({
                         'status': 'error', 
                         'message': f'Trường {field} không tồn tại'
                     })       
@@ -298,24 +313,24 @@ class TrainProgramManagerView(View):
                     curriculum.total_credits = data.get('total_credits', curriculum.total_credits)
                     curriculum.save()
                     
-                return JsonResponse({
+                return FastJsonResponse({
                     'status': 'success', 
                     'message': 'Đã cập nhật chương trình thành công'
                 })
                 
         except Subject.DoesNotExist:
-            return JsonResponse({
+            return FastJsonResponse({
                 'status': 'error', 
                 'message': 'Môn học không tồn tại'
             })
         except Curriculum.DoesNotExist:
-            return JsonResponse({
+            return FastJsonResponse({
                 'status': 'error', 
                 'message': 'Chương trình đào tạo không tồn tại'
             })
         except Exception as e:
             print(f"Error in PUT: {str(e)}")  # Debug log
-            return JsonResponse({
+            return FastJsonResponse({
                 'status': 'error', 
                 'message': f'Lỗi khi cập nhật: {str(e)}'
             })
@@ -329,84 +344,37 @@ class TrainProgramManagerView(View):
                     subject_name = curriculum_subject.name
                     curriculum_subject.delete()
                     
-                    return JsonResponse({
+                    return FastJsonResponse({
                         'status': 'success', 
                         'message': f'Đã xóa môn học {subject_name}'
                     })
                 else:
-                    return JsonResponse({
+                    return FastJsonResponse({
                         'status': 'error', 
                         'message': 'Thiếu ID môn học'
                     })
                     
             except Subject.DoesNotExist:
-                return JsonResponse({
+                return FastJsonResponse({
                     'status': 'error', 
                     'message': 'Môn học trong Chươgn trình không tồn tại'
                 })
             except Exception as e:
-                return JsonResponse({
+                return FastJsonResponse({
                     'status': 'error', 
                     'message': f'Lỗi khi xóa: {str(e)}'
                 })
         
-        return JsonResponse({
+        return FastJsonResponse({
             'status': 'error', 
             'message': 'Invalid request'
         })
         
     def get_subject_data(self, curriculum_id=None):
         """Lấy dữ liệu môn học từ database"""
-        try:           
-            if curriculum_id:
-                curriculum_subjects = Subject.objects.select_related('subject_type', 'department', 'subject_group', 'curriculum', 'course' 
-                ).filter(curriculum=curriculum_id)
-            else:
-                # Lấy tất cả CurriculumSubject
-                curriculum_subjects = Subject.objects.select_related(
-                    'subject_type', 'department', 'subject_group', 'curriculum', 'course' 
-                ).all()
-                
-            curriculum_subjects = curriculum_subjects.order_by('order_number')
-            
-            subject_data = []
-            for cs in curriculum_subjects:
-                # Lấy phân bố học kỳ
-                semester_allocations = SemesterAllocation.objects.filter(base_subject=cs)
-                semester_data = {f'hk{alloc.semester}': float(alloc.credits) for alloc in semester_allocations}
-                
-                subject_data.append({
-                    'id': cs.id,
-                    'ma_mon_hoc': cs.code,
-                    'ten_mon_hoc': cs.name,
-                    'curriculum_id': cs.curriculum.id if cs.curriculum else None,
-                    'curriculum_code': cs.curriculum.code if cs.curriculum else '',
-                    'curriculum_academic_year': cs.curriculum.academic_year if cs.curriculum else '',
-                    'course_id': cs.course.id if cs.course else '',
-                    'course_code': cs.course.code if cs.course else '',
-                    'course_name': cs.course.name if cs.course else '',
-                    'loai_mon': cs.subject_type.name if cs.subject_type else '',
-                    'so_tin_chi': float(cs.credits),
-                    'tong_so_gio': cs.total_hours,
-                    'ly_thuyet': cs.theory_hours,
-                    'thuc_hanh': cs.practice_hours,
-                    'kiem_tra': cs.tests_hours,
-                    'thi': cs.exam_hours,
-                    'hk1': semester_data.get('hk1', ''),
-                    'hk2': semester_data.get('hk2', ''),
-                    'hk3': semester_data.get('hk3', ''),
-                    'hk4': semester_data.get('hk4', ''),
-                    'hk5': semester_data.get('hk5', ''),
-                    'hk6': semester_data.get('hk6', ''),
-                    'don_vi': cs.department.name if cs.department else '',
-                    'bo_mon': cs.subject_group.name if cs.subject_group else '',
-                    'giang_vien': self.get_instructors_for_subject(cs),
-                    'order_number': cs.order_number,
-                    'original_code': cs.original_code if cs.original_code else '',
-                    'subject_id': cs.id
-                })
-            
-            return subject_data
+        try:
+            # Phân bố học kỳ và giảng viên được nạp theo lô (số truy vấn cố định)
+            return load_subject_grid(curriculum_id)
         except Exception as e:
             return self.get_sample_data()
     
@@ -509,7 +477,21 @@ class ImportExcelView(View):
                 'Mô tả môn học': ['', '', '', '', '', '', '', ''],
             }
             
-            df = pd.DataFrame(sample_data)
+            headers = list(sample_data)
+            filename = 'mau_chuong_trinh_dao_tao.xlsx'
+            curriculum_id = request.GET.get('curriculum_id')
+            if curriculum_id:
+                # Xuất toàn bộ môn học của chương trình theo đúng mẫu này để sửa rồi import lại
+                curriculum_code = Curriculum.objects.filter(id=curriculum_id).values_list('code', flat=True).first()
+                if curriculum_code is None:
+                    return FastJsonResponse({'status': 'error', 'message': 'Không tìm thấy chương trình đào tạo'}, status=404)
+                filename = f'chuong_trinh_dao_tao_{curriculum_code}.xlsx'
+                rows = iter_export_values(
+                    CURRICULUM_TEMPLATE_EXPORT,
+                    Subject.objects.filter(curriculum_id=curriculum_id).order_by('order_number', 'id')
+                )
+            else:
+                rows = zip(*sample_data.values())
             
             # Lấy dữ liệu từ database cho sheet hướng dẫn
             departments = Department.objects.all().values('code', 'name')
@@ -521,200 +503,186 @@ class ImportExcelView(View):
             # df_subject_groups = pd.DataFrame(list(subject_groups))
             # df_subject_types = pd.DataFrame(list(subject_types))
             
-            # Tạo file trong memory
-            output = io.BytesIO()
-            with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-                workbook= writer.book
-                # Sheet chính với dữ liệu mẫu
-                df.to_excel(writer, index=False, sheet_name='Dữ liệu mẫu')
-                
-                # Format lại sheet dữ liệu mẫu, điều chỉnh độ rộng cột tự động theo nội dung cột
-                # Riêng cột 'Đơn vị chuyên môn' và 'Tổ bộ môn' đặt rộng hơn, nội dung của cột ngắt dòng tự động
-                worksheet_main = writer.sheets['Dữ liệu mẫu']
-                # Điều chỉnh độ rộng cột
-                for i, col in enumerate(df.columns):
-                    column_len = max(df[col].astype(str).str.len().max(), len(col)) + 2
-                    worksheet_main.set_column(i, i, column_len)
-                
-                # # Đặt độ rộng lớn hơn cho các cột đặc biệt
-                # special_columns = {'P': 30, 'Q': 30, 'U': 40}  # Cột P, Q, U (Đơn vị, Tổ bộ môn, Mô tả)
-                # for col_letter, width in special_columns.items():
-                #     col_index = list(df.columns).index([col for col in df.columns if col_letter in df.columns][0])
-                #     worksheet_main.set_column(col_index, col_index, width)
-                
-                # Thiết lập bộ lọc tự động
-                worksheet_main.autofilter(0, 0, len(df), len(df.columns) - 1)
-                
-                # Đóng băng hàng đầu tiên và cột D
-                worksheet_main.freeze_panes(1, 3)  # Dòng 1, cột D
+            # constant_memory: từng dòng được ghi xuống file tạm ngay thay vì giữ cả workbook trong RAM
+            workbook, output = open_xlsx_workbook()
+            # Sheet chính với dữ liệu mẫu
+            worksheet_main = workbook.add_worksheet('Dữ liệu mẫu')
+            row_count, column_lengths = write_sheet_rows(worksheet_main, headers, rows)
+            
+            # Format lại sheet dữ liệu mẫu, điều chỉnh độ rộng cột tự động theo nội dung cột
+            # Điều chỉnh độ rộng cột
+            for i, column_len in enumerate(column_lengths):
+                worksheet_main.set_column(i, i, column_len + 2)
+            
+            # # Đặt độ rộng lớn hơn cho các cột đặc biệt
+            # special_columns = {'P': 30, 'Q': 30, 'U': 40}  # Cột P, Q, U (Đơn vị, Tổ bộ môn, Mô tả)
+            # for col_letter, width in special_columns.items():
+            #     col_index = list(df.columns).index([col for col in df.columns if col_letter in df.columns][0])
+            #     worksheet_main.set_column(col_index, col_index, width)
+            
+            # Thiết lập bộ lọc tự động
+            worksheet_main.autofilter(0, 0, row_count, len(headers) - 1)
+            
+            # Đóng băng hàng đầu tiên và cột D
+            worksheet_main.freeze_panes(1, 3)  # Dòng 1, cột D
 
-                # Sheet hướng dẫn nhập liệu
-                # workbook = writer.book
-                worksheet = workbook.add_worksheet('Hướng dẫn nhập liệu')
-                
-                # Định dạng
-                bold_format = workbook.add_format({'bold': True})
-                bold_format1 = workbook.add_format({'bold': True, 'font_color': 'red'})
-                italic_format = workbook.add_format({'italic': True, 'font_color': 'blue'})
-                header_format = workbook.add_format({'bold': True, 'bg_color': '#DDEBF7'})
-                
-                row = 0
-                
-                # Section Đơn vị
-                worksheet.write(row, 0, "DANH SÁCH ĐƠN VỊ CÓ SẴN", bold_format)
-                row += 1
-                worksheet.write(row, 0, "TT", header_format)
-                worksheet.write(row, 1, "Mã đơn vị", header_format)
-                worksheet.write(row, 2, "Tên đơn vị", header_format)
-                row += 1
-                tt_department=1
-                for department in departments:
-                    worksheet.write(row, 0, tt_department)
-                    worksheet.write(row, 1, department['code'])
-                    worksheet.write(row, 2, department['name'])
-                    row += 1
-                    tt_department += 1
-                row += 2
-                
-                # Section Bộ môn
-                worksheet.write(row, 0, "DANH SÁCH BỘ MÔN CÓ SẴN", bold_format)
-                row += 1
-                worksheet.write(row, 0, "TT", header_format)
-                worksheet.write(row, 1, "Mã bộ môn", header_format)
-                worksheet.write(row, 2, "Tên bộ môn", header_format)
-                worksheet.write(row, 3, "Tên đơn vị quản lý", header_format)
+            # Sheet hướng dẫn nhập liệu
+            # workbook = writer.book
+            worksheet = workbook.add_worksheet('Hướng dẫn nhập liệu')
+            
+            # Định dạng
+            bold_format = workbook.add_format({'bold': True})
+            bold_format1 = workbook.add_format({'bold': True, 'font_color': 'red'})
+            italic_format = workbook.add_format({'italic': True, 'font_color': 'blue'})
+            header_format = workbook.add_format({'bold': True, 'bg_color': '#DDEBF7'})
+            
+            row = 0
+            
+            # Section Đơn vị
+            worksheet.write(row, 0, "DANH SÁCH ĐƠN VỊ CÓ SẴN", bold_format)
+            row += 1
+            worksheet.write(row, 0, "TT", header_format)
+            worksheet.write(row, 1, "Mã đơn vị", header_format)
+            worksheet.write(row, 2, "Tên đơn vị", header_format)
+            row += 1
+            tt_department=1
+            for department in departments:
+                worksheet.write(row, 0, tt_department)
+                worksheet.write(row, 1, department['code'])
+                worksheet.write(row, 2, department['name'])
                 row += 1
-                tt_sub_gr=1
-                for subject_group in subject_groups:
-                    worksheet.write(row, 0, tt_sub_gr)
-                    worksheet.write(row, 1, subject_group['code'])
-                    worksheet.write(row, 2, subject_group['name'])
-                    worksheet.write(row, 3, subject_group['department__name'])
-                    row += 1
-                    tt_sub_gr += 1
-                row += 2
-                
-                # Section Loại môn
-                worksheet.write(row, 0, "DANH SÁCH LOẠI MÔN CÓ SẴN", bold_format)
+                tt_department += 1
+            row += 2
+            
+            # Section Bộ môn
+            worksheet.write(row, 0, "DANH SÁCH BỘ MÔN CÓ SẴN", bold_format)
+            row += 1
+            worksheet.write(row, 0, "TT", header_format)
+            worksheet.write(row, 1, "Mã bộ môn", header_format)
+            worksheet.write(row, 2, "Tên bộ môn", header_format)
+            worksheet.write(row, 3, "Tên đơn vị quản lý", header_format)
+            row += 1
+            tt_sub_gr=1
+            for subject_group in subject_groups:
+                worksheet.write(row, 0, tt_sub_gr)
+                worksheet.write(row, 1, subject_group['code'])
+                worksheet.write(row, 2, subject_group['name'])
+                worksheet.write(row, 3, subject_group['department__name'])
                 row += 1
-                worksheet.write(row, 0, "TT", header_format)
-                worksheet.write(row, 1, "Mã loại môn", header_format)
-                worksheet.write(row, 2, "Tên loại môn", header_format)
+                tt_sub_gr += 1
+            row += 2
+            
+            # Section Loại môn
+            worksheet.write(row, 0, "DANH SÁCH LOẠI MÔN CÓ SẴN", bold_format)
+            row += 1
+            worksheet.write(row, 0, "TT", header_format)
+            worksheet.write(row, 1, "Mã loại môn", header_format)
+            worksheet.write(row, 2, "Tên loại môn", header_format)
+            row += 1
+            tt_sub_type=1
+            for subject_type in subject_types:
+                worksheet.write(row, 0, tt_sub_type)
+                worksheet.write(row, 1, subject_type['code'])
+                worksheet.write(row, 2, subject_type['name'])
                 row += 1
-                tt_sub_type=1
-                for subject_type in subject_types:
-                    worksheet.write(row, 0, tt_sub_type)
-                    worksheet.write(row, 1, subject_type['code'])
-                    worksheet.write(row, 2, subject_type['name'])
-                    row += 1
-                    tt_sub_type += 1
-                row += 2
-                
-                # Điều chỉnh độ rộng cột tự động vừa với nội dung
-                worksheet.set_column(0, 0, 10)
-                worksheet.set_column(1, 1, 20)
-                worksheet.set_column(2, 2, 30)
-                
-                # Thêm ghi chú
-                worksheet.write(row, 0, "LƯU Ý QUAN TRỌNG:", bold_format1)
+                tt_sub_type += 1
+            row += 2
+            
+            # Điều chỉnh độ rộng cột tự động vừa với nội dung
+            worksheet.set_column(0, 0, 10)
+            worksheet.set_column(1, 1, 20)
+            worksheet.set_column(2, 2, 30)
+            
+            # Thêm ghi chú
+            worksheet.write(row, 0, "LƯU Ý QUAN TRỌNG:", bold_format1)
+            row += 1
+            
+            notes = [
+                "1. Chỉ nhập dữ liệu vào sheet 'Dữ liệu mẫu'",
+                "2. Các cột có dấu * là bắt buộc",
+                "3. Sử dụng các giá trị từ danh sách trên để đảm bảo tính nhất quán",
+                "4. Nếu dùng mã đơn vị, bộ môn, loại môn không có trong danh sách, hệ thống sẽ tự động tạo mới",
+                "5. Thống nhất dùng tên (hoặc mã) đơn vị, bộ môn, loại môn như trong danh sách để tránh lỗi hệ thống",
+                "6. Đảm bảo định dạng số cho các cột số tín chỉ, số giờ, học kỳ",
+                "7. Kiểm tra kỹ dữ liệu trước khi import để tránh lỗi không mong muốn"
+            ]
+            for note in notes:
+                worksheet.write(row, 0, note, italic_format)
                 row += 1
-                
-                notes = [
-                    "1. Chỉ nhập dữ liệu vào sheet 'Dữ liệu mẫu'",
-                    "2. Các cột có dấu * là bắt buộc",
-                    "3. Sử dụng các giá trị từ danh sách trên để đảm bảo tính nhất quán",
-                    "4. Nếu dùng mã đơn vị, bộ môn, loại môn không có trong danh sách, hệ thống sẽ tự động tạo mới",
-                    "5. Thống nhất dùng tên (hoặc mã) đơn vị, bộ môn, loại môn như trong danh sách để tránh lỗi hệ thống",
-                    "6. Đảm bảo định dạng số cho các cột số tín chỉ, số giờ, học kỳ",
-                    "7. Kiểm tra kỹ dữ liệu trước khi import để tránh lỗi không mong muốn"
-                ]
-                for note in notes:
-                    worksheet.write(row, 0, note, italic_format)
-                    row += 1
-                
-                # Thiết lập chế độ lấy danh sách từ sheet hướng dẫn cho các cột tương ứng trong sheet dữ liệu mẫu
-                # Lấy số dòng đã sử dụng trong sheet hướng dẫn
-                # Lấy vị trí cột dựa trên tên cột
-                # def get_column_index(column_name):
-                #     for i, col in enumerate(df.columns):
-                #         if column_name in str(col):
-                #             return i
-                #     return None
-                
-                # Data validation cho cột Đơn vị (P)
-                # dept_col_index = get_column_index('đơn vị')
-                if 'Đơn vị quản lý chuyên môn*' in df.columns:
-                    dept_col_index = list(df.columns).index('Đơn vị quản lý chuyên môn*')
-                    # if dept_col_index is not None:
-                    # Tạo danh sách đơn vị
-                    dept_list = [d['name'] for d in departments]
-                    # Chỉ thêm data validation nếu có dữ liệu
-                    if dept_list:
-                        # Viết danh sách vào một sheet ẩn hoặc sử dụng named range
-                        dept_sheet = workbook.add_worksheet('DeptList')
-                        dept_sheet.hide()
-                        for i, dept in enumerate(dept_list):
-                            dept_sheet.write(i, 0, dept)
-                        
-                        # Tạo data validation
-                        worksheet_main.data_validation(1, dept_col_index, 1000, dept_col_index, {
-                            'validate': 'list',
-                            'source': '=DeptList!$A$1:$A${}'.format(len(dept_list))
-                        })
+            
+            # Thiết lập chế độ lấy danh sách từ sheet hướng dẫn cho các cột tương ứng trong sheet dữ liệu mẫu
+            # Lấy số dòng đã sử dụng trong sheet hướng dẫn
+            # Lấy vị trí cột dựa trên tên cột
+            # def get_column_index(column_name):
+            #     for i, col in enumerate(df.columns):
+            #         if column_name in str(col):
+            #             return i
+            #     return None
+            
+            # Data validation cho cột Đơn vị (P)
+            # dept_col_index = get_column_index('đơn vị')
+            if 'Đơn vị quản lý chuyên môn*' in headers:
+                dept_col_index = headers.index('Đơn vị quản lý chuyên môn*')
+                # if dept_col_index is not None:
+                # Tạo danh sách đơn vị
+                dept_list = [d['name'] for d in departments]
+                # Chỉ thêm data validation nếu có dữ liệu
+                if dept_list:
+                    # Viết danh sách vào một sheet ẩn hoặc sử dụng named range
+                    dept_sheet = workbook.add_worksheet('DeptList')
+                    dept_sheet.hide()
+                    for i, dept in enumerate(dept_list):
+                        dept_sheet.write(i, 0, dept)
                     
-                # subgr_col_index = get_column_index('Bộ môn')
-                # if subgr_col_index is not None:
-                if 'Tổ bộ môn*' in df.columns:
-                    subgr_col_index = list(df.columns).index('Tổ bộ môn*')
-                    # Tạo danh sách Bộ môn
-                    subgr_list = [s['name'] for s in subject_groups]
-                    # Chỉ thêm data validation nếu có dữ liệu
-                    if subgr_list:
-                        # Viết danh sách vào một sheet ẩn hoặc sử dụng named range
-                        subgr_sheet = workbook.add_worksheet('SubgrList')
-                        subgr_sheet.hide()
-                        for i, subgr in enumerate(subgr_list):
-                            subgr_sheet.write(i, 0, subgr)
-                        
-                        # Tạo data validation
-                        worksheet_main.data_validation(1, subgr_col_index, 1000, subgr_col_index, {
-                            'validate': 'list',
-                            'source': '=SubgrList!$A$1:$A${}'.format(len(subgr_list))
-                        })
-                
-                # Data validation cho cột Loại môn (Q)
-                # subtype_col_index = get_column_index('Loại môn')
-                if 'Loại môn' in df.columns:
-                    subtype_col_index = list(df.columns).index('Loại môn')
-                    # Tạo danh sách Bộ môn
-                    subtype_list = [st['name'] for st in subject_types]
-                    # Chỉ thêm data validation nếu có dữ liệu
-                    if subtype_list:
-                        # Viết danh sách vào một sheet ẩn hoặc sử dụng named range
-                        subtype_sheet = workbook.add_worksheet('SubtpeList')
-                        subtype_sheet.hide()
-                        for i, subtpe in enumerate(subtype_list):
-                            subtype_sheet.write(i, 0, subtpe)
-                        
-                        # Tạo data validation
-                        worksheet_main.data_validation(1, subtype_col_index, 1000, subtype_col_index, {
-                            'validate': 'list',
-                            'source': '=SubtpeList!$A$1:$A${}'.format(len(subtype_list))
-                        })
+                    # Tạo data validation
+                    worksheet_main.data_validation(1, dept_col_index, 1000, dept_col_index, {
+                        'validate': 'list',
+                        'source': '=DeptList!$A$1:$A${}'.format(len(dept_list))
+                    })
                 
-            output.seek(0)
+            # subgr_col_index = get_column_index('Bộ môn')
+            # if subgr_col_index is not None:
+            if 'Tổ bộ môn*' in headers:
+                subgr_col_index = headers.index('Tổ bộ môn*')
+                # Tạo danh sách Bộ môn
+                subgr_list = [s['name'] for s in subject_groups]
+                # Chỉ thêm data validation nếu có dữ liệu
+                if subgr_list:
+                    # Viết danh sách vào một sheet ẩn hoặc sử dụng named range
+                    subgr_sheet = workbook.add_worksheet('SubgrList')
+                    subgr_sheet.hide()
+                    for i, subgr in enumerate(subgr_list):
+                        subgr_sheet.write(i, 0, subgr)
+                    
+                    # Tạo data validation
+                    worksheet_main.data_validation(1, subgr_col_index, 1000, subgr_col_index, {
+                        'validate': 'list',
+                        'source': '=SubgrList!$A$1:$A${}'.format(len(subgr_list))
+                    })
             
-            # Trả về file để download
-            response = HttpResponse(
-                output.getvalue(),
-                content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-            )
-            response['Content-Disposition'] = 'attachment; filename="mau_chuong_trinh_dao_tao.xlsx"'
-            response['Content-Length'] = len(output.getvalue())
+            # Data validation cho cột Loại môn (Q)
+            # subtype_col_index = get_column_index('Loại môn')
+            if 'Loại môn' in headers:
+                subtype_col_index = headers.index('Loại môn')
+                # Tạo danh sách Bộ môn
+                subtype_list = [st['name'] for st in subject_types]
+                # Chỉ thêm data validation nếu có dữ liệu
+                if subtype_list:
+                    # Viết danh sách vào một sheet ẩn hoặc sử dụng named range
+                    subtype_sheet = workbook.add_worksheet('SubtpeList')
+                    subtype_sheet.hide()
+                    for i, subtpe in enumerate(subtype_list):
+                        subtype_sheet.write(i, 0, subtpe)
+                    
+                    # Tạo data validation
+                    worksheet_main.data_validation(1, subtype_col_index, 1000, subtype_col_index, {
+                        'validate': 'list',
+                        'source': '=SubtpeList!$A$1:$A${}'.format(len(subtype_list))
+                    })
             
-            return response
+            return xlsx_file_response(workbook, output, filename)
         except Exception as e:
-            return JsonResponse({'status': 'error', 'message': f"Lỗi tạo file mẫu {str(e)}"})
+            return FastJsonResponse({'status': 'error', 'message': f"Lỗi tạo file mẫu {str(e)}"})
     
     def post(self, request):
         """Xử lý import file Excel"""
@@ -726,62 +694,71 @@ class ImportExcelView(View):
                 sheet_name = request.POST.get('sheet_name', '')  # Lấy tên sheet từ request
                 
                 if not curriculum_id:
-                    return JsonResponse({'status': 'error', 'message': 'Vui lòng chọn chương trình đào tạo'})
+                    return FastJsonResponse({'status': 'error', 'message': 'Vui lòng chọn chương trình đào tạo'})
                 
                 # Kiểm tra định dạng file
                 if not excel_file.name.endswith(('.xlsx', '.xls')):
-                    return JsonResponse({'status': 'error', 'message': 'File phải có định dạng Excel (.xlsx hoặc .xls)'})
-                
-                # Kiểm tra kích thước file (tối đa 10MB)
-                if excel_file.size > 10 * 1024 * 1024:
-                    return JsonResponse({'status': 'error', 'message': 'File không được vượt quá 10MB'})
-                
-                try:
-                    # Đọc file Excel để lấy danh sách sheet
-                    excel_file.seek(0)  # Reset file pointer
-                    xls = pd.ExcelFile(excel_file)
-                    sheet_names = xls.sheet_names
-                    
-                    # Nếu không có sheet_name được chọn, sử dụng sheet đầu tiên
-                    if not sheet_name and sheet_names:
-                        sheet_name = sheet_names[0]
-                        
-                    # Đọc file Excel cụ thể
-                    df = pd.read_excel(excel_file, sheet_name=sheet_name)
-                    
-                except Exception as e:
-                    return JsonResponse({'status': 'error', 'message': f'Không thể đọc file Excel: {str(e)}'})
-                
-                # Xử lý dữ liệu và lưu vào database - TRUYỀN excel_file VÀO
-                result = self.process_excel_data(df, curriculum_id, course_id, request.user, excel_file, sheet_name)
-                
-                if result['status'] == 'success':
-                    return JsonResponse({
-                        'status': 'success', 
-                        'message': f'Import file Excel thành công: {result["created_count"]} môn học được tạo, {result["updated_count"]} môn học được cập nhật',
-                        'data': result['processed_data'],
-                        'sheet_used': sheet_name,
-                        'code_mapping': [{'original': item['ma_mon_hoc_goc'], 'new': item['ma_mon_hoc_moi']} 
-                                    for item in result['processed_data']]
-                    })
-                else:
-                    return JsonResponse({'status': 'error', 'message': result['message']})
+                    return FastJsonResponse({'status': 'error', 'message': 'File phải có định dạng Excel (.xlsx hoặc .xls)'})
+                
+                # Kiểm tra kích thước file (file được đọc streaming nên giới hạn lấy từ settings)
+                max_upload_size = settings.IMPORT_MAX_UPLOAD_SIZE
+                if excel_file.size > max_upload_size:
+                    return FastJsonResponse({'status': 'error', 'message': f'File không được vượt quá {max_upload_size // (1024 * 1024)}MB'})
+                
+                # Tạo job import; việc đọc file và ghi dữ liệu chạy ở worker thread
+                history = ImportHistory.objects.create(
+                    status='pending',
+                    object_type='curriculum',
+                    curriculum_id=curriculum_id,
+                    file_name=excel_file.name,
+                    file_size=excel_file.size,
+                    imported_by=request.user if request.user.is_authenticated else None,
+                    additional_info=f"Sheet được sử dụng: {sheet_name}" if sheet_name else None
+                )
+                submit_import_job(history, self.run_import_job, save_upload(excel_file), curriculum_id, course_id, sheet_name)
+                return import_job_response(history)
                     
             else:
-                return JsonResponse({'status': 'error', 'message': 'Không tìm thấy file'})
+                return FastJsonResponse({'status': 'error', 'message': 'Không tìm thấy file'})
                 
         except Exception as e:
-            return JsonResponse({'status': 'error', 'message': f'Lỗi khi xử lý file: {str(e)}'})
+            return FastJsonResponse({'status': 'error', 'message': f'Lỗi khi xử lý file: {str(e)}'})
     
-    def process_excel_data(self, df, curriculum_id, course_id, user, excel_file, sheet_name):  # THÊM excel_file, sheet_name VÀO THAM SỐ
+    def run_import_job(self, job, path, curriculum_id, course_id, sheet_name):
+        """Đọc file Excel (streaming) và import trong worker thread"""
+        try:
+            try:
+                # Không chọn sheet thì SheetReader dùng sheet đầu tiên
+                reader = SheetReader(path, sheet_name or None)
+                sheet_name = reader.sheet_name
+            except Exception as e:
+                job.fail(f'Không thể đọc file Excel: {str(e)}')
+                return
+            
+            job.start(reader.total_rows)
+            with reader:
+                result = self.process_excel_data(reader, curriculum_id, course_id, job)
+        finally:
+            remove_file(path)
+        if result['status'] == 'success':
+            response_data = {
+                'status': 'success', 
+                'message': f'Import file Excel thành công: {result["created_count"]} môn học được tạo, {result["updated_count"]} môn học được cập nhật',
+                'data': result['processed_data'],
+                'errors': result['errors'],
+                'sheet_used': sheet_name,
+                'code_mapping': [{'original': item['ma_mon_hoc_goc'], 'new': item['ma_mon_hoc_moi']} 
+                            for item in result['processed_data']]
+            }
+        else:
+            response_data = {'status': 'error', 'message': result['message']}
+        job.finish(result, response_data)
+    
+    def process_excel_data(self, df, curriculum_id, course_id, job=None):
         """Xử lý dữ liệu từ Excel và lưu vào database"""
         try:
             curriculum = Curriculum.objects.get(id=curriculum_id)
             course = Course.objects.get(id=course_id)
-            created_count = 0
-            updated_count = 0
-            processed_data = []
-            errors = []
             
             # Kiểm tra cấu trúc file
             required_columns = ['Mã môn học*', 'Tên học phần*', 'Số tín chỉ*']
@@ -792,238 +769,12 @@ class ImportExcelView(View):
                     'message': f'File thiếu các cột bắt buộc: {", ".join(missing_columns)}'
                 }
             
-            for index, row in df.iterrows():
-                try:
-                    # Bỏ qua các dòng trống hoặc dòng tiêu đề
-                    if pd.isna(row.get('Mã môn học*')) or str(row.get('Mã môn học*')).strip() in ['', 'Mã môn học*', 'nan']:
-                        continue
-                    
-                    # Chuẩn hóa dữ liệu
-                    original_code = str(row.get('Mã môn học*')).strip()
-                    ten_mon_hoc = str(row.get('Tên học phần*')).strip()
-                    
-                    if not original_code or not ten_mon_hoc:
-                        errors.append(f"Dòng {index + 2}: Mã môn học và Tên học phần không được để trống")
-                        continue
-                    
-                    # Xử lý số tín chỉ
-                    try:
-                        so_tin_chi = float(row.get('Số tín chỉ*', 0))
-                    except (ValueError, TypeError):
-                        so_tin_chi = 0
-                    
-                    # Xử lý số giờ
-                    try:
-                        tong_so_gio = int(float(row.get('Tổng số giờ*', 0)))
-                    except (ValueError, TypeError):
-                        tong_so_gio = 0
-                    
-                    try:
-                        ly_thuyet = int(float(row.get('Lý thuyết*', 0)))
-                    except (ValueError, TypeError):
-                        ly_thuyet = 0
-                    
-                    try:
-                        thuc_hanh = int(float(row.get('Thực hành*', 0)))
-                    except (ValueError, TypeError):
-                        thuc_hanh = 0
-                    
-                    try:
-                        kiem_tra = int(float(row.get('Kiểm tra*', 0)))
-                    except (ValueError, TypeError):
-                        kiem_tra = 0
-                    
-                    try:
-                        thi = int(float(row.get('Thi', 0)))
-                    except (ValueError, TypeError):
-                        thi = 0
-                    
-                    # Xác định học kỳ mặc định từ phân bố học kỳ
-                    default_semester = None
-                    for hk in range(1, 7):
-                        column_name = f'HK{hk}'
-                        if column_name in df.columns:
-                            credits_value = row.get(column_name)
-                            if credits_value and str(credits_value).strip() and str(credits_value).strip() not in ['', 'nan', 'x', 'X']:
-                                default_semester = hk
-                                break
-                    
-                    # Lấy hoặc tạo department - sử dụng giá trị chính xác từ database
-                    department_name = str(row.get('Đơn vị quản lý chuyên môn*', '')).strip()
-                    department = None
-                    if department_name and department_name not in ['', 'nan']:
-                        try:
-                            # Tìm department theo tên chính xác
-                            department = Department.objects.get(name=department_name)
-                        except Department.DoesNotExist:
-                            department, _ = Department.objects.get_or_create(
-                                name=department_name,
-                                defaults={
-                                    'code': department_name[:10].upper().replace(' ', ''),
-                                    'name': department_name
-                                }
-                            )
-                            errors.append(f"Dòng {index + 2}: Đã tạo mới đơn vị '{department_name}'")
-                    
-                    # Lấy hoặc tạo subject_type - sử dụng giá trị chính xác từ database
-                    subject_type_name = str(row.get('Loại môn', 'Bắt buộc')).strip()
-                    if not subject_type_name or subject_type_name == 'nan':
-                        subject_type_name = 'Bắt buộc'
-                    
-                    try:
-                        subject_type = SubjectType.objects.get(name=subject_type_name)
-                    except SubjectType.DoesNotExist:
-                        subject_type, _ = SubjectType.objects.get_or_create(
-                            name=subject_type_name,
-                            defaults={
-                                'code': subject_type_name[:10].upper().replace(' ', ''),
-                                'name': subject_type_name
-                            }
-                        )
-                        errors.append(f"Dòng {index + 2}: Đã tạo mới loại môn '{subject_type_name}'")
-                    
-                    # Lấy hoặc tạo subject_group nếu có
-                    subject_group = None
-                    subject_group_name = str(row.get('Tổ bộ môn*', '')).strip()
-                    if subject_group_name and subject_group_name not in ['', 'nan']:
-                        subject_group, _ = SubjectGroup.objects.get_or_create(
-                            department=department,
-                            name=subject_group_name,
-                            defaults={
-                                'code': subject_group_name[:10].upper().replace(' ', ''),
-                                'name': subject_group_name,
-                                'department': department
-                            }
-                        )
-                    
-                    # Xử lý thứ tự
-                    try:
-                        order_number = int(row.get('TT', index + 1))
-                    except (ValueError, TypeError):
-                        order_number = index + 1
-                    
-                    # Tạo mã duy nhất cho môn học
-                    curriculum_prefix = curriculum.code.replace(' ', '_').upper()[:15]
-                    base_code = original_code
-                    
-                    # Kiểm tra xem mã đã tồn tại chưa
-                    proposed_code = f"{curriculum_prefix}_{base_code}"
-                    counter = 1
-                    unique_code = proposed_code
-                    
-                    while Subject.objects.filter(code=unique_code).exists():
-                        # Kiểm tra xem có phải là cùng một môn học không (dựa trên tên và các thuộc tính)
-                        existing_subject = Subject.objects.get(code=unique_code)
-                        
-                        if (existing_subject.name == ten_mon_hoc and
-                            existing_subject.curriculum.id == curriculum.id and
-                            existing_subject.course.id == course.id and
-                            float(existing_subject.credits) == so_tin_chi and
-                            int(existing_subject.semester) == default_semester):
-                            # Nếu giống hệt, sử dụng môn học hiện có
-                            break
-                        else:
-                            # Nếu khác, tạo mã mới
-                            unique_code = f"{proposed_code}_{counter}"
-                            counter += 1
-                    
-                    # Tạo hoặc cập nhật subject
-                    is_elective = False
-                    if subject_type_name == "Môn học tự chọn":
-                        is_elective = True                        
-                        
-                    subject, created = Subject.objects.update_or_create(
-                        curriculum = curriculum,
-                        course = course,
-                        code = unique_code,
-                        defaults={
-                            'name': ten_mon_hoc,
-                            'credits': so_tin_chi,
-                            'semester': default_semester,
-                            'total_hours': tong_so_gio,
-                            'theory_hours': ly_thuyet,
-                            'practice_hours': thuc_hanh,
-                            'tests_hours': kiem_tra,
-                            'exam_hours': thi,
-                            'department': department,
-                            'subject_type': subject_type,
-                            'subject_group': subject_group,
-                            'is_elective': is_elective,
-                            'order_number': order_number,
-                            'original_code': original_code,
-                        }
-                    )
-                                        
-                    if created:
-                        created_count += 1
-                    else:
-                        updated_count += 1
-                    
-                    # Xử lý phân bố học kỳ
-                    for hk in range(1, 7):
-                        column_name = f'HK{hk}'
-                        if column_name in df.columns:
-                            credits_value = row.get(column_name)
-                            if credits_value and str(credits_value).strip() and str(credits_value).strip() not in ['', 'nan', 'x', 'X']:
-                                try:
-                                    credit_value = float(credits_value)
-                                    SemesterAllocation.objects.update_or_create(
-                                        base_subject=subject,
-                                        semester=hk,
-                                        defaults={'credits': credit_value}
-                                    )
-                                except (ValueError, TypeError) as e:
-                                    errors.append(f"Dòng {index + 2} - HK{hk}: Giá trị tín chỉ không hợp lệ: {credits_value}")
-                    
-                    processed_data.append({
-                        'ma_mon_hoc_goc': original_code,
-                        'ma_mon_hoc_moi': subject.code,
-                        'ten_mon_hoc': subject.name,
-                        'so_tin_chi': float(subject.credits),
-                        'tong_so_gio': subject.total_hours,
-                        'ly_thuyet': subject.theory_hours,
-                        'thuc_hanh': subject.practice_hours,
-                        'kiem_tra': subject.tests_hours,
-                        'thi': subject.exam_hours,
-                        'hoc_ky': subject.semester
-                    })
-                    
-                except Exception as e:
-                    error_msg = f"Dòng {index + 2}: {str(e)}"
-                    errors.append(error_msg)
-            
-            # Lưu lịch sử import - SỬ DỤNG excel_file ĐÃ ĐƯỢC TRUYỀN VÀO
-            # ImportHistory.objects.create(
-            #     curriculum=curriculum,
-            #     file_name=excel_file.name,  # BÂY GIỜ excel_file ĐÃ ĐƯỢC XÁC ĐỊNH
-            #     file_size=excel_file.size,   # BÂY GIỜ excel_file ĐÃ ĐƯỢC XÁC ĐỊNH
-            #     imported_by=user,
-            #     record_count=len(processed_data),
-            #     status='success' if not errors else 'partial',
-            #     errors=errors if errors else None,
-            #     additional_info=f"Sheet được sử dụng: {sheet_name}"
-            # )
-            
-            import_history_data = {
-                'curriculum': curriculum,
-                'file_name': excel_file.name,
-                'file_size': excel_file.size,
-                'imported_by': user,
-                'record_count': len(processed_data),
-                'status': 'success' if not errors else 'partial',
-                'errors': errors if errors else None,
-            }
-            
-            # Chỉ thêm additional_info nếu không gây lỗi
-            try:
-                # Kiểm tra xem model có trường này không
-                test_instance = ImportHistory()
-                if hasattr(test_instance, 'additional_info'):
-                    import_history_data['additional_info'] = f"Sheet được sử dụng: {sheet_name}"
-            except:
-                pass  # Bỏ qua nếu có lỗi
-            
-            ImportHistory.objects.create(**import_history_data)
+            # Import theo lô: bảng tra cứu nạp một lần, ghi bằng bulk_create / bulk_update
+            result = CurriculumImporter(curriculum, course).run(df, job)
+            created_count = result['created_count']
+            updated_count = result['updated_count']
+            processed_data = result['processed_data']
+            errors = result['errors']
                         
             return {
                 'status': 'success',
@@ -1039,11 +790,9 @@ class ImportExcelView(View):
             return {'status': 'error', 'message': f'Lỗi xử lý dữ liệu: {str(e)}'}
     
     def get_sheet_names(self, excel_file):
-        """Lấy danh sách các sheet trong file Excel"""
+        """Lấy danh sách các sheet trong file Excel (chỉ đọc metadata)"""
         try:
-            excel_file.seek(0)  # Reset file pointer
-            xls = pd.ExcelFile(excel_file)
-            return xls.sheet_names
+            return get_sheet_names(excel_file)
         except Exception as e:
             print(f"Error getting sheet names: {str(e)}")
             return []
@@ -1061,64 +810,40 @@ def generate_subject_code(self, curriculum, original_code, name, credits, total_
     else:
         proposed_code = f"{curriculum_prefix}_{random.randint(1000, 9999)}"
     
-    # Kiểm tra xem mã đã tồn tại chưa
-    counter = 1
-    unique_code = proposed_code
+    # Các môn học đã dùng mã cùng tiền tố, lấy bằng một truy vấn
+    existing_subjects = {
+        subject['code']: subject
+        for subject in Subject.objects.filter(code__startswith=proposed_code).values(
+            'code', 'name', 'credits', 'total_hours'
+        )
+    }
     
-    while Subject.objects.filter(code=unique_code).exists():
-        existing_subject = Subject.objects.get(code=unique_code)
-        
-        # Kiểm tra xem có phải cùng một môn học không
-        is_same_subject = (
-            existing_subject.name == name and
-            float(existing_subject.credits) == credits and
-            existing_subject.total_hours == total_hours
+    def is_same_subject(code):
+        # Nếu là cùng môn học, sử dụng mã hiện tại
+        existing_subject = existing_subjects[code]
+        return (
+            existing_subject['name'] == name and
+            float(existing_subject['credits']) == credits and
+            existing_subject['total_hours'] == total_hours
         )
-        
-        if is_same_subject:
-            # Nếu là cùng môn học, sử dụng mã hiện tại
-            break
-        else:
-            # Nếu khác môn học, tạo mã mới
-            unique_code = f"{proposed_code}_{counter}"
-            counter += 1
     
-    return unique_code
+    return first_free_code(proposed_code, existing_subjects, reuse=is_same_subject)
     
 class ThongKeView(View):
     def get(self, request):
-        """API trả về thống kê"""
+        """API trả về thống kê (lọc theo curriculum_id, course_id, department_id, semester;
+        nhóm theo group_by=curriculum,course,department,semester)"""
         try:
-            curriculum_id = request.GET.get('curriculum_id')
-            
-            if curriculum_id:
-                # Tính tổng từ CurriculumSubject
-                curriculum_subjects = Subject.objects.filter(curriculum_id=curriculum_id)
-                total_credits = sum(float(cs.credits) for cs in curriculum_subjects)
-                total_hours = sum(cs.total_hours for cs in curriculum_subjects)
-                total_theory = sum(cs.theory_hours for cs in curriculum_subjects)
-                total_practice = sum(cs.practice_hours for cs in curriculum_subjects)
-            else:
-                # Tính tổng từ tất cả CurriculumSubject
-                curriculum_subjects = Subject.objects.all()
-                total_credits = sum(float(cs.credits) for cs in curriculum_subjects)
-                total_hours = sum(cs.total_hours for cs in curriculum_subjects)
-                total_theory = sum(cs.theory_hours for cs in curriculum_subjects)
-                total_practice = sum(cs.practice_hours for cs in curriculum_subjects)
-            
-            ty_le_ly_thuyet = (total_theory / total_hours * 100) if total_hours > 0 else 0
-            ty_le_thuc_hanh = (total_practice / total_hours * 100) if total_hours > 0 else 0
-            
-            thong_ke = {
-                'tong_tin_chi': total_credits,
-                'tong_gio': total_hours,
-                'ty_le_ly_thuyet': f'{ty_le_ly_thuyet:.1f}%',
-                'ty_le_thuc_hanh': f'{ty_le_thuc_hanh:.1f}%'
-            }
-            return JsonResponse(thong_ke)
+            filters = {key: request.GET.get(key) for key in STATS_FILTER_FIELDS}
+            group_by = parse_group_by(request.GET.get('group_by'))
+            thong_ke = get_subject_statistics(filters, group_by)
+            return FastJsonResponse(thong_ke)
+        except ValueError as e:
+            return FastJsonResponse({'status': 'error', 'message': str(e)}, status=400)
         except Exception as e:
+            print(f"Error in ThongKeView: {str(e)}")
             # Trả về dữ liệu mẫu nếu có lỗi
-            return JsonResponse({
+            return FastJsonResponse({
                 'tong_tin_chi': 0,
                 'tong_gio': 0,
                 'ty_le_ly_thuyet': '',
@@ -1135,34 +860,63 @@ def api_get_sheet_names(request):
             
             # Kiểm tra định dạng file
             if not excel_file.name.endswith(('.xlsx', '.xls')):
-                return JsonResponse({'status': 'error', 'message': 'File phải có định dạng Excel'})
+                return FastJsonResponse({'status': 'error', 'message': 'File phải có định dạng Excel'})
             
             # Lấy danh sách sheet
             sheet_names = []
             try:
-                excel_file.seek(0)  # Reset file pointer
-                xls = pd.ExcelFile(excel_file)
-                sheet_names = xls.sheet_names
+                # Chỉ đọc metadata workbook, không nạp dữ liệu ô
+                sheet_names = get_sheet_names(excel_file)
             except Exception as e:
-                return JsonResponse({'status': 'error', 'message': f'Không thể đọc file Excel: {str(e)}'})
+                return FastJsonResponse({'status': 'error', 'message': f'Không thể đọc file Excel: {str(e)}'})
             
-            return JsonResponse({
+            return FastJsonResponse({
                 'status': 'success',
                 'sheet_names': sheet_names
             })
             
         except Exception as e:
-            return JsonResponse({'status': 'error', 'message': f'Lỗi khi xử lý file: {str(e)}'})
+            return FastJsonResponse({'status': 'error', 'message': f'Lỗi khi xử lý file: {str(e)}'})
     
-    return JsonResponse({'status': 'error', 'message': 'Không tìm thấy file'})
+    return FastJsonResponse({'status': 'error', 'message': 'Không tìm thấy file'})
+
+def import_job_response(history):
+    """Phản hồi sau khi nhận file import.
+
+    Job đã xong (chế độ đồng bộ) thì trả luôn kết quả như trước, ngược lại trả
+    về job_id và URL để frontend polling trạng thái.
+    """
+    if history.is_finished:
+        data = dict(history.result or {'status': 'error', 'message': 'Import thất bại'})
+        data['job_id'] = history.id
+        return FastJsonResponse(data)
+    return FastJsonResponse({
+        'status': 'accepted',
+        'message': 'Đã nhận file, dữ liệu đang được import',
+        'job_id': history.id,
+        'status_url': reverse('api_import_job_status', args=[history.id])
+    }, status=202)
 
 @csrf_exempt
+def api_import_job_status(request, id):
+    """API trạng thái job import (số dòng đã xử lý, lỗi, kết quả cuối cùng)"""
+    try:
+        history = ImportHistory.objects.get(id=id)
+    except ImportHistory.DoesNotExist:
+        return FastJsonResponse({'status': 'error', 'message': 'Không tìm thấy job import'}, status=404)
+    if not history.is_finished and fail_stale_jobs(ImportHistory.objects.filter(id=id)):
+        history.refresh_from_db()
+    return FastJsonResponse({'status': 'success', 'job': serialize_job(history)})
+
+@csrf_exempt
+@etag_by_models(Department)
 def api_departments(request):
     """API lấy danh sách khoa"""
     departments = Department.objects.all().values('id', 'code', 'name')
-    return JsonResponse(list(departments), safe=False)
+    return FastJsonResponse(list(departments), safe=False)
 
 @csrf_exempt
+@etag_by_models(SubjectGroup)
 def api_subject_groups(request):
     """API lấy danh sách tổ bộ môn theo khoa"""
     department_id = request.GET.get('department_id')
@@ -1170,15 +924,17 @@ def api_subject_groups(request):
         subject_groups = SubjectGroup.objects.filter(department_id=department_id).values('id', 'code', 'name')
     else:
         subject_groups = SubjectGroup.objects.all().values('id', 'code', 'name')
-    return JsonResponse(list(subject_groups), safe=False)
+    return FastJsonResponse(list(subject_groups), safe=False)
 
 @csrf_exempt
+@etag_by_models(Curriculum)
 def api_curricula(request):
     """API lấy danh sách chương trình đào tạo"""
     curricula = Curriculum.objects.all().values('id', 'code', 'name', 'academic_year')
-    return JsonResponse(list(curricula), safe=False)
+    return FastJsonResponse(list(curricula), safe=False)
 
 @csrf_exempt
+@etag_by_models(Course)
 def api_courses(request):
     """API lấy danh sách khóa học theo chương trình đào tạo"""
     curriculum_id = request.GET.get('curriculum_id')
@@ -1186,7 +942,18 @@ def api_courses(request):
         courses = Course.objects.filter(curriculum_id=curriculum_id).values('id', 'code', 'name')
     else:
         courses = Course.objects.all().values('id', 'code', 'name')
-    return JsonResponse(list(courses), safe=False)
+    return FastJsonResponse(list(courses), safe=False)
+
+SUBJECT_FILTER_FIELDS = ('curriculum_id', 'department_id', 'subject_group_id', 'course_id')
+
+
+def filter_subjects(params):
+    """Queryset môn học theo các tham số lọc của api_subjects (dùng chung với export)"""
+    queryset = Subject.objects.all()
+    for field in SUBJECT_FILTER_FIELDS:
+        if params.get(field):
+            queryset = queryset.filter(**{field: params[field]})
+    return queryset
 
 @csrf_exempt
 def api_subjects(request):
@@ -1198,102 +965,51 @@ def api_subjects(request):
         department_id = request.GET.get('department_id')
         subject_group_id = request.GET.get('subject_group_id')
         course_id = request.GET.get('course_id')
+        cursor = request.GET.get('cursor', '')
         page = int(request.GET.get('page', 1))
         page_size = min(int(request.GET.get('page_size', 50)), 100)  # Giới hạn tối đa 100
         
-        # Bắt đầu với queryset tất cả subjects
-        queryset = Subject.objects.all()
-        
-        if curriculum_id:
-            queryset = queryset.filter(curriculum_id=curriculum_id)
-            
-        if department_id:
-            queryset = queryset.filter(department_id=department_id)
-            
-        if subject_group_id:
-            queryset = queryset.filter(subject_group_id=subject_group_id)
-            
-        if course_id:
-            queryset = queryset.filter(course_id=course_id)
-        
-        # Đếm tổng số bản ghi trước khi select_related
-        total_count = queryset.count()
+        queryset = filter_subjects(request.GET)
         
-        # Áp dụng select_related và chỉ lấy các trường cần thiết
-        queryset = queryset.select_related(
-            'subject_type', 'department', 'curriculum', 'course'
-        ).only(
-            'id', 'code', 'name', 'credits', 'total_hours',
-            'theory_hours', 'practice_hours', 'tests_hours', 'exam_hours',
-            'order_number', 'original_code',
-            'curriculum__id', 'curriculum__name', 'curriculum__code',
-            'course__id', 'course__name', 'course__code',
-            'department__name', 'subject_group__name', 'subject_type__name'
-        ).order_by('order_number')
+        # Chỉ đếm tổng số bản ghi ở trang đầu, các trang sau theo cursor không cần COUNT(*)
+        total_count = queryset.count() if not cursor else None
         
-        # Phân trang
-        start = (page - 1) * page_size
-        end = start + page_size
-        subjects = queryset[start:end]
-        
-        # Lấy tất cả semester allocations cho các subjects này trong 1 query
-        subject_ids = [s.id for s in subjects]
-        semester_data_map = {}
+        # Phân trang keyset theo (order_number, id); tham số page (OFFSET) chỉ giữ lại cho client cũ
+        try:
+            queryset = apply_subject_cursor(queryset, cursor)
+        except ValueError as e:
+            return FastJsonResponse({'status': 'error', 'message': str(e)}, status=400)
         
-        if subject_ids:
-            allocations = SemesterAllocation.objects.filter(base_subject_id__in=subject_ids)
-            for alloc in allocations:
-                if alloc.base_subject_id not in semester_data_map:
-                    semester_data_map[alloc.base_subject_id] = {}
-                semester_data_map[alloc.base_subject_id][f'hk{alloc.semester}'] = float(alloc.credits) if alloc.credits else ''
+        # Chỉ lấy các cột của output bằng values_list, không khởi tạo model
+        start = 0 if cursor else (page - 1) * page_size
+        rows = list(SUBJECT_ROW_SERIALIZER.rows(queryset)[start:start + page_size + 1])
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
         
-        # Xử lý dữ liệu
-        subject_data = []
-        for cs in subjects:
-            semester_data = semester_data_map.get(cs.id, {})
-            
-            subject_data.append({
-                'id': cs.id,
-                'curriculum_id': cs.curriculum.id if cs.curriculum else None,
-                'curriculum_name': cs.curriculum.name if cs.curriculum else '',
-                'curriculum_code': cs.curriculum.code if cs.curriculum else '',
-                'course_id': cs.course.id if cs.course else None,
-                'course_code': cs.course.code if cs.course else '',
-                'course_name': cs.course.name if cs.course else '',
-                'ma_mon_hoc': cs.code or '',
-                'ten_mon_hoc': cs.name or '',
-                'so_tin_chi': float(cs.credits) if cs.credits else 0,
-                'tong_so_gio': cs.total_hours or 0,
-                'ly_thuyet': cs.theory_hours or 0,
-                'thuc_hanh': cs.practice_hours or 0,
-                'kiem_tra': cs.tests_hours or 0,
-                'thi': cs.exam_hours or 0,
-                'hk1': semester_data.get('hk1', ''),
-                'hk2': semester_data.get('hk2', ''),
-                'hk3': semester_data.get('hk3', ''),
-                'hk4': semester_data.get('hk4', ''),
-                'hk5': semester_data.get('hk5', ''),
-                'hk6': semester_data.get('hk6', ''),
-                'don_vi': cs.department.name if cs.department else '',
-                'bo_mon': cs.subject_group.name if cs.subject_group else '',
-                'order_number': cs.order_number or 0,
-                'original_code': cs.original_code or '',
-                'giang_vien': '',  # Tạm thời để trống để tăng tốc
-                'loai_mon': cs.subject_type.name if cs.subject_type else '',
-                'subject_id': cs.id
-            })
+        # Lấy semester allocations và giảng viên cho các subjects này, mỗi loại 1 query
+        subject_ids = SUBJECT_ROW_SERIALIZER.column(rows, 'id')
+        subject_data = SUBJECT_ROW_SERIALIZER.serialize(
+            rows,
+            semesters=load_semester_map(subject_ids) if subject_ids else {},
+            instructors=load_instructor_map(subject_ids) if subject_ids else {},
+        )
+        next_cursor = encode_subject_cursor(
+            subject_data[-1]['order_number'], subject_data[-1]['id']
+        ) if has_more else None
         
         end_time = time.time()
         execution_time = end_time - start_time
         
-        return JsonResponse({
+        return FastJsonResponse({
             'status': 'success',
             'data': subject_data,
             'pagination': {
                 'page': page,
                 'page_size': page_size,
                 'total_count': total_count,
-                'total_pages': (total_count + page_size - 1) // page_size
+                'total_pages': (total_count + page_size - 1) // page_size if total_count is not None else None,
+                'next_cursor': next_cursor,
+                'has_more': has_more
             },
             'filters_applied': {
                 'curriculum_id': curriculum_id,
@@ -1302,17 +1018,17 @@ def api_subjects(request):
                 'course_id': course_id
             },
             'execution_time': execution_time
-        }, safe=False, json_dumps_params={'ensure_ascii': False})
+        }, safe=False)
     except Exception as e:
         error_details = traceback.format_exc()
         print(f"Error in api_subjects: {e}\n{error_details}")
         
-        return JsonResponse({
+        return FastJsonResponse({
             'status': 'error',
             'message': 'Lỗi server khi lấy danh sách môn học',
             'detail': str(e),
             'traceback': error_details if settings.DEBUG else ''
-        }, status=500, json_dumps_params={'ensure_ascii': False})
+        }, status=500)
 
 def serialize_curriculum_data(data):
     """Serialize curriculum data to ensure JSON compatibility"""
@@ -1327,92 +1043,14 @@ def serialize_curriculum_data(data):
         return data
     
 @csrf_exempt
-@cache_page(60 * 5)
+@cache_response_by_models(Subject, Curriculum, Course, Department, SubjectType, SubjectGroup)
 def api_all_subjects(request):
     """API lấy tất cả môn học (cho dropdown chọn môn học có sẵn)"""
     try:
-        # Chỉ lấy các trường cần thiết, không cần select_related tất cả
-        subjects = Subject.objects.select_related(
-	        'curriculum',
-            'course',
-            'subject_type',
-	        'subject_group',
-	        'department'
-	    ).only(
-            'id', 'code', 'name', 'credits', 'total_hours', 
-            'theory_hours', 'practice_hours', 'tests_hours', 
-            'exam_hours', 'order_number', 'department', 
-            'subject_type', 'subject_group', 'semester',
-            'description', 'prerequisites', 'learning_outcomes',
-            'is_elective', 'elective_group', 'curriculum', 'course'
-        ).order_by('code')
+        # Một truy vấn values_list với các JOIN cần cho tên khoa/bộ môn/..., không khởi tạo model
+        subjects_data = ALL_SUBJECTS_SERIALIZER.serialize(Subject.objects.order_by('code'))
         
-        subjects_data = []
-        for subject in subjects:
-            try:
-                # Sử dụng .__dict__ để tránh lỗi None
-                subject_dict = {
-                    'id': subject.id,
-                    'code': subject.code or '',
-                    'name': subject.name or '',
-                    'credits': float(subject.credits) if subject.credits else 0,
-                    'total_hours': subject.total_hours or 0,
-                    'theory_hours': subject.theory_hours or 0,
-                    'practice_hours': subject.practice_hours or 0,
-                    'tests_hours': subject.tests_hours or 0,
-                    'exam_hours': subject.exam_hours or 0,
-                    'order_number': subject.order_number or 0,
-                    'semester': str(subject.semester) if subject.semester else '',
-                    'description': subject.description or '',
-                    'prerequisites': subject.prerequisites or '',
-                    'learning_outcomes': subject.learning_outcomes or '',
-                    'is_elective': bool(subject.is_elective),
-                    'elective_group': subject.elective_group or '',
-                }
-
-                # Xử lý các foreign key có thể None
-                if subject.curriculum:
-                    subject_dict['curriculum_id'] = subject.curriculum.id
-                    subject_dict['curriculum_name'] = subject.curriculum.name
-                else:
-                    subject_dict['curriculum_id'] = None
-                    subject_dict['curriculum_name'] = ''
-                
-                if subject.course:
-                    subject_dict['course_id'] = subject.course.id
-                    subject_dict['course_name'] = subject.course.name
-                else:
-                    subject_dict['course_id'] = None
-                    subject_dict['course_name'] = ''
-                    
-                if subject.department:
-                    subject_dict['department_id'] = subject.department.id
-                    subject_dict['department_name'] = subject.department.name
-                else:
-                    subject_dict['department_id'] = None
-                    subject_dict['department_name'] = ''
-                
-                if subject.subject_type:
-                    subject_dict['subject_type_id'] = subject.subject_type.id
-                    subject_dict['subject_type_name'] = subject.subject_type.name
-                else:
-                    subject_dict['subject_type_id'] = None
-                    subject_dict['subject_type_name'] = ''
-                
-                if subject.subject_group:
-                    subject_dict['subject_group_id'] = subject.subject_group.id
-                    subject_dict['subject_group_name'] = subject.subject_group.name
-                else:
-                    subject_dict['subject_group_id'] = None
-                    subject_dict['subject_group_name'] = ''
-                
-                subjects_data.append(subject_dict)
-                
-            except Exception as e:
-                print(f"Error processing subject {subject.id}: {e}")
-                continue
-        
-        return JsonResponse({
+        return FastJsonResponse({
             'status': 'success',
             'count': len(subjects_data),
             'data': subjects_data
@@ -1423,16 +1061,23 @@ def api_all_subjects(request):
         error_details = traceback.format_exc()
         print(f"Error in api_all_subjects: {e}\n{error_details}")
         
-        return JsonResponse({
+        return FastJsonResponse({
             'status': 'error',
             'message': f'Lỗi khi lấy danh sách môn học: {str(e)}'
         }, status=500)
 
 @csrf_exempt
+@etag_by_models(*REFERENCE_MODELS)
+def api_reference_data(request):
+    """API lấy toàn bộ dữ liệu danh mục cho dropdown trong một lần gọi"""
+    return FastJsonResponse(get_reference_bundle())
+
+@csrf_exempt
+@etag_by_models(Position)
 def api_positions(request):
     """API lấy tất cả chức vụ (cho dropdown chọn chức vụ có sẵn)"""
     positions = Position.objects.all().values('id', 'name', 'description')
-    return JsonResponse(list(positions), safe=False)
+    return FastJsonResponse(list(positions), safe=False)
 
 @csrf_exempt
 def api_create_subject(request):
@@ -1445,7 +1090,7 @@ def api_create_subject(request):
             required_fields = ['curriculum_id', 'code', 'name', 'credits', 'subject_type_id']
             for field in required_fields:
                 if not data.get(field):
-                    return JsonResponse({
+                    return FastJsonResponse({
                         'status': 'error', 
                         'message': f'Thiếu trường bắt buộc: {field}'
                     })
@@ -1454,7 +1099,7 @@ def api_create_subject(request):
             try:
                 curriculum = Curriculum.objects.get(id=data['curriculum_id'])
             except Curriculum.DoesNotExist:
-                return JsonResponse({
+                return FastJsonResponse({
                     'status': 'error', 
                     'message': 'Chương trình đào tạo không tồn tại'
                 })
@@ -1471,7 +1116,7 @@ def api_create_subject(request):
             try:
                 subject_type = SubjectType.objects.get(id=data['subject_type_id'])
             except SubjectType.DoesNotExist:
-                return JsonResponse({
+                return FastJsonResponse({
                     'status': 'error', 
                     'message': 'Loại môn học không tồn tại'
                 })
@@ -1503,7 +1148,7 @@ def api_create_subject(request):
                     description=data.get('description', ''),
                 )
             except Exception as e:
-                return JsonResponse({
+                return FastJsonResponse({
                     'status': 'error', 
                     'message': f'Lỗi khi tạo môn học: {str(e)}'
                 })
@@ -1523,7 +1168,7 @@ def api_create_subject(request):
                         except Exception as e:
                             print(f"Error creating semester allocation: {str(e)}")  # Debug log
             
-            return JsonResponse({
+            return FastJsonResponse({
                 'status': 'success',
                 'message': 'Đã tạo môn học thành công',
                 'id': subject.id,
@@ -1532,27 +1177,62 @@ def api_create_subject(request):
             
         except Exception as e:
             print(f"Error creating subject: {str(e)}")
-            return JsonResponse({
+            return FastJsonResponse({
                 'status': 'error', 
                 'message': f'Lỗi khi tạo môn học: {str(e)}'
             })
     
-    return JsonResponse({
+    return FastJsonResponse({
         'status': 'error', 
         'message': 'Method not allowed'
     })
-    
+
+
+def train_program_update_multiple(request, id=None):
+    """Cập nhật nhiều ô của lưới môn học trong một transaction.
+
+    Body: {'changes': [{'id', 'field', 'value'}, ...]} hoặc {'id', 'changes': {field: value}}.
+    Ô không hợp lệ được bỏ qua và trả về trong 'results' (xem batch_edit.py).
+    """
+    if request.method != 'POST':
+        return FastJsonResponse({'status': 'error', 'message': 'Method not allowed'}, status=405)
+    try:
+        changes = parse_changes(json.loads(request.body), id)
+    except (ValueError, TypeError) as e:
+        return FastJsonResponse({'status': 'error', 'message': str(e)}, status=400)
+
+    try:
+        results = apply_changes(changes)
+    except Exception as e:
+        print(f"Error applying batch edit: {str(e)}")
+        return FastJsonResponse({
+            'status': 'error',
+            'message': f'Lỗi khi cập nhật: {str(e)}'
+        }, status=500)
+
+    errors = [result for result in results if result['status'] == 'error']
+    updated = len(results) - len(errors)
+    return FastJsonResponse({
+        'status': 'error' if errors and not updated else 'success',
+        'message': f'Đã cập nhật {updated}/{len(results)} ô' + (f', {len(errors)} ô lỗi' if errors else ''),
+        'updated': updated,
+        'errors': len(errors),
+        'results': results,
+    })
+
 @csrf_exempt
+@etag_by_models(SubjectType)
 def api_subject_types(request):
     """API lấy danh sách loại môn học"""
     subject_types = SubjectType.objects.all().values('id', 'code', 'name')
-    return JsonResponse(list(subject_types), safe=False)
+    return FastJsonResponse(list(subject_types), safe=False)
 
 @csrf_exempt
+@etag_by_models(Major)
 def api_majors(request):
     """API lấy danh sách ngành đào tạo"""
     majors = Major.objects.all().values('id', 'code', 'name')
-    return JsonResponse(list(majors), safe=False)
+    return FastJsonResponse(list(majors), safe=False)
 
 @csrf_exempt
 def create_curriculum(request):
@@ -1569,17 +1249,18 @@ def create_curriculum(request):
                 total_credits=data.get('total_credits', 0),
                 status='draft'
             )
-            return JsonResponse({
+            return FastJsonResponse({
                 'status': 'success',
                 'message': 'Đã tạo chương trình đào tạo thành công',
                 'id': curriculum.id
             })
         except Exception as e:
-            return JsonResponse({'status': 'error', 'message': str(e)})
+            return FastJsonResponse({'status': 'error', 'message': str(e)})
     
-    return JsonResponse({'status': 'error', 'message': 'Method not allowed'})
+    return FastJsonResponse({'status': 'error', 'message': 'Method not allowed'})
 
 @csrf_exempt
+@etag_by_models(Class)
 def api_classes(request):
     """API lấy danh sách lớp học"""
     curriculum_id = request.GET.get('curriculum_id')
@@ -1596,7 +1277,7 @@ def api_classes(request):
         classes = classes.filter(is_combined=(is_combined.lower() == 'false'))
     
     class_data = list(classes.values('id', 'code', 'name', 'curriculum_id', 'course_id', 'is_combined'))
-    return JsonResponse(class_data, safe=False)
+    return FastJsonResponse(class_data, safe=False)
 
 @csrf_exempt
 def api_combined_classes(request):
@@ -1620,117 +1301,87 @@ def api_combined_classes(request):
             'class_codes': [c.code for c in cc.classes.all()]
         })
     
-    return JsonResponse(combined_class_data, safe=False)
+    return FastJsonResponse(combined_class_data, safe=False)
+
+@csrf_exempt
+def api_search_instructors(request):
+    """API tìm kiếm giảng viên theo tên (không dấu, có xếp hạng)"""
+    query = request.GET.get('q', '')
+    
+    if query and len(query) >= 2:
+        instructors = [
+            {'id': row['id'], 'full_name': row['full_name'], 'code': row['code']}
+            for row in search('instructors', query, 10)
+        ]
+        return FastJsonResponse(instructors, safe=False)
+    
+    return FastJsonResponse([], safe=False)
 
 @csrf_exempt
-def api_search_instructors(request):
-    """API tìm kiếm giảng viên theo tên"""
+def api_search(request):
+    """API tìm kiếm giảng viên / môn học / lớp học.
+
+    ?q=...&type=instructors,subjects,classes (mặc định: tất cả)&limit=10
+    """
     query = request.GET.get('q', '')
+    types = [item.strip() for item in request.GET.get('type', '').split(',') if item.strip()]
+    try:
+        limit = int(request.GET.get('limit', SEARCH_DEFAULT_LIMIT))
+        results = {
+            target: search(target, query, limit)
+            for target in (types or SEARCH_TARGETS)
+        }
+    except ValueError as e:
+        return FastJsonResponse({'status': 'error', 'message': str(e)}, status=400)
     
-    if query and len(query) >= 2:
-        instructors = Instructor.objects.filter(
-            full_name__icontains=query
-        ).values('id', 'full_name', 'code')[:10]
-        return JsonResponse(list(instructors), safe=False)
-    
-    return JsonResponse([], safe=False)
+    return FastJsonResponse({'status': 'success', 'query': query, 'results': results})
+
+def filter_teaching_assignments(params):
+    """Queryset phân công theo các tham số lọc của api_teaching_assignments (dùng chung với export)"""
+    instructor_id = params.get('instructor_id')
+    curriculum_id = params.get('curriculum_id')
+    subject_id = params.get('subject_id')
+    department_id = params.get('department_id')
+    class_id = params.get('class_id')
+    combined_class_id = params.get('combined_class_id')
+    academic_year = params.get('academic_year')
+    semester = params.get('semester')
+    class_type = params.get('class_type')
+
+    teaching_assignments = TeachingAssignment.objects.all()
+    if instructor_id:
+        teaching_assignments = teaching_assignments.filter(instructor_id=instructor_id)
+    if curriculum_id:
+        teaching_assignments = teaching_assignments.filter(curriculum_subject__curriculum_id=curriculum_id)
+    if subject_id:
+        teaching_assignments = teaching_assignments.filter(curriculum_subject_id=subject_id)
+    if department_id:
+        teaching_assignments = teaching_assignments.filter(
+            Q(instructor__department_id=department_id) |
+            Q(curriculum_subject__curriculum__department_id=department_id)
+        )
+    if class_id:
+        teaching_assignments = teaching_assignments.filter(class_obj_id=class_id)
+    if combined_class_id:
+        teaching_assignments = teaching_assignments.filter(combined_class_id=combined_class_id)
+    if academic_year:
+        teaching_assignments = teaching_assignments.filter(academic_year=academic_year)
+    if semester:
+        teaching_assignments = teaching_assignments.filter(semester=semester)
+    if class_type:
+        if class_type == 'regular':
+            teaching_assignments = teaching_assignments.filter(class_obj__isnull=False)
+        elif class_type == 'combined':
+            teaching_assignments = teaching_assignments.filter(combined_class__isnull=False)
+    return teaching_assignments
 
 @csrf_exempt
 def api_teaching_assignments(request):
     """API lấy danh sách phân công giảng dạy với thông tin lớp học"""
     try:
-        instructor_id = request.GET.get('instructor_id')
-        curriculum_id = request.GET.get('curriculum_id')
-        subject_id = request.GET.get('subject_id')
-        department_id = request.GET.get('department_id')
-        class_id = request.GET.get('class_id')
-        combined_class_id = request.GET.get('combined_class_id')
-        academic_year = request.GET.get('academic_year')
-        semester = request.GET.get('semester')
-        class_type = request.GET.get('class_type')
-        
-        teaching_assignments = TeachingAssignment.objects.select_related(
-            'instructor', 
-            'curriculum_subject',
-            'class_obj',
-            'combined_class'
-        ).prefetch_related(
-            'curriculum_subject__curriculum',
-            'instructor__position'
-        )
-        
-        if instructor_id:
-            teaching_assignments = teaching_assignments.filter(instructor_id=instructor_id)
-        if curriculum_id:
-            teaching_assignments = teaching_assignments.filter(curriculum_subject__curriculum_id=curriculum_id)
-        if subject_id:
-            teaching_assignments = teaching_assignments.filter(curriculum_subject_id=subject_id)
-        if department_id:
-            teaching_assignments = teaching_assignments.filter(
-                Q(instructor__department_id=department_id) |
-                Q(curriculum_subject__curriculum__department_id=department_id)
-            )
-        if class_id:
-            teaching_assignments = teaching_assignments.filter(class_obj_id=class_id)
-        if combined_class_id:
-            teaching_assignments = teaching_assignments.filter(combined_class_id=combined_class_id)
-        if academic_year:
-            teaching_assignments = teaching_assignments.filter(academic_year=academic_year)
-        if semester:
-            teaching_assignments = teaching_assignments.filter(semester=semester)
-        if class_type:
-            if class_type == 'regular':
-                teaching_assignments = teaching_assignments.filter(class_obj__isnull=False)
-            elif class_type == 'combined':
-                teaching_assignments = teaching_assignments.filter(combined_class__isnull=False)
-        
-        assignments_data = []
-        for assignment in teaching_assignments:
-            assignments_data.append({
-                'id': assignment.id,
-                'instructor_id': assignment.instructor.id,
-                'instructor_name': assignment.instructor.full_name,
-                'instructor_code': assignment.instructor.code,
-                'academic_year': assignment.academic_year,
-                'semester': assignment.semester,
-                'is_main_instructor': assignment.is_main_instructor,
-                'student_count': assignment.student_count,
-                'teaching_hours': assignment.teaching_hours,
-                'subject_id': assignment.curriculum_subject.id if assignment.curriculum_subject else None,
-                'subject_code': assignment.curriculum_subject.code if assignment.curriculum_subject else '',
-                'subject_name': assignment.curriculum_subject.name if assignment.curriculum_subject else '',
-                
-                'class_type': 'regular' if assignment.class_obj else 'combined' if assignment.combined_class else '',
-                'class_name': assignment.class_obj.name if assignment.class_obj else (assignment.combined_class.name if assignment.combined_class else ''),
-                'class_code': assignment.class_obj.code if assignment.class_obj else (assignment.combined_class.code if assignment.combined_class else ''),
-                'class_obj_id': assignment.class_obj.id if assignment.class_obj else None,
-            })
-            # # Thêm thông tin môn học
-            # if assignment.curriculum_subject:
-            #     assignments_data.update({
-            #         'subject_id': assignment.curriculum_subject.id,
-            #         'subject_code': assignment.curriculum_subject.code,
-            #         'subject_name': assignment.curriculum_subject.name,
-            #     })
-            
-            # Thêm thông tin lớp học
-            # if assignment.class_obj:
-            #     assignments_data.update({
-            #         'class_type': 'regular',
-            #         'class_name': assignment.class_obj.name,
-            #         'class_code': assignment.class_obj.code,
-            #         'class_obj_id': assignment.class_obj.id,
-            #     })
-            # elif assignment.combined_class:
-            #     assignments_data.update({
-            #         'class_type': 'combined',
-            #         'class_name': assignment.combined_class.name,
-            #         'class_code': assignment.combined_class.code,
-            #         'combined_class_id': assignment.combined_class.id,
-            #     })
-            
-            # assignments_data.append(assignments_data)
-        return JsonResponse(assignments_data, safe=False)
+        teaching_assignments = filter_teaching_assignments(request.GET)
+        assignments_data = TEACHING_ASSIGNMENT_SERIALIZER.serialize(teaching_assignments)
+        return FastJsonResponse(assignments_data, safe=False)
     except Exception as e:
         # Trả về lỗi dạng JSON thay vì HTML
         error_data = {
@@ -1738,79 +1389,33 @@ def api_teaching_assignments(request):
             'message': str(e),
             'traceback': traceback.format_exc()
         }
-        return JsonResponse(error_data, status=500, safe=False)
+        return FastJsonResponse(error_data, status=500, safe=False)
+
+@csrf_exempt
+def api_export_subjects(request):
+    """Xuất môn học kèm phân bố học kỳ (?format=csv|ndjson|xlsx, cùng bộ lọc với api_subjects)"""
+    queryset = filter_subjects(request.GET).order_by('curriculum_id', 'order_number', 'id')
+    try:
+        return export_response(SUBJECT_EXPORT, queryset, request.GET.get('format', 'csv'), 'mon_hoc', 'Môn học')
+    except ValueError as e:
+        return FastJsonResponse({'status': 'error', 'message': str(e)}, status=400)
+
+@csrf_exempt
+def api_export_teaching_assignments(request):
+    """Xuất phân công giảng dạy kèm thông tin lớp (?format=csv|ndjson|xlsx, cùng bộ lọc với api_teaching_assignments)"""
+    queryset = filter_teaching_assignments(request.GET).order_by('-academic_year', 'semester', 'id')
+    try:
+        return export_response(
+            TEACHING_ASSIGNMENT_EXPORT, queryset, request.GET.get('format', 'csv'),
+            'phan_cong_giang_day', 'Phân công'
+        )
+    except ValueError as e:
+        return FastJsonResponse({'status': 'error', 'message': str(e)}, status=400)
 
 @csrf_exempt
 def api_teaching_statistics(request):
-    """API thống kê phân công giảng dạy"""
-    # Thống kê theo giảng viên
-    instructor_stats = TeachingAssignment.objects.values(
-        'instructor__id', 
-        'instructor__full_name',
-        'instructor__code'
-    ).annotate(
-        total_assignments=Count('id'),
-        total_students=Sum('student_count'),
-        total_hours=Sum('teaching_hours'),
-        subject_count=Count('curriculum_subject__code', distinct=True),
-        regular_class_count=Count('class_obj', distinct=True),
-            # Case(
-            #     When(class_obj__isnull=False, then=1),
-            #     output_field=IntegerField(),
-            # ),
-            # distinct=True
-        # ),
-        # Đếm lớp học ghép
-        combined_class_count=Count('combined_class', distinct=True)
-        #     Case(
-        #         When(combined_class__isnull=False, then=1),
-        #         output_field=IntegerField(),
-        #     ),
-        #     distinct=True
-        # )
-    ).annotate(
-        class_count=F('regular_class_count') + F('combined_class_count')
-    )
-    
-    # Thống kê theo chương trình đào tạo
-    curriculum_stats = TeachingAssignment.objects.values(
-        'curriculum_subject__curriculum__id',
-        'curriculum_subject__curriculum__name',
-        'curriculum_subject__curriculum__code'
-    ).annotate(
-        total_assignments=Count('id'),
-        total_instructors=Count('instructor', distinct=True),
-        total_subjects=Count('curriculum_subject__code', distinct=True)
-    )
-    
-    # Thống kê theo đơn vị
-    department_stats = TeachingAssignment.objects.values(
-        'instructor__department__id',
-        'instructor__department__name',
-        'instructor__department__code'
-    ).annotate(
-        total_assignments=Count('id'),
-        total_instructors=Count('instructor', distinct=True),
-        total_hours=Sum('teaching_hours')
-    )
-    
-    # Thống kê theo đơn vị quản lý giáo viên
-    department_teacher_stats = TeachingAssignment.objects.values(
-        'instructor__department_of_teacher_management__id',
-        'instructor__department_of_teacher_management__name',
-        'instructor__department_of_teacher_management__code'
-    ).annotate(
-        total_assignments=Count('id'),
-        total_instructors=Count('instructor', distinct=True),
-        total_hours=Sum('teaching_hours')
-    )
-    
-    return JsonResponse({
-        'instructor_statistics': list(instructor_stats),
-        'curriculum_statistics': list(curriculum_stats),
-        'department_statistics': list(department_stats),
-        'department_teacher_statistics': list(department_teacher_stats)
-    })
+    """API thống kê phân công giảng dạy (đọc từ bảng tổng hợp tính sẵn)"""
+    return FastJsonResponse(get_teaching_statistics())
 
 @csrf_exempt
 def api_create_teaching_assignment(request):
@@ -1823,14 +1428,14 @@ def api_create_teaching_assignment(request):
             required_fields = ['instructor_id', 'curriculum_subject_id', 'academic_year', 'semester']
             for field in required_fields:
                 if not data.get(field):
-                    return JsonResponse({
+                    return FastJsonResponse({
                         'status': 'error', 
                         'message': f'Thiếu trường bắt buộc: {field}'
                     })
             
             # Kiểm tra xem có class_obj hay combined_class
             if not data.get('class_obj_id') and not data.get('combined_class_id'):
-                return JsonResponse({
+                return FastJsonResponse({
                     'status': 'error', 
                     'message': 'Phải chọn lớp học thường hoặc lớp học ghép'
                 })
@@ -1848,19 +1453,19 @@ def api_create_teaching_assignment(request):
                 teaching_hours=data.get('teaching_hours', 0)
             )
             
-            return JsonResponse({
+            return FastJsonResponse({
                 'status': 'success',
                 'message': 'Đã tạo phân công giảng dạy thành công',
                 'id': teaching_assignment.id
             })
             
         except Exception as e:
-            return JsonResponse({
+            return FastJsonResponse({
                 'status': 'error', 
                 'message': f'Lỗi khi tạo phân công giảng dạy: {str(e)}'
             })
     
-    return JsonResponse({
+    return FastJsonResponse({
         'status': 'error', 
         'message': 'Method not allowed'
     })
@@ -1870,38 +1475,33 @@ class TeachingManagementView(View):
     template_name = 'products/teaching_management.html'
     
     def get(self, request):
-        # Lấy dữ liệu cho các dropdown
+        # Lấy dữ liệu cho các dropdown; bảng danh mục lấy từ gói dùng chung
+        reference = get_reference_bundle()['data']
         instructors = Instructor.objects.all().values('id', 'code', 'full_name', 'department__name')
-        curricula = Curriculum.objects.all().values('id', 'code', 'name', 'academic_year')
-        departments = Department.objects.all().values('id', 'code', 'name')
-        departmets_teacher_management = Department.objects.all().values('id', 'code', 'name')
-        courses = Course.objects.all().values('id', 'code', 'name')
-        subject_types = SubjectType.objects.all().values('id', 'code', 'name')
         subjects = Subject.objects.all().values('id', 'code', 'name')
-        majors = Major.objects.all().values('id', 'code', 'name')
-        classes = Class.objects.all().values('id', 'code', 'name')
         combined_classes = CombinedClass.objects.all().values('id', 'code', 'name')
         
         context = {
             'instructors': list(instructors),
-            'curricula': list(curricula),
-            'departments': list(departments),
-            'departmets_teacher_management': list(departmets_teacher_management),
-            'courses': list(courses),
-            'subject_types': list(subject_types),
+            'curricula': reference['curricula'],
+            'departments': reference['departments'],
+            'departmets_teacher_management': reference['departments'],
+            'courses': reference['courses'],
+            'subject_types': reference['subject_types'],
             'subjects': list(subjects),
-            'classes': list(classes),
+            'classes': reference['classes'],
             'combined_classes': list(combined_classes),
-            'majors': list(majors),
+            'majors': reference['majors'],
         }
         
         return render(request, self.template_name, context)
 
 @csrf_exempt
+@etag_by_models(Instructor, Department, SubjectGroup, Position)
 def api_instructors(request):
     """API lấy danh sách giảng viên"""
     try:
-        instructors = Instructor.objects.select_related('department', 'subject_group', 'position', 'department_of_teacher_management')
+        instructors = Instructor.objects.all()
          # Áp dụng bộ lọc nếu có
         department_id = request.GET.get('department_id')
         if department_id:
@@ -1925,80 +1525,9 @@ def api_instructors(request):
             is_active_bool = is_active.lower() == 'true'
             instructors = instructors.filter(is_active=is_active_bool)
             
-        # instructors_data = instructors.values('id', 'code', 'full_name', 'email', 'phone', 'position_id', 'department_id', 'department_of_teacher_management_id', 'subject_group_id', 'is_active')
-        # Tạo danh sách dữ liệu với thông tin đầy đủ
-        instructors_data = []
-        for instructor in instructors:
-            instructors_data.append({
-                'id': instructor.id,
-                'code': instructor.code,
-                'full_name': instructor.full_name,
-                'email': instructor.email,
-                'phone': instructor.phone,
-                'is_active': instructor.is_active,
-                
-                'position_id': instructor.position.id if instructor.position else None,
-                'department_id': instructor.department.id if instructor.department else None,
-                'department_of_teacher_management_id': instructor.department_of_teacher_management.id if instructor.department_of_teacher_management else None,
-                'subject_group_id': instructor.subject_group.id if instructor.subject_group else None,
-                
-                'position': {
-                    'id': instructor.position.id,
-                    'name': instructor.position.name,
-                } if instructor.position else None,
-                'department': {
-                    'id': instructor.department.id,
-                    'name': instructor.department.name,
-                    'code': instructor.department.code,
-                } if instructor.department else None,
-                'department_of_teacher_management': {
-                    'id': instructor.department_of_teacher_management.id,
-                    'name': instructor.department_of_teacher_management.name,
-                    'code': instructor.department_of_teacher_management.code,
-                } if instructor.department_of_teacher_management else None,
-                'subject_group': {
-                    'id': instructor.subject_group.id,
-                    'name': instructor.subject_group.name,
-                    'code': instructor.subject_group.code,
-                } if instructor.subject_group else None,
-                
-            })
-            # # Thêm thông tin quan hệ nếu có
-            # if instructor.position:
-            #     instructors_data['position_id'] = instructor.position.id
-            #     instructors_data['position'] = {
-            #         'id': instructor.position.id,
-            #         'name': instructor.position.name,
-            #     }
-            # else:
-            #     instructors_data['position_id'] = None
-            #     instructors_data['position'] = None
-            
-            # if instructor.department:
-            #     instructors_data['department_id'] = instructor.department.id
-            #     instructors_data['department'] = {
-            #         'id': instructor.department.id,
-            #         'name': instructor.department.name,
-            #         'code': instructor.department.code,
-            #     }
-            
-            # if instructor.department_of_teacher_management:
-            #     instructors_data['department_of_teacher_management_id'] = instructor.department_of_teacher_management.id
-            #     instructors_data['department_of_teacher_management'] = {
-            #         'id': instructor.department_of_teacher_management.id,
-            #         'name': instructor.department_of_teacher_management.name,
-            #         'code': instructor.department_of_teacher_management.code,
-            #     }
-            
-            # if instructor.subject_group:
-            #     instructors_data['subject_group_id'] = instructor.subject_group.id
-            #     instructors_data['subject_group'] = {
-            #         'id': instructor.subject_group.id,
-            #         'name': instructor.subject_group.name,
-            #         'code': instructor.subject_group.code,
-            #     }
-            # instructors_data.append(instructors_data)
-        return JsonResponse(instructors_data, safe=False)
+        # Thông tin chức vụ/khoa/bộ môn lấy bằng JOIN trong cùng một truy vấn values_list
+        instructors_data = INSTRUCTOR_SERIALIZER.serialize(instructors)
+        return FastJsonResponse(instructors_data, safe=False)
     except Exception as e:
         # Trả về lỗi dạng JSON thay vì HTML
         error_data = {
@@ -2006,7 +1535,7 @@ def api_instructors(request):
             'message': str(e),
             'traceback': traceback.format_exc()
         }
-        return JsonResponse(error_data, status=500, safe=False)
+        return FastJsonResponse(error_data, status=500, safe=False)
 
 @csrf_exempt
 def api_create_class(request):
@@ -2019,7 +1548,7 @@ def api_create_class(request):
             required_fields = ['code', 'name', 'curriculum_id', 'course_id']
             for field in required_fields:
                 if not data.get(field):
-                    return JsonResponse({
+                    return FastJsonResponse({
                         'status': 'error', 
                         'message': f'Thiếu trường bắt buộc: {field}'
                     })
@@ -2056,19 +1585,19 @@ def api_create_class(request):
                 description=data.get('description')
             )
             
-            return JsonResponse({
+            return FastJsonResponse({
                 'status': 'success',
                 'message': 'Đã tạo lớp học thành công',
                 'id': class_obj.id
             })
             
         except Exception as e:
-            return JsonResponse({
+            return FastJsonResponse({
                 'status': 'error', 
                 'message': f'Lỗi khi tạo lớp học: {str(e)}'
             })
     
-    return JsonResponse({
+    return FastJsonResponse({
         'status': 'error', 
         'message': 'Method not allowed'
     })
@@ -2084,7 +1613,7 @@ def api_create_instructor(request):
             required_fields = ['code', 'full_name']
             for field in required_fields:
                 if not data.get(field):
-                    return JsonResponse({
+                    return FastJsonResponse({
                         'status': 'error', 
                         'message': f'Thiếu trường bắt buộc: {field}'
                     })
@@ -2132,19 +1661,19 @@ def api_create_instructor(request):
                 is_active=data.get('is_active', True)
             )
             
-            return JsonResponse({
+            return FastJsonResponse({
                 'status': 'success',
                 'message': 'Đã tạo giảng viên thành công',
                 'id': instructor.id
             })
             
         except Exception as e:
-            return JsonResponse({
+            return FastJsonResponse({
                 'status': 'error', 
                 'message': f'Lỗi khi tạo giảng viên: {str(e)}'
             })
     
-    return JsonResponse({
+    return FastJsonResponse({
         'status': 'error', 
         'message': 'Method not allowed'
     })
@@ -2160,7 +1689,7 @@ def api_create_combined_class(request):
             required_fields = ['code', 'name', 'subject_id', 'classes']
             for field in required_fields:
                 if not data.get(field):
-                    return JsonResponse({
+                    return FastJsonResponse({
                         'status': 'error', 
                         'message': f'Thiếu trường bắt buộc: {field}'
                     })
@@ -2182,19 +1711,19 @@ def api_create_combined_class(request):
             classes = Class.objects.filter(id__in=data.get('classes', []))
             combined_class.classes.set(classes)
             
-            return JsonResponse({
+            return FastJsonResponse({
                 'status': 'success',
                 'message': 'Đã tạo lớp học ghép thành công',
                 'id': combined_class.id
             })
             
         except Exception as e:
-            return JsonResponse({
+            return FastJsonResponse({
                 'status': 'error', 
                 'message': f'Lỗi khi tạo lớp học ghép: {str(e)}'
             })
     
-    return JsonResponse({
+    return FastJsonResponse({
         'status': 'error', 
         'message': 'Method not allowed'
     })
@@ -2205,304 +1734,327 @@ import io
 from django.core.files.base import ContentFile
 
 class ImportTeachingDataView(View):
+    # Các bảng tham chiếu mà mỗi file mẫu đọc tới; file mẫu được cache theo
+    # phiên bản của các bảng này nên tự hết hiệu lực khi dữ liệu thay đổi
+    TEMPLATE_DEPENDENCIES = {
+        'class': [Curriculum, Course, Class, CombinedClass],
+        'combined-class': [Subject, Class, CombinedClass, Department, Curriculum],
+        'instructor': [Instructor, Department, Position, SubjectGroup],
+        'teaching-assignment': [Instructor, Subject, Class, CombinedClass, Curriculum, Department],
+    }
+    TEMPLATE_CACHE_TIMEOUT = 60 * 60 * 24
+    
     def get(self, request, object_type):
         """Tải file Excel mẫu cho từng loại đối tượng với sheet hướng dẫn"""
+        if object_type not in self.TEMPLATE_DEPENDENCIES:
+            return FastJsonResponse({'status': 'error', 'message': 'Loại đối tượng không hợp lệ'})
         try:
-            # Tạo workbook
-            output = io.BytesIO()
+            version = get_models_version(*self.TEMPLATE_DEPENDENCIES[object_type])
+            cache_key = f'import-template:{object_type}:{version}'
+            template = cache.get(cache_key)
+            if template is None:
+                template = self.build_template(object_type)
+                cache.set(cache_key, template, self.TEMPLATE_CACHE_TIMEOUT)
+            content, filename = template
                 
-            with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-                workbook  = writer.book
+            # Trả về file để download
+            response = HttpResponse(
+                content,
+                content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+            )
+            response['Content-Disposition'] = f'attachment; filename="{filename}"'
+            response['Content-Length'] = len(content)
                 
-                curricula = Curriculum.objects.all().values('code')
-                courses = Course.objects.all().values('code')
-                classes = Class.objects.all().values('code')
-                combined_classes = CombinedClass.objects.all().values('code')
-                subjects = Subject.objects.all().values('code', 'name')
-                departments = Department.objects.all().values('code', 'name')
-                positions = Position.objects.all().values('name')
-                subject_groups = SubjectGroup.objects.all().values('code')
-                instructors = Instructor.objects.all().values('code', 'full_name')
-
-                # Tạo sheet dữ liệu mẫu
-                if object_type == 'class':
-                    sample_data = self.get_class_template()
-                    filename = "mau_import_lop_hoc.xlsx"
-                    df = pd.DataFrame(sample_data)
-                    df.to_excel(writer, index=False, sheet_name='Dữ liệu mẫu')
-                    
-                    # Định dạng cho sheet Dữ liệu mẫu và Hướng dẫn nhập liệu
-                    sample_worksheet = writer.sheets['Dữ liệu mẫu']
-                    
-                    # Điều chỉnh độ rộng các cột vừa với nội dung cột
-                    for i, col in enumerate(df.columns):
-                        column_len = max(df[col].astype(str).str.len().max(), len(col)) + 2
-                        sample_worksheet.set_column(i, i, column_len)
-                    
-                    # Tạo sheet hướng dẫn cho lớp học
-                    self.create_class_guide_sheet(writer)
-                    # guide_worksheet = writer.sheets['Hướng dẫn nhập liệu']
-                    
-                    
-                    curriculum_list = [cu['code'] for cu in curricula]
-                    course_list = [co['code'] for co in courses]
-                    comb_class_list = [cc['code'] for cc in combined_classes]
+            return response
+        except Exception as e:
+            return FastJsonResponse({'status': 'error', 'message': f"Lỗi tạo file mẫu: {str(e)}"})
+    
+    def build_template(self, object_type):
+        """Tạo nội dung file mẫu (bytes, tên file) cho một loại đối tượng"""
+        # Tạo workbook
+        output = io.BytesIO()
+            
+        with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
+            workbook  = writer.book
+            
+            curricula = Curriculum.objects.all().values('code')
+            courses = Course.objects.all().values('code')
+            classes = Class.objects.all().values('code')
+            combined_classes = CombinedClass.objects.all().values('code')
+            subjects = Subject.objects.all().values('code', 'name')
+            departments = Department.objects.all().values('code', 'name')
+            positions = Position.objects.all().values('name')
+            subject_groups = SubjectGroup.objects.all().values('code')
+            instructors = Instructor.objects.all().values('code', 'full_name')
 
-                    # Viết danh sách vào một sheet ẩn hoặc sử dụng named range
-                    dataClass_sheet = workbook.add_worksheet('dataClass')
-                    dataClass_sheet.hide()
-                    
-                    # Chỉ thêm data validation nếu có dữ liệu
-                    if curriculum_list:
-                        for i, curr in enumerate(curriculum_list):
-                            dataClass_sheet.write(i, 0, curr)
-                    if course_list:
-                        for i, course in enumerate(course_list):
-                            dataClass_sheet.write(i, 1, course)
-                    if comb_class_list:
-                        for i, comb_class in enumerate(comb_class_list):
-                            dataClass_sheet.write(i, 2, comb_class)
-                        
-                    # Tạo data validation
-                    if curricula:
-                        sample_worksheet.data_validation(1, 2, 1000, 2, {
-                            'validate': 'list',
-                            'source': '=dataClass!$A$1:$A${}'.format(len(curriculum_list))
-                        })
-                    if courses:
-                        sample_worksheet.data_validation(1, 3, 1000, 3, {
-                            'validate': 'list',
-                            'source': '=dataClass!$B$1:$B${}'.format(len(course_list))
-                        })
-                    if combined_classes:
-                        sample_worksheet.data_validation(1, 7, 1000, 7, {
-                            'validate': 'list',
-                            'source': '=dataClass!$C$1:$C${}'.format(len(comb_class_list))
-                        })
-                elif object_type == 'combined-class':
-                    sample_data = self.get_combined_class_template()
-                    filename = "mau_import_lop_hoc_ghep.xlsx"
-                    df = pd.DataFrame(sample_data)
-                    df.to_excel(writer, index=False, sheet_name='Dữ liệu mẫu')
-                    
-                    # Định dạng cho sheet Dữ liệu mẫu và Hướng dẫn nhập liệu
-                    sample_worksheet = writer.sheets['Dữ liệu mẫu']
-                    # Điều chỉnh độ rộng các cột vừa với nội dung cột
-                    for i, col in enumerate(df.columns):
-                        column_len = max(df[col].astype(str).str.len().max(), len(col)) + 2
-                        sample_worksheet.set_column(i, i, column_len)
+            # Tạo sheet dữ liệu mẫu
+            if object_type == 'class':
+                sample_data = self.get_class_template()
+                filename = "mau_import_lop_hoc.xlsx"
+                df = pd.DataFrame(sample_data)
+                df.to_excel(writer, index=False, sheet_name='Dữ liệu mẫu')
+                
+                # Định dạng cho sheet Dữ liệu mẫu và Hướng dẫn nhập liệu
+                sample_worksheet = writer.sheets['Dữ liệu mẫu']
+                
+                # Điều chỉnh độ rộng các cột vừa với nội dung cột
+                for i, col in enumerate(df.columns):
+                    column_len = max(df[col].astype(str).str.len().max(), len(col)) + 2
+                    sample_worksheet.set_column(i, i, column_len)
+                
+                # Tạo sheet hướng dẫn cho lớp học
+                self.create_class_guide_sheet(writer)
+                # guide_worksheet = writer.sheets['Hướng dẫn nhập liệu']
+                
+                
+                curriculum_list = [cu['code'] for cu in curricula]
+                course_list = [co['code'] for co in courses]
+                comb_class_list = [cc['code'] for cc in combined_classes]
+
+                # Viết danh sách vào một sheet ẩn hoặc sử dụng named range
+                dataClass_sheet = workbook.add_worksheet('dataClass')
+                dataClass_sheet.hide()
+                
+                # Chỉ thêm data validation nếu có dữ liệu
+                if curriculum_list:
+                    for i, curr in enumerate(curriculum_list):
+                        dataClass_sheet.write(i, 0, curr)
+                if course_list:
+                    for i, course in enumerate(course_list):
+                        dataClass_sheet.write(i, 1, course)
+                if comb_class_list:
+                    for i, comb_class in enumerate(comb_class_list):
+                        dataClass_sheet.write(i, 2, comb_class)
                     
-                    # Tạo sheet hướng dẫn cho lớp học ghép
-                    self.create_combined_class_guide_sheet(writer)
+                # Tạo data validation
+                if curricula:
+                    sample_worksheet.data_validation(1, 2, 1000, 2, {
+                        'validate': 'list',
+                        'source': '=dataClass!$A$1:$A${}'.format(len(curriculum_list))
+                    })
+                if courses:
+                    sample_worksheet.data_validation(1, 3, 1000, 3, {
+                        'validate': 'list',
+                        'source': '=dataClass!$B$1:$B${}'.format(len(course_list))
+                    })
+                if combined_classes:
+                    sample_worksheet.data_validation(1, 7, 1000, 7, {
+                        'validate': 'list',
+                        'source': '=dataClass!$C$1:$C${}'.format(len(comb_class_list))
+                    })
+            elif object_type == 'combined-class':
+                sample_data = self.get_combined_class_template()
+                filename = "mau_import_lop_hoc_ghep.xlsx"
+                df = pd.DataFrame(sample_data)
+                df.to_excel(writer, index=False, sheet_name='Dữ liệu mẫu')
+                
+                # Định dạng cho sheet Dữ liệu mẫu và Hướng dẫn nhập liệu
+                sample_worksheet = writer.sheets['Dữ liệu mẫu']
+                # Điều chỉnh độ rộng các cột vừa với nội dung cột
+                for i, col in enumerate(df.columns):
+                    column_len = max(df[col].astype(str).str.len().max(), len(col)) + 2
+                    sample_worksheet.set_column(i, i, column_len)
+                
+                # Tạo sheet hướng dẫn cho lớp học ghép
+                self.create_combined_class_guide_sheet(writer)
 
-                    subject_code_list = [s['code'] for s in subjects]
-                    subject_name_list = [sn['name'] for sn in subjects]
-                    class_list = [cl['code'] for cl in classes]
-                    comb_class_list = [cc['code'] for cc in combined_classes]
+                subject_code_list = [s['code'] for s in subjects]
+                subject_name_list = [sn['name'] for sn in subjects]
+                class_list = [cl['code'] for cl in classes]
+                comb_class_list = [cc['code'] for cc in combined_classes]
 
-                    # Viết danh sách vào một sheet ẩn hoặc sử dụng named range
-                    dataCombClass_sheet = workbook.add_worksheet('dataCombClass')
-                    dataCombClass_sheet.hide()
-                    
-                    # Chỉ thêm data validation nếu có dữ liệu
-                    if subject_code_list:
-                        for i, subj_code in enumerate(subject_code_list):
-                            dataCombClass_sheet.write(i, 0, subj_code)
-                        for i, subj_name in enumerate(subject_name_list):
-                            dataCombClass_sheet.write(i, 1, subj_name)
-                    if class_list:
-                        for i, class_item in enumerate(class_list):
-                            dataCombClass_sheet.write(i, 2, class_item)
-                    if comb_class_list:
-                        for i, comb_class in enumerate(comb_class_list):
-                            dataCombClass_sheet.write(i, 3, comb_class)
-                        
-                    # Tạo data validation
-                    if subjects:
-                        sample_worksheet.data_validation(1, 2, 1000, 2, {
-                            'validate': 'list',
-                            'source': '=dataCombClass!$A$1:$B${}'.format(len(subject_code_list))
-                        })
-                    # if classes:
-                    #     sample_worksheet.data_validation(1, 3, 1000, 3, {
-                    #         'validate': 'list',
-                    #         'source': '=dataCombClass!$C$1:$C${}'.format(len(class_list))
-                    #     })
-                    # if combined_classes:
-                    #     sample_worksheet.data_validation(1, 0, 1000, 0, {
-                    #         'validate': 'list',
-                    #         'source': '=dataCombClass!$D$1:$D${}'.format(len(comb_class_list))
-                    #     })
-                    note_format = workbook.add_format({'italic': True, 'font_color': 'blue', 'font_size': 9})
-                    sample_worksheet.write(1, 3, "CNOT5,DTD5,DCN5", note_format)
-                    comment_text = "Nhập nhiều mã lớp phân cách bằng dấu phẩy\nVí dụ: CNOT5,DTD5,DCN5\nDanh sách lớp có sẵn xem ở sheet 'Hướng dẫn nhập liệu'"
-                    sample_worksheet.write_comment(0, 3, comment_text, {'x_scale': 1.5, 'y_scale': 2})
-                elif object_type == 'instructor':
-                    sample_data = self.get_instructor_template()
-                    filename = "mau_import_giang_vien.xlsx"
-                    df = pd.DataFrame(sample_data)
-                    df.to_excel(writer, index=False, sheet_name='Dữ liệu mẫu')
-                                        
-                    # Định dạng cho sheet Dữ liệu mẫu và Hướng dẫn nhập liệu
-                    sample_worksheet = writer.sheets['Dữ liệu mẫu']
-                    # Điều chỉnh độ rộng các cột vừa với nội dung cột
-                    for i, col in enumerate(df.columns):
-                        column_len = max(df[col].astype(str).str.len().max(), len(col)) + 2
-                        sample_worksheet.set_column(i, i, column_len)
+                # Viết danh sách vào một sheet ẩn hoặc sử dụng named range
+                dataCombClass_sheet = workbook.add_worksheet('dataCombClass')
+                dataCombClass_sheet.hide()
+                
+                # Chỉ thêm data validation nếu có dữ liệu
+                if subject_code_list:
+                    for i, subj_code in enumerate(subject_code_list):
+                        dataCombClass_sheet.write(i, 0, subj_code)
+                    for i, subj_name in enumerate(subject_name_list):
+                        dataCombClass_sheet.write(i, 1, subj_name)
+                if class_list:
+                    for i, class_item in enumerate(class_list):
+                        dataCombClass_sheet.write(i, 2, class_item)
+                if comb_class_list:
+                    for i, comb_class in enumerate(comb_class_list):
+                        dataCombClass_sheet.write(i, 3, comb_class)
                     
-                    # Tạo sheet hướng dẫn cho giảng viên
-                    self.create_instructor_guide_sheet(writer)
-                    
-                    instructors_code_list = [inst['code'] for inst in instructors]
-                    instructors_name_list = [instn['full_name'] for instn in instructors]
-                    department_code_list = [dc['code'] for dc in departments]
-                    department_name_list = [dn['name'] for dn in departments]
-                    position_list = [p['name'] for p in positions]
-                    subj_grp_list = [sg['code'] for sg in subject_groups]
+                # Tạo data validation
+                if subjects:
+                    sample_worksheet.data_validation(1, 2, 1000, 2, {
+                        'validate': 'list',
+                        'source': '=dataCombClass!$A$1:$B${}'.format(len(subject_code_list))
+                    })
+                # if classes:
+                #     sample_worksheet.data_validation(1, 3, 1000, 3, {
+                #         'validate': 'list',
+                #         'source': '=dataCombClass!$C$1:$C${}'.format(len(class_list))
+                #     })
+                # if combined_classes:
+                #     sample_worksheet.data_validation(1, 0, 1000, 0, {
+                #         'validate': 'list',
+                #         'source': '=dataCombClass!$D$1:$D${}'.format(len(comb_class_list))
+                #     })
+                note_format = workbook.add_format({'italic': True, 'font_color': 'blue', 'font_size': 9})
+                sample_worksheet.write(1, 3, "CNOT5,DTD5,DCN5", note_format)
+                comment_text = "Nhập nhiều mã lớp phân cách bằng dấu phẩy\nVí dụ: CNOT5,DTD5,DCN5\nDanh sách lớp có sẵn xem ở sheet 'Hướng dẫn nhập liệu'"
+                sample_worksheet.write_comment(0, 3, comment_text, {'x_scale': 1.5, 'y_scale': 2})
+            elif object_type == 'instructor':
+                sample_data = self.get_instructor_template()
+                filename = "mau_import_giang_vien.xlsx"
+                df = pd.DataFrame(sample_data)
+                df.to_excel(writer, index=False, sheet_name='Dữ liệu mẫu')
+                                    
+                # Định dạng cho sheet Dữ liệu mẫu và Hướng dẫn nhập liệu
+                sample_worksheet = writer.sheets['Dữ liệu mẫu']
+                # Điều chỉnh độ rộng các cột vừa với nội dung cột
+                for i, col in enumerate(df.columns):
+                    column_len = max(df[col].astype(str).str.len().max(), len(col)) + 2
+                    sample_worksheet.set_column(i, i, column_len)
+                
+                # Tạo sheet hướng dẫn cho giảng viên
+                self.create_instructor_guide_sheet(writer)
+                
+                instructors_code_list = [inst['code'] for inst in instructors]
+                instructors_name_list = [instn['full_name'] for instn in instructors]
+                department_code_list = [dc['code'] for dc in departments]
+                department_name_list = [dn['name'] for dn in departments]
+                position_list = [p['name'] for p in positions]
+                subj_grp_list = [sg['code'] for sg in subject_groups]
 
-                    # Viết danh sách vào một sheet ẩn hoặc sử dụng named range
-                    dataInstructor_sheet = workbook.add_worksheet('dataInstructor')
-                    dataInstructor_sheet.hide()
-                    
-                    # Chỉ thêm data validation nếu có dữ liệu
-                    if instructors_code_list:
-                        for i, instructor_code in enumerate(instructors_code_list):
-                            dataInstructor_sheet.write(i, 0, instructor_code)
-                        for i, instructor_name in enumerate(instructors_name_list):
-                            dataInstructor_sheet.write(i, 1, instructor_name)
-                    if department_code_list:
-                        for i, depart_code in enumerate(department_code_list):
-                            dataInstructor_sheet.write(i, 2, depart_code)
-                        for i, depart_name in enumerate(department_name_list):
-                            dataInstructor_sheet.write(i, 3, depart_name)
-                    if position_list:
-                        for i, position in enumerate(position_list):
-                            dataInstructor_sheet.write(i, 4, position)
-                    if subj_grp_list:
-                        for i, sub_grp in enumerate(subj_grp_list):
-                            dataInstructor_sheet.write(i, 5, sub_grp)
-                        
-                    # Tạo data validation
-                    if instructors_code_list:
-                        sample_worksheet.data_validation(1, 0, 1000, 0, {
-                            'validate': 'list',
-                            'source': '=dataInstructor!$A$1:$A${}'.format(len(instructors_code_list))
-                        })
-                    if instructors_name_list:
-                        sample_worksheet.data_validation(1, 1, 1000, 1, {
-                            'validate': 'list',
-                            'source': '=dataInstructor!$B$1:$B${}'.format(len(instructors_name_list))
-                        })
-                    if department_name_list:
-                        sample_worksheet.data_validation(1, 2, 1000, 2, {
-                            'validate': 'list',
-                            'source': '=dataInstructor!$D$1:$D${}'.format(len(department_name_list))
-                        })
-                        sample_worksheet.data_validation(1, 6, 1000, 6, {
-                            'validate': 'list',
-                            'source': '=dataInstructor!$D$1:$D${}'.format(len(department_name_list))
-                        })
-                    if position_list:
-                        sample_worksheet.data_validation(1, 3, 1000, 3, {
-                            'validate': 'list',
-                            'source': '=dataInstructor!$E$1:$E${}'.format(len(position_list))
-                        })
-                    if subj_grp_list:
-                        sample_worksheet.data_validation(1, 7, 1000, 7, {
-                            'validate': 'list',
-                            'source': '=dataInstructor!$F$1:$F${}'.format(len(subj_grp_list))
-                        })
-                elif object_type == 'teaching-assignment':
-                    sample_data = self.get_teaching_assignment_template()
-                    filename = "mau_import_phan_cong_giang_day.xlsx"
-                    df = pd.DataFrame(sample_data)
-                    df.to_excel(writer, index=False, sheet_name='Dữ liệu mẫu')
+                # Viết danh sách vào một sheet ẩn hoặc sử dụng named range
+                dataInstructor_sheet = workbook.add_worksheet('dataInstructor')
+                dataInstructor_sheet.hide()
+                
+                # Chỉ thêm data validation nếu có dữ liệu
+                if instructors_code_list:
+                    for i, instructor_code in enumerate(instructors_code_list):
+                        dataInstructor_sheet.write(i, 0, instructor_code)
+                    for i, instructor_name in enumerate(instructors_name_list):
+                        dataInstructor_sheet.write(i, 1, instructor_name)
+                if department_code_list:
+                    for i, depart_code in enumerate(department_code_list):
+                        dataInstructor_sheet.write(i, 2, depart_code)
+                    for i, depart_name in enumerate(department_name_list):
+                        dataInstructor_sheet.write(i, 3, depart_name)
+                if position_list:
+                    for i, position in enumerate(position_list):
+                        dataInstructor_sheet.write(i, 4, position)
+                if subj_grp_list:
+                    for i, sub_grp in enumerate(subj_grp_list):
+                        dataInstructor_sheet.write(i, 5, sub_grp)
                     
-                    # Định dạng cho sheet Dữ liệu mẫu và Hướng dẫn nhập liệu
-                    sample_worksheet = writer.sheets['Dữ liệu mẫu']
-                    # guide_worksheet = writer.sheets['Hướng dẫn nhập liệu']
-                    # Điều chỉnh độ rộng các cột vừa với nội dung cột
-                    for i, col in enumerate(df.columns):
-                        column_len = max(df[col].astype(str).str.len().max(), len(col)) + 2
-                        sample_worksheet.set_column(i, i, column_len)
-                    
-                    # Tạo sheet hướng dẫn cho phân công giảng dạy
-                    self.create_teaching_assignment_guide_sheet(writer)
-                    
-                    instructors_code_list = [inst['code'] for inst in instructors]
-                    instructors_name_list = [instn['full_name'] for instn in instructors]
-                    subjects_code_list = [sc['code'] for sc in subjects]
-                    subjects_name_list = [sn['name'] for sn in subjects]
-                    regular_classes_list = [cl['code'] for cl in classes]
-                    combined_classes_list = [ccl['code'] for ccl in combined_classes]
-                    all_class_list = regular_classes_list + combined_classes_list
-                    subject_type = ['Thường', 'Ghép']
+                # Tạo data validation
+                if instructors_code_list:
+                    sample_worksheet.data_validation(1, 0, 1000, 0, {
+                        'validate': 'list',
+                        'source': '=dataInstructor!$A$1:$A${}'.format(len(instructors_code_list))
+                    })
+                if instructors_name_list:
+                    sample_worksheet.data_validation(1, 1, 1000, 1, {
+                        'validate': 'list',
+                        'source': '=dataInstructor!$B$1:$B${}'.format(len(instructors_name_list))
+                    })
+                if department_name_list:
+                    sample_worksheet.data_validation(1, 2, 1000, 2, {
+                        'validate': 'list',
+                        'source': '=dataInstructor!$D$1:$D${}'.format(len(department_name_list))
+                    })
+                    sample_worksheet.data_validation(1, 6, 1000, 6, {
+                        'validate': 'list',
+                        'source': '=dataInstructor!$D$1:$D${}'.format(len(department_name_list))
+                    })
+                if position_list:
+                    sample_worksheet.data_validation(1, 3, 1000, 3, {
+                        'validate': 'list',
+                        'source': '=dataInstructor!$E$1:$E${}'.format(len(position_list))
+                    })
+                if subj_grp_list:
+                    sample_worksheet.data_validation(1, 7, 1000, 7, {
+                        'validate': 'list',
+                        'source': '=dataInstructor!$F$1:$F${}'.format(len(subj_grp_list))
+                    })
+            elif object_type == 'teaching-assignment':
+                sample_data = self.get_teaching_assignment_template()
+                filename = "mau_import_phan_cong_giang_day.xlsx"
+                df = pd.DataFrame(sample_data)
+                df.to_excel(writer, index=False, sheet_name='Dữ liệu mẫu')
+                
+                # Định dạng cho sheet Dữ liệu mẫu và Hướng dẫn nhập liệu
+                sample_worksheet = writer.sheets['Dữ liệu mẫu']
+                # guide_worksheet = writer.sheets['Hướng dẫn nhập liệu']
+                # Điều chỉnh độ rộng các cột vừa với nội dung cột
+                for i, col in enumerate(df.columns):
+                    column_len = max(df[col].astype(str).str.len().max(), len(col)) + 2
+                    sample_worksheet.set_column(i, i, column_len)
+                
+                # Tạo sheet hướng dẫn cho phân công giảng dạy
+                self.create_teaching_assignment_guide_sheet(writer)
+                
+                instructors_code_list = [inst['code'] for inst in instructors]
+                instructors_name_list = [instn['full_name'] for instn in instructors]
+                subjects_code_list = [sc['code'] for sc in subjects]
+                subjects_name_list = [sn['name'] for sn in subjects]
+                regular_classes_list = [cl['code'] for cl in classes]
+                combined_classes_list = [ccl['code'] for ccl in combined_classes]
+                all_class_list = regular_classes_list + combined_classes_list
+                subject_type = ['Thường', 'Ghép']
 
-                    # Viết danh sách vào một sheet ẩn hoặc sử dụng named range
-                    dataAssignment_sheet = workbook.add_worksheet('dataAssignment')
-                    dataAssignment_sheet.hide()
+                # Viết danh sách vào một sheet ẩn hoặc sử dụng named range
+                dataAssignment_sheet = workbook.add_worksheet('dataAssignment')
+                dataAssignment_sheet.hide()
+                
+                # Chỉ thêm data validation nếu có dữ liệu
+                if instructors_code_list:
+                    for i, instructor_code in enumerate(instructors_code_list):
+                        dataAssignment_sheet.write(i, 0, instructor_code)
+                    for i, instructor_name in enumerate(instructors_name_list):
+                        dataAssignment_sheet.write(i, 1, instructor_name)
+                if subjects_code_list:
+                    for i, subjects_code in enumerate(subjects_code_list):
+                        dataAssignment_sheet.write(i, 2, subjects_code)
+                    for i, subjects_name in enumerate(subjects_name_list):
+                        dataAssignment_sheet.write(i, 3, subjects_name)
+                if all_class_list:
+                    for i, class_item in enumerate(all_class_list):
+                        dataAssignment_sheet.write(i, 4, class_item)
+                # if combined_classes_list:
+                #     for i, combined_class in enumerate(combined_classes_list):
+                #         dataAssignment_sheet.write(i, 5, combined_class)
                     
-                    # Chỉ thêm data validation nếu có dữ liệu
-                    if instructors_code_list:
-                        for i, instructor_code in enumerate(instructors_code_list):
-                            dataAssignment_sheet.write(i, 0, instructor_code)
-                        for i, instructor_name in enumerate(instructors_name_list):
-                            dataAssignment_sheet.write(i, 1, instructor_name)
-                    if subjects_code_list:
-                        for i, subjects_code in enumerate(subjects_code_list):
-                            dataAssignment_sheet.write(i, 2, subjects_code)
-                        for i, subjects_name in enumerate(subjects_name_list):
-                            dataAssignment_sheet.write(i, 3, subjects_name)
-                    if all_class_list:
-                        for i, class_item in enumerate(all_class_list):
-                            dataAssignment_sheet.write(i, 4, class_item)
-                    # if combined_classes_list:
-                    #     for i, combined_class in enumerate(combined_classes_list):
-                    #         dataAssignment_sheet.write(i, 5, combined_class)
-                        
-                    # Tạo data validation
-                    if instructors_code_list:
-                        sample_worksheet.data_validation(1, 0, 1000, 0, {
-                            'validate': 'list',
-                            'source': '=dataAssignment!$A$1:$A${}'.format(len(instructors_code_list))
-                        })
-                    if instructors_name_list:
-                        sample_worksheet.data_validation(1, 1, 1000, 1, {
-                            'validate': 'list',
-                            'source': '=dataAssignment!$B$1:$B${}'.format(len(instructors_name_list))
-                        })
-                    if subjects_code_list:
-                        sample_worksheet.data_validation(1, 2, 1000, 2, {
-                            'validate': 'list',
-                            'source': '=dataAssignment!$C$1:$C${}'.format(len(subjects_code_list))
-                        })
-                        
-                    if all_class_list:
-                        sample_worksheet.data_validation(1, 3, 1000, 3, {
-                            'validate': 'list',
-                            'source': '=dataAssignment!$E$1:$E${}'.format(len(all_class_list))
-                        })
-                    sample_worksheet.data_validation(1, 4, 1000, 4, {
-                            'validate': 'list',
-                            'source': subject_type
-                        })
+                # Tạo data validation
+                if instructors_code_list:
+                    sample_worksheet.data_validation(1, 0, 1000, 0, {
+                        'validate': 'list',
+                        'source': '=dataAssignment!$A$1:$A${}'.format(len(instructors_code_list))
+                    })
+                if instructors_name_list:
+                    sample_worksheet.data_validation(1, 1, 1000, 1, {
+                        'validate': 'list',
+                        'source': '=dataAssignment!$B$1:$B${}'.format(len(instructors_name_list))
+                    })
+                if subjects_code_list:
+                    sample_worksheet.data_validation(1, 2, 1000, 2, {
+                        'validate': 'list',
+                        'source': '=dataAssignment!$C$1:$C${}'.format(len(subjects_code_list))
+                    })
+                    
+                if all_class_list:
+                    sample_worksheet.data_validation(1, 3, 1000, 3, {
+                        'validate': 'list',
+                        'source': '=dataAssignment!$E$1:$E${}'.format(len(all_class_list))
+                    })
+                sample_worksheet.data_validation(1, 4, 1000, 4, {
+                        'validate': 'list',
+                        'source': subject_type
+                    })
 						
-                else:
-                    return JsonResponse({'status': 'error', 'message': 'Loại đối tượng không hợp lệ'})
-                
-            output.seek(0)
-                
-            # Trả về file để download
-            response = HttpResponse(
-                output.getvalue(),
-                content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-            )
-            response['Content-Disposition'] = f'attachment; filename="{filename}"'
-            response['Content-Length'] = len(output.getvalue())
-                
-            return response
-        except Exception as e:
-            return JsonResponse({'status': 'error', 'message': f"Lỗi tạo file mẫu: {str(e)}"})
+            else:
+                raise ValueError('Loại đối tượng không hợp lệ')
+            
+        output.seek(0)
+        return output.getvalue(), filename
     
     def create_class_guide_sheet(self, writer):
         """Tạo sheet hướng dẫn cho import lớp học - SỬA CHO XLSXWRITER"""
@@ -2894,6 +2446,14 @@ class ImportTeachingDataView(View):
         except Exception as e:
             print(f"Error creating teaching assignment guide sheet: {str(e)}")
         
+    # Hàm xử lý import theo loại đối tượng
+    IMPORT_PROCESSORS = {
+        'class': 'process_class_import',
+        'combined-class': 'process_combined_class_import',
+        'instructor': 'process_instructor_import',
+        'teaching-assignment': 'process_teaching_assignment_import',
+    }
+        
     def post(self, request, object_type):
         """Xử lý import file Excel với chức năng chọn sheet"""
         try:
@@ -2903,65 +2463,68 @@ class ImportTeachingDataView(View):
                     
                 # Kiểm tra định dạng file
                 if not excel_file.name.endswith(('.xlsx', '.xls')):
-                    return JsonResponse({'status': 'error', 'message': 'File phải có định dạng Excel (.xlsx hoặc .xls)'})
-                    
-                # Kiểm tra kích thước file (tối đa 10MB)
-                if excel_file.size > 10 * 1024 * 1024:
-                    return JsonResponse({'status': 'error', 'message': 'File không được vượt quá 10MB'})
+                    return FastJsonResponse({'status': 'error', 'message': 'File phải có định dạng Excel (.xlsx hoặc .xls)'})
                     
-                try:
-                    # Đọc file Excel để lấy danh sách sheet
-                    excel_file.seek(0)
-                    xls = pd.ExcelFile(excel_file)
-                    sheet_names = xls.sheet_names
-                        
-                    # Nếu không có sheet được chọn, sử dụng sheet đầu tiên
-                    if not selected_sheet and sheet_names:
-                        selected_sheet = sheet_names[0]
-                        
-                    # Đọc sheet được chọn
-                    df = pd.read_excel(excel_file, sheet_name=selected_sheet)
-                    print(f"File imported successfully, sheet: {selected_sheet}, shape: {df.shape}")
-                        
-                except Exception as e:
-                    return JsonResponse({'status': 'error', 'message': f'Không thể đọc file Excel: {str(e)}'})
+                # Kiểm tra kích thước file (file được đọc streaming nên giới hạn lấy từ settings)
+                max_upload_size = settings.IMPORT_MAX_UPLOAD_SIZE
+                if excel_file.size > max_upload_size:
+                    return FastJsonResponse({'status': 'error', 'message': f'File không được vượt quá {max_upload_size // (1024 * 1024)}MB'})
                     
-                # Xử lý dữ liệu theo loại đối tượng
-                if object_type == 'class':
-                    result = self.process_class_import(df, request.user, excel_file, selected_sheet)
-                elif object_type == 'combined-class':
-                    result = self.process_combined_class_import(df, request.user, excel_file, selected_sheet)
-                elif object_type == 'instructor':
-                    result = self.process_instructor_import(df, request.user, excel_file, selected_sheet)
-                elif object_type == 'teaching-assignment':
-                    result = self.process_teaching_assignment_import(df, request.user, excel_file, selected_sheet)
-                else:
-                    return JsonResponse({'status': 'error', 'message': 'Loại đối tượng không hợp lệ'})
+                if object_type not in self.IMPORT_PROCESSORS:
+                    return FastJsonResponse({'status': 'error', 'message': 'Loại đối tượng không hợp lệ'})
                     
-                if result['status'] == 'success':
-                    return JsonResponse({
-                        'status': 'success', 
-                        'message': result['message'],
-                        'data': result.get('processed_data', []),
-                        'errors': result.get('errors', []),
-                        'sheet_used': selected_sheet
-                    })
-                else:
-                    return JsonResponse({'status': 'error', 'message': result['message']})
+                # Tạo job import; việc đọc file và ghi dữ liệu chạy ở worker thread
+                history = ImportHistory.objects.create(
+                    status='pending',
+                    object_type=object_type,
+                    file_name=excel_file.name,
+                    file_size=excel_file.size,
+                    imported_by=request.user if request.user.is_authenticated else None,
+                    additional_info=f"Sheet được sử dụng: {selected_sheet}" if selected_sheet else None
+                )
+                submit_import_job(history, self.run_import_job, save_upload(excel_file), object_type, selected_sheet)
+                return import_job_response(history)
                         
             else:
-                return JsonResponse({'status': 'error', 'message': 'Không tìm thấy file'})
+                return FastJsonResponse({'status': 'error', 'message': 'Không tìm thấy file'})
                     
         except Exception as e:
             print(f"Error in import: {str(e)}")
-            return JsonResponse({'status': 'error', 'message': f'Lỗi khi xử lý file: {str(e)}'})
+            return FastJsonResponse({'status': 'error', 'message': f'Lỗi khi xử lý file: {str(e)}'})
+        
+    def run_import_job(self, job, path, object_type, selected_sheet):
+        """Đọc file Excel (streaming) và import trong worker thread"""
+        try:
+            try:
+                # Không chọn sheet thì SheetReader dùng sheet đầu tiên
+                reader = SheetReader(path, selected_sheet or None)
+                selected_sheet = reader.sheet_name
+                print(f"File opened successfully, sheet: {selected_sheet}, rows: {reader.total_rows}")
+            except Exception as e:
+                job.fail(f'Không thể đọc file Excel: {str(e)}')
+                return
+                
+            job.start(reader.total_rows)
+            with reader:
+                result = getattr(self, self.IMPORT_PROCESSORS[object_type])(reader, job)
+        finally:
+            remove_file(path)
+        if result['status'] == 'success':
+            response_data = {
+                'status': 'success', 
+                'message': result['message'],
+                'data': result.get('processed_data', []),
+                'errors': result.get('errors', []),
+                'sheet_used': selected_sheet
+            }
+        else:
+            response_data = {'status': 'error', 'message': result['message']}
+        job.finish(result, response_data)
         
     def get_sheet_names(self, excel_file):
-        """Lấy danh sách các sheet trong file Excel"""
+        """Lấy danh sách các sheet trong file Excel (chỉ đọc metadata)"""
         try:
-            excel_file.seek(0)
-            xls = pd.ExcelFile(excel_file)
-            return xls.sheet_names
+            return get_sheet_names(excel_file)
         except Exception as e:
             print(f"Error getting sheet names: {str(e)}")
             return []
@@ -3019,7 +2582,7 @@ class ImportTeachingDataView(View):
             'Số giờ giảng dạy': [45, 75, 30]
         }
         
-    def process_class_import(self, df, user, excel_file, sheet_name):
+    def process_class_import(self, df, job=None):
         """Xử lý import lớp học"""
         try:
             created_count = 0
@@ -3036,64 +2599,47 @@ class ImportTeachingDataView(View):
                     'message': f'File thiếu các cột bắt buộc: {", ".join(missing_columns)}'
                 }
                 
-            for index, row in df.iterrows():
+            # Chuẩn hóa dữ liệu theo cột (bỏ qua dòng trống)
+            rows = iter_normalized_rows(df, CLASS_COLUMNS, key='code',
+                                   required=['name', 'curriculum_code', 'course_code'])
+            for row in rows:
+                line = row['line']
+                if job:
+                    job.advance()
                 try:
-                    # Bỏ qua các dòng trống
-                    if pd.isna(row.get('Mã lớp*')) or str(row.get('Mã lớp*')).strip() in ['', 'Mã lớp*', 'nan']:
-                        continue
-                        
-                    # Chuẩn hóa dữ liệu
-                    code = str(row.get('Mã lớp*')).strip()
-                    name = str(row.get('Tên lớp*')).strip()
-                    curriculum_code = str(row.get('Mã chương trình*')).strip()
-                    course_code = str(row.get('Mã khóa học*')).strip()
+                    code = row['code']
+                    name = row['name']
+                    curriculum_code = row['curriculum_code']
+                    course_code = row['course_code']
                         
-                    if not code or not name or not curriculum_code or not course_code:
-                        errors.append(f"Dòng {index + 2}: Thiếu thông tin bắt buộc")
+                    if row['missing_required']:
+                        errors.append(f"Dòng {line}: Thiếu thông tin bắt buộc")
                         continue
                         
                     # Tìm curriculum và course
                     try:
                         curriculum = Curriculum.objects.get(code=curriculum_code)
                     except Curriculum.DoesNotExist:
-                        errors.append(f"Dòng {index + 2}: Không tìm thấy chương trình với mã '{curriculum_code}'")
+                        errors.append(f"Dòng {line}: Không tìm thấy chương trình với mã '{curriculum_code}'")
                         continue
                         
                     try:
                         course = Course.objects.get(code=course_code)
                     except Course.DoesNotExist:
-                        errors.append(f"Dòng {index + 2}: Không tìm thấy khóa học với mã '{course_code}'")
+                        errors.append(f"Dòng {line}: Không tìm thấy khóa học với mã '{course_code}'")
                         continue
                         
-                    # Xử lý ngày tháng
-                    start_date = None
-                    end_date = None
+                    # Ngày tháng đã được chuyển đổi; báo lỗi các ô không hợp lệ
+                    start_date = row['start_date']
+                    end_date = row['end_date']
+                    if row['start_date_error']:
+                        errors.append(f"Dòng {line}: Định dạng ngày bắt đầu không hợp lệ: {row['start_date_error']}")
+                    if row['end_date_error']:
+                        errors.append(f"Dòng {line}: Định dạng ngày kết thúc không hợp lệ: {row['end_date_error']}")
                         
-                    start_date_str = str(row.get('Ngày bắt đầu', '')).strip()
-                    if start_date_str and start_date_str not in ['', 'nan']:
-                        try:
-                            start_date = pd.to_datetime(start_date_str).date()
-                        except:
-                            errors.append(f"Dòng {index + 2}: Định dạng ngày bắt đầu không hợp lệ: {start_date_str}")
-                        
-                    end_date_str = str(row.get('Ngày kết thúc', '')).strip()
-                    if end_date_str and end_date_str not in ['', 'nan']:
-                        try:
-                            end_date = pd.to_datetime(end_date_str).date()
-                        except:
-                            errors.append(f"Dòng {index + 2}: Định dạng ngày kết thúc không hợp lệ: {end_date_str}")
-                        
-                    # Xử lý lớp ghép
-                    is_combined_str = str(row.get('Là lớp ghép', 'Không')).strip()
-                    is_combined = is_combined_str.lower() in ['có', 'yes', 'true', '1']
-                        
-                    combined_class_code = str(row.get('Mã lớp ghép (nếu có)', '')).strip()
-                    if combined_class_code in ['', 'nan']:
-                        combined_class_code = None
-                        
-                    description = str(row.get('Mô tả', '')).strip()
-                    if description in ['', 'nan']:
-                        description = None
+                    is_combined = row['is_combined']
+                    combined_class_code = row['combined_class_code'] or None
+                    description = row['description'] or None
                         
                     # Tạo hoặc cập nhật lớp học
                     class_obj, created = Class.objects.update_or_create(
@@ -3123,18 +2669,7 @@ class ImportTeachingDataView(View):
                     })
                         
                 except Exception as e:
-                    errors.append(f"Dòng {index + 2}: {str(e)}")
-                
-            # Lưu lịch sử import
-            ImportHistory.objects.create(
-                file_name=excel_file.name,
-                file_size=excel_file.size,
-                imported_by=user,
-                record_count=len(processed_data),
-                status='success' if not errors else 'partial',
-                errors=errors if errors else None,
-                additional_info=f"Sheet được sử dụng: {sheet_name}"
-            )
+                    errors.append(f"Dòng {line}: {str(e)}")
                 
             return {
                 'status': 'success',
@@ -3149,7 +2684,7 @@ class ImportTeachingDataView(View):
             print(f"Error in process_class_import: {str(e)}")
             return {'status': 'error', 'message': f'Lỗi xử lý dữ liệu: {str(e)}'}
         
-    def process_combined_class_import(self, df, user, excel_file, sheet_name):
+    def process_combined_class_import(self, df, job=None):
         """Xử lý import lớp học ghép"""
         try:
             created_count = 0
@@ -3166,27 +2701,28 @@ class ImportTeachingDataView(View):
                     'message': f'File thiếu các cột bắt buộc: {", ".join(missing_columns)}'
                 }
                 
-            for index, row in df.iterrows():
+            # Chuẩn hóa dữ liệu theo cột (bỏ qua dòng trống)
+            rows = iter_normalized_rows(df, COMBINED_CLASS_COLUMNS, key='code',
+                                   required=['name', 'subject_code', 'class_codes'])
+            for row in rows:
+                line = row['line']
+                if job:
+                    job.advance()
                 try:
-                    # Bỏ qua các dòng trống
-                    if pd.isna(row.get('Mã lớp ghép*')) or str(row.get('Mã lớp ghép*')).strip() in ['', 'Mã lớp ghép*', 'nan']:
-                        continue
-                        
-                    # Chuẩn hóa dữ liệu
-                    code = str(row.get('Mã lớp ghép*')).strip()
-                    name = str(row.get('Tên lớp ghép*')).strip()
-                    subject_code = str(row.get('Mã môn học*')).strip()
-                    classes_codes_str = str(row.get('Mã các lớp thành phần*')).strip()
+                    code = row['code']
+                    name = row['name']
+                    subject_code = row['subject_code']
+                    classes_codes_str = row['class_codes']
                         
-                    if not code or not name or not subject_code or not classes_codes_str:
-                        errors.append(f"Dòng {index + 2}: Thiếu thông tin bắt buộc")
+                    if row['missing_required']:
+                        errors.append(f"Dòng {line}: Thiếu thông tin bắt buộc")
                         continue
                         
                     # Tìm môn học
                     try:
                         subject = Subject.objects.get(code=subject_code)
                     except Subject.DoesNotExist:
-                        errors.append(f"Dòng {index + 2}: Không tìm thấy môn học với mã '{subject_code}'")
+                        errors.append(f"Dòng {line}: Không tìm thấy môn học với mã '{subject_code}'")
                         continue
                         
                     # Xử lý các lớp thành phần
@@ -3197,15 +2733,13 @@ class ImportTeachingDataView(View):
                             class_obj = Class.objects.get(code=class_code)
                             classes.append(class_obj)
                         except Class.DoesNotExist:
-                            errors.append(f"Dòng {index + 2}: Không tìm thấy lớp với mã '{class_code}'")
+                            errors.append(f"Dòng {line}: Không tìm thấy lớp với mã '{class_code}'")
                         
                     if not classes:
-                        errors.append(f"Dòng {index + 2}: Không có lớp thành phần hợp lệ")
+                        errors.append(f"Dòng {line}: Không có lớp thành phần hợp lệ")
                         continue
                         
-                    description = str(row.get('Mô tả', '')).strip()
-                    if description in ['', 'nan']:
-                        description = None
+                    description = row['description'] or None
                         
                     # Tạo hoặc cập nhật lớp học ghép
                     combined_class, created = CombinedClass.objects.update_or_create(
@@ -3234,18 +2768,7 @@ class ImportTeachingDataView(View):
                     })
                         
                 except Exception as e:
-                    errors.append(f"Dòng {index + 2}: {str(e)}")
-                
-            # Lưu lịch sử import
-            ImportHistory.objects.create(
-                file_name=excel_file.name,
-                file_size=excel_file.size,
-                imported_by=user,
-                record_count=len(processed_data),
-                status='success' if not errors else 'partial',
-                errors=errors if errors else None,
-                additional_info=f"Sheet được sử dụng: {sheet_name}"
-            )
+                    errors.append(f"Dòng {line}: {str(e)}")
                 
             return {
                 'status': 'success',
@@ -3260,7 +2783,7 @@ class ImportTeachingDataView(View):
             print(f"Error in process_combined_class_import: {str(e)}")
             return {'status': 'error', 'message': f'Lỗi xử lý dữ liệu: {str(e)}'}
     
-    def process_instructor_import(self, df, user, excel_file, sheet_name):
+    def process_instructor_import(self, df, job=None):
         """Xử lý import giảng viên"""
         try:
             created_count = 0
@@ -3277,73 +2800,65 @@ class ImportTeachingDataView(View):
                     'message': f'File thiếu các cột bắt buộc: {", ".join(missing_columns)}'
                 }
                 
-            for index, row in df.iterrows():
+            # Chuẩn hóa dữ liệu theo cột (bỏ qua dòng trống)
+            rows = iter_normalized_rows(df, INSTRUCTOR_COLUMNS, key='code',
+                                   required=['full_name', 'department_teacher', 'department', 'position', 'subject_group'])
+            for row in rows:
+                line = row['line']
+                if job:
+                    job.advance()
                 try:
-                    # Bỏ qua các dòng trống
-                    if pd.isna(row.get('Mã giảng viên*')) or str(row.get('Mã giảng viên*')).strip() in ['', 'Mã giảng viên*', 'nan']:
-                        continue
-                        
-                    # Chuẩn hóa dữ liệu
-                    code = str(row.get('Mã giảng viên*')).strip()
-                    full_name = str(row.get('Họ và tên*')).strip()
-                    department_teacher = str(row.get('Đơn vị quản lý GV*')).strip()
-                    department = str(row.get('Khoa chuyên môn*')).strip()
-                    position = str(row.get('Chức vụ*')).strip()
-                    subject_group = str(row.get('Mã tổ bộ môn*')).strip()
-                        
-                    if not code or not full_name or not department_teacher or not department or not position or not subject_group:
-                        errors.append(f"Dòng {index + 2}: Thiếu thông tin bắt buộc")
+                    code = row['code']
+                    full_name = row['full_name']
+                    department_teacher = row['department_teacher']
+                    department = row['department']
+                    position = row['position']
+                    subject_group = row['subject_group']
+                        
+                    if row['missing_required']:
+                        errors.append(f"Dòng {line}: Thiếu thông tin bắt buộc")
                         continue
 
                     # Xử lý Đơn vị quản lý giảng viên
                     department_teacher_obj = None
-                    if department_teacher and department_teacher not in ['', 'nan']:
+                    if department_teacher:
                         try:
                             department_teacher_obj = Department.objects.get(name=department_teacher)
                         except Department.DoesNotExist:
-                            errors.append(f"Dòng {index + 2}: Không tìm thấy khoa với mã '{department_teacher}'")
+                            errors.append(f"Dòng {line}: Không tìm thấy khoa với mã '{department_teacher}'")
                             continue
                     
                     # Xử lý chức vụ
                     position_obj = None
-                    if position in ['', 'nan']:
+                    if position:
                         try:
                             position_obj = Position.objects.get(name=position)
                         except Position.DoesNotExist:
-                            errors.append(f"Dòng {index + 2}: Không tìm thấy chức vụ '{position}'")
+                            errors.append(f"Dòng {line}: Không tìm thấy chức vụ '{position}'")
                             continue
                         
-                    # Xử lý email
-                    email = str(row.get('Email', '')).strip()
-                    if email in ['', 'nan']:
-                        email = None
-
-                    # Xử lý số điện thoại
-                    phone = str(row.get('Số điện thoại', '')).strip()
-                    if phone in ['', 'nan']:
-                        phone = None
+                    email = row['email'] or None
+                    phone = row['phone'] or None
 
                     # Xử lý khoa
                     department_obj = None
-                    if department and department not in ['', 'nan']:
+                    if department:
                         try:
                             department_obj = Department.objects.get(name=department)
                         except Department.DoesNotExist:
-                            errors.append(f"Dòng {index + 2}: Không tìm thấy khoa với mã '{department}'")
+                            errors.append(f"Dòng {line}: Không tìm thấy khoa với mã '{department}'")
                             continue
 
                     # Xử lý tổ bộ môn
                     subject_group_obj = None
-                    if subject_group and subject_group not in ['', 'nan']:
+                    if subject_group:
                         try:
                             subject_group_obj = SubjectGroup.objects.get(code=subject_group)
                         except SubjectGroup.DoesNotExist:
-                            errors.append(f"Dòng {index + 2}: Không tìm thấy tổ bộ môn với mã '{subject_group}'")
+                            errors.append(f"Dòng {line}: Không tìm thấy tổ bộ môn với mã '{subject_group}'")
                             continue
 
-                    # Xử lý trạng thái
-                    status_str = str(row.get('Trạng thái', 'Đang hoạt động')).strip()
-                    is_active = status_str.lower() in ['đang hoạt động', 'active', 'true', '1', 'có', 'yes']
+                    is_active = row['is_active']
 
                     # Tạo hoặc cập nhật giảng viên
                     instructor, created = Instructor.objects.update_or_create(
@@ -3353,7 +2868,7 @@ class ImportTeachingDataView(View):
                             'email': email,
                             'phone': phone,
                             'department': department_obj,
-                            'department_teacher': department_teacher_obj,
+                            'department_of_teacher_management': department_teacher_obj,
                             'position': position_obj,
                             'subject_group': subject_group_obj,
                             'is_active': is_active
@@ -3369,25 +2884,14 @@ class ImportTeachingDataView(View):
                         'code': instructor.code,
                         'full_name': instructor.full_name,
                         'email': instructor.email,
-                        'department': department.name if department else 'N/A',
-                        'department_teacher': department_teacher.name if department_teacher else 'N/A',
-                        'position': instructor.position or 'N/A',
+                        'department': department_obj.name if department_obj else 'N/A',
+                        'department_teacher': department_teacher_obj.name if department_teacher_obj else 'N/A',
+                        'position': position_obj.name if position_obj else 'N/A',
                         'is_active': instructor.is_active
                     })
                         
                 except Exception as e:
-                    errors.append(f"Dòng {index + 2}: {str(e)}")
-                
-            # Lưu lịch sử import
-            ImportHistory.objects.create(
-                file_name=excel_file.name,
-                file_size=excel_file.size,
-                imported_by=user,
-                record_count=len(processed_data),
-                status='success' if not errors else 'partial',
-                errors=errors if errors else None,
-                additional_info=f"Sheet được sử dụng: {sheet_name}"
-            )
+                    errors.append(f"Dòng {line}: {str(e)}")
                 
             return {
                 'status': 'success',
@@ -3402,7 +2906,7 @@ class ImportTeachingDataView(View):
             print(f"Error in process_instructor_import: {str(e)}")
             return {'status': 'error', 'message': f'Lỗi xử lý dữ liệu: {str(e)}'}
         
-    def process_teaching_assignment_import(self, df, user, excel_file, sheet_name):
+    def process_teaching_assignment_import(self, df, job=None):
         """Xử lý import phân công giảng dạy"""
         try:
             created_count = 0
@@ -3419,156 +2923,133 @@ class ImportTeachingDataView(View):
                     'message': f'File thiếu các cột bắt buộc: {", ".join(missing_columns)}'
                 }
                 
-            for index, row in df.iterrows():
-                try:
-                    # Bỏ qua các dòng trống
-                    if pd.isna(row.get('Mã giảng viên*')) or str(row.get('Mã giảng viên*')).strip() in ['', 'Mã giảng viên*', 'nan']:
-                        continue
-                        
-                    # Chuẩn hóa dữ liệu
-                    instructor_code = str(row.get('Mã giảng viên*')).strip()
-                    instructor_name = str(row.get('Họ và tên*')).strip()
-                    subject_code = str(row.get('Mã môn học*')).strip()
-                    class_code = str(row.get('Mã lớp*')).strip()
-                    class_type = str(row.get('Loại lớp*')).strip()
-                    academic_year = str(row.get('Năm học*')).strip()
-                    semester = str(row.get('Học kỳ*')).strip()
-                        
-                    if not instructor_code or not instructor_name or not subject_code or not class_code or not class_type or not academic_year or not semester:
-                        errors.append(f"Dòng {index + 2}: Thiếu thông tin bắt buộc")
-                        continue
-                        
-                    # Tìm giảng viên
+            # Chuẩn hóa dữ liệu theo cột (bỏ qua dòng trống)
+            rows = iter_normalized_rows(df, TEACHING_ASSIGNMENT_COLUMNS, key='instructor_code',
+                                   required=['instructor_name', 'subject_code', 'class_code', 'class_type', 'academic_year'])
+            # Một transaction cho cả file: bảng tổng hợp phân công được tính lại một lần
+            # khi commit thay vì sau mỗi dòng (update_or_create tự dùng savepoint)
+            with transaction.atomic():
+                for row in rows:
+                    line = row['line']
+                    if job:
+                        job.advance()
                     try:
-                        instructor = Instructor.objects.get(code=instructor_code)
-                    except Instructor.DoesNotExist:
-                        errors.append(f"Dòng {index + 2}: Không tìm thấy giảng viên với mã '{instructor_code}'")
-                        continue
-                    
-                    # Tìm giảng viên
-                    try:
-                        instructor_name = Instructor.objects.get(full_name=instructor_name)
-                    except Instructor.DoesNotExist:
-                        errors.append(f"Dòng {index + 2}: Không tìm thấy giảng viên với tên '{instructor_name}'")
-                        continue
-                        
-                    # Tìm môn học (CurriculumSubject)
-                    try:
-                        curriculum_subjects = Subject.objects.get(
-                            code=subject_code
-                        )
-                    except Subject.DoesNotExist:
-                        errors.append(f"Dòng {index + 2}: Không tìm thấy môn học với mã '{subject_code}'")
-                        continue
-                    except Subject.MultipleObjectsReturned:
-                        curriculum_subjects = Subject.objects.filter(
-                            code=subject_code
-                        )
-                        curriculum_subject = curriculum_subjects.first()
-                        errors.append(f"Dòng {index + 2}: Có nhiều môn học với mã '{subject_code}', sử dụng môn học đầu tiên")
-                        
-                    # Tìm lớp học
-                    class_obj = None
-                    combined_class = None
+                        instructor_code = row['instructor_code']
+                        instructor_name = row['instructor_name']
+                        subject_code = row['subject_code']
+                        class_code = row['class_code']
+                        class_type = row['class_type']
+                        academic_year = row['academic_year']
+                        semester = row['semester']
+                        
+                        if row['missing_required'] or (semester is None and not row['semester_error']):
+                            errors.append(f"Dòng {line}: Thiếu thông tin bắt buộc")
+                            continue
                         
-                    if class_type.lower() in ['thường', 'regular', 'thuong']:
+                        # Tìm giảng viên
                         try:
-                            class_obj = Class.objects.get(code=class_code)
-                        except Class.DoesNotExist:
-                            errors.append(f"Dòng {index + 2}: Không tìm thấy lớp thường với mã '{class_code}'")
+                            instructor = Instructor.objects.get(code=instructor_code)
+                        except Instructor.DoesNotExist:
+                            errors.append(f"Dòng {line}: Không tìm thấy giảng viên với mã '{instructor_code}'")
                             continue
-                    elif class_type.lower() in ['ghép', 'combined', 'ghep']:
+                    
+                        # Tìm giảng viên
                         try:
-                            combined_class = CombinedClass.objects.get(code=class_code)
-                        except CombinedClass.DoesNotExist:
-                            errors.append(f"Dòng {index + 2}: Không tìm thấy lớp ghép với mã '{class_code}'")
+                            instructor_name = Instructor.objects.get(full_name=instructor_name)
+                        except Instructor.DoesNotExist:
+                            errors.append(f"Dòng {line}: Không tìm thấy giảng viên với tên '{instructor_name}'")
                             continue
-                    else:
-                        errors.append(f"Dòng {index + 2}: Loại lớp không hợp lệ: {class_type}. Phải là 'Thường' hoặc 'Ghép'")
-                        continue
-                        
-                    # Xử lý học kỳ
-                    try:
-                        semester = int(semester)
-                    except ValueError:
-                        errors.append(f"Dòng {index + 2}: Học kỳ phải là số: {semester}")
-                        continue
-                        
-                    # Xử lý giảng viên chính
-                    is_main_instructor_str = str(row.get('Là giảng viên chính*', 'Có')).strip()
-                    is_main_instructor = is_main_instructor_str.lower() in ['có', 'yes', 'true', '1']
-                        
-                    # Xử lý số lượng sinh viên và giờ giảng dạy
-                    student_count = 0
-                    teaching_hours = 0
-                        
-                    try:
-                        student_count = int(row.get('Số lượng sinh viên', 0))
-                    except (ValueError, TypeError):
-                        pass
                         
-                    try:
-                        teaching_hours = int(row.get('Số giờ giảng dạy', 0))
-                    except (ValueError, TypeError):
-                        pass
+                        # Tìm môn học (CurriculumSubject)
+                        try:
+                            curriculum_subject = Subject.objects.get(
+                                code=subject_code
+                            )
+                        except Subject.DoesNotExist:
+                            errors.append(f"Dòng {line}: Không tìm thấy môn học với mã '{subject_code}'")
+                            continue
+                        except Subject.MultipleObjectsReturned:
+                            curriculum_subjects = Subject.objects.filter(
+                                code=subject_code
+                            )
+                            curriculum_subject = curriculum_subjects.first()
+                            errors.append(f"Dòng {line}: Có nhiều môn học với mã '{subject_code}', sử dụng môn học đầu tiên")
+                        
+                        # Tìm lớp học
+                        class_obj = None
+                        combined_class = None
+                        
+                        if class_type.lower() in ['thường', 'regular', 'thuong']:
+                            try:
+                                class_obj = Class.objects.get(code=class_code)
+                            except Class.DoesNotExist:
+                                errors.append(f"Dòng {line}: Không tìm thấy lớp thường với mã '{class_code}'")
+                                continue
+                        elif class_type.lower() in ['ghép', 'combined', 'ghep']:
+                            try:
+                                combined_class = CombinedClass.objects.get(code=class_code)
+                            except CombinedClass.DoesNotExist:
+                                errors.append(f"Dòng {line}: Không tìm thấy lớp ghép với mã '{class_code}'")
+                                continue
+                        else:
+                            errors.append(f"Dòng {line}: Loại lớp không hợp lệ: {class_type}. Phải là 'Thường' hoặc 'Ghép'")
+                            continue
                         
-                    # Tạo hoặc cập nhật phân công giảng dạy
-                    if class_obj:
-                        # Phân công cho lớp thường
-                        teaching_assignment, created = TeachingAssignment.objects.update_or_create(
-                            instructor=instructor,
-                            curriculum_subject=curriculum_subject,
-                            class_obj=class_obj,
-                            academic_year=academic_year,
-                            semester=semester,
-                            defaults={
-                                'is_main_instructor': is_main_instructor,
-                                'student_count': student_count,
-                                'teaching_hours': teaching_hours
-                            }
-                        )
-                    else:
-                        # Phân công cho lớp ghép
-                        teaching_assignment, created = TeachingAssignment.objects.update_or_create(
-                            instructor=instructor,
-                            curriculum_subject=curriculum_subject,
-                            combined_class=combined_class,
-                            academic_year=academic_year,
-                            semester=semester,
-                            defaults={
-                                'is_main_instructor': is_main_instructor,
-                                'student_count': student_count,
-                                'teaching_hours': teaching_hours
-                            }
-                        )
+                        # Xử lý học kỳ
+                        if row['semester_error']:
+                            errors.append(f"Dòng {line}: Học kỳ phải là số: {row['semester_error']}")
+                            continue
                         
-                    if created:
-                        created_count += 1
-                    else:
-                        updated_count += 1
+                        is_main_instructor = row['is_main_instructor']
+                        student_count = row['student_count']
+                        teaching_hours = row['teaching_hours']
+                        
+                        # Tạo hoặc cập nhật phân công giảng dạy
+                        if class_obj:
+                            # Phân công cho lớp thường
+                            teaching_assignment, created = TeachingAssignment.objects.update_or_create(
+                                instructor=instructor,
+                                curriculum_subject=curriculum_subject,
+                                class_obj=class_obj,
+                                academic_year=academic_year,
+                                semester=semester,
+                                defaults={
+                                    'is_main_instructor': is_main_instructor,
+                                    'student_count': student_count,
+                                    'teaching_hours': teaching_hours
+                                }
+                            )
+                        else:
+                            # Phân công cho lớp ghép
+                            teaching_assignment, created = TeachingAssignment.objects.update_or_create(
+                                instructor=instructor,
+                                curriculum_subject=curriculum_subject,
+                                combined_class=combined_class,
+                                academic_year=academic_year,
+                                semester=semester,
+                                defaults={
+                                    'is_main_instructor': is_main_instructor,
+                                    'student_count': student_count,
+                                    'teaching_hours': teaching_hours
+                                }
+                            )
                         
-                    processed_data.append({
-						'instructor_code': instructor.code,
-                        'instructor_name': instructor.full_name,
-                        'subject': curriculum_subject.name,
-                        'class_code': class_code,
-                        'academic_year': academic_year,
-                        'semester': semester
-                    })
+                        if created:
+                            created_count += 1
+                        else:
+                            updated_count += 1
+                        
+                        processed_data.append({
+                            'instructor_code': instructor.code,
+                            'instructor_name': instructor.full_name,
+                            'subject': curriculum_subject.name,
+                            'class_code': class_code,
+                            'academic_year': academic_year,
+                            'semester': semester
+                        })
                         
-                except Exception as e:
-                    errors.append(f"Dòng {index + 2}: {str(e)}")
-                
-            # Lưu lịch sử import
-            ImportHistory.objects.create(
-                file_name=excel_file.name,
-                file_size=excel_file.size,
-                imported_by=user,
-                record_count=len(processed_data),
-                status='success' if not errors else 'partial',
-                errors=errors if errors else None,
-                additional_info=f"Sheet được sử dụng: {sheet_name}"
-            )
+                    except Exception as e:
+                        errors.append(f"Dòng {line}: {str(e)}")
                 
             return {
                 'status': 'success',
@@ -3602,11 +3083,11 @@ def api_class_detail(request, id):
                 'combined_class_code': class_obj.combined_class_code,
                 'description': class_obj.description
             }
-            return JsonResponse({'status': 'success', 'data': class_data})
+            return FastJsonResponse({'status': 'success', 'data': class_data})
         except Class.DoesNotExist:
-            return JsonResponse({'status': 'error', 'message': 'Lớp học không tồn tại'})
+            return FastJsonResponse({'status': 'error', 'message': 'Lớp học không tồn tại'})
         except Exception as e:
-            return JsonResponse({'status': 'error', 'message': str(e)})
+            return FastJsonResponse({'status': 'error', 'message': str(e)})
 
 @csrf_exempt
 def api_update_class(request, id):
@@ -3625,12 +3106,12 @@ def api_update_class(request, id):
                 try:
                     class_obj.curriculum = Curriculum.objects.get(id=data['curriculum_id'])
                 except Curriculum.DoesNotExist:
-                    return JsonResponse({'status': 'error', 'message': 'Chương trình không tồn tại'})
+                    return FastJsonResponse({'status': 'error', 'message': 'Chương trình không tồn tại'})
             if 'course_id' in data:
                 try:
                     class_obj.course = Course.objects.get(id=data['course_id'])
                 except Course.DoesNotExist:
-                    return JsonResponse({'status': 'error', 'message': 'Khóa học không tồn tại'})
+                    return FastJsonResponse({'status': 'error', 'message': 'Khóa học không tồn tại'})
             if 'start_date' in data:
                 class_obj.start_date = data['start_date'] if data['start_date'] else None
             if 'end_date' in data:
@@ -3644,15 +3125,15 @@ def api_update_class(request, id):
             
             class_obj.save()
             
-            return JsonResponse({
+            return FastJsonResponse({
                 'status': 'success',
                 'message': 'Đã cập nhật lớp học thành công'
             })
             
         except Class.DoesNotExist:
-            return JsonResponse({'status': 'error', 'message': 'Lớp học không tồn tại'})
+            return FastJsonResponse({'status': 'error', 'message': 'Lớp học không tồn tại'})
         except Exception as e:
-            return JsonResponse({'status': 'error', 'message': str(e)})
+            return FastJsonResponse({'status': 'error', 'message': str(e)})
 
 @csrf_exempt
 def api_delete_class(request, id):
@@ -3663,15 +3144,15 @@ def api_delete_class(request, id):
             class_name = class_obj.name
             class_obj.delete()
             
-            return JsonResponse({
+            return FastJsonResponse({
                 'status': 'success',
                 'message': f'Đã xóa lớp học {class_name} thành công'
             })
             
         except Class.DoesNotExist:
-            return JsonResponse({'status': 'error', 'message': 'Lớp học không tồn tại'})
+            return FastJsonResponse({'status': 'error', 'message': 'Lớp học không tồn tại'})
         except Exception as e:
-            return JsonResponse({'status': 'error', 'message': str(e)})
+            return FastJsonResponse({'status': 'error', 'message': str(e)})
 
 @csrf_exempt
 def api_combined_class_detail(request, id):
@@ -3687,11 +3168,11 @@ def api_combined_class_detail(request, id):
                 'description': combined_class.description,
                 'classes': [{'id': c.id, 'code': c.code, 'name': c.name} for c in combined_class.classes.all()]
             }
-            return JsonResponse({'status': 'success', 'data': class_data})
+            return FastJsonResponse({'status': 'success', 'data': class_data})
         except CombinedClass.DoesNotExist:
-            return JsonResponse({'status': 'error', 'message': 'Lớp học ghép không tồn tại'})
+            return FastJsonResponse({'status': 'error', 'message': 'Lớp học ghép không tồn tại'})
         except Exception as e:
-            return JsonResponse({'status': 'error', 'message': str(e)})
+            return FastJsonResponse({'status': 'error', 'message': str(e)})
 
 @csrf_exempt
 def api_update_combined_class(request, id):
@@ -3710,7 +3191,7 @@ def api_update_combined_class(request, id):
                 try:
                     combined_class.subject = Subject.objects.get(id=data['subject_id'])
                 except Subject.DoesNotExist:
-                    return JsonResponse({'status': 'error', 'message': 'Môn học không tồn tại'})
+                    return FastJsonResponse({'status': 'error', 'message': 'Môn học không tồn tại'})
             if 'description' in data:
                 combined_class.description = data['description'] if data['description'] else None
             
@@ -3721,15 +3202,15 @@ def api_update_combined_class(request, id):
                 classes = Class.objects.filter(id__in=data['classes'])
                 combined_class.classes.set(classes)
             
-            return JsonResponse({
+            return FastJsonResponse({
                 'status': 'success',
                 'message': 'Đã cập nhật lớp học ghép thành công'
             })
             
         except CombinedClass.DoesNotExist:
-            return JsonResponse({'status': 'error', 'message': 'Lớp học ghép không tồn tại'})
+            return FastJsonResponse({'status': 'error', 'message': 'Lớp học ghép không tồn tại'})
         except Exception as e:
-            return JsonResponse({'status': 'error', 'message': str(e)})
+            return FastJsonResponse({'status': 'error', 'message': str(e)})
 
 @csrf_exempt
 def api_delete_combined_class(request, id):
@@ -3740,15 +3221,15 @@ def api_delete_combined_class(request, id):
             class_name = combined_class.name
             combined_class.delete()
             
-            return JsonResponse({
+            return FastJsonResponse({
                 'status': 'success',
                 'message': f'Đã xóa lớp học ghép {class_name} thành công'
             })
             
         except CombinedClass.DoesNotExist:
-            return JsonResponse({'status': 'error', 'message': 'Lớp học ghép không tồn tại'})
+            return FastJsonResponse({'status': 'error', 'message': 'Lớp học ghép không tồn tại'})
         except Exception as e:
-            return JsonResponse({'status': 'error', 'message': str(e)})
+            return FastJsonResponse({'status': 'error', 'message': str(e)})
 
 @csrf_exempt
 def api_instructor_detail(request, id):
@@ -3767,11 +3248,11 @@ def api_instructor_detail(request, id):
                 'subject_group_id': instructor.subject_group.id if instructor.subject_group else None,
                 'is_active': instructor.is_active
             }
-            return JsonResponse({'status': 'success', 'data': instructor_data})
+            return FastJsonResponse({'status': 'success', 'data': instructor_data})
         except Instructor.DoesNotExist:
-            return JsonResponse({'status': 'error', 'message': 'Giảng viên không tồn tại'})
+            return FastJsonResponse({'status': 'error', 'message': 'Giảng viên không tồn tại'})
         except Exception as e:
-            return JsonResponse({'status': 'error', 'message': str(e)})
+            return FastJsonResponse({'status': 'error', 'message': str(e)})
 
 @csrf_exempt
 def api_update_instructor(request, id):
@@ -3794,31 +3275,31 @@ def api_update_instructor(request, id):
                 try:
                     instructor.department = Department.objects.get(id=data['department_id'])
                 except Department.DoesNotExist:
-                    return JsonResponse({'status': 'error', 'message': 'Khoa không tồn tại'})
+                    return FastJsonResponse({'status': 'error', 'message': 'Khoa không tồn tại'})
             if 'department_teacher_id' in data:
                 try:
                     instructor.department_of_teacher_management = Department.objects.get(id=data['department_teacher_id'])
                 except Department.DoesNotExist:
-                    return JsonResponse({'status': 'error', 'message': 'Đơn vị không tồn tại'})
+                    return FastJsonResponse({'status': 'error', 'message': 'Đơn vị không tồn tại'})
             if 'subject_group_id' in data:
                 try:
                     instructor.subject_group = SubjectGroup.objects.get(id=data['subject_group_id'])
                 except SubjectGroup.DoesNotExist:
-                    return JsonResponse({'status': 'error', 'message': 'Bộ môn không tồn tại'})
+                    return FastJsonResponse({'status': 'error', 'message': 'Bộ môn không tồn tại'})
             if 'is_active' in data:
                 instructor.is_active = data['is_active']
             
             instructor.save()
             
-            return JsonResponse({
+            return FastJsonResponse({
                 'status': 'success',
                 'message': 'Đã cập nhật giảng viên thành công'
             })
             
         except Instructor.DoesNotExist:
-            return JsonResponse({'status': 'error', 'message': 'Giảng viên không tồn tại'})
+            return FastJsonResponse({'status': 'error', 'message': 'Giảng viên không tồn tại'})
         except Exception as e:
-            return JsonResponse({'status': 'error', 'message': str(e)})
+            return FastJsonResponse({'status': 'error', 'message': str(e)})
 
 @csrf_exempt
 def api_delete_instructor(request, id):
@@ -3829,15 +3310,15 @@ def api_delete_instructor(request, id):
             instructor_name = instructor.full_name
             instructor.delete()
             
-            return JsonResponse({
+            return FastJsonResponse({
                 'status': 'success',
                 'message': f'Đã xóa giảng viên {instructor_name} thành công'
             })
             
         except Instructor.DoesNotExist:
-            return JsonResponse({'status': 'error', 'message': 'Giảng viên không tồn tại'})
+            return FastJsonResponse({'status': 'error', 'message': 'Giảng viên không tồn tại'})
         except Exception as e:
-            return JsonResponse({'status': 'error', 'message': str(e)})
+            return FastJsonResponse({'status': 'error', 'message': str(e)})
 
 @csrf_exempt
 def api_teaching_assignment_detail(request, id):
@@ -3862,11 +3343,11 @@ def api_teaching_assignment_detail(request, id):
                 'student_count': assignment.student_count,
                 'teaching_hours': assignment.teaching_hours
             }
-            return JsonResponse({'status': 'success', 'data': assignment_data})
+            return FastJsonResponse({'status': 'success', 'data': assignment_data})
         except TeachingAssignment.DoesNotExist:
-            return JsonResponse({'status': 'error', 'message': 'Phân công giảng dạy không tồn tại'})
+            return FastJsonResponse({'status': 'error', 'message': 'Phân công giảng dạy không tồn tại'})
         except Exception as e:
-            return JsonResponse({'status': 'error', 'message': str(e)})
+            return FastJsonResponse({'status': 'error', 'message': str(e)})
 
 @csrf_exempt
 def api_update_teaching_assignment(request, id):
@@ -3881,22 +3362,22 @@ def api_update_teaching_assignment(request, id):
                 try:
                     assignment.instructor = Instructor.objects.get(id=data['instructor_id'])
                 except Instructor.DoesNotExist:
-                    return JsonResponse({'status': 'error', 'message': 'Giảng viên không tồn tại'})
+                    return FastJsonResponse({'status': 'error', 'message': 'Giảng viên không tồn tại'})
             if 'curriculum_subject_id' in data:
                 try:
                     assignment.curriculum_subject = Subject.objects.get(id=data['curriculum_subject_id'])
                 except Subject.DoesNotExist:
-                    return JsonResponse({'status': 'error', 'message': 'Môn học không tồn tại'})
+                    return FastJsonResponse({'status': 'error', 'message': 'Môn học không tồn tại'})
             if 'class_obj_id' in data:
                 try:
                     assignment.class_obj = Class.objects.get(id=data['class_obj_id'])
                 except Class.DoesNotExist:
-                    return JsonResponse({'status': 'error', 'message': 'Lớp học không tồn tại'})
+                    return FastJsonResponse({'status': 'error', 'message': 'Lớp học không tồn tại'})
             if 'combined_class_id' in data:
                 try:
                     assignment.combined_class = CombinedClass.objects.get(id=data['combined_class_id'])
                 except CombinedClass.DoesNotExist:
-                    return JsonResponse({'status': 'error', 'message': 'Lớp ghép không tồn tại'})
+                    return FastJsonResponse({'status': 'error', 'message': 'Lớp ghép không tồn tại'})
             if 'academic_year' in data:
                 assignment.academic_year = data['academic_year']
             if 'semester' in data:
@@ -3910,15 +3391,15 @@ def api_update_teaching_assignment(request, id):
             
             assignment.save()
             
-            return JsonResponse({
+            return FastJsonResponse({
                 'status': 'success',
                 'message': 'Đã cập nhật phân công giảng dạy thành công'
             })
             
         except TeachingAssignment.DoesNotExist:
-            return JsonResponse({'status': 'error', 'message': 'Phân công giảng dạy không tồn tại'})
+            return FastJsonResponse({'status': 'error', 'message': 'Phân công giảng dạy không tồn tại'})
         except Exception as e:
-            return JsonResponse({'status': 'error', 'message': str(e)})
+            return FastJsonResponse({'status': 'error', 'message': str(e)})
 
 @csrf_exempt
 def api_delete_teaching_assignment(request, id):
@@ -3928,12 +3409,12 @@ def api_delete_teaching_assignment(request, id):
             assignment = TeachingAssignment.objects.get(id=id)
             assignment.delete()
             
-            return JsonResponse({
+            return FastJsonResponse({
                 'status': 'success',
                 'message': 'Đã xóa phân công giảng dạy thành công'
             })
             
         except TeachingAssignment.DoesNotExist:
-            return JsonResponse({'status': 'error', 'message': 'Phân công giảng dạy không tồn tại'})
+            return FastJsonResponse({'status': 'error', 'message': 'Phân công giảng dạy không tồn tại'})
         except Exception as e:
-            return JsonResponse({'status': 'error', 'message': str(e)})
+            return FastJsonResponse({'status': 'error', 'message': str(e)})
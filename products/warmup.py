@@ -0,0 +1,146 @@
+# warmup.py
+"""Làm nóng worker trước khi nhận request.
+
+Sau khi khởi động lạnh (Railway/Render), request đầu tiên của mỗi worker phải
+trả chi phí mở kết nối database, import views (pandas, openpyxl, ...), biên
+dịch các template lớn và dựng lại cache danh mục. warm_up() làm trước các việc
+đó. gunicorn.conf.py gọi nó trong post_worker_init - sau khi worker nạp ứng
+dụng, trước khi worker nhận kết nối - nên gunicorn chỉ chuyển request tới
+worker đã nóng. Khi chạy bằng server khác, /ready/ tự khởi động warm-up trong
+thread nền và trả 503 cho tới khi xong.
+
+Template được biên dịch bằng get_template(): loader mặc định của Django (không
+khai báo 'loaders') là cached loader, giữ Template đã biên dịch trong process.
+"""
+import logging
+import threading
+import time
+
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+# Các trang render phía server (template vài trăm KB)
+WARMUP_TEMPLATES = (
+    'products/TrainProgram.html',
+    'products/teaching_management.html',
+    'products/home.html',
+)
+
+_lock = threading.Lock()
+_state = {
+    'ready': False,
+    'running': False,
+    'duration_ms': None,
+    'steps': {},
+    'errors': {},
+}
+
+
+def check_database():
+    """Mở và kiểm tra kết nối của mọi database (kết nối được giữ lại theo CONN_MAX_AGE)"""
+    for alias in connections:
+        connection = connections[alias]
+        connection.ensure_connection()
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+            cursor.fetchone()
+
+
+def load_url_modules():
+    """Import URLconf, kéo theo views và các thư viện nặng (pandas, openpyxl, ...)"""
+    from django.urls import get_resolver
+    get_resolver().url_patterns
+
+
+def compile_templates():
+    from django.template.loader import get_template
+    for template_name in WARMUP_TEMPLATES:
+        get_template(template_name)
+
+
+def fail_stale_import_jobs():
+    """Job import mồ côi của worker trước khi restart (products/jobs.py)"""
+    from .jobs import fail_stale_jobs
+    fail_stale_jobs()
+
+
+def prime_caches():
+    """Phiên bản model và gói danh mục dùng cho dropdown / trang quản lý"""
+    from .reference_data import get_reference_bundle
+    get_reference_bundle()
+
+
+# Bước lỗi ở đây làm worker không sẵn sàng; các bước còn lại chỉ được ghi log
+REQUIRED_STEPS = (
+    ('database', check_database),
+)
+OPTIONAL_STEPS = (
+    ('url_modules', load_url_modules),
+    ('templates', compile_templates),
+    ('caches', prime_caches),
+    ('stale_import_jobs', fail_stale_import_jobs),
+)
+
+
+def warm_up():
+    """Chạy các bước làm nóng một lần cho process; trả về True nếu worker sẵn sàng"""
+    with _lock:
+        if _state['ready']:
+            return True
+        _state['running'] = True
+        started = time.perf_counter()
+        steps, errors = {}, {}
+        for name, step in REQUIRED_STEPS + OPTIONAL_STEPS:
+            step_started = time.perf_counter()
+            try:
+                step()
+            except Exception as e:
+                errors[name] = str(e)
+                logger.exception('Warm-up step %s failed', name)
+                if (name, step) in REQUIRED_STEPS:
+                    break
+            finally:
+                steps[name] = round((time.perf_counter() - step_started) * 1000, 1)
+        _state.update(
+            ready=not any(name in errors for name, _ in REQUIRED_STEPS),
+            running=False,
+            duration_ms=round((time.perf_counter() - started) * 1000, 1),
+            steps=steps,
+            errors=errors,
+        )
+        logger.info('Warm-up finished in %s ms (ready=%s): %s', _state['duration_ms'], _state['ready'], steps)
+        return _state['ready']
+
+
+def warm_up_in_background():
+    """Khởi động warm_up() trong thread nền nếu chưa sẵn sàng và chưa chạy"""
+    with _lock:
+        if _state['ready'] or _state['running']:
+            return
+        _state['running'] = True
+    threading.Thread(target=_run_in_background, name='warmup', daemon=True).start()
+
+
+def _run_in_background():
+    try:
+        warm_up()
+    finally:
+        # Kết nối mở trong thread nền không được dùng lại bởi thread xử lý request
+        connections.close_all()
+        _state['running'] = False
+
+
+def is_ready():
+    return _state['ready']
+
+
+def readiness():
+    """Trạng thái làm nóng của process hiện tại (cho /ready/)"""
+    return {
+        'ready': _state['ready'],
+        'warming': _state['running'],
+        'duration_ms': _state['duration_ms'],
+        'steps': dict(_state['steps']),
+        'errors': dict(_state['errors']),
+    }